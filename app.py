@@ -1,13 +1,37 @@
 from flask import Flask, render_template, request, jsonify
 import openai
 import mysql.connector
-import json
+import time
 import os
 from datetime import datetime
 import uuid
 from config import Config
+from fallback_generator import create_fallback_flashcards
+from generation_cache import cache_key, generation_cache
+from db_pool import db_connection, db_pool, init_app as init_db_pool
+from migrations import migrate
+from session_cache import session_cache
+from metrics import init_app as init_metrics, openai_call
+from request_log import init_app as init_request_log, log
+from auth import auth_manager, login_required
+from password_hasher import password_hasher
+from rate_limiter import auth_limiter
+from session_purger import session_purger
+from generation_jobs import JobQueue, JobQueueFull
+from note_chunker import generate_chunked
+from near_duplicates import (LSHIndex, band_hashes, check_batch, find_duplicate_groups, minhash,
+                             pack_signature, unpack_signature)
+from flashcard_stream import (flashcard_messages, iter_generation_events, openai_configured, parse_flashcard_json,
+                              sse_response)
+from pagination import page_response, parse_page_args
+from search_index import parse_search_args
+from review_scheduler import due_response, parse_review_answer, parse_review_args, review_fields, schedule
+from export_stream import EXPORT_FORMATS, export_response, prime_rows
+from queries import DUE_REVIEWS, REVIEW_COLUMNS, STUDY_SESSION_CARDS, flashcards_page_sql, lsh_candidates_sql
 
 app = Flask(__name__)
+init_metrics(app)
+init_request_log(app)
 
 # Configuration
 app.config['SECRET_KEY'] = Config.SECRET_KEY
@@ -15,6 +39,7 @@ OPENAI_API_KEY = Config.OPENAI_API_KEY
 
 # Database configuration
 DB_CONFIG = Config.DB_CONFIG
+init_db_pool(app)
 
 # Initialize OpenAI client
 openai.api_key = OPENAI_API_KEY
@@ -33,149 +58,184 @@ def create_database():
         cursor.execute("CREATE DATABASE IF NOT EXISTS flashcards_db")
         cursor.execute("USE flashcards_db")
         
-        # Create flashcards table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS flashcards (
-                id VARCHAR(36) PRIMARY KEY,
-                user_id VARCHAR(36),
-                question TEXT NOT NULL,
-                answer TEXT NOT NULL,
-                subject VARCHAR(100),
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Create study_sessions table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS study_sessions (
-                id VARCHAR(36) PRIMARY KEY,
-                user_id VARCHAR(36),
-                session_name VARCHAR(200),
-                flashcard_ids JSON,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
+        # Tables and indexes come from the versioned migrations
+        migrate(conn)
         
         conn.commit()
         cursor.close()
         conn.close()
-        print("Database and tables created successfully!")
+        log('database_ready')
+        return True
         
     except mysql.connector.Error as e:
-        print(f"Database setup error: {e}")
-        print("⚠️  MySQL connection failed. The app will run in demo mode.")
-        print("🔧 To fix this:")
-        print("   1. Make sure MySQL server is running")
-        print("   2. Update database credentials in config.py or set environment variables")
-        print("   3. Or run 'python demo.py' for a version without database")
+        log('db_error', 'error', operation='create_database', error=str(e), fallback='demo mode')
         return False
     except Exception as e:
-        print(f"Unexpected database error: {e}")
+        log('unexpected_error', 'error', operation='create_database', error=str(e))
         return False
 
 def generate_flashcards(notes, num_cards=5):
-    """Generate flashcards using OpenAI API"""
+    """Generate flashcards using OpenAI API, one concurrent request per chunk of long notes"""
     # Check if we have a valid API key
-    if Config.OPENAI_API_KEY == 'demo-mode-no-api-key' or Config.OPENAI_API_KEY == 'your-openai-api-key-here':
-        print("⚠️  OpenAI API key not configured - using fallback flashcard generation")
+    if not openai_configured():
+        log('openai_not_configured', 'warning', fallback=True)
         return create_fallback_flashcards(notes, num_cards)
     
+    return generate_chunked(notes, num_cards, generate_chunk_flashcards)
+
+def generate_chunk_flashcards(notes, num_cards):
+    """Generate flashcards for one prompt-sized piece of notes using OpenAI API"""
+    key = cache_key(notes, num_cards)
+    cached = generation_cache.get(key)
+    if cached is not None:
+        return cached
+
     try:
-        prompt = f"""
-        Create {num_cards} educational flashcards from the following study notes. 
-        For each flashcard, provide a clear question and a comprehensive answer.
-        Format the response as a JSON array with 'question' and 'answer' fields.
-        
-        Study Notes:
-        {notes}
-        
-        Generate {num_cards} flashcards that cover the key concepts and important details.
-        """
-        
+        started = time.perf_counter()
         # Use the newer OpenAI API format
-        response = openai.chat.completions.create(
-            model=Config.OPENAI_MODEL,
-            messages=[
-                {"role": "system", "content": "You are an educational assistant that creates effective flashcards from study materials."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=Config.OPENAI_MAX_TOKENS,
-            temperature=Config.OPENAI_TEMPERATURE
-        )
+        with openai_call() as call:
+            response = openai.chat.completions.create(
+                model=Config.OPENAI_MODEL,
+                messages=flashcard_messages(notes, num_cards),
+                max_tokens=Config.OPENAI_MAX_TOKENS,
+                temperature=Config.OPENAI_TEMPERATURE
+            )
+            call['usage'] = response.usage
         
-        # Parse the response
-        content = response.choices[0].message.content
-        # Try to extract JSON from the response
-        try:
-            # Look for JSON array in the response
-            start_idx = content.find('[')
-            end_idx = content.rfind(']') + 1
-            if start_idx != -1 and end_idx != -1:
-                json_str = content[start_idx:end_idx]
-                flashcards = json.loads(json_str)
-                return flashcards
-            else:
-                # Fallback: create simple flashcards
-                return create_fallback_flashcards(notes, num_cards)
-        except json.JSONDecodeError:
+        # Parse the JSON array out of the response
+        flashcards = parse_flashcard_json(response.choices[0].message.content)
+        if flashcards is None:
+            # Fallback: create simple flashcards
             return create_fallback_flashcards(notes, num_cards)
-            
+        generation_cache.put(key, flashcards, time.perf_counter() - started)
+        return flashcards
+
     except Exception as e:
-        print(f"OpenAI API error: {e}")
-        print("⚠️  Falling back to simple flashcard generation")
+        log('openai_error', 'error', error=str(e), fallback=True)
         return create_fallback_flashcards(notes, num_cards)
 
-def create_fallback_flashcards(notes, num_cards):
-    """Create simple flashcards when AI fails"""
-    sentences = notes.split('.')
-    flashcards = []
-    
-    for i in range(min(num_cards, len(sentences))):
-        if sentences[i].strip():
-            question = f"What is the key point about: {sentences[i][:50]}..."
-            answer = sentences[i].strip()
-            flashcards.append({
-                "question": question,
-                "answer": answer
-            })
-    
-    return flashcards
+def insert_flashcard_rows(cursor, rows):
+    """Insert (id, user_id, question, answer, subject, minhash) rows in bounded multi-row batches"""
+    chunk_size = Config.DB_BULK_INSERT_CHUNK
+    for start in range(0, len(rows), chunk_size):
+        # executemany rewrites a plain INSERT ... VALUES into one multi-row INSERT
+        cursor.executemany("""
+            INSERT INTO flashcards (id, user_id, question, answer, subject, minhash)
+            VALUES (%s, %s, %s, %s, %s, %s)
+        """, rows[start:start + chunk_size])
+
+def insert_lsh_bucket_rows(cursor, user_id, signed_cards):
+    """Index (card_id, signature) pairs in flashcard_lsh_buckets"""
+    rows = [(user_id, band_hash, card_id) for card_id, signature in signed_cards
+            for band_hash in band_hashes(signature)]
+    chunk_size = Config.DB_BULK_INSERT_CHUNK
+    for start in range(0, len(rows), chunk_size):
+        cursor.executemany("""
+            INSERT IGNORE INTO flashcard_lsh_buckets (user_id, band_hash, flashcard_id)
+            VALUES (%s, %s, %s)
+        """, rows[start:start + chunk_size])
+
+def insert_review_rows(cursor, user_id, card_ids):
+    """Queue new cards for review, due straight away"""
+    now = datetime.now()
+    rows = [(card_id, user_id, now) for card_id in card_ids]
+    chunk_size = Config.DB_BULK_INSERT_CHUNK
+    for start in range(0, len(rows), chunk_size):
+        cursor.executemany("""
+            INSERT INTO flashcard_reviews (flashcard_id, user_id, due_at)
+            VALUES (%s, %s, %s)
+        """, rows[start:start + chunk_size])
+
+def load_near_duplicate_candidates(cursor, user_id, signatures):
+    """LSH index of the user's cards that share a bucket with any of the signatures"""
+    index = LSHIndex()
+    bucket_keys = sorted({band_hash for signature in signatures for band_hash in band_hashes(signature)})
+    chunk_size = Config.DB_BULK_INSERT_CHUNK
+    for start in range(0, len(bucket_keys), chunk_size):
+        chunk = bucket_keys[start:start + chunk_size]
+        cursor.execute(lsh_candidates_sql(len(chunk)), [user_id] + chunk)
+        for card_id, packed in cursor.fetchall():
+            if card_id not in index:
+                index.add(card_id, unpack_signature(packed))
+    return index
 
 def save_flashcards_to_db(flashcards, subject="General", user_id=None):
-    """Save flashcards to database"""
+    """
+    Save flashcards to database in a single transaction. Cards that nearly
+    duplicate one already in the user's deck are not stored again; their
+    position in the returned ids holds the existing card's id instead.
+    """
+    # IDs are generated client-side so no round-trip is needed to learn them
+    cards = [(str(uuid.uuid4()), card) for card in flashcards]
+    dedupe = bool(user_id) and Config.DEDUPE_MODE != 'off'
+    
     try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        cursor = conn.cursor()
-        
-        saved_ids = []
-        for card in flashcards:
-            card_id = str(uuid.uuid4())
-            if user_id:
-                cursor.execute("""
-                    INSERT INTO flashcards (id, user_id, question, answer, subject)
-                    VALUES (%s, %s, %s, %s, %s)
-                """, (card_id, user_id, card['question'], card['answer'], subject))
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            if dedupe:
+                signatures = [minhash(card) for _, card in cards]
+                deck = load_near_duplicate_candidates(cursor, user_id, signatures)
+                checked = check_batch(cards, deck)
+                duplicates = sum(1 for _, _, duplicate_of in checked if duplicate_of)
+                if duplicates:
+                    log('near_duplicates', mode=Config.DEDUPE_MODE, duplicates=duplicates, cards=len(cards))
+                if Config.DEDUPE_MODE == 'dry_run':
+                    checked = [(card_id, signature, None) for card_id, signature, _ in checked]
             else:
-                cursor.execute("""
-                    INSERT INTO flashcards (id, question, answer, subject)
-                    VALUES (%s, %s, %s, %s)
-                """, (card_id, card['question'], card['answer'], subject))
-            saved_ids.append(card_id)
-        
-        conn.commit()
-        cursor.close()
-        conn.close()
-        return saved_ids
+                checked = [(card_id, None, None) for card_id, _ in cards]
+            
+            rows = [
+                (card_id, user_id, card['question'], card['answer'], subject,
+                 pack_signature(signature) if signature else None)
+                for (card_id, card), (_, signature, duplicate_of) in zip(cards, checked)
+                if duplicate_of is None
+            ]
+            insert_flashcard_rows(cursor, rows)
+            if dedupe:
+                insert_lsh_bucket_rows(cursor, user_id, [
+                    (card_id, signature) for card_id, signature, duplicate_of in checked if duplicate_of is None
+                ])
+            if user_id:
+                insert_review_rows(cursor, user_id, [row[0] for row in rows])
+            conn.commit()
+            cursor.close()
+        return [duplicate_of or card_id for card_id, _, duplicate_of in checked]
         
     except mysql.connector.Error as e:
-        print(f"Database save error: {e}")
-        print("⚠️  Saving to database failed - using temporary IDs")
+        log('db_error', 'error', operation='save_flashcards', error=str(e), fallback='temporary ids')
         # Return temporary IDs for demo mode
         return [f"temp-{i}" for i in range(len(flashcards))]
     except Exception as e:
-        print(f"Unexpected database error: {e}")
+        log('unexpected_error', 'error', operation='save_flashcards', error=str(e))
         return []
 
+def run_generation_job(payload, user_id=None):
+    """Generate flashcards from a /generate or /jobs payload and save them"""
+    flashcards = generate_flashcards(payload['notes'], payload['num_cards'])
+    card_ids = save_flashcards_to_db(flashcards, payload['subject'], user_id)
+    return {
+        'flashcards': flashcards,
+        'card_ids': card_ids,
+        'message': f'Successfully generated {len(flashcards)} flashcards!'
+    }
+
+generation_jobs = JobQueue('app', run_generation_job)
+
+@app.before_request
+def start_background_threads():
+    """
+    Run the expired-session purge and the generation job reaper in every
+    worker, so jobs orphaned by a recycled worker are reclaimed even if this
+    one never receives a /jobs request
+    """
+    session_purger.start()
+    generation_jobs.start()
+
+def optional_user():
+    """User info for the request's session token, or None if not signed in"""
+    session_token = request.headers.get('Authorization', '').replace('Bearer ', '')
+    return auth_manager.verify_session(session_token) if session_token else None
+
 @app.route('/')
 def index():
     """Main page"""
@@ -193,43 +253,300 @@ def generate():
         if not notes.strip():
             return jsonify({'error': 'Please provide study notes'}), 400
         
-        # Generate flashcards
-        flashcards = generate_flashcards(notes, num_cards)
+        # Generate flashcards and save them with user context if available
+        user = optional_user()
+        user_id = user['user_id'] if user else None
+        payload = {'notes': notes, 'subject': subject, 'num_cards': num_cards}
+        return jsonify(run_generation_job(payload, user_id))
         
-        # Save to database with user context if available
-        user_id = getattr(request, 'user', {}).get('user_id') if hasattr(request, 'user') else None
-        card_ids = save_flashcards_to_db(flashcards, subject, user_id)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/generate/stream', methods=['POST'])
+def generate_stream():
+    """Generate flashcards, sending each one as a Server-Sent Event as soon as it is ready"""
+    data = request.get_json(silent=True) or {}
+    notes = data.get('notes', '')
+    subject = data.get('subject', 'General')
+    num_cards = data.get('num_cards', 5)
+    
+    if not notes.strip():
+        return jsonify({'error': 'Please provide study notes'}), 400
+    
+    user = optional_user()
+    user_id = user['user_id'] if user else None
+    events = iter_generation_events(
+        notes, num_cards, create_fallback_flashcards,
+        lambda cards: save_flashcards_to_db(cards, subject, user_id),
+        generate_chunk=generate_chunk_flashcards
+    )
+    return sse_response(events)
+
+@app.route('/jobs', methods=['POST'])
+def submit_generation_job():
+    """Queue flashcard generation and return a job id to poll"""
+    try:
+        data = request.get_json()
+        notes = data.get('notes', '')
+        subject = data.get('subject', 'General')
+        num_cards = data.get('num_cards', 5)
         
-        return jsonify({
-            'flashcards': flashcards,
-            'card_ids': card_ids,
-            'message': f'Successfully generated {len(flashcards)} flashcards!'
+        if not notes.strip():
+            return jsonify({'error': 'Please provide study notes'}), 400
+        
+        user = optional_user()
+        payload = {'notes': notes, 'subject': subject, 'num_cards': num_cards}
+        job_id = generation_jobs.submit(payload, user['user_id'] if user else None)
+        
+        response = jsonify({
+            'job_id': job_id,
+            'status': 'queued',
+            'poll_after': Config.GENERATION_JOB_POLL_INTERVAL
         })
+        response.headers['Location'] = f'/jobs/{job_id}'
+        return response, 202
         
+    except JobQueueFull as e:
+        response = jsonify({'error': f'Too many generations in progress, please retry ({e})'})
+        response.headers['Retry-After'] = '5'
+        return response, 503
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/jobs/<job_id>')
+def get_generation_job(job_id):
+    """Status of a generation job, with its flashcards once done"""
+    job = generation_jobs.get(job_id)
+    if job and job['user_id']:
+        user = optional_user()
+        if not user or user['user_id'] != job['user_id']:
+            job = None
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    body = {'job_id': job['id'], 'status': job['status']}
+    if job['status'] == 'done':
+        body.update(job['result'])
+    elif job['status'] == 'failed':
+        body['error'] = job['error']
+    else:
+        body['poll_after'] = Config.GENERATION_JOB_POLL_INTERVAL
+    return jsonify(body)
+
 @app.route('/flashcards')
+@login_required
 def get_flashcards():
-    """Get all flashcards from database"""
+    """Get a page of the user's flashcards, newest first"""
     try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        cursor = conn.cursor(dictionary=True)
-        
-        cursor.execute("SELECT * FROM flashcards ORDER BY created_at DESC")
-        flashcards = cursor.fetchall()
+        limit, after, subject = parse_page_args(request.args)
+        if after:
+            after = (datetime.fromisoformat(after[0]), after[1])
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        query = flashcards_page_sql(subject=bool(subject), after=bool(after))
+        params = [request.user['user_id']]
+        if subject:
+            params.append(subject)
+        if after:
+            params.extend([after[0], after[0], after[1]])
+        params.append(limit + 1)
         
-        cursor.close()
-        conn.close()
+        with db_connection() as conn:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(query, params)
+            flashcards = cursor.fetchall()
+            cursor.close()
         
-        return jsonify({'flashcards': flashcards})
+        return jsonify(page_response(flashcards, limit))
         
     except mysql.connector.Error as e:
-        print(f"Database read error: {e}")
+        log('db_error', 'error', operation='list_flashcards', error=str(e))
         return jsonify({'flashcards': [], 'message': 'Database unavailable - no saved flashcards'})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/flashcards/search')
+@login_required
+def search_flashcards():
+    """Search the user's flashcards by question and answer text, best match first"""
+    try:
+        query, limit, subject = parse_search_args(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        # The FULLTEXT index finds matches; user_id narrows them to the caller's deck
+        sql = """
+            SELECT id, user_id, question, answer, subject, created_at,
+                   MATCH(question, answer) AGAINST (%s IN NATURAL LANGUAGE MODE) AS score
+            FROM flashcards
+            WHERE user_id = %s AND MATCH(question, answer) AGAINST (%s IN NATURAL LANGUAGE MODE)
+        """
+        params = [query, request.user['user_id'], query]
+        if subject:
+            sql += " AND subject = %s"
+            params.append(subject)
+        sql += " ORDER BY score DESC LIMIT %s"
+        params.append(limit)
+        
+        with db_connection() as conn:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(sql, params)
+            flashcards = cursor.fetchall()
+            cursor.close()
+        
+        for card in flashcards:
+            card['score'] = round(float(card['score']), 4)
+        return jsonify({'flashcards': flashcards, 'query': query, 'count': len(flashcards)})
+        
+    except mysql.connector.Error as e:
+        log('db_error', 'error', operation='search_flashcards', error=str(e))
+        return jsonify({'flashcards': [], 'query': query, 'count': 0, 'message': 'Database unavailable - search is offline'})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/flashcards/dedupe', methods=['POST'])
+@login_required
+def dedupe_flashcards():
+    """Find near-duplicate cards in the user's deck and delete them unless dry_run"""
+    data = request.get_json(silent=True) or {}
+    dry_run = data.get('dry_run', True) is not False
+    user_id = request.user['user_id']
+    
+    try:
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            # Oldest first, so the original of each group is the card kept
+            cursor.execute("""
+                SELECT id, question, answer, minhash
+                FROM flashcards
+                WHERE user_id = %s
+                ORDER BY created_at, id
+            """, (user_id,))
+            signed = []
+            unsigned = []
+            for card_id, question, answer, packed in cursor.fetchall():
+                if packed is None:
+                    signature = minhash({'question': question, 'answer': answer})
+                    unsigned.append((card_id, signature))
+                else:
+                    signature = unpack_signature(packed)
+                signed.append((card_id, signature))
+            
+            groups = find_duplicate_groups(signed)
+            duplicate_ids = [card_id for ids in groups.values() for card_id in ids]
+            
+            if not dry_run:
+                # Cards saved before near-duplicate detection get their signatures now
+                doomed = set(duplicate_ids)
+                unsigned = [(card_id, signature) for card_id, signature in unsigned if card_id not in doomed]
+                cursor.executemany(
+                    "UPDATE flashcards SET minhash = %s WHERE id = %s",
+                    [(pack_signature(signature), card_id) for card_id, signature in unsigned]
+                )
+                insert_lsh_bucket_rows(cursor, user_id, unsigned)
+                
+                chunk_size = Config.DB_BULK_INSERT_CHUNK
+                for start in range(0, len(duplicate_ids), chunk_size):
+                    chunk = duplicate_ids[start:start + chunk_size]
+                    placeholders = ', '.join(['%s'] * len(chunk))
+                    cursor.execute(f"DELETE FROM flashcard_lsh_buckets WHERE flashcard_id IN ({placeholders})", chunk)
+                    cursor.execute(
+                        f"DELETE FROM flashcards WHERE user_id = %s AND id IN ({placeholders})", [user_id] + chunk
+                    )
+                conn.commit()
+            cursor.close()
+        
+        return jsonify({
+            'dry_run': dry_run,
+            'cards_checked': len(signed),
+            'duplicates_found': len(duplicate_ids),
+            'duplicates_removed': 0 if dry_run else len(duplicate_ids),
+            'groups': [{'keep': keep, 'duplicates': ids} for keep, ids in groups.items()]
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def review_state(row):
+    """A flashcard_reviews row as a review_scheduler state, with epoch-second times"""
+    state = {column: row[column] for column in REVIEW_COLUMNS}
+    for column in ('due_at', 'last_reviewed_at'):
+        if state[column] is not None:
+            state[column] = state[column].timestamp()
+    state['ease'] = float(state['ease'])
+    return state
+
+@app.route('/review/next')
+@login_required
+def next_review():
+    """The user's cards that are due for review, soonest first"""
+    try:
+        limit = parse_review_args(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        user_id = request.user['user_id']
+        with db_connection() as conn:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(DUE_REVIEWS, (user_id, datetime.now(), limit))
+            rows = cursor.fetchall()
+            next_due_at = None
+            if not rows:
+                cursor.execute("SELECT MIN(due_at) AS due_at FROM flashcard_reviews WHERE user_id = %s", (user_id,))
+                next_due_at = cursor.fetchone()['due_at']
+            cursor.close()
+        
+    except mysql.connector.Error as e:
+        log('db_error', 'error', operation='review_next', error=str(e))
+        return jsonify({'error': 'Database unavailable - cannot load reviews'}), 500
+    
+    cards = [
+        dict({key: row[key] for key in ('id', 'question', 'answer', 'subject', 'created_at')}, review=review_state(row))
+        for row in rows
+    ]
+    return jsonify(due_response(cards, next_due_at))
+
+@app.route('/review/answer', methods=['POST'])
+@login_required
+def answer_review():
+    """Record how well the user recalled a card and schedule its next review"""
+    try:
+        card_id, grade = parse_review_answer(request.get_json(silent=True) or {})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        with db_connection() as conn:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(f"""
+                SELECT {', '.join(REVIEW_COLUMNS)} FROM flashcard_reviews
+                WHERE flashcard_id = %s AND user_id = %s
+                FOR UPDATE
+            """, (card_id, request.user['user_id']))
+            row = cursor.fetchone()
+            state = None
+            if row is not None:
+                state = schedule(review_state(row), grade, time.time())
+                cursor.execute(f"""
+                    UPDATE flashcard_reviews SET {', '.join(column + ' = %s' for column in REVIEW_COLUMNS)}
+                    WHERE flashcard_id = %s
+                """, [datetime.fromtimestamp(state['due_at']), state['repetitions'], state['interval_days'],
+                      state['ease'], state['reviews'], datetime.fromtimestamp(state['last_reviewed_at']), card_id])
+            conn.commit()
+            cursor.close()
+        
+    except mysql.connector.Error as e:
+        log('db_error', 'error', operation='review_answer', error=str(e))
+        return jsonify({'error': 'Database unavailable - answer not saved'}), 500
+    
+    if state is None:
+        return jsonify({'error': 'Flashcard not found'}), 404
+    return jsonify({'card_id': card_id, 'grade': grade, 'review': review_fields(state)})
+
 @app.route('/save-session', methods=['POST'])
 def save_session():
     """Save a study session"""
@@ -237,56 +554,143 @@ def save_session():
         data = request.get_json()
         session_name = data.get('session_name', 'Study Session')
         flashcard_ids = data.get('flashcard_ids', [])
+        if not isinstance(flashcard_ids, list) or not all(isinstance(card_id, str) for card_id in flashcard_ids):
+            return jsonify({'error': 'flashcard_ids must be a list of flashcard ids'}), 400
         
+        user = optional_user()
+        user_id = user['user_id'] if user else None
         session_id = str(uuid.uuid4())
         
-        conn = mysql.connector.connect(**DB_CONFIG)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            INSERT INTO study_sessions (id, session_name, flashcard_ids)
-            VALUES (%s, %s, %s)
-        """, (session_id, session_name, json.dumps(flashcard_ids)))
-        
-        conn.commit()
-        cursor.close()
-        conn.close()
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("""
+                INSERT INTO study_sessions (id, user_id, session_name)
+                VALUES (%s, %s, %s)
+            """, (session_id, user_id, session_name))
+            card_count = insert_study_session_cards(cursor, session_id, user_id, flashcard_ids)
+            
+            conn.commit()
+            cursor.close()
         
-        return jsonify({'session_id': session_id, 'message': 'Session saved successfully!'})
+        return jsonify({'session_id': session_id, 'card_count': card_count, 'message': 'Session saved successfully!'})
         
     except mysql.connector.Error as e:
-        print(f"Database save session error: {e}")
+        log('db_error', 'error', operation='save_session', error=str(e))
         return jsonify({'error': 'Database unavailable - session not saved'}), 500
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/export/<format>')
-def export_flashcards(format):
-    """Export flashcards in different formats"""
+def insert_study_session_cards(cursor, session_id, user_id, flashcard_ids):
+    """Add a session's cards in the order given, keeping only existing cards with the same owner"""
+    flashcard_ids = list(dict.fromkeys(flashcard_ids))
+    owned = set()
+    chunk_size = Config.DB_BULK_INSERT_CHUNK
+    for start in range(0, len(flashcard_ids), chunk_size):
+        chunk = flashcard_ids[start:start + chunk_size]
+        placeholders = ', '.join(['%s'] * len(chunk))
+        cursor.execute(f"SELECT id FROM flashcards WHERE user_id <=> %s AND id IN ({placeholders})",
+                       [user_id] + chunk)
+        owned.update(row[0] for row in cursor.fetchall())
+    
+    rows = [(session_id, position, card_id)
+            for position, card_id in enumerate(card_id for card_id in flashcard_ids if card_id in owned)]
+    for start in range(0, len(rows), chunk_size):
+        cursor.executemany("""
+            INSERT INTO study_session_cards (session_id, position, flashcard_id)
+            VALUES (%s, %s, %s)
+        """, rows[start:start + chunk_size])
+    return len(rows)
+
+@app.route('/user/sessions/<session_id>/cards')
+@login_required
+def get_study_session_cards(session_id):
+    """Get one of the user's study sessions with its flashcards in order"""
     try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        cursor = conn.cursor(dictionary=True)
+        with db_connection() as conn:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(STUDY_SESSION_CARDS, (session_id, request.user['user_id']))
+            rows = cursor.fetchall()
+            cursor.close()
         
-        cursor.execute("SELECT * FROM flashcards ORDER BY created_at DESC")
-        flashcards = cursor.fetchall()
-        
-        cursor.close()
-        conn.close()
+    except mysql.connector.Error as e:
+        log('db_error', 'error', operation='session_cards', error=str(e))
+        return jsonify({'error': 'Database unavailable - cannot load session'}), 500
+    
+    if not rows:
+        return jsonify({'error': 'Study session not found'}), 404
+    
+    study_session = {
+        'id': session_id,
+        'user_id': request.user['user_id'],
+        'session_name': rows[0]['session_name'],
+        'created_at': rows[0]['session_created_at']
+    }
+    flashcards = [
+        {key: row[key] for key in ('id', 'question', 'answer', 'subject', 'created_at')}
+        for row in rows if row['id'] is not None
+    ]
+    return jsonify({'session': study_session, 'flashcards': flashcards, 'count': len(flashcards)})
+
+def iter_user_flashcards(user_id):
+    """Yield a user's flashcards, newest first, through an unbuffered cursor"""
+    with db_connection() as conn:
+        # Unbuffered: rows stay on the server until fetched, one batch at a time
+        cursor = conn.cursor(dictionary=True, buffered=False)
+        cursor.execute("""
+            SELECT id, question, answer, subject, created_at
+            FROM flashcards
+            WHERE user_id = %s
+            ORDER BY created_at DESC, id DESC
+        """, (user_id,))
         
-        if format == 'json':
-            return jsonify({'flashcards': flashcards})
-        elif format == 'pdf':
-            # For now, return JSON. PDF generation can be added later
-            return jsonify({'flashcards': flashcards, 'format': 'pdf'})
-        else:
-            return jsonify({'error': 'Unsupported format'}), 400
+        finished = False
+        try:
+            while True:
+                rows = cursor.fetchmany(Config.EXPORT_FETCH_SIZE)
+                if not rows:
+                    finished = True
+                    break
+                yield from rows
+        finally:
+            if not finished:
+                # Client went away mid-export - drain so the connection can be reused
+                try:
+                    conn.consume_results()
+                except Exception:
+                    pass
+            cursor.close()
+
+@app.route('/export/<format>')
+@login_required
+def export_flashcards(format):
+    """Export the user's flashcards in different formats"""
+    if format not in EXPORT_FORMATS:
+        return jsonify({'error': 'Unsupported format'}), 400
+    
+    try:
+        rows = prime_rows(iter_user_flashcards(request.user['user_id']))
+        return export_response(format, rows)
             
     except mysql.connector.Error as e:
-        print(f"Database export error: {e}")
+        log('db_error', 'error', operation='export', error=str(e))
         return jsonify({'error': 'Database unavailable - cannot export flashcards'}), 500
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/debug/stats')
+def debug_stats():
+    """Connection pool and cache statistics for this worker"""
+    return jsonify({
+        'db_pool': db_pool.stats(),
+        'session_cache': session_cache.stats(),
+        'generation_cache': generation_cache.stats(),
+        'generation_jobs': generation_jobs.stats(),
+        'password_hasher': password_hasher.stats(),
+        'auth_rate_limit': auth_limiter.stats(),
+        'sessions': session_purger.stats()
+    })
+
 if __name__ == '__main__':
     # Create database on startup
     db_success = create_database()
@@ -294,8 +698,11 @@ if __name__ == '__main__':
     if not db_success:
         print("\n🚀 Starting AI Study Buddy in Demo Mode")
         print("⚠️  Database connection failed - some features will be limited")
+        print("🔧 To fix this:")
+        print("   1. Make sure MySQL server is running")
+        print("   2. Update database credentials in config.py or set environment variables")
+        print("   3. Or run 'python demo.py' for a version without database")
         print("🌐 Application will be available at: http://localhost:5000")
-        print("📖 For full functionality, fix database connection or run 'python demo.py'")
         print("-" * 50)
     else:
         print("🚀 Starting AI Study Buddy with Database")
@@ -1,10 +1,19 @@
-import hashlib
 import secrets
 import mysql.connector
 from datetime import datetime, timedelta
 from functools import wraps
 from flask import request, jsonify, session
 from config import Config
+from db_pool import db_connection
+from migrations import migrate
+from password_hasher import PasswordHasherBusy, password_hasher
+from queries import SESSION_LOOKUP, SESSIONS_BEYOND_CAP
+from rate_limiter import RateLimited, auth_limiter, client_ip
+from request_log import log
+from session_cache import MISS, session_cache
+
+# Refresh a session's last_used_at at most this often; it only orders evictions
+TOUCH_INTERVAL = timedelta(seconds=60)
 
 class AuthManager:
     def __init__(self):
@@ -24,216 +33,216 @@ class AuthManager:
             cursor.execute("CREATE DATABASE IF NOT EXISTS flashcards_db")
             cursor.execute("USE flashcards_db")
             
-            # Create users table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS users (
-                    id VARCHAR(36) PRIMARY KEY,
-                    username VARCHAR(50) UNIQUE NOT NULL,
-                    email VARCHAR(100) UNIQUE NOT NULL,
-                    password_hash VARCHAR(255) NOT NULL,
-                    salt VARCHAR(255) NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    last_login TIMESTAMP NULL
-                )
-            """)
-            
-            # Create user_sessions table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS user_sessions (
-                    id VARCHAR(36) PRIMARY KEY,
-                    user_id VARCHAR(36) NOT NULL,
-                    session_token VARCHAR(255) UNIQUE NOT NULL,
-                    expires_at TIMESTAMP NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
-                )
-            """)
-            
-            # Update flashcards table to include user_id
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS flashcards (
-                    id VARCHAR(36) PRIMARY KEY,
-                    user_id VARCHAR(36) NOT NULL,
-                    question TEXT NOT NULL,
-                    answer TEXT NOT NULL,
-                    subject VARCHAR(100),
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
-                )
-            """)
-            
-            # Update study_sessions table to include user_id
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS study_sessions (
-                    id VARCHAR(36) PRIMARY KEY,
-                    user_id VARCHAR(36) NOT NULL,
-                    session_name VARCHAR(200),
-                    flashcard_ids JSON,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
-                )
-            """)
+            # Same versioned migrations as app.py, so the schema does not depend on which ran first
+            migrate(conn)
             
             conn.commit()
             cursor.close()
             conn.close()
-            print("✅ Authentication tables created successfully!")
+            log('auth_tables_ready')
             return True
             
         except mysql.connector.Error as e:
-            print(f"❌ Database setup error: {e}")
+            log('db_error', 'error', operation='init_auth_tables', error=str(e))
             return False
         except Exception as e:
-            print(f"❌ Unexpected error: {e}")
+            log('unexpected_error', 'error', operation='init_auth_tables', error=str(e))
             return False
     
     def hash_password(self, password, salt=None):
-        """Hash password with salt"""
-        if salt is None:
-            salt = secrets.token_hex(16)
-        password_hash = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt.encode('utf-8'), 100000)
-        return salt, password_hash.hex()
+        """Hash password with salt in the password hashing pool"""
+        return password_hasher.hash_password(password, salt)
     
     def verify_password(self, password, stored_hash, stored_salt):
-        """Verify password against stored hash"""
-        _, computed_hash = self.hash_password(password, stored_salt)
-        return computed_hash == stored_hash
+        """Verify password against stored hash in constant time"""
+        return password_hasher.verify_password(password, stored_hash, stored_salt)
     
     def register_user(self, username, email, password):
-        """Register a new user"""
+        """Register a new user; raises RateLimited before hashing if the caller is over its limit"""
         try:
-            conn = mysql.connector.connect(**self.db_config)
-            cursor = conn.cursor()
-            
-            # Check if username or email already exists
-            cursor.execute("SELECT id FROM users WHERE username = %s OR email = %s", (username, email))
-            if cursor.fetchone():
+            auth_limiter.check(client_ip(), username, email)
+            with db_connection() as conn:
+                cursor = conn.cursor()
+
+                # Check if username or email already exists
+                cursor.execute("SELECT id FROM users WHERE username = %s OR email = %s", (username, email))
+                exists = cursor.fetchone() is not None
+                cursor.close()
+
+            if exists:
                 return False, "Username or email already exists"
-            
-            # Create new user
+
+            # Hash without holding a pooled connection: it is deliberately slow
             user_id = secrets.token_urlsafe(32)
             salt, password_hash = self.hash_password(password)
-            
-            cursor.execute("""
-                INSERT INTO users (id, username, email, password_hash, salt)
-                VALUES (%s, %s, %s, %s, %s)
-            """, (user_id, username, email, password_hash, salt))
-            
-            conn.commit()
-            cursor.close()
-            conn.close()
-            
+
+            with db_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    INSERT INTO users (id, username, email, password_hash, salt)
+                    VALUES (%s, %s, %s, %s, %s)
+                """, (user_id, username, email, password_hash, salt))
+
+                conn.commit()
+                cursor.close()
+
             return True, user_id
-            
+
+        except (PasswordHasherBusy, RateLimited):
+            raise
+        except mysql.connector.IntegrityError:
+            # Someone took the username or email while the password was hashing
+            return False, "Username or email already exists"
         except mysql.connector.Error as e:
-            print(f"Database error during registration: {e}")
+            log('db_error', 'error', operation='register', error=str(e))
             return False, "Database error"
         except Exception as e:
-            print(f"Unexpected error during registration: {e}")
+            log('unexpected_error', 'error', operation='register', error=str(e))
             return False, "Registration failed"
     
     def login_user(self, username, password):
-        """Authenticate user and create session"""
+        """Authenticate user and create session; raises RateLimited before hashing if the caller is over its limit"""
         try:
-            conn = mysql.connector.connect(**self.db_config)
-            cursor = conn.cursor(dictionary=True)
-            
-            # Get user by username
-            cursor.execute("SELECT * FROM users WHERE username = %s", (username,))
-            user = cursor.fetchone()
-            
+            auth_limiter.check(client_ip(), username)
+            with db_connection() as conn:
+                cursor = conn.cursor(dictionary=True)
+
+                # Get user by username
+                cursor.execute("SELECT * FROM users WHERE username = %s", (username,))
+                user = cursor.fetchone()
+                cursor.close()
+
             if not user:
                 return False, "Invalid username or password"
-            
-            # Verify password
+
+            # Verify (and maybe rehash) with the connection back in the pool
             if not self.verify_password(password, user['password_hash'], user['salt']):
                 return False, "Invalid username or password"
-            
+
+            # Upgrade hashes stored at an older cost while the password is at hand
+            rehashed = None
+            if password_hasher.needs_rehash(user['password_hash']):
+                rehashed = self.hash_password(password)
+
             # Create session
             session_token = secrets.token_urlsafe(32)
             session_id = secrets.token_urlsafe(32)
-            expires_at = datetime.now() + timedelta(days=7)
-            
-            cursor.execute("""
-                INSERT INTO user_sessions (id, user_id, session_token, expires_at)
-                VALUES (%s, %s, %s, %s)
-            """, (session_id, user['id'], session_token, expires_at))
-            
-            # Update last login
-            cursor.execute("UPDATE users SET last_login = NOW() WHERE id = %s", (user['id'],))
-            
-            conn.commit()
-            cursor.close()
-            conn.close()
-            
+            now = datetime.now()
+            expires_at = now + timedelta(seconds=Config.SESSION_LIFETIME)
+
+            with db_connection() as conn:
+                cursor = conn.cursor(dictionary=True)
+                if rehashed:
+                    # Skipped if the password changed since it was read
+                    cursor.execute("""
+                        UPDATE users SET password_hash = %s, salt = %s
+                        WHERE id = %s AND password_hash = %s
+                    """, (rehashed[1], rehashed[0], user['id'], user['password_hash']))
+
+                cursor.execute("""
+                    INSERT INTO user_sessions (id, user_id, session_token, expires_at, last_used_at)
+                    VALUES (%s, %s, %s, %s, %s)
+                """, (session_id, user['id'], session_token, expires_at, now))
+                evicted = self._evict_extra_sessions(cursor, user['id'])
+
+                # Update last login
+                cursor.execute("UPDATE users SET last_login = NOW() WHERE id = %s", (user['id'],))
+
+                conn.commit()
+                cursor.close()
+
+            for token in evicted:
+                session_cache.invalidate(token)
+
             return True, {
                 'user_id': user['id'],
                 'username': user['username'],
                 'email': user['email'],
                 'session_token': session_token
             }
-            
+
+        except (PasswordHasherBusy, RateLimited):
+            # Callers answer 503 with Retry-After rather than a failed login
+            raise
         except mysql.connector.Error as e:
-            print(f"Database error during login: {e}")
+            log('db_error', 'error', operation='login', error=str(e))
             return False, "Database error"
         except Exception as e:
-            print(f"Unexpected error during login: {e}")
+            log('unexpected_error', 'error', operation='login', error=str(e))
             return False, "Login failed"
     
+    def _evict_extra_sessions(self, cursor, user_id):
+        """Delete a user's least recently used sessions beyond MAX_SESSIONS_PER_USER; returns their tokens"""
+        # last_used_at is refreshed when a worker's session cache misses, so it is accurate to SESSION_CACHE_TTL
+        cursor.execute(SESSIONS_BEYOND_CAP, (user_id, Config.MAX_SESSIONS_PER_USER))
+        tokens = [row['session_token'] for row in cursor.fetchall()]
+        if tokens:
+            placeholders = ', '.join(['%s'] * len(tokens))
+            cursor.execute(f"DELETE FROM user_sessions WHERE session_token IN ({placeholders})", tokens)
+        return tokens
+    
     def verify_session(self, session_token):
         """Verify session token and return user info"""
+        cached = session_cache.get(session_token)
+        if cached is not MISS:
+            return cached
+
         try:
-            conn = mysql.connector.connect(**self.db_config)
-            cursor = conn.cursor(dictionary=True)
-            
-            # Get session and user info
-            cursor.execute("""
-                SELECT us.*, u.username, u.email 
-                FROM user_sessions us
-                JOIN users u ON us.user_id = u.id
-                WHERE us.session_token = %s AND us.expires_at > NOW()
-            """, (session_token,))
-            
-            session_data = cursor.fetchone()
-            
-            cursor.close()
-            conn.close()
-            
+            with db_connection() as conn:
+                cursor = conn.cursor(dictionary=True)
+
+                # Get session and user info
+                cursor.execute(SESSION_LOOKUP, (session_token,))
+
+                session_data = cursor.fetchone()
+
+                # Record the use for least-recently-used eviction, at most once per TOUCH_INTERVAL
+                last_used_at = session_data['last_used_at'] if session_data else None
+                if session_data and (last_used_at is None or datetime.now() - last_used_at > TOUCH_INTERVAL):
+                    cursor.execute("UPDATE user_sessions SET last_used_at = NOW() WHERE session_token = %s",
+                                   (session_token,))
+                    conn.commit()
+
+                cursor.close()
+
             if not session_data:
+                session_cache.set_invalid(session_token)
                 return None
-            
-            return {
+
+            user = {
                 'user_id': session_data['user_id'],
                 'username': session_data['username'],
                 'email': session_data['email']
             }
-            
+            session_cache.set(session_token, user, session_data['expires_at'])
+            return user
+
         except mysql.connector.Error as e:
-            print(f"Database error during session verification: {e}")
+            log('db_error', 'error', operation='verify_session', error=str(e))
             return None
         except Exception as e:
-            print(f"Unexpected error during session verification: {e}")
+            log('unexpected_error', 'error', operation='verify_session', error=str(e))
             return None
     
     def logout_user(self, session_token):
         """Logout user by removing session"""
         try:
-            conn = mysql.connector.connect(**self.db_config)
-            cursor = conn.cursor()
-            
-            cursor.execute("DELETE FROM user_sessions WHERE session_token = %s", (session_token,))
-            
-            conn.commit()
-            cursor.close()
-            conn.close()
-            
+            with db_connection() as conn:
+                cursor = conn.cursor()
+
+                cursor.execute("DELETE FROM user_sessions WHERE session_token = %s", (session_token,))
+
+                conn.commit()
+                cursor.close()
+
+            session_cache.invalidate(session_token)
             return True
-            
+
         except mysql.connector.Error as e:
-            print(f"Database error during logout: {e}")
+            log('db_error', 'error', operation='logout', error=str(e))
             return False
         except Exception as e:
-            print(f"Unexpected error during logout: {e}")
+            log('unexpected_error', 'error', operation='logout', error=str(e))
             return False
 
 # Global auth manager instance
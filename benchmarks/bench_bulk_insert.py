@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-row vs bulk flashcard inserts
+Compares the old one-INSERT-per-card loop with insert_flashcard_rows
+(multi-row INSERTs in DB_BULK_INSERT_CHUNK batches) for 10, 1k and 100k
+cards. Runs against the MySQL server in Config.DB_CONFIG inside a
+transaction that is rolled back, so no data is left behind. The
+in-memory store used by demo.py is benchmarked as well.
+
+Usage: python benchmarks/bench_bulk_insert.py [--sizes 10,1000,100000]
+"""
+
+import argparse
+import os
+import sys
+import time
+import uuid
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import mysql.connector
+
+from app import insert_flashcard_rows
+from config import Config
+from memory_store import MemoryStore
+
+BENCH_USER = 'bench-' + uuid.uuid4().hex[:8]
+
+
+def make_rows(count):
+    return [(str(uuid.uuid4()), BENCH_USER, f"Question {i}?", f"Answer {i}.", 'Benchmark', None) for i in range(count)]
+
+
+def per_row_insert(cursor, rows):
+    """The loop save_flashcards_to_db used before bulk inserts"""
+    for row in rows:
+        cursor.execute("""
+            INSERT INTO flashcards (id, user_id, question, answer, subject, minhash)
+            VALUES (%s, %s, %s, %s, %s, %s)
+        """, row)
+
+
+def time_mysql(conn, insert, rows):
+    cursor = conn.cursor()
+    try:
+        # Satisfy the users foreign key when the auth schema is installed
+        cursor.execute("""
+            INSERT INTO users (id, username, email, password_hash, salt)
+            VALUES (%s, %s, %s, '', '')
+        """, (BENCH_USER, BENCH_USER, BENCH_USER + '@example.com'))
+    except mysql.connector.Error:
+        pass
+    started = time.perf_counter()
+    insert(cursor, rows)
+    elapsed = time.perf_counter() - started
+    conn.rollback()
+    cursor.close()
+    return elapsed
+
+
+def bench_mysql(sizes):
+    try:
+        conn = mysql.connector.connect(**Config.DB_CONFIG)
+    except mysql.connector.Error as e:
+        print(f"⚠️  MySQL not available ({e}) - skipping MySQL benchmark")
+        return
+
+    print(f"MySQL ({Config.DB_CONFIG['host']}), chunk size {Config.DB_BULK_INSERT_CHUNK}")
+    print(f"{'cards':>8} {'per-row (s)':>12} {'bulk (s)':>10} {'speedup':>8}")
+    for size in sizes:
+        rows = make_rows(size)
+        per_row = time_mysql(conn, per_row_insert, rows)
+        bulk = time_mysql(conn, insert_flashcard_rows, rows)
+        print(f"{size:>8} {per_row:12.4f} {bulk:10.4f} {per_row / bulk:7.1f}x")
+    conn.close()
+
+
+def bench_memory(sizes):
+    print("\nMemoryStore (demo.py)")
+    print(f"{'cards':>8} {'per-card (s)':>13} {'batch (s)':>10}")
+    for size in sizes:
+        cards = [{
+            'id': row[0], 'user_id': row[1], 'question': row[2], 'answer': row[3],
+            'subject': row[4], 'created_at': datetime.now().isoformat()
+        } for row in make_rows(size)]
+
+        store = MemoryStore()
+        started = time.perf_counter()
+        for card in cards:
+            store.add_flashcards([card])
+        per_card = time.perf_counter() - started
+
+        store = MemoryStore()
+        started = time.perf_counter()
+        store.add_flashcards(cards)
+        batch = time.perf_counter() - started
+        print(f"{size:>8} {per_card:13.4f} {batch:10.4f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', default='10,1000,100000')
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(',')]
+
+    bench_mysql(sizes)
+    bench_memory(sizes)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Benchmark the extractive fallback flashcard generator
+Times create_fallback_flashcards on synthetic lecture notes from 10 KB to
+1 MB and fails if the largest input takes longer than the budget.
+
+Usage: python benchmarks/bench_fallback_generator.py [--max-bytes N] [--budget SECONDS]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fallback_generator import create_fallback_flashcards
+
+TOPICS = [
+    'photosynthesis', 'chloroplasts', 'mitochondria', 'respiration', 'enzymes', 'glucose',
+    'ribosomes', 'transcription', 'translation', 'membranes', 'osmosis', 'diffusion',
+    'chromosomes', 'meiosis', 'mitosis', 'alleles', 'genotype', 'phenotype', 'evolution',
+    'ecosystems', 'homeostasis', 'hormones', 'neurons', 'synapses', 'antibodies'
+]
+FILLER = ['the', 'process', 'cell', 'energy', 'involves', 'produces', 'requires', 'during',
+          'stage', 'structure', 'function', 'rate', 'temperature', 'e.g.', 'approx.', '3.5']
+
+
+def make_notes(size, seed=1):
+    """Roughly size bytes of paragraphs of plausible-looking study notes"""
+    rng = random.Random(seed)
+    paragraphs = []
+    length = 0
+    while length < size:
+        sentences = []
+        for _ in range(rng.randint(3, 8)):
+            words = [rng.choice(FILLER if rng.random() < 0.6 else TOPICS) for _ in range(rng.randint(6, 25))]
+            sentences.append(' '.join(words).capitalize() + '.')
+        paragraph = ' '.join(sentences)
+        paragraphs.append(paragraph)
+        length += len(paragraph) + 2
+    return '\n\n'.join(paragraphs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--max-bytes', type=int, default=1_000_000)
+    parser.add_argument('--budget', type=float, default=1.0)
+    parser.add_argument('--cards', type=int, default=10)
+    args = parser.parse_args()
+
+    sizes = [n for n in (10_000, 100_000, 1_000_000) if n <= args.max_bytes] or [args.max_bytes]
+    print(f"{'bytes':>10} {'seconds':>9} {'MB/s':>8} {'cards':>6}")
+
+    elapsed = 0.0
+    for size in sizes:
+        notes = make_notes(size)
+        started = time.perf_counter()
+        cards = create_fallback_flashcards(notes, args.cards)
+        elapsed = time.perf_counter() - started
+        print(f"{len(notes):>10} {elapsed:9.3f} {len(notes) / elapsed / 1e6:8.2f} {len(cards):>6}")
+
+    if elapsed > args.budget:
+        print(f"❌ {sizes[-1]} bytes took {elapsed:.3f}s (budget {args.budget}s)")
+        return 1
+    print(f"✅ Within the {args.budget}s budget")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks of the hot functions, checked against committed baselines
+Times each case below in CPU time and compares it with
+benchmarks/baselines.json. The run fails if any case is more than --threshold
+slower than its baseline (default 0.75 = 75%). Every run also times a fixed
+pure-Python reference loop between cases, and timings are compared relative
+to it, so a baseline recorded on one machine still means something on
+another. hash_password is timed inline, without the hashing process pool.
+
+After an intended change in speed, record new baselines with --update and
+commit benchmarks/baselines.json with the change.
+
+Usage: python benchmarks/bench_hot_paths.py [--threshold R] [--only NAME] [--update]
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_fallback_generator import make_notes
+
+BASELINES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines.json')
+
+
+def reference():
+    """Fixed mix of dict, string, sort and JSON work to scale timings by"""
+    data = {f'key-{i}': [i, str(i) * 3, i / 7] for i in range(2000)}
+    text = json.dumps(sorted(data.items(), key=lambda item: item[1][1]))
+    return len(json.loads(text))
+
+
+def measure(fn, min_time=0.1, repeat=7):
+    """Best of repeat runs, in microseconds of this process's CPU time per call"""
+    # CPU time rather than wall time, so other load on the machine does not count
+    fn()
+    number = 1
+    while True:
+        started = time.process_time()
+        for _ in range(number):
+            fn()
+        elapsed = time.process_time() - started
+        if elapsed >= min_time:
+            break
+        number *= 2
+    best = elapsed / number
+    for _ in range(repeat - 1):
+        started = time.process_time()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.process_time() - started) / number)
+    return best * 1e6
+
+
+def completion(cards):
+    """A chat completion with cards flashcards in a JSON array, wrapped in prose"""
+    array = json.dumps([{'question': f'What is term {i}?', 'answer': f'Term {i} is defined as ...'}
+                        for i in range(cards)], indent=2)
+    return f"Here are your flashcards:\n{array}\nGood luck with your studies!"
+
+
+def deck(size, user_id='bench-user'):
+    return [{'id': f'card-{i}', 'user_id': user_id, 'question': f'What happens in stage {i} of the cycle?',
+             'answer': f'Stage {i} converts the products of stage {i - 1} into energy.', 'subject': 'Biology',
+             'created_at': f'2024-01-01T00:00:{i % 60:02d}.{i:06d}'} for i in range(size)]
+
+
+def build_cases(demo):
+    """name -> callable; each setup runs here, outside the timed calls"""
+    from flask import jsonify
+
+    from fallback_generator import create_fallback_flashcards
+    from flashcard_stream import parse_flashcard_json
+    from storage import create_store
+
+    built = {}
+
+    for size in (1_000, 10_000, 100_000):
+        notes = make_notes(size)
+        built[f'fallback_generator_{size // 1000}k_chars'] = lambda notes=notes: create_fallback_flashcards(notes, 10)
+
+    for count in (1_000, 100_000):
+        store = create_store('memory')
+        expires_at = datetime.now() + timedelta(days=1)
+        for u in range(count // 10):
+            store.add_user({'id': f'user-{u}', 'username': f'user{u}', 'email': f'user{u}@example.com',
+                            'password_hash': 'h', 'salt': 's'})
+        for i in range(count):
+            store.add_session({'id': f'session-{i}', 'user_id': f'user-{i // 10}',
+                               'session_token': f'token-{i}', 'expires_at': expires_at})
+        tokens = itertools.cycle([f'token-{i}' for i in range(0, count, max(1, count // 1000))] + ['missing'])
+
+        def verify(store=store, tokens=tokens):
+            demo.store = store
+            return demo.verify_session_token(next(tokens))
+        built[f'verify_session_token_{count // 1000}k_sessions'] = verify
+
+    built['hash_password'] = lambda: demo.hash_password('correct horse battery staple', 'bench-salt')
+
+    for cards in (10, 100):
+        content = completion(cards)
+        built[f'parse_flashcard_json_{cards}_cards'] = lambda content=content: parse_flashcard_json(content)
+
+    save_store = create_store('memory')
+    save_store.add_flashcards(deck(1000))
+    counter = itertools.count()
+
+    def save():
+        demo.store = save_store
+        n = next(counter)
+        batch = [{'question': f'Batch {n} question {i}: what drives reaction {n * 10 + i}?',
+                  'answer': f'Enzyme {n}-{i} lowers its activation energy.'} for i in range(10)]
+        card_ids = demo.save_flashcards_demo(batch, 'Biology', 'bench-user')
+        # Keep the deck at 1,000 cards so every call does the same work
+        save_store.remove_flashcards([card_id for card_id in card_ids if not card_id.startswith('card-')])
+    built['save_flashcards_demo_10_cards'] = save
+
+    for size in (1_000, 10_000):
+        cards = deck(size)
+
+        def serialize(cards=cards):
+            with demo.app.test_request_context():
+                return jsonify({'flashcards': cards, 'count': len(cards)}).get_data()
+        built[f'jsonify_{size // 1000}k_cards'] = serialize
+
+    return built
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--threshold', type=float, default=0.75, help='allowed slowdown, 0.75 = 75%%')
+    parser.add_argument('--only', help='run only cases whose name contains this')
+    parser.add_argument('--update', action='store_true', help='write the results as the new baselines')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['STORAGE_BACKEND'] = 'memory'
+        os.environ['GENERATION_JOBS_DB'] = os.path.join(tmp, 'jobs.db')
+        os.environ['LOG_FILE'] = os.path.join(tmp, 'app.log')
+        # Hash in this process, where its CPU time is measured, rather than in the pool
+        os.environ['PASSWORD_HASH_WORKERS'] = '0'
+        import demo
+
+        built = build_cases(demo)
+        names = [name for name in built if not args.only or args.only in name]
+        reference_us = measure(reference)
+        results = {}
+        for name in names:
+            results[name] = round(measure(built[name]), 3)
+            reference_us = min(reference_us, measure(reference))
+
+    baseline = {}
+    if os.path.exists(BASELINES):
+        with open(BASELINES, encoding='utf-8') as f:
+            baseline = json.load(f)
+    base_results = baseline.get('results', {})
+    scale = reference_us / baseline['reference_us'] if baseline.get('reference_us') else 1.0
+
+    print(f"Reference loop: {reference_us:.1f} µs"
+          + (f" ({scale:.2f}x the baseline machine)" if baseline else ''))
+    print(f"{'case':<36}{'µs/call':>12}{'baseline':>12}{'change':>9}")
+    regressions = []
+    for name in names:
+        us = results[name]
+        if name not in base_results:
+            print(f"{name:<36}{us:>12.2f}{'-':>12}{'new':>9}")
+            continue
+        expected = base_results[name] * scale
+        change = us / expected - 1
+        flag = ' ❌' if change > args.threshold else ''
+        print(f"{name:<36}{us:>12.2f}{expected:>12.2f}{change * 100:>+8.0f}%{flag}")
+        if change > args.threshold:
+            regressions.append(name)
+
+    if args.update:
+        baseline = {
+            'recorded_at': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'reference_us': round(reference_us, 3),
+            # Cases not run this time keep their baseline, rescaled to this machine
+            'results': dict({name: round(us * scale, 3) for name, us in base_results.items()}, **results)
+        }
+        with open(BASELINES, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2)
+            f.write('\n')
+        print(f"📄 Baselines written to {os.path.relpath(BASELINES, ROOT)}")
+        return 0
+
+    if regressions:
+        print(f"❌ {len(regressions)} slower than baseline by more than {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    print(f"✅ No case more than {args.threshold:.0%} slower than its baseline")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
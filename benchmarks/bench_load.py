@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+HTTP load test of the study endpoints, with a JSON report to diff across releases
+Serves demo.py, render_simple.py or app.py on a local threaded server (or
+targets --url, e.g. gunicorn) and runs --users virtual students at once. Each
+registers and logs in, then --iterations times generates cards from notes,
+lists its deck, saves a study session and exports. Notes, card counts and
+export formats come from --seed, so two runs send the same requests. Cards
+come from the fallback generator unless --openai is given.
+
+Reports requests per second and p50/p95/p99 latency per route; --output
+writes them as JSON and --compare prints the change against an earlier file.
+Routes the app does not have are skipped. app.py needs MySQL (DB_HOST) and
+has no /auth routes, so its users generate anonymously and the deck, session
+and export calls answer 401.
+
+Usage: python benchmarks/bench_load.py [--app demo|render_simple|app] [--storage memory|sqlite]
+                                       [--users N] [--iterations N] [--seed N] [--openai]
+                                       [--output FILE] [--compare FILE] [--url URL]
+"""
+
+import argparse
+import importlib
+import json
+import logging
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+TOPICS = {
+    'Biology': ['Photosynthesis converts light energy into chemical energy stored in glucose.',
+                'Mitochondria produce ATP through cellular respiration.',
+                'DNA is transcribed into messenger RNA in the nucleus.',
+                'Enzymes lower the activation energy of reactions.'],
+    'Chemistry': ['An acid donates protons while a base accepts them.',
+                  'Covalent bonds share electron pairs between atoms.',
+                  'The mole is 6.022 x 10^23 particles of a substance.',
+                  'Catalysts speed up reactions without being consumed.'],
+    'History': ['The Industrial Revolution began in Britain in the late 18th century.',
+                'The printing press spread literacy across Europe.',
+                'The Treaty of Westphalia ended the Thirty Years War in 1648.',
+                'The Silk Road linked trade between China and the Mediterranean.'],
+}
+EXPORT_FORMATS = ('json', 'ndjson', 'csv')
+ROUTES = ('POST /auth/register', 'POST /auth/login', 'POST /generate', 'GET /flashcards',
+          'POST /save-session', 'GET /export/<format>')
+
+
+def percentile(timings, p):
+    """Nearest-rank percentile of sorted timings"""
+    return timings[max(0, math.ceil(p / 100 * len(timings)) - 1)]
+
+
+class Client:
+    """One virtual student: a session token and the cards it has saved"""
+
+    def __init__(self, base, rng, recorder, skip=()):
+        self.base = base
+        self.rng = rng
+        self.record = recorder
+        self.skip = set(skip)
+        self.token = None
+        self.card_ids = []
+
+    def call(self, route, method, path, payload=None):
+        if route in self.skip:
+            return None
+        request = urllib.request.Request(self.base + path, method=method,
+                                         data=json.dumps(payload).encode() if payload is not None else None)
+        request.add_header('Content-Type', 'application/json')
+        if self.token:
+            request.add_header('Authorization', f'Bearer {self.token}')
+        started = time.perf_counter()
+        content_type = ''
+        try:
+            with urllib.request.urlopen(request, timeout=60) as response:
+                status, body = response.status, response.read()
+                content_type = response.headers.get('Content-Type', '')
+        except urllib.error.HTTPError as e:
+            status, body = e.code, e.read()
+        except (urllib.error.URLError, OSError):
+            status, body = 0, b''
+        self.record(route, time.perf_counter() - started, status)
+        if 200 <= status < 300 and content_type.startswith('application/json'):
+            return json.loads(body)
+        return None
+
+    def sign_in(self, name):
+        credentials = {'username': name, 'email': f'{name}@example.com', 'password': 'load-test-pass'}
+        self.call('POST /auth/register', 'POST', '/auth/register', credentials)
+        body = self.call('POST /auth/login', 'POST', '/auth/login', credentials)
+        if body:
+            self.token = body['user']['session_token']
+
+    def study(self):
+        subject = self.rng.choice(sorted(TOPICS))
+        notes = ' '.join(self.rng.sample(TOPICS[subject], 3))
+        body = self.call('POST /generate', 'POST', '/generate',
+                         {'notes': notes, 'subject': subject, 'num_cards': self.rng.randint(3, 6)})
+        if body:
+            self.card_ids.extend(card_id for card_id in body.get('card_ids', []) if card_id)
+
+        page = self.call('GET /flashcards', 'GET', '/flashcards?limit=20')
+        if page and page.get('next_cursor'):
+            self.call('GET /flashcards', 'GET', f"/flashcards?limit=20&cursor={page['next_cursor']}")
+
+        chosen = self.rng.sample(self.card_ids, min(len(self.card_ids), 10))
+        self.call('POST /save-session', 'POST', '/save-session',
+                  {'session_name': f'Review {subject}', 'flashcard_ids': chosen})
+
+        export_format = self.rng.choice(EXPORT_FORMATS)
+        self.call('GET /export/<format>', 'GET', f'/export/{export_format}')
+
+
+class Recorder:
+    """Latencies and statuses per route, from every client thread"""
+
+    def __init__(self):
+        self.timings = {}
+        self.errors = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, route, seconds, status):
+        with self._lock:
+            self.timings.setdefault(route, []).append(seconds * 1000)
+            if not 200 <= status < 400:
+                self.errors[route] = self.errors.get(route, 0) + 1
+
+    def report(self, elapsed):
+        routes = {}
+        for route, timings in sorted(self.timings.items()):
+            timings = sorted(timings)
+            routes[route] = {
+                'requests': len(timings),
+                'errors': self.errors.get(route, 0),
+                'throughput_rps': round(len(timings) / elapsed, 2),
+                'p50_ms': round(percentile(timings, 50), 3),
+                'p95_ms': round(percentile(timings, 95), 3),
+                'p99_ms': round(percentile(timings, 99), 3),
+                'max_ms': round(timings[-1], 3)
+            }
+        total = sum(route['requests'] for route in routes.values())
+        return {
+            'total': {
+                'requests': total,
+                'errors': sum(route['errors'] for route in routes.values()),
+                'duration_s': round(elapsed, 3),
+                'throughput_rps': round(total / elapsed, 2)
+            },
+            'routes': routes
+        }
+
+
+def serve(app_name, storage, tmp, openai=False):
+    """Import the app with the chosen storage and serve it on a free local port"""
+    os.environ['STORAGE_BACKEND'] = storage
+    os.environ['STORAGE_PATH'] = os.path.join(tmp, 'load.db')
+    os.environ['GENERATION_JOBS_DB'] = os.path.join(tmp, 'jobs.db')
+    os.environ.setdefault('LOG_FILE', os.path.join(tmp, 'app.log'))
+    # Every virtual user registers from 127.0.0.1, which the auth rate limiter would stop
+    os.environ['AUTH_RATE_LIMIT_ENABLED'] = '0'
+    if not openai:
+        # The fallback generator answers the same way every run, without network time
+        os.environ['OPENAI_API_KEY'] = 'demo-mode-no-api-key'
+    from werkzeug.serving import make_server
+
+    app = importlib.import_module(app_name).app
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    rules = {f"{method} {rule.rule}" for rule in app.url_map.iter_rules() for method in rule.methods}
+    return server, f'http://127.0.0.1:{server.server_port}', rules
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(report, baseline):
+    """Print throughput and p95 change per route against an earlier report"""
+    print(f"\nAgainst {baseline['meta'].get('revision') or 'baseline'} ({baseline['meta'].get('started_at')})")
+    print(f"{'route':<24}{'rps':>10}{'change':>9}{'p95 ms':>10}{'change':>9}")
+    for route, now in report['routes'].items():
+        before = baseline['routes'].get(route)
+        if not before:
+            print(f"{route:<24}{now['throughput_rps']:>10.1f}{'new':>9}{now['p95_ms']:>10.2f}")
+            continue
+        rps_change = (now['throughput_rps'] / before['throughput_rps'] - 1) * 100 if before['throughput_rps'] else 0
+        p95_change = (now['p95_ms'] / before['p95_ms'] - 1) * 100 if before['p95_ms'] else 0
+        print(f"{route:<24}{now['throughput_rps']:>10.1f}{rps_change:>+8.0f}%{now['p95_ms']:>10.2f}{p95_change:>+8.0f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--app', choices=('demo', 'render_simple', 'app'), default='demo')
+    parser.add_argument('--storage', choices=('memory', 'sqlite'), default='memory')
+    parser.add_argument('--url', help='load an already running server instead of serving --app')
+    parser.add_argument('--users', type=int, default=8, help='concurrent virtual users')
+    parser.add_argument('--iterations', type=int, default=10, help='study loops per user')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--openai', action='store_true', help='call OpenAI instead of the fallback generator')
+    parser.add_argument('--output', help='write the report as JSON to this file')
+    parser.add_argument('--compare', help='an earlier --output file to compare with')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        server, rules = None, None
+        if args.url:
+            base = args.url.rstrip('/')
+        else:
+            server, base, rules = serve(args.app, args.storage, tmp, args.openai)
+        skipped = [route for route in ROUTES if route not in rules] if rules is not None else []
+        recorder = Recorder()
+        # Usernames only need to be new on the server; they do not change the requests' cost
+        run_id = uuid.uuid4().hex[:8]
+
+        def student(n):
+            client = Client(base, random.Random(args.seed * 1000 + n), recorder, skipped)
+            client.sign_in(f'load-{run_id}-{n}')
+            for _ in range(args.iterations):
+                client.study()
+
+        threads = [threading.Thread(target=student, args=(n,)) for n in range(args.users)]
+        started_at = datetime.now().isoformat(timespec='seconds')
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        if server is not None:
+            server.shutdown()
+
+    report = {
+        'meta': {
+            'app': None if args.url else args.app,
+            'url': args.url,
+            'storage': None if args.url else args.storage,
+            'users': args.users,
+            'iterations': args.iterations,
+            'seed': args.seed,
+            'openai': args.openai,
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'started_at': started_at,
+            'skipped_routes': skipped
+        },
+        **recorder.report(elapsed)
+    }
+
+    print(f"{report['meta']['app'] or base}: {args.users} users x {args.iterations} iterations")
+    print(f"{'route':<24}{'requests':>9}{'errors':>8}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for route, stats in report['routes'].items():
+        print(f"{route:<24}{stats['requests']:>9}{stats['errors']:>8}{stats['throughput_rps']:>10.1f}"
+              f"{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}{stats['p99_ms']:>10.2f}")
+    total = report['total']
+    print(f"Total: {total['requests']} requests, {total['errors']} errors, "
+          f"{total['throughput_rps']:.1f} requests/s in {total['duration_s']:.1f}s")
+    if skipped:
+        print(f"Skipped (not served by {args.app}): {', '.join(skipped)}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+            f.write('\n')
+        print(f"📄 Report written to {args.output}")
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            compare(report, json.load(f))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Load test /flashcards latency during a login storm
+Serves demo.py on a local threaded server, measures GET /flashcards on its
+own, then again while a crowd of clients logs in as fast as it can. With
+password hashing in its own low-priority process pool the second run should
+look like the first; --inline hashes in the request threads instead, which
+is how every login worked before, for comparison.
+
+Usage: python benchmarks/bench_login_storm.py [--logins N] [--requests N] [--inline]
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from werkzeug.serving import make_server
+
+from config import Config
+from demo import app, store
+from password_hasher import password_hasher
+
+
+def call(base, path, payload=None, token=None):
+    request = urllib.request.Request(base + path, data=json.dumps(payload).encode() if payload else None)
+    request.add_header('Content-Type', 'application/json')
+    if token:
+        request.add_header('Authorization', f'Bearer {token}')
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def measure(base, token, count):
+    """Sorted /flashcards latencies in milliseconds"""
+    timings = []
+    for _ in range(count):
+        started = time.perf_counter()
+        status, _ = call(base, '/flashcards?limit=20', token=token)
+        assert status == 200, status
+        timings.append((time.perf_counter() - started) * 1000)
+    return sorted(timings)
+
+
+def summary(timings):
+    return timings[len(timings) // 2], timings[int(len(timings) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--logins', type=int, default=16, help='concurrent clients logging in')
+    parser.add_argument('--requests', type=int, default=200, help='/flashcards requests per phase')
+    parser.add_argument('--inline', action='store_true', help='hash in the request thread (old behaviour)')
+    parser.add_argument('--max-ratio', type=float, default=5.0, help='allowed p95 slowdown during the storm')
+    args = parser.parse_args()
+
+    # Every client shares one IP and username, which the auth rate limiter would stop
+    Config.AUTH_RATE_LIMIT_ENABLED = False
+    if args.inline:
+        password_hasher.max_workers = 0
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{server.server_port}'
+
+    credentials = {'username': 'storm-user', 'email': 'storm@example.com', 'password': 'storm-pass'}
+    call(base, '/auth/register', credentials)
+    status, body = call(base, '/auth/login', credentials)
+    token = body['user']['session_token']
+    store.add_flashcards([
+        {'id': f'card-{i}', 'user_id': body['user']['user_id'], 'question': f'Question {i}?',
+         'answer': f'Answer {i}.', 'subject': 'Benchmark', 'created_at': f'2024-01-01T00:00:{i % 60:02d}.{i:06d}'}
+        for i in range(1000)
+    ])
+
+    calm = measure(base, token, args.requests)
+
+    stop = threading.Event()
+    logins = {'ok': 0, 'busy': 0}
+
+    def storm():
+        while not stop.is_set():
+            status, _ = call(base, '/auth/login', credentials)
+            logins['ok' if status == 200 else 'busy'] += 1
+
+    crowd = [threading.Thread(target=storm, daemon=True) for _ in range(args.logins)]
+    for thread in crowd:
+        thread.start()
+    time.sleep(0.5)
+    stormy = measure(base, token, args.requests)
+    stop.set()
+    for thread in crowd:
+        thread.join()
+    server.shutdown()
+    password_hasher.shutdown()
+
+    mode = 'inline' if args.inline else 'process pool'
+    print(f"Password hashing: {mode}, {args.logins} clients logging in")
+    print(f"{'phase':>8} {'p50 ms':>8} {'p95 ms':>8}")
+    for name, timings in (('calm', calm), ('storm', stormy)):
+        p50, p95 = summary(timings)
+        print(f"{name:>8} {p50:8.2f} {p95:8.2f}")
+    print(f"Logins during storm: {logins['ok']} ok, {logins['busy']} turned away")
+
+    ratio = summary(stormy)[1] / summary(calm)[1]
+    if ratio > args.max_ratio:
+        print(f"❌ p95 grew {ratio:.1f}x during the storm (limit {args.max_ratio}x)")
+        return 1
+    print(f"✅ p95 grew {ratio:.1f}x during the storm")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark session verification in the in-memory store
+Shows that MemoryStore.verify_session stays flat from 1k to 1M sessions,
+while the old nested list scan grows with users x sessions.
+
+Usage: python benchmarks/bench_memory_store.py [--max-sessions N]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from memory_store import MemoryStore
+
+SESSIONS_PER_USER = 4
+LOOKUPS = 20000
+LEGACY_LOOKUPS = 50
+
+
+def build_store(num_sessions):
+    """Fill a store with num_sessions sessions spread over users"""
+    store = MemoryStore()
+    expires_at = datetime.now() + timedelta(days=7)
+    num_users = max(1, num_sessions // SESSIONS_PER_USER)
+
+    for i in range(num_users):
+        store.add_user({
+            'id': f"user-{i}",
+            'username': f"student{i}",
+            'email': f"student{i}@example.com",
+            'password_hash': '',
+            'salt': ''
+        })
+    for i in range(num_sessions):
+        store.add_session({
+            'user_id': f"user-{i % num_users}",
+            'session_token': f"token-{i}",
+            'expires_at': expires_at
+        })
+    return store
+
+
+def legacy_verify(sessions, users, session_token):
+    """The list scan demo.py used before MemoryStore"""
+    for session in sessions:
+        if session['session_token'] == session_token and session['expires_at'] > datetime.now():
+            for user in users:
+                if user['id'] == session['user_id']:
+                    return user
+    return None
+
+
+def time_lookups(verify, tokens):
+    started = time.perf_counter()
+    for token in tokens:
+        verify(token)
+    return (time.perf_counter() - started) / len(tokens)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--max-sessions', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    sizes = [n for n in (1_000, 10_000, 100_000, 1_000_000) if n <= args.max_sessions]
+    print(f"{'sessions':>10} {'indexed (us)':>14} {'list scan (us)':>16}")
+
+    for size in sizes:
+        store = build_store(size)
+        tokens = [f"token-{random.randrange(size)}" for _ in range(LOOKUPS)]
+        indexed = time_lookups(store.verify_session, tokens)
+
+        legacy = ''
+        if size <= 10_000:
+            sessions = list(store.sessions.values())
+            users = list(store.users.values())
+            legacy_time = time_lookups(lambda t: legacy_verify(sessions, users, t), tokens[:LEGACY_LOOKUPS])
+            legacy = f"{legacy_time * 1e6:16.1f}"
+
+        print(f"{size:>10} {indexed * 1e6:14.2f} {legacy}")
+        del store
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark the cost of recording metrics
+Times a small Flask route with and without the metrics hooks, and the raw
+cost of a counter increment and a histogram observation. The run fails if
+the hooks add more than --max-overhead microseconds per request.
+
+Usage: python benchmarks/bench_metrics.py [--requests N] [--max-overhead US]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask, jsonify
+
+from metrics import Metrics, init_app
+
+
+def make_app(registry=None):
+    app = Flask(__name__)
+    if registry is not None:
+        init_app(app, registry)
+
+    @app.route('/flashcards/<card_id>')
+    def card(card_id):
+        return jsonify({'id': card_id})
+
+    return app
+
+
+def per_request(app, requests):
+    """Microseconds per request through the test client, best of three runs"""
+    client = app.test_client()
+    best = None
+    for _ in range(3):
+        started = time.perf_counter()
+        for i in range(requests):
+            client.get(f"/flashcards/card-{i % 100}")
+        elapsed = (time.perf_counter() - started) / requests * 1e6
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def per_call(record, calls):
+    started = time.perf_counter()
+    for _ in range(calls):
+        record()
+    return (time.perf_counter() - started) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--max-overhead', type=float, default=50.0)
+    args = parser.parse_args()
+
+    registry = Metrics(path='')
+    labels = (('method', 'GET'), ('route', '/flashcards/<card_id>'))
+    inc_us = per_call(lambda: registry.inc('study_buddy_http_requests_total', labels + (('status', '200'),)), 100_000)
+    observe_us = per_call(
+        lambda: registry.observe('study_buddy_http_request_duration_seconds', 0.012, labels), 100_000)
+    print(f"Counter increment:      {inc_us:8.2f} µs")
+    print(f"Histogram observation:  {observe_us:8.2f} µs")
+
+    plain = per_request(make_app(), args.requests)
+    timed = per_request(make_app(registry), args.requests)
+    overhead = timed - plain
+    print(f"Request without metrics:{plain:8.1f} µs")
+    print(f"Request with metrics:   {timed:8.1f} µs")
+    print(f"Overhead per request:   {overhead:8.1f} µs")
+
+    started = time.perf_counter()
+    registry.render()
+    print(f"Render /metrics:        {(time.perf_counter() - started) * 1e3:8.2f} ms")
+
+    if overhead > args.max_overhead:
+        print(f"❌ Metrics add {overhead:.1f} µs per request (limit {args.max_overhead})")
+        return 1
+    print(f"✅ Metrics add under {args.max_overhead:.0f} µs per request")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
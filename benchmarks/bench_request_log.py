@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark request logging: print() to a stream vs the queued JSON-lines log
+Several threads log at once, as gunicorn threads serving requests would, and
+the time each call takes in the calling thread is reported. Both write to a
+stdout that stalls for --stall-us on every write, like a pipe whose reader
+(a log shipper, a terminal) is falling behind.
+
+Usage: python benchmarks/bench_request_log.py [--threads N] [--records N] [--stall-us US]
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from request_log import RequestLog
+
+
+class StallingStream:
+    """A stdout that takes stall seconds per write, one writer at a time"""
+
+    def __init__(self, stall):
+        self.stall = stall
+        self.lines = 0
+        self._lock = threading.Lock()
+
+    def _block(self):
+        deadline = time.perf_counter() + self.stall
+        while time.perf_counter() < deadline:
+            pass
+
+    def write(self, text):
+        with self._lock:
+            self._block()
+            self.lines += text.count('\n')
+
+    def writelines(self, lines):
+        self.write(''.join(lines))
+
+    def flush(self):
+        pass
+
+
+def run(threads, records, record):
+    """Microseconds per call in the calling thread"""
+    def worker(n):
+        for i in range(records):
+            record(n, i)
+
+    pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    started = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return (time.perf_counter() - started) / (threads * records) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--records', type=int, default=5000, help='records per thread')
+    parser.add_argument('--stall-us', type=float, default=20.0, help='time each write to stdout takes')
+    args = parser.parse_args()
+
+    stall = args.stall_us / 1e6
+    stdout = sys.stdout
+    try:
+        sys.stdout = StallingStream(stall)
+        printed = run(args.threads, args.records, lambda n, i: print(
+            f"[{time.time()}] GET /flashcards/card-{i} - 127.0.0.{n}", flush=True))
+
+        sys.stdout = stream = StallingStream(stall)
+        request_log = RequestLog('', queue_size=args.threads * args.records)
+        queued = run(args.threads, args.records, lambda n, i: request_log.log(
+            'request', method='GET', path=f"/flashcards/card-{i}", status=200, remote_addr=f"127.0.0.{n}"))
+        started = time.perf_counter()
+        request_log.flush()
+        drained = time.perf_counter() - started
+    finally:
+        sys.stdout = stdout
+    assert stream.lines == args.threads * args.records
+
+    print(f"{args.threads} threads x {args.records} records, {args.stall_us:g} µs per stdout write")
+    print("Microseconds per call in the calling thread")
+    print(f"print + flush: {printed:8.2f} µs")
+    print(f"queued log:    {queued:8.2f} µs  (writer caught up {drained * 1e3:.0f} ms later)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
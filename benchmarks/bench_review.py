@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Benchmark the review queue: /review/next and /review/answer per deck size
+Fills each backend with decks of growing size and times fetching the next
+due card and answering it. The cost should stay flat as the deck grows;
+the run fails if the largest deck is more than --max-ratio times slower
+than the smallest.
+
+Usage: python benchmarks/bench_review.py [--cards N] [--ops N] [--max-ratio R]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_search import make_cards
+from storage import BACKENDS, create_store
+
+
+def run(store, cards, ops):
+    """Microseconds per next and per answer on a deck of len(cards)"""
+    for start in range(0, len(cards), 1000):
+        store.add_flashcards(cards[start:start + 1000])
+    rng = random.Random(1)
+    next_time = answer_time = 0.0
+    for _ in range(ops):
+        started = time.perf_counter()
+        card = store.due_reviews('bench-user', 1)[0]
+        answered = time.perf_counter()
+        store.record_review('bench-user', card['id'], rng.choice((2, 3, 4, 5)))
+        finished = time.perf_counter()
+        next_time += answered - started
+        answer_time += finished - answered
+    return next_time / ops * 1e6, answer_time / ops * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--cards', type=int, default=100_000, help='largest deck')
+    parser.add_argument('--ops', type=int, default=2000)
+    parser.add_argument('--max-ratio', type=float, default=3.0)
+    args = parser.parse_args()
+
+    sizes = sorted({min(1000, args.cards), min(10_000, args.cards), args.cards})
+    deck = [dict(card, user_id='bench-user') for card in make_cards(args.cards)]
+    print("Deck size, microseconds per call")
+    print(f"{'backend':>8}{'cards':>10}{'next':>10}{'answer':>10}")
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in BACKENDS:
+            timings = []
+            for size in sizes:
+                store = create_store(backend, os.path.join(tmp, f"review-{size}.db"))
+                next_us, answer_us = run(store, deck[:size], min(args.ops, size))
+                timings.append(next_us)
+                print(f"{backend:>8}{size:>10}{next_us:10.1f}{answer_us:10.1f}")
+            ratio = timings[-1] / timings[0]
+            if ratio > args.max_ratio:
+                print(f"❌ {backend}: next is {ratio:.1f}x slower on {sizes[-1]} cards than on {sizes[0]}")
+                failed = True
+    if not failed:
+        print(f"✅ Next-card time stays within {args.max_ratio}x from {sizes[0]} to {sizes[-1]} cards")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Benchmark in-memory flashcard search
+Fills one user's deck with synthetic cards, then times /flashcards/search
+style queries through MemoryStore and fails if the p95 latency exceeds the
+budget.
+
+Usage: python benchmarks/bench_search.py [--cards N] [--queries N] [--budget MS]
+"""
+
+import argparse
+import itertools
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_fallback_generator import FILLER, TOPICS
+from memory_store import MemoryStore
+
+
+def make_cards(count, seed=1):
+    """Cards drawing on a shared topic list plus a long tail of rarer words"""
+    rng = random.Random(seed)
+    vocabulary = TOPICS + [f"term{i}" for i in range(20_000)]
+    cum_weights = list(itertools.accumulate([50] * len(TOPICS) + [1] * 20_000))
+    cards = []
+    for i in range(count):
+        words = rng.choices(vocabulary, cum_weights=cum_weights, k=rng.randint(6, 18))
+        words += rng.sample(FILLER, 3)
+        rng.shuffle(words)
+        split = len(words) // 2
+        cards.append({
+            'id': f"card-{i}",
+            'user_id': 'bench-user',
+            'question': ' '.join(words[:split]).capitalize() + '?',
+            'answer': ' '.join(words[split:]).capitalize() + '.',
+            'subject': rng.choice(['Biology', 'Chemistry', 'Physics']),
+            'created_at': f"2024-01-01T00:00:00.{i:06d}"
+        })
+    return cards
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--cards', type=int, default=100_000)
+    parser.add_argument('--queries', type=int, default=500)
+    parser.add_argument('--budget', type=float, default=10.0, help='p95 budget in milliseconds')
+    args = parser.parse_args()
+
+    store = MemoryStore()
+    started = time.perf_counter()
+    store.add_flashcards(make_cards(args.cards))
+    print(f"Indexed {args.cards} cards in {time.perf_counter() - started:.2f}s")
+
+    rng = random.Random(2)
+    queries = {
+        'rare word': lambda: f"term{rng.randrange(20_000)}",
+        'common word': lambda: rng.choice(TOPICS),
+        'mixed': lambda: f"{rng.choice(TOPICS)} term{rng.randrange(20_000)} {rng.choice(TOPICS)}",
+    }
+
+    print(f"{'query':>12} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+    worst = 0.0
+    for name, make_query in queries.items():
+        timings = []
+        for _ in range(args.queries):
+            query = make_query()
+            started = time.perf_counter()
+            store.search_flashcards('bench-user', query, 20)
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        p95 = timings[int(len(timings) * 0.95) - 1]
+        worst = max(worst, p95)
+        print(f"{name:>12} {timings[len(timings) // 2]:8.2f} {p95:8.2f} {timings[-1]:8.2f}")
+
+    if worst > args.budget:
+        print(f"❌ p95 of {worst:.2f}ms is over the {args.budget}ms budget")
+        return 1
+    print(f"✅ Within the {args.budget}ms budget")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Benchmark the storage backends behind demo.py and render_simple.py
+Times the operations a request performs (verifying a session, paging and
+searching a deck, saving a batch of generated cards) against MemoryStore
+and the SQLite store, on a deck of --cards cards.
+
+Usage: python benchmarks/bench_storage.py [--cards N] [--ops N] [--path FILE]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_search import make_cards
+from storage import BACKENDS, create_store
+
+
+def timed(operation, count):
+    """Microseconds per call"""
+    started = time.perf_counter()
+    for i in range(count):
+        operation(i)
+    return (time.perf_counter() - started) / count * 1e6
+
+
+def run(store, cards, ops):
+    store.add_user({'id': 'bench-user', 'username': 'bench', 'email': 'bench@example.com',
+                    'password_hash': 'hash', 'salt': 'salt', 'created_at': datetime.now().isoformat()})
+    store.add_session({'user_id': 'bench-user', 'session_token': 'token',
+                       'expires_at': datetime.now() + timedelta(days=1)})
+    for start in range(0, len(cards), 1000):
+        store.add_flashcards(cards[start:start + 1000])
+    newest = store.page_flashcards('bench-user', 1)[0]
+
+    batch = 10
+    return {
+        'verify session': timed(lambda i: store.verify_session('token'), ops),
+        'first page': timed(lambda i: store.page_flashcards('bench-user', 50), ops),
+        'later page': timed(lambda i: store.page_flashcards('bench-user', 50, (newest['created_at'], newest['id'])), ops),
+        'search': timed(lambda i: store.search_flashcards('bench-user', f"photosynthesis term{i}", 20), ops),
+        f'save {batch} cards': timed(lambda i: store.add_flashcards([
+            dict(cards[0], id=f"extra-{i}-{j}", created_at=f"2025-01-01T00:00:00.{i:06d}") for j in range(batch)
+        ]), ops),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--cards', type=int, default=20_000)
+    parser.add_argument('--ops', type=int, default=500)
+    parser.add_argument('--path', help='SQLite file to use (default: a temporary file)')
+    args = parser.parse_args()
+
+    cards = [dict(card, user_id='bench-user') for card in make_cards(args.cards)]
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in BACKENDS:
+            store = create_store(backend, args.path or os.path.join(tmp, 'bench.db'))
+            results[backend] = run(store, cards, args.ops)
+
+    print(f"{args.cards} cards, microseconds per call")
+    print(f"{'operation':>16}" + ''.join(f"{backend:>10}" for backend in BACKENDS))
+    for operation in results[BACKENDS[0]]:
+        print(f"{operation:>16}" + ''.join(f"{results[backend][operation]:10.1f}" for backend in BACKENDS))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
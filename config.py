@@ -1,4 +1,6 @@
 import os
+import tempfile
+
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -20,11 +22,129 @@ class Config:
         'password': os.getenv('DB_PASSWORD', ''),
         'database': os.getenv('DB_NAME', 'flashcards_db')
     }
-    
+
+    # Storage Configuration for demo.py and render_simple.py
+    # STORAGE_BACKEND is 'memory' (lost on restart) or 'sqlite' (STORAGE_PATH,
+    # shared by every gunicorn worker on the machine)
+    STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'memory')
+    STORAGE_PATH = os.getenv('STORAGE_PATH', 'study_buddy.db')
+
+    # Database Connection Pool Configuration
+    # Every gunicorn worker gets its own pool, so MySQL sees up to
+    # workers * DB_POOL_SIZE connections (see gunicorn.conf.py)
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
+    DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '10'))
+    DB_POOL_MAX_LIFETIME = int(os.getenv('DB_POOL_MAX_LIFETIME', '1800'))
+    DB_POOL_PING_INTERVAL = int(os.getenv('DB_POOL_PING_INTERVAL', '30'))
+    # Rows per multi-row INSERT when saving flashcards in bulk
+    DB_BULK_INSERT_CHUNK = int(os.getenv('DB_BULK_INSERT_CHUNK', '500'))
+
+    # Password Hashing Configuration
+    # Raising PASSWORD_HASH_ITERATIONS rehashes each password at its owner's next
+    # login. At most PASSWORD_HASH_MAX_PENDING hashes wait for the
+    # PASSWORD_HASH_WORKERS processes; further logins get a 503 after
+    # PASSWORD_HASH_QUEUE_TIMEOUT seconds. PASSWORD_HASH_WORKERS=0 hashes in the
+    # request thread
+    PASSWORD_HASH_ITERATIONS = int(os.getenv('PASSWORD_HASH_ITERATIONS', '100000'))
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', '2'))
+    PASSWORD_HASH_MAX_PENDING = int(os.getenv('PASSWORD_HASH_MAX_PENDING', '16'))
+    PASSWORD_HASH_QUEUE_TIMEOUT = float(os.getenv('PASSWORD_HASH_QUEUE_TIMEOUT', '5'))
+    PASSWORD_HASH_NICE = int(os.getenv('PASSWORD_HASH_NICE', '10'))
+
+    # Auth Rate Limit Configuration
+    # Token buckets per client IP and per username, refilled at *_RATE tokens a
+    # second up to *_BURST. Set AUTH_RATE_LIMIT_DB to a SQLite file to share the
+    # buckets between workers, and AUTH_RATE_LIMIT_PROXIES to the number of
+    # proxies in front of the app that append to X-Forwarded-For
+    AUTH_RATE_LIMIT_ENABLED = os.getenv('AUTH_RATE_LIMIT_ENABLED', '1') == '1'
+    AUTH_RATE_LIMIT_IP_RATE = float(os.getenv('AUTH_RATE_LIMIT_IP_RATE', '0.5'))
+    AUTH_RATE_LIMIT_IP_BURST = int(os.getenv('AUTH_RATE_LIMIT_IP_BURST', '10'))
+    AUTH_RATE_LIMIT_USER_RATE = float(os.getenv('AUTH_RATE_LIMIT_USER_RATE', '0.1'))
+    AUTH_RATE_LIMIT_USER_BURST = int(os.getenv('AUTH_RATE_LIMIT_USER_BURST', '5'))
+    AUTH_RATE_LIMIT_DB = os.getenv('AUTH_RATE_LIMIT_DB', '')
+    AUTH_RATE_LIMIT_MAX_KEYS = int(os.getenv('AUTH_RATE_LIMIT_MAX_KEYS', '10000'))
+    AUTH_RATE_LIMIT_PROXIES = int(os.getenv('AUTH_RATE_LIMIT_PROXIES', '0'))
+
+    # Login Session Configuration
+    # Logging in beyond MAX_SESSIONS_PER_USER signs out the user's least recently
+    # used session (in MySQL, last use is recorded when a worker's session cache
+    # misses). Expired MySQL sessions are deleted every SESSION_PURGE_INTERVAL
+    # seconds, SESSION_PURGE_BATCH rows per transaction
+    SESSION_LIFETIME = int(os.getenv('SESSION_LIFETIME', str(7 * 24 * 3600)))
+    MAX_SESSIONS_PER_USER = int(os.getenv('MAX_SESSIONS_PER_USER', '10'))
+    SESSION_PURGE_INTERVAL = float(os.getenv('SESSION_PURGE_INTERVAL', '300'))
+    SESSION_PURGE_BATCH = int(os.getenv('SESSION_PURGE_BATCH', '1000'))
+
+    # Metrics Configuration
+    # GET /metrics serves Prometheus metrics. With several gunicorn workers set
+    # METRICS_DB to a SQLite file they share; each worker adds its counts to it
+    # every METRICS_FLUSH_INTERVAL seconds
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', '1') == '1'
+    METRICS_DB = os.getenv('METRICS_DB', '')
+    METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', '5'))
+
+    # Request Log Configuration
+    # JSON lines go to stdout, or appended to LOG_FILE, from a background thread.
+    # LOG_SAMPLE_RATES logs only a share of requests to busy routes, e.g.
+    # '/health=0.01,/metrics=0'; errors and requests slower than
+    # LOG_SLOW_REQUEST_MS milliseconds are always logged
+    LOG_REQUESTS = os.getenv('LOG_REQUESTS', '1') == '1'
+    LOG_FILE = os.getenv('LOG_FILE', '')
+    LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', '10000'))
+    LOG_SAMPLE_RATES = os.getenv('LOG_SAMPLE_RATES', '/health=0.01,/status=0.01,/metrics=0.01')
+    LOG_SLOW_REQUEST_MS = float(os.getenv('LOG_SLOW_REQUEST_MS', '1000'))
+
+    # Session Cache Configuration
+    # A logout is honored by other workers within SESSION_INVALIDATION_POLL seconds
+    # when SESSION_INVALIDATION_FILE is set, otherwise within SESSION_CACHE_TTL
+    SESSION_CACHE_SIZE = int(os.getenv('SESSION_CACHE_SIZE', '10000'))
+    SESSION_CACHE_TTL = int(os.getenv('SESSION_CACHE_TTL', '60'))
+    SESSION_CACHE_NEGATIVE_TTL = int(os.getenv('SESSION_CACHE_NEGATIVE_TTL', '5'))
+    SESSION_INVALIDATION_FILE = os.getenv('SESSION_INVALIDATION_FILE', '')
+    SESSION_INVALIDATION_POLL = float(os.getenv('SESSION_INVALIDATION_POLL', '1'))
+
+    # Generation Cache Configuration
+    # Set GENERATION_CACHE_DB to a SQLite file path to share results between workers
+    GENERATION_CACHE_SIZE = int(os.getenv('GENERATION_CACHE_SIZE', '256'))
+    GENERATION_CACHE_MAX_BYTES = int(os.getenv('GENERATION_CACHE_MAX_BYTES', str(8 * 1024 * 1024)))
+    GENERATION_CACHE_MAX_AGE = int(os.getenv('GENERATION_CACHE_MAX_AGE', str(7 * 24 * 3600)))
+    GENERATION_CACHE_DB = os.getenv('GENERATION_CACHE_DB', '')
+    GENERATION_CACHE_DB_MAX_BYTES = int(os.getenv('GENERATION_CACHE_DB_MAX_BYTES', str(256 * 1024 * 1024)))
+
+    # Chunked Generation Configuration
+    # Long notes are split into pieces of about GENERATION_CHUNK_TOKENS prompt
+    # tokens and up to GENERATION_CONCURRENCY pieces are sent to OpenAI at once
+    GENERATION_CHUNK_TOKENS = int(os.getenv('GENERATION_CHUNK_TOKENS', '2000'))
+    GENERATION_CONCURRENCY = int(os.getenv('GENERATION_CONCURRENCY', '4'))
+
+    # Near-Duplicate Detection Configuration
+    # DEDUPE_MODE: 'skip' drops new cards that match the user's deck, 'dry_run'
+    # only logs the matches, 'off' disables the check
+    DEDUPE_MODE = os.getenv('DEDUPE_MODE', 'skip')
+    DEDUPE_THRESHOLD = float(os.getenv('DEDUPE_THRESHOLD', '0.7'))
+
+    # Generation Job Configuration
+    # Jobs are stored in GENERATION_JOBS_DB so a recycled worker's jobs are picked
+    # up by another worker once their GENERATION_JOB_LEASE runs out. A running
+    # job's lease is renewed every third of GENERATION_JOB_LEASE while it runs
+    GENERATION_JOBS_DB = os.getenv('GENERATION_JOBS_DB',
+                                   os.path.join(tempfile.gettempdir(), 'study_buddy_generation_jobs.db'))
+    GENERATION_JOB_WORKERS = int(os.getenv('GENERATION_JOB_WORKERS', '4'))
+    GENERATION_JOB_QUEUE_SIZE = int(os.getenv('GENERATION_JOB_QUEUE_SIZE', '50'))
+    GENERATION_JOB_LEASE = int(os.getenv('GENERATION_JOB_LEASE', '300'))
+    GENERATION_JOB_MAX_ATTEMPTS = int(os.getenv('GENERATION_JOB_MAX_ATTEMPTS', '3'))
+    GENERATION_JOB_REAP_INTERVAL = float(os.getenv('GENERATION_JOB_REAP_INTERVAL', '15'))
+    GENERATION_JOB_RETENTION = int(os.getenv('GENERATION_JOB_RETENTION', str(24 * 3600)))
+    GENERATION_JOB_POLL_INTERVAL = float(os.getenv('GENERATION_JOB_POLL_INTERVAL', '1'))
+
     # Application Configuration
     MAX_FLASHCARDS = 10
     MIN_FLASHCARDS = 3
     DEFAULT_FLASHCARDS = 5
+    FLASHCARDS_PAGE_SIZE = int(os.getenv('FLASHCARDS_PAGE_SIZE', '50'))
+    FLASHCARDS_MAX_PAGE_SIZE = int(os.getenv('FLASHCARDS_MAX_PAGE_SIZE', '200'))
+    EXPORT_FETCH_SIZE = int(os.getenv('EXPORT_FETCH_SIZE', '1000'))
+    PDF_CARDS_PER_PAGE = int(os.getenv('PDF_CARDS_PER_PAGE', '4'))
     
     # OpenAI Model Configuration
     OPENAI_MODEL = "gpt-3.5-turbo"
@@ -0,0 +1,251 @@
+"""
+MySQL connection pool for AI Study Buddy
+One pool per process, shared by the Flask routes in app.py and AuthManager.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import mysql.connector
+from mysql.connector import errors as mysql_errors
+from flask import current_app, g, has_app_context
+
+from config import Config
+from metrics import TimedConnection
+
+
+def connect_timed(**db_config):
+    """mysql.connector.connect, with statement times reported to /metrics"""
+    return TimedConnection(mysql.connector.connect(**db_config))
+
+
+class ConnectionPool:
+    """Process-wide pool of MySQL connections"""
+
+    def __init__(self, db_config=None, size=None, timeout=None, max_lifetime=None,
+                 ping_interval=None, connect=None):
+        self.db_config = db_config or Config.DB_CONFIG
+        self.size = size or Config.DB_POOL_SIZE
+        self.timeout = timeout if timeout is not None else Config.DB_POOL_TIMEOUT
+        self.max_lifetime = max_lifetime if max_lifetime is not None else Config.DB_POOL_MAX_LIFETIME
+        self.ping_interval = ping_interval if ping_interval is not None else Config.DB_POOL_PING_INTERVAL
+        self._connect = connect or connect_timed
+        # Connections inherited from a parent process are kept referenced (never
+        # closed) so their sockets are not shut down underneath the parent.
+        self._inherited = []
+        self._reset()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _reset(self):
+        """Start from an empty pool owned by the current process"""
+        self._pid = os.getpid()
+        self._cond = threading.Condition()
+        self._idle = deque()
+        self._created_at = {}
+        self._open = 0
+        self._checked_out = 0
+        self._stats = {
+            'created': 0,
+            'recycled': 0,
+            'stale': 0,
+            'discarded': 0,
+            'checkouts': 0,
+            'waits': 0,
+            'wait_time': 0.0,
+            'timeouts': 0
+        }
+
+    def _after_fork(self):
+        """Drop connections opened by the parent (gunicorn preload_app)"""
+        self._inherited.extend(conn for conn, _ in self._idle)
+        self._reset()
+
+    def _check_pid(self):
+        if self._pid != os.getpid():
+            self._after_fork()
+
+    def get_connection(self):
+        """Check out a live connection, waiting up to the pool timeout"""
+        self._check_pid()
+        started = time.monotonic()
+        waited = False
+        conn = None
+        last_used = None
+
+        with self._cond:
+            while True:
+                if self._idle:
+                    # LIFO keeps the most recently used connections warm
+                    conn, last_used = self._idle.pop()
+                    break
+                if self._open < self.size:
+                    self._open += 1
+                    break
+                if not waited:
+                    waited = True
+                    self._stats['waits'] += 1
+                remaining = self.timeout - (time.monotonic() - started)
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    raise mysql_errors.PoolError(
+                        f"Connection pool exhausted ({self.size} connections checked out)"
+                    )
+                self._cond.wait(remaining)
+
+            self._checked_out += 1
+            self._stats['checkouts'] += 1
+            if waited:
+                self._stats['wait_time'] += time.monotonic() - started
+
+        try:
+            if conn is not None:
+                conn = self._validate(conn, last_used)
+            if conn is None:
+                conn = self._create()
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._checked_out -= 1
+                self._cond.notify()
+            raise
+
+        return conn
+
+    def release(self, conn, discard=False):
+        """Return a connection to the pool, rolling back any open transaction"""
+        if self._pid != os.getpid() or id(conn) not in self._created_at:
+            return
+
+        if not discard:
+            try:
+                if getattr(conn, 'in_transaction', True):
+                    conn.rollback()
+            except Exception:
+                discard = True
+
+        with self._cond:
+            self._checked_out -= 1
+            if discard:
+                self._open -= 1
+                self._stats['discarded'] += 1
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+        if discard:
+            self._close(conn)
+
+    def _create(self):
+        conn = self._connect(**self.db_config)
+        self._created_at[id(conn)] = time.monotonic()
+        self._stats['created'] += 1
+        return conn
+
+    def _validate(self, conn, last_used):
+        """Return conn if it is still usable, otherwise close it and return None"""
+        now = time.monotonic()
+        if self.max_lifetime and now - self._created_at.get(id(conn), now) > self.max_lifetime:
+            self._stats['recycled'] += 1
+            self._close(conn)
+            return None
+
+        if now - last_used > self.ping_interval:
+            try:
+                alive = conn.is_connected()
+            except Exception:
+                alive = False
+            if not alive:
+                self._stats['stale'] += 1
+                self._close(conn)
+                return None
+
+        return conn
+
+    def _close(self, conn):
+        self._created_at.pop(id(conn), None)
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def stats(self):
+        """Snapshot of pool usage for sizing against gunicorn workers"""
+        with self._cond:
+            checkouts = self._stats['checkouts']
+            return {
+                'pid': self._pid,
+                'size': self.size,
+                'open': self._open,
+                'idle': len(self._idle),
+                'checked_out': self._checked_out,
+                'checkouts': checkouts,
+                'created': self._stats['created'],
+                'recycled': self._stats['recycled'],
+                'stale': self._stats['stale'],
+                'discarded': self._stats['discarded'],
+                'waits': self._stats['waits'],
+                'wait_time_total': round(self._stats['wait_time'], 6),
+                'wait_time_avg': round(self._stats['wait_time'] / self._stats['waits'], 6) if self._stats['waits'] else 0.0,
+                'timeouts': self._stats['timeouts']
+            }
+
+    def close_all(self):
+        """Close every idle connection (checked out ones close on release)"""
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._open -= len(idle)
+        for conn, _ in idle:
+            self._close(conn)
+
+
+# Global pool instance
+db_pool = ConnectionPool()
+
+
+def init_app(app, pool=None):
+    """Bind one pooled connection per request to the Flask app context"""
+    app.extensions['db_pool'] = pool or db_pool
+    app.teardown_appcontext(release_request_connection)
+
+
+def get_db():
+    """Return the pooled connection bound to the current request"""
+    if 'db_conn' not in g:
+        g.db_conn = current_app.extensions['db_pool'].get_connection()
+    return g.db_conn
+
+
+def release_request_connection(exception=None):
+    """Return the request's connection to the pool on app context teardown"""
+    conn = g.pop('db_conn', None)
+    if conn is not None:
+        current_app.extensions['db_pool'].release(conn, discard=exception is not None)
+
+
+@contextmanager
+def db_connection():
+    """Yield a pooled connection, reusing the request's connection when there is one"""
+    if has_app_context() and 'db_pool' in current_app.extensions:
+        conn = get_db()
+        try:
+            yield conn
+        except Exception:
+            try:
+                conn.rollback()
+            except Exception:
+                # Broken connection - drop it so the next call gets a fresh one
+                g.pop('db_conn', None)
+                current_app.extensions['db_pool'].release(conn, discard=True)
+            raise
+        return
+
+    conn = db_pool.get_connection()
+    try:
+        yield conn
+    finally:
+        db_pool.release(conn)
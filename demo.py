@@ -7,15 +7,32 @@ This version runs without MySQL for testing purposes.
 from flask import Flask, render_template, request, jsonify
 from flask_cors import CORS
 import openai
-import json
+import time
 import os
 from datetime import datetime, timedelta
 import uuid
-import hashlib
 import secrets
 from config import Config
+from fallback_generator import create_fallback_flashcards
+from generation_cache import cache_key, generation_cache
+from generation_jobs import JobQueue, JobQueueFull
+from metrics import init_app as init_metrics, openai_call
+from request_log import init_app as init_request_log, log
+from note_chunker import generate_chunked
+from flashcard_stream import (flashcard_messages, iter_generation_events, openai_configured, parse_flashcard_json,
+                              sse_response)
+from storage import create_store
+from password_hasher import PasswordHasherBusy, password_hasher
+from rate_limiter import auth_limiter, limit_auth
+from near_duplicates import check_batch, find_duplicate_groups, minhash
+from search_index import parse_search_args
+from review_scheduler import due_response, parse_review_answer, parse_review_args, review_fields
+from pagination import page_response, parse_page_args
+from export_stream import EXPORT_FORMATS, export_response, prime_rows
 
 app = Flask(__name__)
+init_metrics(app)
+init_request_log(app)
 
 # Enable CORS for deployment
 CORS(app)
@@ -24,31 +41,29 @@ CORS(app)
 app.config['SECRET_KEY'] = Config.SECRET_KEY
 openai.api_key = Config.OPENAI_API_KEY
 
-# In-memory storage for demo
-flashcards_storage = []
-sessions_storage = []
-users_storage = []
-sessions_storage_auth = []
-password_reset_tokens = []
+# Storage for demo: in memory, or a shared SQLite file (STORAGE_BACKEND)
+store = create_store()
 
 # Simple user management for demo
 def hash_password(password, salt=None):
-    """Hash password with salt"""
-    if salt is None:
-        salt = secrets.token_hex(16)
-    password_hash = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt.encode('utf-8'), 100000)
-    return salt, password_hash.hex()
+    """Hash password with salt in the password hashing pool"""
+    return password_hasher.hash_password(password, salt)
 
 def verify_password(password, stored_hash, stored_salt):
-    """Verify password against stored hash"""
-    _, computed_hash = hash_password(password, stored_salt)
-    return computed_hash == stored_hash
+    """Verify password against stored hash in constant time"""
+    return password_hasher.verify_password(password, stored_hash, stored_salt)
+
+def busy_response(error):
+    """503 for a request turned away by the password hashing pool"""
+    response = jsonify({'error': f'Too many sign-ins in progress, please retry ({error})'})
+    response.headers['Retry-After'] = '1'
+    return response, 503
 
 def create_user_session(user_id):
     """Create a session for user"""
     session_token = secrets.token_urlsafe(32)
     session_id = str(uuid.uuid4())
-    expires_at = datetime.now() + timedelta(days=7)
+    expires_at = datetime.now() + timedelta(seconds=Config.SESSION_LIFETIME)
     
     session_data = {
         'id': session_id,
@@ -56,31 +71,17 @@ def create_user_session(user_id):
         'session_token': session_token,
         'expires_at': expires_at
     }
-    sessions_storage_auth.append(session_data)
+    store.add_session(session_data)
     return session_token
 
 def verify_session_token(session_token):
     """Verify session token and return user info"""
-    for session in sessions_storage_auth:
-        if session['session_token'] == session_token and session['expires_at'] > datetime.now():
-            # Find user
-            for user in users_storage:
-                if user['id'] == session['user_id']:
-                    return {
-                        'user_id': user['id'],
-                        'username': user['username'],
-                        'email': user['email']
-                    }
-    return None
+    return store.verify_session(session_token)
 
 def create_password_reset_token(email):
     """Create a password reset token"""
     # Find user by email
-    user = None
-    for u in users_storage:
-        if u['email'] == email:
-            user = u
-            break
+    user = store.get_user_by_email(email)
     
     if not user:
         return None, "Email not found"
@@ -96,94 +97,100 @@ def create_password_reset_token(email):
         'user_id': user['id']
     }
     
-    # Remove any existing tokens for this user
-    password_reset_tokens[:] = [t for t in password_reset_tokens if t['email'] != email]
-    password_reset_tokens.append(reset_data)
+    # Replaces any existing token for this user
+    store.set_reset_token(reset_data)
     
     return reset_token, user['username']
 
 def verify_reset_token(token):
     """Verify password reset token"""
-    for reset_data in password_reset_tokens:
-        if reset_data['token'] == token and reset_data['expires_at'] > datetime.now():
-            return reset_data
-    return None
+    return store.get_reset_token(token)
 
 def generate_flashcards(notes, num_cards=5):
-    """Generate flashcards using OpenAI API"""
+    """Generate flashcards using OpenAI API, one concurrent request per chunk of long notes"""
+    if not openai_configured():
+        return create_fallback_flashcards(notes, num_cards)
+    return generate_chunked(notes, num_cards, generate_chunk_flashcards)
+
+def generate_chunk_flashcards(notes, num_cards):
+    """Generate flashcards for one prompt-sized piece of notes using OpenAI API"""
+    key = cache_key(notes, num_cards)
+    cached = generation_cache.get(key)
+    if cached is not None:
+        return cached
+
     try:
-        prompt = f"""
-        Create {num_cards} educational flashcards from the following study notes. 
-        For each flashcard, provide a clear question and a comprehensive answer.
-        Format the response as a JSON array with 'question' and 'answer' fields.
-        
-        Study Notes:
-        {notes}
-        
-        Generate {num_cards} flashcards that cover the key concepts and important details.
-        """
-        
-        response = openai.chat.completions.create(
-            model=Config.OPENAI_MODEL,
-            messages=[
-                {"role": "system", "content": "You are an educational assistant that creates effective flashcards from study materials."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=Config.OPENAI_MAX_TOKENS,
-            temperature=Config.OPENAI_TEMPERATURE
-        )
-        
-        # Parse the response
-        content = response.choices[0].message.content
-        try:
-            # Look for JSON array in the response
-            start_idx = content.find('[')
-            end_idx = content.rfind(']') + 1
-            if start_idx != -1 and end_idx != -1:
-                json_str = content[start_idx:end_idx]
-                flashcards = json.loads(json_str)
-                return flashcards
-            else:
-                return create_fallback_flashcards(notes, num_cards)
-        except json.JSONDecodeError:
+        started = time.perf_counter()
+        with openai_call() as call:
+            response = openai.chat.completions.create(
+                model=Config.OPENAI_MODEL,
+                messages=flashcard_messages(notes, num_cards),
+                max_tokens=Config.OPENAI_MAX_TOKENS,
+                temperature=Config.OPENAI_TEMPERATURE
+            )
+            call['usage'] = response.usage
+        
+        # Parse the JSON array out of the response
+        flashcards = parse_flashcard_json(response.choices[0].message.content)
+        if flashcards is None:
             return create_fallback_flashcards(notes, num_cards)
-            
+        generation_cache.put(key, flashcards, time.perf_counter() - started)
+        return flashcards
+
     except Exception as e:
-        print(f"OpenAI API error: {e}")
+        log('openai_error', 'error', error=str(e), fallback=True)
         return create_fallback_flashcards(notes, num_cards)
 
-def create_fallback_flashcards(notes, num_cards):
-    """Create simple flashcards when AI fails"""
-    sentences = notes.split('.')
-    flashcards = []
-    
-    for i in range(min(num_cards, len(sentences))):
-        if sentences[i].strip():
-            question = f"What is the key point about: {sentences[i][:50]}..."
-            answer = sentences[i].strip()
-            flashcards.append({
-                "question": question,
-                "answer": answer
-            })
-    
-    return flashcards
-
 def save_flashcards_demo(flashcards, subject="General", user_id=None):
-    """Save flashcards to in-memory storage"""
-    saved_ids = []
+    """
+    Save flashcards to the demo store as one batch. Cards that nearly
+    duplicate one already in the user's deck are not stored again; their
+    position in the returned ids holds the existing card's id instead.
+    """
+    saved_cards = []
     for card in flashcards:
-        card_id = str(uuid.uuid4())
         card_data = {
-            'id': card_id,
+            'id': str(uuid.uuid4()),
             'user_id': user_id,
             'question': card['question'],
             'answer': card['answer'],
             'subject': subject,
             'created_at': datetime.now().isoformat()
         }
-        flashcards_storage.append(card_data)
-        saved_ids.append(card_id)
-    return saved_ids
+        saved_cards.append(card_data)
+    
+    if not user_id or Config.DEDUPE_MODE == 'off':
+        store.add_flashcards(saved_cards)
+        return [card['id'] for card in saved_cards]
+    
+    checked = check_batch([(card['id'], card) for card in saved_cards], store.near_duplicate_index(user_id))
+    duplicates = sum(1 for _, _, duplicate_of in checked if duplicate_of)
+    if duplicates:
+        log('near_duplicates', mode=Config.DEDUPE_MODE, duplicates=duplicates, cards=len(saved_cards))
+    
+    keep = [i for i, (_, _, duplicate_of) in enumerate(checked)
+            if duplicate_of is None or Config.DEDUPE_MODE == 'dry_run']
+    store.add_flashcards([saved_cards[i] for i in keep], [checked[i][1] for i in keep])
+    if Config.DEDUPE_MODE == 'dry_run':
+        return [card['id'] for card in saved_cards]
+    return [duplicate_of or card_id for card_id, _, duplicate_of in checked]
+
+def run_generation_job(payload, user_id=None):
+    """Generate flashcards from a /generate or /jobs payload and save them"""
+    flashcards = generate_flashcards(payload['notes'], payload['num_cards'])
+    card_ids = save_flashcards_demo(flashcards, payload['subject'], user_id)
+    return {
+        'flashcards': flashcards,
+        'card_ids': card_ids,
+        'message': f'Successfully generated {len(flashcards)} flashcards!'
+    }
+
+generation_jobs = JobQueue('demo', run_generation_job)
+
+@app.before_request
+def start_generation_jobs():
+    """Reclaim jobs left running by an earlier process without waiting for a /jobs request"""
+    generation_jobs.start()
 
 @app.route('/')
 def index():
@@ -191,6 +198,7 @@ def index():
     return render_template('index.html')
 
 @app.route('/auth/register', methods=['POST'])
+@limit_auth('username', 'email')
 def register():
     """User registration endpoint"""
     try:
@@ -210,9 +218,8 @@ def register():
             return jsonify({'error': 'Password must be at least 6 characters'}), 400
         
         # Check if username or email already exists
-        for user in users_storage:
-            if user['username'] == username or user['email'] == email:
-                return jsonify({'error': 'Username or email already exists'}), 400
+        if store.user_exists(username, email):
+            return jsonify({'error': 'Username or email already exists'}), 400
         
         # Create new user
         user_id = str(uuid.uuid4())
@@ -227,14 +234,18 @@ def register():
             'created_at': datetime.now().isoformat()
         }
         
-        users_storage.append(new_user)
+        if not store.add_user(new_user):
+            return jsonify({'error': 'Username or email already exists'}), 400
         
         return jsonify({'message': 'User registered successfully!', 'user_id': user_id}), 201
             
+    except PasswordHasherBusy as e:
+        return busy_response(e)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/auth/login', methods=['POST'])
+@limit_auth('username')
 def login():
     """User login endpoint"""
     try:
@@ -246,11 +257,7 @@ def login():
             return jsonify({'error': 'Username and password are required'}), 400
         
         # Find user
-        user = None
-        for u in users_storage:
-            if u['username'] == username:
-                user = u
-                break
+        user = store.get_user_by_username(username)
         
         if not user:
             return jsonify({'error': 'Invalid username or password'}), 401
@@ -259,6 +266,11 @@ def login():
         if not verify_password(password, user['password_hash'], user['salt']):
             return jsonify({'error': 'Invalid username or password'}), 401
         
+        # Upgrade hashes stored at an older cost while the password is at hand
+        if password_hasher.needs_rehash(user['password_hash']):
+            salt, password_hash = hash_password(password)
+            store.update_password(user['id'], salt, password_hash)
+        
         # Create session
         session_token = create_user_session(user['id'])
         
@@ -272,10 +284,13 @@ def login():
             }
         })
             
+    except PasswordHasherBusy as e:
+        return busy_response(e)
     except Exception as e:
                     return jsonify({'error': str(e)}), 500
 
 @app.route('/auth/forgot-password', methods=['POST'])
+@limit_auth('email')
 def forgot_password():
     """Send password reset email (simulated)"""
     try:
@@ -295,8 +310,8 @@ def forgot_password():
             return jsonify({'error': 'Email not found'}), 404
         
         # In a real app, you would send an email here
-        # For demo purposes, we'll return the token
-        print(f"Password reset requested for: {email}, token: {reset_token}")
+        # For demo purposes, we'll return the token (it is not logged)
+        log('password_reset_requested', email=email)
         
         return jsonify({
             'message': f'Password reset instructions sent to {email}',
@@ -305,10 +320,11 @@ def forgot_password():
         })
         
     except Exception as e:
-        print(f"Forgot password error: {str(e)}")
+        log('unexpected_error', 'error', operation='forgot_password', error=str(e))
         return jsonify({'error': str(e)}), 500
 
 @app.route('/auth/reset-password', methods=['POST'])
+@limit_auth()
 def reset_password():
     """Reset password using token"""
     try:
@@ -331,23 +347,22 @@ def reset_password():
             return jsonify({'error': 'Invalid or expired token'}), 400
         
         # Find user and update password
-        user_id = reset_data['user_id']
-        for user in users_storage:
-            if user['id'] == user_id:
-                salt, password_hash = hash_password(new_password)
-                user['password_hash'] = password_hash
-                user['salt'] = salt
-                
-                # Remove used token
-                password_reset_tokens[:] = [t for t in password_reset_tokens if t['token'] != token]
-                
-                print(f"Password reset successful for user: {user['username']}")
-                return jsonify({'message': 'Password reset successfully!'})
-        
-        return jsonify({'error': 'User not found'}), 404
+        if not store.get_user(reset_data['user_id']):
+            return jsonify({'error': 'User not found'}), 404
+        
+        salt, password_hash = hash_password(new_password)
+        user = store.update_password(reset_data['user_id'], salt, password_hash)
         
+        # Remove used token
+        store.remove_reset_token(token)
+        
+        log('password_reset', username=user['username'])
+        return jsonify({'message': 'Password reset successfully!'})
+        
+    except PasswordHasherBusy as e:
+        return busy_response(e)
     except Exception as e:
-        print(f"Reset password error: {str(e)}")
+        log('unexpected_error', 'error', operation='reset_password', error=str(e))
         return jsonify({'error': str(e)}), 500
 
 @app.route('/auth/logout', methods=['POST'])
@@ -357,7 +372,7 @@ def logout():
         session_token = request.headers.get('Authorization', '').replace('Bearer ', '')
         
         # Remove session
-        sessions_storage_auth[:] = [s for s in sessions_storage_auth if s['session_token'] != session_token]
+        store.remove_session(session_token)
         
         return jsonify({'message': 'Logout successful!'})
     except Exception as e:
@@ -397,34 +412,204 @@ def generate():
         if not user:
             return jsonify({'error': 'Authentication required'}), 401
         
-        # Generate flashcards
-        flashcards = generate_flashcards(notes, num_cards)
+        # Generate flashcards and save them to the demo store with user context
+        payload = {'notes': notes, 'subject': subject, 'num_cards': num_cards}
+        return jsonify(run_generation_job(payload, user['user_id']))
         
-        # Save to in-memory storage with user context
-        card_ids = save_flashcards_demo(flashcards, subject, user['user_id'])
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/generate/stream', methods=['POST'])
+def generate_stream():
+    """Generate flashcards, sending each one as a Server-Sent Event as soon as it is ready"""
+    data = request.get_json(silent=True) or {}
+    notes = data.get('notes', '')
+    subject = data.get('subject', 'General')
+    num_cards = data.get('num_cards', 5)
+    
+    if not notes.strip():
+        return jsonify({'error': 'Please provide study notes'}), 400
+    
+    # Check authentication
+    session_token = request.headers.get('Authorization', '').replace('Bearer ', '')
+    user = verify_session_token(session_token)
+    
+    if not user:
+        return jsonify({'error': 'Authentication required'}), 401
+    
+    events = iter_generation_events(
+        notes, num_cards, create_fallback_flashcards,
+        lambda cards: save_flashcards_demo(cards, subject, user['user_id']),
+        generate_chunk=generate_chunk_flashcards
+    )
+    return sse_response(events)
+
+@app.route('/jobs', methods=['POST'])
+def submit_generation_job():
+    """Queue flashcard generation and return a job id to poll"""
+    try:
+        data = request.get_json()
+        notes = data.get('notes', '')
+        subject = data.get('subject', 'General')
+        num_cards = data.get('num_cards', 5)
         
-        return jsonify({
-            'flashcards': flashcards,
-            'card_ids': card_ids,
-            'message': f'Successfully generated {len(flashcards)} flashcards!'
+        if not notes.strip():
+            return jsonify({'error': 'Please provide study notes'}), 400
+        
+        # Check authentication
+        session_token = request.headers.get('Authorization', '').replace('Bearer ', '')
+        user = verify_session_token(session_token)
+        
+        if not user:
+            return jsonify({'error': 'Authentication required'}), 401
+        
+        payload = {'notes': notes, 'subject': subject, 'num_cards': num_cards}
+        job_id = generation_jobs.submit(payload, user['user_id'])
+        
+        response = jsonify({
+            'job_id': job_id,
+            'status': 'queued',
+            'poll_after': Config.GENERATION_JOB_POLL_INTERVAL
         })
+        response.headers['Location'] = f'/jobs/{job_id}'
+        return response, 202
         
+    except JobQueueFull as e:
+        response = jsonify({'error': f'Too many generations in progress, please retry ({e})'})
+        response.headers['Retry-After'] = '5'
+        return response, 503
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/jobs/<job_id>')
+def get_generation_job(job_id):
+    """Status of a generation job, with its flashcards once done"""
+    session_token = request.headers.get('Authorization', '').replace('Bearer ', '')
+    user = verify_session_token(session_token)
+    
+    if not user:
+        return jsonify({'error': 'Authentication required'}), 401
+    
+    job = generation_jobs.get(job_id)
+    if job is None or job['user_id'] != user['user_id']:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    body = {'job_id': job['id'], 'status': job['status']}
+    if job['status'] == 'done':
+        body.update(job['result'])
+    elif job['status'] == 'failed':
+        body['error'] = job['error']
+    else:
+        body['poll_after'] = Config.GENERATION_JOB_POLL_INTERVAL
+    return jsonify(body)
+
 @app.route('/flashcards')
 def get_flashcards():
-    """Get user's flashcards from in-memory storage"""
+    """Get a page of the user's flashcards from the demo store, newest first"""
     session_token = request.headers.get('Authorization', '').replace('Bearer ', '')
     user = verify_session_token(session_token)
     
     if not user:
         return jsonify({'error': 'Authentication required'}), 401
     
+    try:
+        limit, after, subject = parse_page_args(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
     # Get only user's flashcards
-    user_flashcards = [card for card in flashcards_storage if card.get('user_id') == user['user_id']]
+    user_flashcards = store.page_flashcards(user['user_id'], limit + 1, after, subject)
+    
+    return jsonify(page_response(user_flashcards, limit))
+
+@app.route('/flashcards/search')
+def search_flashcards():
+    """Search the user's flashcards by question and answer text, best match first"""
+    session_token = request.headers.get('Authorization', '').replace('Bearer ', '')
+    user = verify_session_token(session_token)
+    
+    if not user:
+        return jsonify({'error': 'Authentication required'}), 401
+    
+    try:
+        query, limit, subject = parse_search_args(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    results = store.search_flashcards(user['user_id'], query, limit, subject)
     
-    return jsonify({'flashcards': user_flashcards})
+    return jsonify({'flashcards': results, 'query': query, 'count': len(results)})
+
+@app.route('/review/next')
+def next_review():
+    """The user's cards that are due for review, soonest first"""
+    session_token = request.headers.get('Authorization', '').replace('Bearer ', '')
+    user = verify_session_token(session_token)
+    
+    if not user:
+        return jsonify({'error': 'Authentication required'}), 401
+    
+    try:
+        limit = parse_review_args(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    cards = store.due_reviews(user['user_id'], limit)
+    next_due_at = None if cards else store.next_review_at(user['user_id'])
+    return jsonify(due_response(cards, next_due_at))
+
+@app.route('/review/answer', methods=['POST'])
+def answer_review():
+    """Record how well the user recalled a card and schedule its next review"""
+    session_token = request.headers.get('Authorization', '').replace('Bearer ', '')
+    user = verify_session_token(session_token)
+    
+    if not user:
+        return jsonify({'error': 'Authentication required'}), 401
+    
+    try:
+        card_id, grade = parse_review_answer(request.get_json(silent=True) or {})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    state = store.record_review(user['user_id'], card_id, grade)
+    if state is None:
+        return jsonify({'error': 'Flashcard not found'}), 404
+    return jsonify({'card_id': card_id, 'grade': grade, 'review': review_fields(state)})
+
+@app.route('/flashcards/dedupe', methods=['POST'])
+def dedupe_flashcards():
+    """Find near-duplicate cards in the user's deck and delete them unless dry_run"""
+    session_token = request.headers.get('Authorization', '').replace('Bearer ', '')
+    user = verify_session_token(session_token)
+    
+    if not user:
+        return jsonify({'error': 'Authentication required'}), 401
+    
+    data = request.get_json(silent=True) or {}
+    dry_run = data.get('dry_run', True) is not False
+    
+    # Oldest first, so the original of each group is the card kept
+    index = store.near_duplicate_index(user['user_id'])
+    cards = store.get_user_flashcards(user['user_id'])
+    signed = []
+    for card in cards:
+        signature = index.signature(card['id'])
+        if signature is None:
+            signature = minhash(card)
+            index.add(card['id'], signature)
+        signed.append((card['id'], signature))
+    groups = find_duplicate_groups(signed)
+    
+    duplicate_ids = [card_id for ids in groups.values() for card_id in ids]
+    removed = 0 if dry_run else store.remove_flashcards(duplicate_ids)
+    return jsonify({
+        'dry_run': dry_run,
+        'cards_checked': len(cards),
+        'duplicates_found': len(duplicate_ids),
+        'duplicates_removed': removed,
+        'groups': [{'keep': keep, 'duplicates': ids} for keep, ids in groups.items()]
+    })
 
 @app.route('/save-session', methods=['POST'])
 def save_session():
@@ -439,6 +624,8 @@ def save_session():
         data = request.get_json()
         session_name = data.get('session_name', 'Study Session')
         flashcard_ids = data.get('flashcard_ids', [])
+        if not isinstance(flashcard_ids, list) or not all(isinstance(card_id, str) for card_id in flashcard_ids):
+            return jsonify({'error': 'flashcard_ids must be a list of flashcard ids'}), 400
         
         session_id = str(uuid.uuid4())
         session_data = {
@@ -449,9 +636,13 @@ def save_session():
             'created_at': datetime.now().isoformat()
         }
         
-        sessions_storage.append(session_data)
+        saved = store.add_study_session(session_data)
         
-        return jsonify({'session_id': session_id, 'message': 'Session saved successfully!'})
+        return jsonify({
+            'session_id': session_id,
+            'card_count': len(saved['flashcard_ids']),
+            'message': 'Session saved successfully!'
+        })
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -465,13 +656,11 @@ def export_flashcards(format):
     if not user:
         return jsonify({'error': 'Authentication required'}), 401
     
-    # Get only user's flashcards
-    user_flashcards = [card for card in flashcards_storage if card.get('user_id') == user['user_id']]
+    # Get only user's flashcards, newest first, read as the export is sent
+    user_flashcards = store.iter_user_flashcards(user['user_id'])
     
-    if format == 'json':
-        return jsonify({'flashcards': user_flashcards})
-    elif format == 'pdf':
-        return jsonify({'flashcards': user_flashcards, 'format': 'pdf'})
+    if format in EXPORT_FORMATS:
+        return export_response(format, prime_rows(user_flashcards))
     else:
         return jsonify({'error': 'Unsupported format'}), 400
 
@@ -485,10 +674,26 @@ def get_user_sessions():
         return jsonify({'error': 'Authentication required'}), 401
     
     # Get only user's sessions
-    user_sessions = [session for session in sessions_storage if session.get('user_id') == user['user_id']]
+    user_sessions = store.get_user_study_sessions(user['user_id'])
     
     return jsonify({'sessions': user_sessions})
 
+@app.route('/user/sessions/<session_id>/cards')
+def get_study_session_cards(session_id):
+    """Get one of the user's study sessions with its flashcards in order"""
+    session_token = request.headers.get('Authorization', '').replace('Bearer ', '')
+    user = verify_session_token(session_token)
+    
+    if not user:
+        return jsonify({'error': 'Authentication required'}), 401
+    
+    found = store.get_study_session_cards(user['user_id'], session_id)
+    if found is None:
+        return jsonify({'error': 'Study session not found'}), 404
+    
+    study_session, cards = found
+    return jsonify({'session': study_session, 'flashcards': cards, 'count': len(cards)})
+
 @app.route('/status')
 def get_status():
     """Get application status and configuration"""
@@ -512,25 +717,33 @@ def get_status():
 @app.route('/demo-info')
 def demo_info():
     """Show demo information"""
+    counts = store.counts()
     return jsonify({
         'message': 'This is a demo version running without MySQL',
         'storage': {
-            'users_count': len(users_storage),
-            'flashcards_count': len(flashcards_storage),
-            'sessions_count': len(sessions_storage)
+            'backend': Config.STORAGE_BACKEND,
+            'users_count': counts['users'],
+            'flashcards_count': counts['flashcards'],
+            'sessions_count': counts['study_sessions']
         }
     })
 
 @app.route('/debug')
 def debug_info():
     """Debug endpoint for troubleshooting deployment issues"""
+    counts = store.counts()
     return jsonify({
         'app_name': 'AI Study Buddy Demo',
         'status': 'running',
         'timestamp': datetime.now().isoformat(),
-        'users_count': len(users_storage),
-        'sessions_count': len(sessions_storage_auth),
-        'flashcards_count': len(flashcards_storage),
+        'users_count': counts['users'],
+        'sessions_count': counts['sessions'],
+        'flashcards_count': counts['flashcards'],
+        'generation_cache': generation_cache.stats(),
+        'generation_jobs': generation_jobs.stats(),
+        'password_hasher': password_hasher.stats(),
+        'auth_rate_limit': auth_limiter.stats(),
+        'sessions': store.session_stats(),
         'environment': {
             'flask_version': '2.3.3',
             'python_version': '3.x',
@@ -545,12 +758,24 @@ def debug_info():
             '/auth/logout',
             '/auth/profile',
             '/generate',
+            '/generate/stream',
+            '/jobs',
+            '/jobs/<job_id>',
             '/flashcards',
+            '/flashcards/search',
+            '/flashcards/dedupe',
+            '/review/next',
+            '/review/answer',
             '/save-session',
             '/export/json',
+            '/export/ndjson',
+            '/export/csv',
+            '/export/pdf',
             '/user/sessions',
+            '/user/sessions/<session_id>/cards',
             '/status',
             '/health',
+            '/metrics',
             '/debug'
         ]
     })
@@ -574,11 +799,6 @@ def not_found(error):
 def internal_error(error):
     return jsonify({'error': 'Internal server error', 'message': str(error)}), 500
 
-@app.before_request
-def log_request():
-    """Log all requests for debugging"""
-    print(f"[{datetime.now().isoformat()}] {request.method} {request.path} - {request.remote_addr}")
-
 if __name__ == '__main__':
     print("🚀 Starting AI Study Buddy Demo Mode")
     print("⚠️  This version runs without MySQL - data will be lost on restart")
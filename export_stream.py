@@ -0,0 +1,101 @@
+"""
+Streaming flashcard export
+Every serializer takes an iterator of card rows and yields encoded chunks,
+so memory stays flat no matter how many cards are exported.
+"""
+
+import csv
+import io
+import itertools
+import json
+from datetime import datetime
+
+from flask import Response, stream_with_context
+
+from pdf_export import iter_pdf
+
+EXPORT_FIELDS = ('id', 'question', 'answer', 'subject', 'created_at')
+
+# Bytes of output gathered before a chunk is handed to the WSGI server
+CHUNK_SIZE = 64 * 1024
+
+
+def export_row(row):
+    """Restrict a card row to the exported fields in JSON-friendly form"""
+    card = {}
+    for field in EXPORT_FIELDS:
+        value = row.get(field)
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        card[field] = value
+    return card
+
+
+def _chunked(pieces):
+    """Join small string pieces into roughly CHUNK_SIZE byte chunks"""
+    buffer = []
+    size = 0
+    for piece in pieces:
+        buffer.append(piece)
+        size += len(piece)
+        if size >= CHUNK_SIZE:
+            yield ''.join(buffer).encode('utf-8')
+            buffer = []
+            size = 0
+    if buffer:
+        yield ''.join(buffer).encode('utf-8')
+
+
+def iter_ndjson(rows):
+    """One JSON object per line"""
+    return _chunked(json.dumps(export_row(row)) + '\n' for row in rows)
+
+
+def iter_json(rows):
+    """The {"flashcards": [...]} document produced by the old export, streamed"""
+    def pieces():
+        yield '{"flashcards": ['
+        for index, row in enumerate(rows):
+            yield (',' if index else '') + json.dumps(export_row(row))
+        yield ']}'
+    return _chunked(pieces())
+
+
+def iter_csv(rows):
+    """CSV with a header row"""
+    def pieces():
+        line = io.StringIO()
+        writer = csv.writer(line)
+        writer.writerow(EXPORT_FIELDS)
+        yield line.getvalue()
+        for row in rows:
+            line.seek(0)
+            line.truncate()
+            card = export_row(row)
+            writer.writerow([card[field] for field in EXPORT_FIELDS])
+            yield line.getvalue()
+    return _chunked(pieces())
+
+
+EXPORT_FORMATS = {
+    'json': ('application/json', iter_json),
+    'ndjson': ('application/x-ndjson', iter_ndjson),
+    'csv': ('text/csv', iter_csv),
+    'pdf': ('application/pdf', iter_pdf)
+}
+
+
+def prime_rows(rows):
+    """Start a lazy row iterator now so query errors surface before headers are sent"""
+    rows = iter(rows)
+    for first in rows:
+        return itertools.chain([first], rows)
+    return iter(())
+
+
+def export_response(format, rows, filename='flashcards'):
+    """Streamed download of rows in one of EXPORT_FORMATS"""
+    mimetype, serializer = EXPORT_FORMATS[format]
+    response = Response(stream_with_context(serializer(rows)), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename={filename}.{format}'
+    return response
@@ -0,0 +1,150 @@
+"""
+Extractive flashcard generation used when OpenAI is down or not configured
+Notes are split into sentences, each sentence is scored by the TF-IDF weight
+of its terms, and the best sentences become fill-in-the-blank cards with
+their most important term blanked out. Every step is a single pass over the
+text, so a megabyte of notes takes a fraction of a second.
+"""
+
+import heapq
+import math
+import re
+from collections import Counter
+
+# Words that end in a period without ending the sentence
+ABBREVIATIONS = frozenset("""
+    mr mrs ms dr prof sr jr st mt vs etc al fig figs eq eqs no nos vol pp approx
+    dept est inc ltd co corp jan feb mar apr jun jul aug sep sept oct nov dec
+    e.g i.e cf ca
+""".split())
+
+STOPWORDS = frozenset("""
+    a about above after again against all also am an and any are as at be because been
+    before being below between both but by can could did do does doing down during each
+    few for from further had has have having he her here hers herself him himself his how
+    however i if in into is it its itself just like made make many may me might more most
+    much must my myself no nor not now of off often on once one only or other our ours
+    ourselves out over own same she should so some such than that the their theirs them
+    themselves then there these they this those through thus to too under until up upon
+    us used using very was we were what when where which while who whom why will with
+    within without would you your yours yourself yourselves called known include includes
+    including another every per via
+""".split())
+
+# A candidate boundary: terminal punctuation, optional closing quotes/brackets, whitespace
+_BOUNDARY = re.compile(r'([.!?]+)(["\'\)\]]*)(\s+)')
+_LAST_WORD = re.compile(r'([A-Za-z][A-Za-z.]*)$')
+_LINE_BREAK = re.compile(r'\n\s*\n|\n(?=\s*(?:[-*•]|\d+[.)])\s)')
+_BULLET = re.compile(r'^\s*(?:[-*•]|\d+[.)])\s+')
+_TERM = re.compile(r"[A-Za-z][A-Za-z'-]*[A-Za-z]")
+
+MIN_WORDS = 5
+MAX_WORDS = 60
+# Words a card must keep around its blank for the question to be answerable
+MIN_CONTEXT_WORDS = 3
+MIN_TERM_LENGTH = 4
+_INFLECTIONS = ('ed', 'ing', 'ly')
+
+
+def split_sentences(text):
+    """Split text into sentences without breaking on abbreviations, initials or decimals"""
+    sentences = []
+    for block in _LINE_BREAK.split(text):
+        block = _BULLET.sub('', block)
+        start = 0
+        for match in _BOUNDARY.finditer(block):
+            end = match.end(2)
+            following = block[match.end():match.end() + 1]
+            if match.group(1) == '.':
+                word = _LAST_WORD.search(block, start, match.start())
+                word = word.group(1).lower() if word else ''
+                # "Dr. Smith", "J. Watson", "e.g. cells" and "approx. 5" continue the sentence
+                if word.rstrip('.') in ABBREVIATIONS or len(word) == 1 or (following and following.islower()):
+                    continue
+            sentence = ' '.join(block[start:end].split())
+            if sentence:
+                sentences.append(sentence)
+            start = match.end()
+        tail = ' '.join(block[start:].split())
+        if tail:
+            sentences.append(tail)
+    return sentences
+
+
+def sentence_terms(sentence):
+    """Lower-cased content words of a sentence"""
+    return [term for term in (match.group().lower() for match in _TERM.finditer(sentence))
+            if len(term) >= MIN_TERM_LENGTH and term not in STOPWORDS]
+
+
+def score_sentences(sentences):
+    """
+    Score every sentence by the TF-IDF weight of its terms, treating each
+    sentence as a document; returns (scores, idf, terms_per_sentence)
+    """
+    terms_per_sentence = [sentence_terms(sentence) for sentence in sentences]
+    document_frequency = Counter()
+    term_frequency = Counter()
+    for terms in terms_per_sentence:
+        term_frequency.update(terms)
+        document_frequency.update(set(terms))
+
+    count = len(sentences) or 1
+    idf = {term: math.log(count / frequency) + 1.0 for term, frequency in document_frequency.items()}
+    weights = {term: frequency * idf[term] for term, frequency in term_frequency.items()}
+    scores = [
+        sum(weights[term] for term in terms) / math.sqrt(len(terms)) if terms else 0.0
+        for terms in terms_per_sentence
+    ]
+    return scores, idf, terms_per_sentence
+
+
+def key_term(terms, idf):
+    """The term to blank out: rare in the notes, long, and not an inflected verb or adverb"""
+    def specificity(term):
+        score = idf[term] * math.log(len(term))
+        return score / 2 if term.endswith(_INFLECTIONS) else score
+    return max(terms, key=specificity)
+
+
+def cloze(sentence, term):
+    """Blank out the first whole-word occurrence of term; returns (question text, answer)"""
+    match = re.search(r'\b' + re.escape(term) + r'\b', sentence, re.IGNORECASE)
+    if match is None:
+        return None
+    return sentence[:match.start()] + '_____' + sentence[match.end():], match.group()
+
+
+def create_fallback_flashcards(notes, num_cards):
+    """Create fill-in-the-blank flashcards from the most informative sentences"""
+    num_cards = int(num_cards)
+    sentences = split_sentences(notes)
+    # Prefer sentences of a readable length, but short notes may have nothing else;
+    # a sentence too short to leave context around its blank makes no card at all
+    sentences = ([s for s in sentences if MIN_WORDS <= len(s.split()) <= MAX_WORDS]
+                 or [s for s in sentences if len(s.split()) > MIN_CONTEXT_WORDS])
+    if not sentences or num_cards <= 0:
+        return []
+
+    scores, idf, terms_per_sentence = score_sentences(sentences)
+    # Linear-time top-N (n log k), then back into note order so cards follow the notes
+    best = heapq.nlargest(num_cards, range(len(sentences)), key=scores.__getitem__)
+
+    flashcards = []
+    for index in sorted(best):
+        sentence = sentences[index]
+        terms = terms_per_sentence[index]
+        blanked = cloze(sentence, key_term(terms, idf)) if terms else None
+        if blanked is None:
+            # Nothing worth blanking out: ask for the sentence itself
+            flashcards.append({
+                "question": f"What is the key point about: {sentence[:50]}...",
+                "answer": sentence
+            })
+            continue
+        question, answer = blanked
+        flashcards.append({
+            "question": f"Fill in the blank: {question}",
+            "answer": answer
+        })
+    return flashcards
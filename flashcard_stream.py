@@ -0,0 +1,230 @@
+"""
+Streaming flashcard generation
+Reads a streamed chat completion, pulls each flashcard object out of the JSON
+array as soon as its closing brace arrives, and sends it to the browser as a
+Server-Sent Event.
+"""
+
+import json
+import time
+
+import openai
+from flask import Response, stream_with_context
+
+from config import Config
+from generation_cache import cache_key, generation_cache
+from metrics import openai_call
+from note_chunker import CardDeduper, iter_chunk_cards, split_notes
+from request_log import log
+
+SYSTEM_PROMPT = "You are an educational assistant that creates effective flashcards from study materials."
+
+
+def flashcard_messages(notes, num_cards):
+    """Chat messages asking the model for num_cards flashcards as a JSON array"""
+    prompt = f"""
+        Create {num_cards} educational flashcards from the following study notes.
+        For each flashcard, provide a clear question and a comprehensive answer.
+        Format the response as a JSON array with 'question' and 'answer' fields.
+
+        Study Notes:
+        {notes}
+
+        Generate {num_cards} flashcards that cover the key concepts and important details.
+        """
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def parse_flashcard_json(content):
+    """The JSON array of cards in a completion's text, or None if there is none"""
+    start = content.find('[')
+    end = content.rfind(']') + 1
+    if start == -1 or end <= start:
+        return None
+    try:
+        flashcards = json.loads(content[start:end])
+    except json.JSONDecodeError:
+        return None
+    return flashcards if isinstance(flashcards, list) else None
+
+
+def openai_configured():
+    return Config.OPENAI_API_KEY not in ('demo-mode-no-api-key', 'your-openai-api-key-here')
+
+
+class FlashcardArrayParser:
+    """Incremental parser for a JSON array of objects wrapped in arbitrary text"""
+
+    def __init__(self):
+        self._buffer = ''
+        self._pos = 0
+        self._started = False
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._object_start = None
+        self.finished = False
+
+    def feed(self, text):
+        """Add more completion text; returns the flashcards completed by it"""
+        if self.finished:
+            return []
+        self._buffer += text
+        cards = []
+        buffer = self._buffer
+        pos = self._pos
+        while pos < len(buffer):
+            char = buffer[pos]
+            if not self._started:
+                if char == '[':
+                    self._started = True
+                pos += 1
+                continue
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == '\\':
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in '{[':
+                if self._depth == 0 and char == '{':
+                    self._object_start = pos
+                self._depth += 1
+            elif char in '}]':
+                if self._depth == 0:
+                    # The closing bracket of the array itself
+                    self.finished = True
+                    pos += 1
+                    break
+                self._depth -= 1
+                if self._depth == 0 and self._object_start is not None:
+                    card = self._decode(buffer[self._object_start:pos + 1])
+                    if card is not None:
+                        cards.append(card)
+                    self._object_start = None
+            pos += 1
+
+        # Only the unfinished object needs to be kept
+        keep_from = self._object_start if self._object_start is not None else pos
+        self._buffer = buffer[keep_from:]
+        self._pos = pos - keep_from
+        if self._object_start is not None:
+            self._object_start = 0
+        return cards
+
+    @staticmethod
+    def _decode(text):
+        try:
+            card = json.loads(text)
+        except json.JSONDecodeError:
+            return None
+        if isinstance(card, dict) and 'question' in card and 'answer' in card:
+            return {'question': str(card['question']), 'answer': str(card['answer'])}
+        return None
+
+
+def stream_completion(notes, num_cards):
+    """Yield text deltas of a streamed chat completion"""
+    # Timed until the last delta, or until the client goes away
+    with openai_call('stream'):
+        stream = openai.chat.completions.create(
+            model=Config.OPENAI_MODEL,
+            messages=flashcard_messages(notes, num_cards),
+            max_tokens=Config.OPENAI_MAX_TOKENS,
+            temperature=Config.OPENAI_TEMPERATURE,
+            stream=True
+        )
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def iter_generation_events(notes, num_cards, fallback, save, completion=None, generate_chunk=None):
+    """
+    Yield SSE events for one generation: a 'card' event per flashcard as it is
+    parsed, then 'done' with the saved card ids, or 'error' if nothing came back.
+    Notes longer than one prompt are sent to generate_chunk piece by piece, and
+    each piece's cards are streamed as soon as that piece finishes.
+    """
+    started = time.perf_counter()
+    first_card_at = None
+    cards = []
+    source = 'openai'
+
+    key = cache_key(notes, num_cards)
+    chunked = (generate_chunk is not None and completion is None and openai_configured()
+               and len(split_notes(notes)) > 1)
+    # Chunks are cached one by one inside generate_chunk
+    cached = None if chunked else generation_cache.get(key)
+    if chunked:
+        deduper = CardDeduper()
+        for _, chunk_cards in iter_chunk_cards(notes, num_cards, generate_chunk):
+            for card in chunk_cards:
+                if len(cards) < int(num_cards) and deduper.add(card):
+                    if first_card_at is None:
+                        first_card_at = time.perf_counter()
+                    cards.append(card)
+                    yield sse_event('card', card)
+    elif cached is not None:
+        source = 'cache'
+        cards = cached
+        for card in cards:
+            yield sse_event('card', card)
+        first_card_at = time.perf_counter() if cards else None
+    elif completion is not None or openai_configured():
+        parser = FlashcardArrayParser()
+        completed = False
+        try:
+            for text in (completion or stream_completion)(notes, num_cards):
+                for card in parser.feed(text):
+                    if first_card_at is None:
+                        first_card_at = time.perf_counter()
+                    cards.append(card)
+                    yield sse_event('card', card)
+                if parser.finished:
+                    break
+            completed = parser.finished
+        except Exception as e:
+            log('openai_error', 'error', mode='stream', error=str(e))
+        # A stream cut off partway still shows its cards, but must not be cached as the full answer
+        if cards and completed:
+            generation_cache.put(key, cards, time.perf_counter() - started)
+
+    if not cards:
+        source = 'fallback'
+        cards = fallback(notes, num_cards)
+        for card in cards:
+            yield sse_event('card', card)
+        first_card_at = time.perf_counter() if cards else None
+
+    if not cards:
+        yield sse_event('error', {'error': 'No flashcards could be generated from these notes'})
+        return
+
+    card_ids = save(cards)
+    finished = time.perf_counter()
+    yield sse_event('done', {
+        'card_ids': card_ids,
+        'source': source,
+        'message': f'Successfully generated {len(cards)} flashcards!',
+        'time_to_first_card': round(first_card_at - started, 3),
+        'total_time': round(finished - started, 3)
+    })
+
+
+def sse_response(events):
+    """Stream events to the client without proxy buffering"""
+    response = Response(stream_with_context(events), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,246 @@
+"""
+Cache for AI flashcard generation results
+Entries are keyed by a hash of the normalized notes, the number of cards and
+the OpenAI model settings. A bounded in-memory LRU sits in front of an
+optional SQLite file that every gunicorn worker on the box can share.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+from config import Config
+from request_log import log
+from metrics import cache_samples, metrics
+
+
+def normalize_notes(notes):
+    """Canonical form of notes so whitespace-only edits hit the same entry"""
+    return ' '.join(unicodedata.normalize('NFKC', notes).split())
+
+
+def cache_key(notes, num_cards, model=None, temperature=None):
+    """Content address for one generation request"""
+    model = model or Config.OPENAI_MODEL
+    temperature = Config.OPENAI_TEMPERATURE if temperature is None else temperature
+    payload = json.dumps([normalize_notes(notes), int(num_cards), model, float(temperature)])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class SQLiteCacheTier:
+    """Persistent cache tier shared by every worker through one SQLite file"""
+
+    EVICT_EVERY = 50
+
+    def __init__(self, path, max_bytes=None, max_age=None):
+        self.path = path
+        self.max_bytes = max_bytes or Config.GENERATION_CACHE_DB_MAX_BYTES
+        self.max_age = max_age or Config.GENERATION_CACHE_MAX_AGE
+        self._puts = 0
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS generation_cache (
+                        key TEXT PRIMARY KEY,
+                        value TEXT NOT NULL,
+                        size INTEGER NOT NULL,
+                        generation_seconds REAL NOT NULL,
+                        created_at REAL NOT NULL,
+                        last_used REAL NOT NULL
+                    )
+                """)
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_generation_cache_last_used ON generation_cache (last_used)")
+        finally:
+            conn.close()
+
+    def _connect(self):
+        # One short-lived connection per call keeps this safe across threads and forks
+        conn = sqlite3.connect(self.path, timeout=5)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def get(self, key):
+        """Return (value, generation_seconds, age_seconds) or None"""
+        now = time.time()
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT value, generation_seconds, created_at FROM generation_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[2] > self.max_age:
+                return None
+            with conn:
+                conn.execute("UPDATE generation_cache SET last_used = ? WHERE key = ?", (now, key))
+            return row[0], row[1], now - row[2]
+        finally:
+            conn.close()
+
+    def put(self, key, value, generation_seconds):
+        now = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("""
+                    INSERT OR REPLACE INTO generation_cache
+                        (key, value, size, generation_seconds, created_at, last_used)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, (key, value, len(value), generation_seconds, now, now))
+            self._puts += 1
+            if self._puts % self.EVICT_EVERY == 1:
+                self.evict(conn)
+        finally:
+            conn.close()
+
+    def evict(self, conn=None):
+        """Drop entries past max_age, then least recently used ones until under max_bytes"""
+        own = conn is None
+        conn = conn or self._connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM generation_cache WHERE created_at < ?", (time.time() - self.max_age,))
+                total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM generation_cache").fetchone()[0]
+                if total > self.max_bytes:
+                    excess = total - self.max_bytes
+                    freed = 0
+                    stale = []
+                    for key, size in conn.execute("SELECT key, size FROM generation_cache ORDER BY last_used"):
+                        stale.append((key,))
+                        freed += size
+                        if freed >= excess:
+                            break
+                    conn.executemany("DELETE FROM generation_cache WHERE key = ?", stale)
+        finally:
+            if own:
+                conn.close()
+
+    def stats(self):
+        conn = self._connect()
+        try:
+            entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM generation_cache").fetchone()
+            return {'path': self.path, 'entries': entries, 'bytes': size, 'max_bytes': self.max_bytes}
+        finally:
+            conn.close()
+
+
+class GenerationCache:
+    """Two-tier cache of generated flashcard lists"""
+
+    def __init__(self, max_entries=None, max_bytes=None, max_age=None, persistent=None):
+        self.max_entries = max_entries or Config.GENERATION_CACHE_SIZE
+        self.max_bytes = max_bytes or Config.GENERATION_CACHE_MAX_BYTES
+        self.max_age = max_age or Config.GENERATION_CACHE_MAX_AGE
+        self.persistent = persistent
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+        self.seconds_saved = 0.0
+
+    def get(self, key):
+        """Return a fresh copy of the cached flashcards, or None"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, generation_seconds, created = entry
+                if now - created <= self.max_age:
+                    self._entries.move_to_end(key)
+                    self.memory_hits += 1
+                    self.seconds_saved += generation_seconds
+                    return json.loads(value)
+                self._remove(key)
+
+        if self.persistent is not None:
+            try:
+                found = self.persistent.get(key)
+            except sqlite3.Error as e:
+                log('cache_error', 'error', cache='generation', operation='read', error=str(e))
+                found = None
+            if found is not None:
+                value, generation_seconds, age = found
+                with self._lock:
+                    self.persistent_hits += 1
+                    self.seconds_saved += generation_seconds
+                    # Keep the entry's real age so memory does not serve it past max_age
+                    self._store(key, value, generation_seconds, age)
+                return json.loads(value)
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, flashcards, generation_seconds):
+        """Remember a generation result and how long it took to produce"""
+        value = json.dumps(flashcards)
+        with self._lock:
+            self._store(key, value, generation_seconds)
+        if self.persistent is not None:
+            try:
+                self.persistent.put(key, value, generation_seconds)
+            except sqlite3.Error as e:
+                log('cache_error', 'error', cache='generation', operation='write', error=str(e))
+
+    def clear(self):
+        """Drop every entry held in memory"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Hit ratio and OpenAI latency avoided by this worker"""
+        with self._lock:
+            hits = self.memory_hits + self.persistent_hits
+            lookups = hits + self.misses
+            stats = {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'memory_hits': self.memory_hits,
+                'persistent_hits': self.persistent_hits,
+                'misses': self.misses,
+                'hit_ratio': round(hits / lookups, 4) if lookups else 0.0,
+                'seconds_saved': round(self.seconds_saved, 3)
+            }
+        if self.persistent is not None:
+            try:
+                stats['persistent'] = self.persistent.stats()
+            except sqlite3.Error as e:
+                stats['persistent'] = {'error': str(e)}
+        return stats
+
+    def _store(self, key, value, generation_seconds, age=0.0):
+        if len(value) > self.max_bytes:
+            return
+        self._remove(key)
+        self._entries[key] = (value, generation_seconds, time.monotonic() - age)
+        self._bytes += len(value)
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            _, (evicted, _, _) = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[0])
+
+
+def _default_persistent_tier():
+    if not Config.GENERATION_CACHE_DB:
+        return None
+    try:
+        return SQLiteCacheTier(Config.GENERATION_CACHE_DB)
+    except sqlite3.Error as e:
+        log('cache_error', 'error', cache='generation', operation='open', error=str(e), fallback='memory only')
+        return None
+
+
+# Global generation cache instance
+generation_cache = GenerationCache(persistent=_default_persistent_tier())
+metrics.register_collector(lambda: cache_samples(
+    'generation', generation_cache.memory_hits + generation_cache.persistent_hits, generation_cache.misses))
@@ -0,0 +1,308 @@
+"""
+Background flashcard generation jobs
+Submitting a job stores it in SQLite and hands it to a small thread pool, so
+the request returns at once instead of holding a sync gunicorn worker for the
+whole OpenAI round-trip. Every job carries a lease, renewed by the worker's
+reaper thread for as long as the job runs; if the worker is recycled or dies,
+the lease runs out and another worker's reaper picks the job up again.
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from config import Config
+from request_log import log
+
+STATUS_QUEUED = 'queued'
+STATUS_RUNNING = 'running'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+
+
+class JobQueueFull(Exception):
+    """Raised when this worker already has as many jobs as it may hold"""
+
+
+class JobQueue:
+    """SQLite-backed job queue drained by a bounded thread pool"""
+
+    def __init__(self, name, runner, path=None, max_workers=None, max_pending=None,
+                 lease_seconds=None, max_attempts=None, reap_interval=None, retention=None):
+        self.name = name
+        self.runner = runner
+        self.path = path or Config.GENERATION_JOBS_DB
+        self.max_workers = max_workers or Config.GENERATION_JOB_WORKERS
+        self.max_pending = max_pending or Config.GENERATION_JOB_QUEUE_SIZE
+        self.lease_seconds = lease_seconds or Config.GENERATION_JOB_LEASE
+        self.max_attempts = max_attempts or Config.GENERATION_JOB_MAX_ATTEMPTS
+        self.reap_interval = reap_interval or Config.GENERATION_JOB_REAP_INTERVAL
+        self.retention = retention or Config.GENERATION_JOB_RETENTION
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS generation_jobs (
+                    id TEXT PRIMARY KEY,
+                    queue TEXT NOT NULL,
+                    user_id TEXT,
+                    status TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    lease_owner TEXT,
+                    lease_expires REAL NOT NULL,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_generation_jobs_lease
+                ON generation_jobs (queue, status, lease_expires)
+            """)
+        self._reset()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        """Threads do not survive fork, so each process starts its own lazily"""
+        self._pid = os.getpid()
+        self.owner = f"{socket.gethostname()}:{self._pid}:{uuid.uuid4().hex[:8]}"
+        self._lock = threading.Lock()
+        self._executor = None
+        self._reaper = None
+        self._stop = threading.Event()
+        self._pending = 0
+        self._running = set()
+        self._stats = {'submitted': 0, 'completed': 0, 'failed': 0, 'reclaimed': 0, 'rejected': 0}
+
+    @contextmanager
+    def _connect(self):
+        """Short-lived connection committed on success, closed either way"""
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def start(self):
+        """Start the thread pool and reaper for this process if not running"""
+        if self._executor is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._reset()
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix=f"{self.name}-job")
+                self._stop = threading.Event()
+                self._reaper = threading.Thread(target=self._reap_loop, args=(self._stop,),
+                                                name=f"{self.name}-reaper", daemon=True)
+                self._reaper.start()
+
+    def stop(self, wait=True):
+        """Stop accepting work; unfinished jobs are left for another worker"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+            self._stop.set()
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    def submit(self, payload, user_id=None):
+        """Persist a job and schedule it; returns the job id"""
+        self.start()
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._stats['rejected'] += 1
+                raise JobQueueFull(f"{self._pending} generation jobs already pending")
+            self._pending += 1
+
+        job_id = str(uuid.uuid4())
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                conn.execute("""
+                    INSERT INTO generation_jobs
+                        (id, queue, user_id, status, payload, lease_owner, lease_expires, created_at, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, (job_id, self.name, user_id, STATUS_QUEUED, json.dumps(payload), self.owner,
+                      now + self.lease_seconds, now, now))
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+            raise
+
+        with self._lock:
+            self._stats['submitted'] += 1
+        self._schedule(job_id)
+        return job_id
+
+    def get(self, job_id):
+        """Public view of a job, or None"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM generation_jobs WHERE id = ? AND queue = ?", (job_id, self.name)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            'id': row['id'],
+            'user_id': row['user_id'],
+            'status': row['status'],
+            'result': json.loads(row['result']) if row['result'] else None,
+            'error': row['error'],
+            'attempts': row['attempts'],
+            'created_at': row['created_at'],
+            'updated_at': row['updated_at']
+        }
+
+    def _schedule(self, job_id):
+        executor = self._executor
+        try:
+            if executor is None:
+                raise RuntimeError('job queue stopped')
+            executor.submit(self._run, job_id)
+        except RuntimeError:
+            # Shutting down: the lease will expire and another worker takes over
+            with self._lock:
+                self._pending -= 1
+
+    def _claim(self, job_id):
+        """Take the lease on a job; returns its row if this worker should run it"""
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute("""
+                UPDATE generation_jobs
+                SET status = ?, lease_owner = ?, lease_expires = ?, attempts = attempts + 1, updated_at = ?
+                WHERE id = ? AND (
+                    (status = ? AND lease_owner = ?)
+                    OR (status IN (?, ?) AND lease_expires < ?)
+                )
+            """, (STATUS_RUNNING, self.owner, now + self.lease_seconds, now,
+                  job_id, STATUS_QUEUED, self.owner, STATUS_QUEUED, STATUS_RUNNING, now))
+            if cursor.rowcount != 1:
+                return None
+            return conn.execute("SELECT * FROM generation_jobs WHERE id = ?", (job_id,)).fetchone()
+
+    def _finish(self, job_id, status, result=None, error=None):
+        with self._connect() as conn:
+            conn.execute("""
+                UPDATE generation_jobs
+                SET status = ?, result = ?, error = ?, lease_owner = NULL, updated_at = ?
+                WHERE id = ? AND lease_owner = ?
+            """, (status, json.dumps(result) if result is not None else None, error,
+                  time.time(), job_id, self.owner))
+
+    def _run(self, job_id):
+        try:
+            row = self._claim(job_id)
+            if row is None:
+                return
+            with self._lock:
+                self._running.add(job_id)
+            try:
+                result = self.runner(json.loads(row['payload']), row['user_id'])
+            except Exception as e:
+                log('job_failed', 'error', job_id=job_id, error=str(e))
+                self._finish(job_id, STATUS_FAILED, error=str(e))
+                with self._lock:
+                    self._stats['failed'] += 1
+            else:
+                self._finish(job_id, STATUS_DONE, result=result)
+                with self._lock:
+                    self._stats['completed'] += 1
+        except sqlite3.Error as e:
+            log('job_store_error', 'error', error=str(e))
+        finally:
+            with self._lock:
+                self._running.discard(job_id)
+                self._pending -= 1
+
+    def renew_leases(self):
+        """Extend the lease of every job this worker is running; returns how many"""
+        with self._lock:
+            running = list(self._running)
+        if not running:
+            return 0
+        with self._connect() as conn:
+            cursor = conn.execute(f"""
+                UPDATE generation_jobs
+                SET lease_expires = ?
+                WHERE status = ? AND lease_owner = ? AND id IN ({', '.join('?' * len(running))})
+            """, (time.time() + self.lease_seconds, STATUS_RUNNING, self.owner, *running))
+            return cursor.rowcount
+
+    def reap(self):
+        """Reschedule jobs whose lease ran out and drop old finished jobs"""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("""
+                UPDATE generation_jobs
+                SET status = ?, error = ?, lease_owner = NULL, updated_at = ?
+                WHERE queue = ? AND status IN (?, ?) AND lease_expires < ? AND attempts >= ?
+            """, (STATUS_FAILED, f"Abandoned after {self.max_attempts} attempts", now,
+                  self.name, STATUS_QUEUED, STATUS_RUNNING, now, self.max_attempts))
+            conn.execute("""
+                DELETE FROM generation_jobs
+                WHERE queue = ? AND status IN (?, ?) AND updated_at < ?
+            """, (self.name, STATUS_DONE, STATUS_FAILED, now - self.retention))
+            with self._lock:
+                room = self.max_pending - self._pending
+            if room <= 0:
+                return 0
+            orphans = [row['id'] for row in conn.execute("""
+                SELECT id FROM generation_jobs
+                WHERE queue = ? AND status IN (?, ?) AND lease_expires < ?
+                ORDER BY created_at
+                LIMIT ?
+            """, (self.name, STATUS_QUEUED, STATUS_RUNNING, now, room))]
+        with self._lock:
+            # Never run a job twice in this worker, even if a renewal was late
+            orphans = [job_id for job_id in orphans if job_id not in self._running]
+
+        for job_id in orphans:
+            with self._lock:
+                self._pending += 1
+                self._stats['reclaimed'] += 1
+            self._schedule(job_id)
+        return len(orphans)
+
+    def _reap_loop(self, stop):
+        # Wake often enough to renew running leases well before they run out
+        interval = min(self.reap_interval, self.lease_seconds / 3)
+        while True:
+            stopping = stop.wait(interval)
+            try:
+                self.renew_leases()
+                if not stopping:
+                    self.reap()
+            except sqlite3.Error as e:
+                log('job_store_error', 'error', operation='reap', error=str(e))
+            if stopping:
+                # Keep renewing for jobs the executor is still finishing
+                with self._lock:
+                    if not self._running:
+                        return
+                time.sleep(interval)
+
+    def stats(self):
+        """Job counters for this worker and queue depth across all workers"""
+        with self._lock:
+            stats = dict(self._stats, pending=self._pending, workers=self.max_workers)
+        try:
+            with self._connect() as conn:
+                stats['jobs'] = {row['status']: row['count'] for row in conn.execute(
+                    "SELECT status, COUNT(*) AS count FROM generation_jobs WHERE queue = ? GROUP BY status",
+                    (self.name,)
+                )}
+        except sqlite3.Error as e:
+            stats['jobs'] = {'error': str(e)}
+        return stats
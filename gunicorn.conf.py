@@ -1,10 +1,19 @@
 # Gunicorn configuration file
 bind = "0.0.0.0:10000"
+# Each worker opens its own MySQL pool (Config.DB_POOL_SIZE), so the database
+# must accept workers * DB_POOL_SIZE connections. /debug/stats reports usage.
 workers = 2
-worker_class = "sync"
+# Threads let a worker keep serving while some of its requests wait on the
+# password hashing pool (PASSWORD_HASH_WORKERS processes per worker)
+worker_class = "gthread"
+threads = 4
 worker_connections = 1000
+# /jobs runs OpenAI calls on background threads, so requests stay well under
+# this timeout; /generate is kept for clients that cannot poll
 timeout = 30
 keepalive = 2
 max_requests = 1000
 max_requests_jitter = 100
+# Pools are fork-safe: connections opened while preloading are dropped in the
+# workers after fork
 preload_app = True
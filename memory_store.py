@@ -0,0 +1,379 @@
+"""
+In-memory storage for the demo and simple deployments
+Every lookup goes through a dict index, so verifying a session or finding
+a user costs the same with ten users or a million. Sessions also sit in a
+min-heap by expiry, so expired ones are dropped as new ones arrive and
+memory follows the number of live sessions.
+"""
+
+import heapq
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from datetime import datetime
+
+from config import Config
+from near_duplicates import LSHIndex
+from review_scheduler import ReviewQueue, new_state, schedule
+from search_index import SearchIndex
+
+
+class SortedCards:
+    """Cards kept in (created_at, id) order for keyset pagination"""
+
+    def __init__(self):
+        self.keys = []
+        self.cards = []
+
+    def insert(self, card):
+        key = (card['created_at'], card['id'])
+        if not self.keys or key >= self.keys[-1]:
+            # New cards almost always sort last
+            self.keys.append(key)
+            self.cards.append(card)
+        else:
+            index = bisect_left(self.keys, key)
+            self.keys.insert(index, key)
+            self.cards.insert(index, card)
+
+    def remove(self, card):
+        key = (card['created_at'], card['id'])
+        index = bisect_left(self.keys, key)
+        if index < len(self.keys) and self.keys[index] == key:
+            del self.keys[index]
+            del self.cards[index]
+
+    def page(self, limit, after=None):
+        """Up to limit cards older than the after key, newest first"""
+        end = bisect_left(self.keys, tuple(after)) if after else len(self.keys)
+        start = max(0, end - limit)
+        return self.cards[start:end][::-1]
+
+    def page_after(self, limit, before=None):
+        """Up to limit cards newer than the before key, oldest first"""
+        start = bisect_right(self.keys, tuple(before)) if before else 0
+        return self.cards[start:start + limit]
+
+    def __len__(self):
+        return len(self.cards)
+
+
+class MemoryStore:
+    """Hash-indexed storage for users, sessions, flashcards and study sessions"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.users = {}
+        self.sessions = {}
+        self.flashcards = {}
+        self.study_sessions = {}
+        self.reset_tokens = {}
+        self._users_by_username = {}
+        self._users_by_email = {}
+        self._cards_by_user = {}
+        self._cards_by_subject = {}
+        self._study_sessions_by_user = {}
+        self._study_sessions_by_card = {}
+        self._reset_token_by_email = {}
+        self._sessions_by_user = {}
+        self._session_expiry = []
+        self._session_stats = {'expired': 0, 'evicted': 0}
+        self._near_duplicates_by_user = {}
+        self._search_by_user = {}
+        self._review_states = {}
+        self._review_queues = {}
+
+    # Users
+
+    def add_user(self, user):
+        """Store a new user; returns False if the username or email is taken"""
+        with self._lock:
+            if self.user_exists(user['username'], user['email']):
+                return False
+            self.users[user['id']] = user
+            self._users_by_username[user['username']] = user
+            self._users_by_email[user['email']] = user
+            return True
+
+    def get_user(self, user_id):
+        return self.users.get(user_id)
+
+    def get_user_by_username(self, username):
+        return self._users_by_username.get(username)
+
+    def get_user_by_email(self, email):
+        return self._users_by_email.get(email)
+
+    def user_exists(self, username, email):
+        return username in self._users_by_username or email in self._users_by_email
+
+    def update_password(self, user_id, salt, password_hash):
+        """Replace a user's password hash; returns the user or None"""
+        with self._lock:
+            user = self.users.get(user_id)
+            if user is not None:
+                user['salt'] = salt
+                user['password_hash'] = password_hash
+            return user
+
+    # Login sessions
+
+    def add_session(self, session, max_per_user=None):
+        """Store a session, evicting the user's least recently used ones over the cap"""
+        max_per_user = max_per_user or Config.MAX_SESSIONS_PER_USER
+        with self._lock:
+            self.expire_sessions()
+            token = session['session_token']
+            self.sessions[token] = session
+            heapq.heappush(self._session_expiry, (session['expires_at'], token))
+            user_sessions = self._sessions_by_user.setdefault(session['user_id'], OrderedDict())
+            user_sessions[token] = None
+            while len(user_sessions) > max_per_user:
+                oldest = next(iter(user_sessions))
+                self.remove_session(oldest)
+                self._session_stats['evicted'] += 1
+
+    def get_session(self, session_token):
+        return self.sessions.get(session_token)
+
+    def remove_session(self, session_token):
+        with self._lock:
+            session = self.sessions.pop(session_token, None)
+            if session is not None:
+                user_sessions = self._sessions_by_user.get(session['user_id'])
+                if user_sessions is not None:
+                    user_sessions.pop(session_token, None)
+                    if not user_sessions:
+                        del self._sessions_by_user[session['user_id']]
+                # Removed sessions leave stale heap entries; rebuild once they dominate
+                if len(self._session_expiry) > 2 * len(self.sessions) + 64:
+                    self._session_expiry = [(s['expires_at'], token) for token, s in self.sessions.items()]
+                    heapq.heapify(self._session_expiry)
+            return session
+
+    def expire_sessions(self, now=None):
+        """Drop every session whose expiry has passed; returns how many"""
+        now = now or datetime.now()
+        expired = 0
+        with self._lock:
+            # remove_session may rebuild the heap, so always go through the attribute
+            while self._session_expiry and self._session_expiry[0][0] <= now:
+                expires_at, token = heapq.heappop(self._session_expiry)
+                session = self.sessions.get(token)
+                # Skip entries for sessions already removed (or replaced under the same token)
+                if session is not None and session['expires_at'] == expires_at:
+                    self.remove_session(token)
+                    expired += 1
+            self._session_stats['expired'] += expired
+        return expired
+
+    def session_stats(self):
+        """Live session count and how many sessions expired or were evicted"""
+        with self._lock:
+            return dict(self._session_stats, live=len(self.sessions), users=len(self._sessions_by_user),
+                        heap_entries=len(self._session_expiry))
+
+    def verify_session(self, session_token):
+        """Return user info for a live session token, or None"""
+        session = self.sessions.get(session_token)
+        if session is None:
+            return None
+
+        if session['expires_at'] <= datetime.now():
+            self.expire_sessions()
+            return None
+
+        user = self.users.get(session['user_id'])
+        if user is None:
+            return None
+
+        with self._lock:
+            user_sessions = self._sessions_by_user.get(user['id'])
+            if user_sessions is not None and session_token in user_sessions:
+                user_sessions.move_to_end(session_token)
+
+        return {
+            'user_id': user['id'],
+            'username': user['username'],
+            'email': user['email']
+        }
+
+    # Flashcards
+
+    def add_flashcards(self, cards, signatures=None):
+        """Store flashcard dicts and index them by owner, plus MinHash signatures if given"""
+        now = time.time()
+        with self._lock:
+            for position, card in enumerate(cards):
+                self.flashcards[card['id']] = card
+                user_id = card.get('user_id')
+                self._cards_by_user.setdefault(user_id, SortedCards()).insert(card)
+                self._cards_by_subject.setdefault((user_id, card.get('subject')), SortedCards()).insert(card)
+                self._search_by_user.setdefault(user_id, SearchIndex()).add(card['id'], card)
+                if signatures is not None:
+                    self.near_duplicate_index(user_id).add(card['id'], signatures[position])
+                if user_id is not None:
+                    # New cards are due for their first review straight away
+                    self._review_states[card['id']] = new_state(now)
+                    self._review_queues.setdefault(user_id, ReviewQueue()).push(card['id'], now)
+
+    def remove_flashcards(self, card_ids):
+        """Delete flashcards by id; returns how many were removed"""
+        removed = 0
+        with self._lock:
+            for card_id in card_ids:
+                card = self.flashcards.pop(card_id, None)
+                if card is None:
+                    continue
+                user_id = card.get('user_id')
+                self._cards_by_user[user_id].remove(card)
+                self._cards_by_subject[(user_id, card.get('subject'))].remove(card)
+                self._search_by_user[user_id].remove(card_id)
+                index = self._near_duplicates_by_user.get(user_id)
+                if index is not None:
+                    index.remove(card_id)
+                for session_id in self._study_sessions_by_card.pop(card_id, ()):
+                    self.study_sessions[session_id]['flashcard_ids'].remove(card_id)
+                if self._review_states.pop(card_id, None) is not None:
+                    self._review_queues[user_id].remove(card_id)
+                removed += 1
+        return removed
+
+    def near_duplicate_index(self, user_id):
+        """The LSH index of a user's card signatures"""
+        with self._lock:
+            return self._near_duplicates_by_user.setdefault(user_id, LSHIndex())
+
+    def search_flashcards(self, user_id, query, limit=20, subject=None):
+        """Up to limit of a user's cards matching query, best BM25 match first"""
+        index = self._search_by_user.get(user_id)
+        if index is None:
+            return []
+        accept = None
+        if subject:
+            accept = lambda card_id: self.flashcards[card_id].get('subject') == subject
+        with self._lock:
+            results = index.search(query, limit, accept)
+            return [dict(self.flashcards[card_id], score=round(score, 4)) for card_id, score in results]
+
+    def get_user_flashcards(self, user_id):
+        """Return a user's flashcards, oldest first"""
+        cards = self._cards_by_user.get(user_id)
+        return list(cards.cards) if cards else []
+
+    def iter_user_flashcards(self, user_id, newest_first=True):
+        """Yield a user's flashcards a page at a time, newest first unless newest_first is False"""
+        cards = self._cards_by_user.get(user_id)
+        if not cards:
+            return
+        key = None
+        while True:
+            # Each page is read by key under the lock, so cards saved mid-export do not shift it
+            with self._lock:
+                if newest_first:
+                    page = cards.page(Config.EXPORT_FETCH_SIZE, key)
+                else:
+                    page = cards.page_after(Config.EXPORT_FETCH_SIZE, key)
+            if not page:
+                return
+            yield from page
+            key = (page[-1]['created_at'], page[-1]['id'])
+
+    def page_flashcards(self, user_id, limit, after=None, subject=None):
+        """Up to limit of a user's cards older than the (created_at, id) key, newest first"""
+        if subject:
+            cards = self._cards_by_subject.get((user_id, subject))
+        else:
+            cards = self._cards_by_user.get(user_id)
+        return cards.page(limit, after) if cards else []
+
+    # Reviews
+
+    def due_reviews(self, user_id, limit=1, now=None):
+        """Up to limit of a user's cards due for review by now, soonest first, each with its review state"""
+        now = time.time() if now is None else now
+        with self._lock:
+            queue = self._review_queues.get(user_id)
+            if queue is None:
+                return []
+            return [dict(self.flashcards[card_id], review=dict(self._review_states[card_id]))
+                    for card_id in queue.due(now, limit)]
+
+    def next_review_at(self, user_id):
+        """When the user's next card falls due, or None if they have no cards"""
+        with self._lock:
+            queue = self._review_queues.get(user_id)
+            return queue.next_due_at() if queue else None
+
+    def record_review(self, user_id, card_id, grade, now=None):
+        """Reschedule a card after an answer; returns its new state, or None if it is not the user's"""
+        now = time.time() if now is None else now
+        with self._lock:
+            state = self._review_states.get(card_id)
+            if state is None or self.flashcards[card_id].get('user_id') != user_id:
+                return None
+            state = self._review_states[card_id] = schedule(state, grade, now)
+            self._review_queues[user_id].push(card_id, state['due_at'])
+            return dict(state)
+
+    # Study sessions
+
+    def add_study_session(self, study_session):
+        """Store a study session; only the owner's existing cards are kept, in the order given"""
+        with self._lock:
+            user_id = study_session.get('user_id')
+            flashcard_ids = [card_id for card_id in dict.fromkeys(study_session.get('flashcard_ids', []))
+                             if card_id in self.flashcards and self.flashcards[card_id].get('user_id') == user_id]
+            study_session = dict(study_session, flashcard_ids=flashcard_ids)
+            self.study_sessions[study_session['id']] = study_session
+            self._study_sessions_by_user.setdefault(user_id, []).append(study_session)
+            for card_id in flashcard_ids:
+                self._study_sessions_by_card.setdefault(card_id, set()).add(study_session['id'])
+            return study_session
+
+    def get_user_study_sessions(self, user_id):
+        return [dict(study_session, flashcard_ids=list(study_session['flashcard_ids']))
+                for study_session in self._study_sessions_by_user.get(user_id, ())]
+
+    def get_study_session_cards(self, user_id, session_id):
+        """A user's study session and its cards in order, or None if it is not theirs"""
+        with self._lock:
+            study_session = self.study_sessions.get(session_id)
+            if study_session is None or study_session.get('user_id') != user_id:
+                return None
+            cards = [self.flashcards[card_id] for card_id in study_session['flashcard_ids']]
+            return {key: value for key, value in study_session.items() if key != 'flashcard_ids'}, cards
+
+    # Password reset tokens
+
+    def set_reset_token(self, reset_data):
+        """Store a reset token, replacing any earlier token for the same email"""
+        with self._lock:
+            previous = self._reset_token_by_email.pop(reset_data['email'], None)
+            if previous is not None:
+                self.reset_tokens.pop(previous, None)
+            self.reset_tokens[reset_data['token']] = reset_data
+            self._reset_token_by_email[reset_data['email']] = reset_data['token']
+
+    def get_reset_token(self, token):
+        """Return reset data for an unexpired token, or None"""
+        reset_data = self.reset_tokens.get(token)
+        if reset_data is None or reset_data['expires_at'] <= datetime.now():
+            return None
+        return reset_data
+
+    def remove_reset_token(self, token):
+        with self._lock:
+            reset_data = self.reset_tokens.pop(token, None)
+            if reset_data is not None and self._reset_token_by_email.get(reset_data['email']) == token:
+                del self._reset_token_by_email[reset_data['email']]
+
+    def counts(self):
+        """Number of stored objects of each kind"""
+        return {
+            'users': len(self.users),
+            'sessions': len(self.sessions),
+            'flashcards': len(self.flashcards),
+            'study_sessions': len(self.study_sessions)
+        }
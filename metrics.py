@@ -0,0 +1,393 @@
+"""
+Prometheus metrics for app.py, demo.py and render_simple.py
+init_app() adds GET /metrics and times every request: counts and latency
+histograms per route, method and status, plus requests in flight. MySQL and
+SQLite queries, OpenAI calls (latency and tokens) and cache hit ratios are
+recorded through the helpers below.
+
+Recording only touches dicts in this process, so it costs microseconds
+(python benchmarks/bench_metrics.py). Gunicorn workers are separate
+processes, so with METRICS_DB set each worker adds its counts to a shared
+SQLite file every METRICS_FLUSH_INTERVAL seconds and /metrics reports the
+total of all workers, including ones that have been recycled. Gauges are
+kept per worker and dropped once a worker stops flushing.
+"""
+
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from flask import Response, g, request
+
+from config import Config
+from request_log import log
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+OPENAI_BUCKETS = (0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0, 120.0)
+
+# name -> (type, help, histogram buckets)
+DEFINITIONS = {
+    'study_buddy_http_requests_total': ('counter', 'HTTP requests by route, method and status', None),
+    'study_buddy_http_request_duration_seconds': ('histogram', 'Time to build each HTTP response', LATENCY_BUCKETS),
+    'study_buddy_http_requests_in_flight': ('gauge', 'HTTP requests being handled', None),
+    'study_buddy_db_query_duration_seconds': ('histogram', 'Database statement time by backend and statement',
+                                              QUERY_BUCKETS),
+    'study_buddy_openai_request_duration_seconds': ('histogram', 'OpenAI chat completion time by mode and outcome',
+                                                    OPENAI_BUCKETS),
+    'study_buddy_openai_tokens_total': ('counter', 'OpenAI tokens used, by prompt and completion', None),
+    'study_buddy_cache_requests_total': ('counter', 'Cache lookups by cache and result', None),
+    'study_buddy_cache_hit_ratio': ('gauge', 'Share of cache lookups that were hits since the counters began', None),
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS metric_series (
+    name TEXT NOT NULL,
+    suffix TEXT NOT NULL,
+    labels TEXT NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (name, suffix, labels)
+);
+CREATE TABLE IF NOT EXISTS metric_gauges (
+    pid INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    labels TEXT NOT NULL,
+    value REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (pid, name, labels)
+);
+"""
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+    return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + '}'
+
+
+def _format_value(value):
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Metrics:
+    """Counters, gauges and histograms for one process, optionally summed across workers in SQLite"""
+
+    def __init__(self, path=None, flush_interval=None):
+        self.path = Config.METRICS_DB if path is None else path
+        self.flush_interval = flush_interval or Config.METRICS_FLUSH_INTERVAL
+        self._collectors = []
+        self._reset()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._reset)
+        if self.path:
+            conn = self._connect()
+            try:
+                conn.executescript(SCHEMA)
+            finally:
+                conn.close()
+            atexit.register(self._try_flush)
+
+    def _reset(self):
+        """Each worker counts only its own requests"""
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+        self._flushed = {}
+        self._flusher = None
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    # Recording - labels are (key, value) pairs in key order
+
+    def inc(self, name, labels=(), value=1):
+        key = (name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+        if self.path and self._flusher is None:
+            self._start_flusher()
+
+    def add_gauge(self, name, delta, labels=()):
+        key = (name, labels)
+        with self._lock:
+            self._gauges[key] = self._gauges.get(key, 0) + delta
+
+    def observe(self, name, value, labels=()):
+        buckets = DEFINITIONS[name][2]
+        key = (name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                # One count per bucket plus +Inf, then sum and count
+                histogram = self._histograms[key] = [0] * (len(buckets) + 3)
+            histogram[bisect_left(buckets, value)] += 1
+            histogram[-2] += value
+            histogram[-1] += 1
+        if self.path and self._flusher is None:
+            self._start_flusher()
+
+    def register_collector(self, collect):
+        """collect() returns (name, labels, value) for counters kept elsewhere in this process"""
+        self._collectors.append(collect)
+
+    # Aggregation
+
+    def _series(self):
+        """This process's cumulative counter and histogram series: (name, suffix, labels) -> value"""
+        with self._lock:
+            counters = list(self._counters.items())
+            histograms = [(key, list(values)) for key, values in self._histograms.items()]
+        series = {}
+        for (name, labels), value in counters:
+            series[(name, '', labels)] = value
+        for collect in self._collectors:
+            for name, labels, value in collect():
+                series[(name, '', labels)] = series.get((name, '', labels), 0) + value
+        for (name, labels), values in histograms:
+            buckets = DEFINITIONS[name][2]
+            cumulative = 0
+            for bound, count in zip(buckets + ('+Inf',), values):
+                cumulative += count
+                le = bound if bound == '+Inf' else _format_value(bound)
+                series[(name, '_bucket', labels + (('le', le),))] = cumulative
+            series[(name, '_sum', labels)] = values[-2]
+            series[(name, '_count', labels)] = values[-1]
+        return series
+
+    def _start_flusher(self):
+        with self._lock:
+            if self._flusher is not None:
+                return
+            self._flusher = threading.Thread(target=self._flush_loop, name='metrics-flush', daemon=True)
+        self._flusher.start()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self._try_flush()
+
+    def _try_flush(self):
+        try:
+            self.flush()
+        except sqlite3.Error as e:
+            log('metrics_flush_error', 'error', error=str(e))
+
+    def flush(self):
+        """Add this process's counts since the last flush to the shared file"""
+        if not self.path or self._pid != os.getpid():
+            return
+        with self._flush_lock:
+            series = self._series()
+            deltas = []
+            for key, value in series.items():
+                delta = value - self._flushed.get(key, 0)
+                if delta:
+                    deltas.append((key[0], key[1], json.dumps(key[2]), delta))
+            with self._lock:
+                gauges = [(self._pid, name, json.dumps(labels), value, time.time())
+                          for (name, labels), value in self._gauges.items()]
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.executemany("""
+                        INSERT INTO metric_series (name, suffix, labels, value) VALUES (?, ?, ?, ?)
+                        ON CONFLICT (name, suffix, labels) DO UPDATE SET value = value + excluded.value
+                    """, deltas)
+                    conn.executemany("INSERT OR REPLACE INTO metric_gauges VALUES (?, ?, ?, ?, ?)", gauges)
+            finally:
+                conn.close()
+            self._flushed = series
+
+    def _collect(self):
+        """All series and gauges to report: this process alone, or every worker's when METRICS_DB is set"""
+        if not self.path:
+            with self._lock:
+                gauges = {key: value for key, value in self._gauges.items()}
+            return self._series(), gauges
+
+        # A locked or unwritable file costs this scrape the unflushed counts, not the response
+        self._try_flush()
+        conn = self._connect()
+        try:
+            with conn:
+                # A worker that stopped flushing has exited; its gauges no longer apply
+                conn.execute("DELETE FROM metric_gauges WHERE updated_at < ?",
+                             (time.time() - 3 * self.flush_interval,))
+            rows = conn.execute("SELECT name, suffix, labels, value FROM metric_series").fetchall()
+            gauge_rows = conn.execute(
+                "SELECT name, labels, SUM(value) FROM metric_gauges GROUP BY name, labels"
+            ).fetchall()
+        finally:
+            conn.close()
+        gauges = {(name, tuple(map(tuple, json.loads(labels)))): value for name, labels, value in gauge_rows}
+        series = {(name, suffix, tuple(map(tuple, json.loads(labels)))): value for name, suffix, labels, value in rows}
+        return series, gauges
+
+    def render(self):
+        """Everything in the Prometheus text exposition format"""
+        series, gauges = self._collect()
+
+        hits, lookups = {}, {}
+        for (name, _, labels), value in series.items():
+            if name == 'study_buddy_cache_requests_total':
+                cache = dict(labels)['cache']
+                lookups[cache] = lookups.get(cache, 0) + value
+                if dict(labels)['result'] == 'hit':
+                    hits[cache] = hits.get(cache, 0) + value
+        for cache, total in lookups.items():
+            if total:
+                gauges[('study_buddy_cache_hit_ratio', (('cache', cache),))] = hits.get(cache, 0) / total
+
+        suffix_order = {'': 0, '_bucket': 1, '_sum': 2, '_count': 3}
+        lines = []
+        for name, (kind, help_text, _) in DEFINITIONS.items():
+            if kind == 'gauge':
+                samples = sorted((('', labels), value) for (gauge, labels), value in gauges.items() if gauge == name)
+            else:
+                samples = sorted(
+                    ((suffix, labels), value) for (metric, suffix, labels), value in series.items() if metric == name
+                )
+            if not samples:
+                continue
+            if kind == 'histogram':
+                def order(sample):
+                    (suffix, labels), _ = sample
+                    le = dict(labels).get('le')
+                    base = tuple(pair for pair in labels if pair[0] != 'le')
+                    return base, suffix_order[suffix], float('inf') if le == '+Inf' else float(le or 0)
+                samples.sort(key=order)
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for (suffix, labels), value in samples:
+                lines.append(f"{name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+# Global metrics instance
+metrics = Metrics()
+
+
+def init_app(app, registry=None):
+    """Time every request of app and serve GET /metrics"""
+    registry = registry or metrics
+    if not Config.METRICS_ENABLED:
+        return
+
+    @app.before_request
+    def start_request_timer():
+        g.metrics_started = time.perf_counter()
+        registry.add_gauge('study_buddy_http_requests_in_flight', 1)
+
+    @app.after_request
+    def record_request(response):
+        started = g.pop('metrics_started', None)
+        if started is not None:
+            registry.add_gauge('study_buddy_http_requests_in_flight', -1)
+            labels = (('method', request.method),
+                      ('route', request.url_rule.rule if request.url_rule else 'unmatched'),
+                      ('status', str(response.status_code)))
+            registry.inc('study_buddy_http_requests_total', labels)
+            registry.observe('study_buddy_http_request_duration_seconds', time.perf_counter() - started, labels[:2])
+        return response
+
+    @app.teardown_request
+    def end_request(exception=None):
+        # after_request is skipped when a response could not be built
+        if g.pop('metrics_started', None) is not None:
+            registry.add_gauge('study_buddy_http_requests_in_flight', -1)
+
+    def metrics_endpoint():
+        return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
+    app.add_url_rule('/metrics', 'metrics', metrics_endpoint)
+
+
+def observe_query(backend, statement, seconds):
+    """Record one statement (or, for SQLite writes, one transaction) in the query histogram"""
+    metrics.observe('study_buddy_db_query_duration_seconds', seconds,
+                    (('backend', backend), ('statement', statement)))
+
+
+def statement_kind(sql):
+    """select, insert, update, delete or other - a bounded label for a SQL statement"""
+    word = sql.lstrip().split(None, 1)[0].lower() if sql.strip() else ''
+    return word if word in ('select', 'insert', 'update', 'delete') else 'other'
+
+
+class TimedCursor:
+    """A MySQL cursor that times execute and executemany"""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, operation, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return self._cursor.execute(operation, *args, **kwargs)
+        finally:
+            observe_query('mysql', statement_kind(operation), time.perf_counter() - started)
+
+    def executemany(self, operation, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return self._cursor.executemany(operation, *args, **kwargs)
+        finally:
+            observe_query('mysql', statement_kind(operation), time.perf_counter() - started)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class TimedConnection:
+    """A MySQL connection whose cursors are TimedCursors"""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def cursor(self, *args, **kwargs):
+        return TimedCursor(self._conn.cursor(*args, **kwargs))
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+def cache_samples(cache, hits, misses):
+    """Counter samples for a cache's hit and miss totals, for register_collector"""
+    return [('study_buddy_cache_requests_total', (('cache', cache), ('result', 'hit')), hits),
+            ('study_buddy_cache_requests_total', (('cache', cache), ('result', 'miss')), misses)]
+
+
+@contextmanager
+def openai_call(mode='complete'):
+    """Time one OpenAI request; set call['usage'] to the response's usage to count tokens"""
+    call = {'usage': None}
+    outcome = 'error'
+    started = time.perf_counter()
+    try:
+        yield call
+        outcome = 'ok'
+    except GeneratorExit:
+        # A streaming client went away before the completion finished
+        outcome = 'cancelled'
+        raise
+    finally:
+        metrics.observe('study_buddy_openai_request_duration_seconds', time.perf_counter() - started,
+                        (('mode', mode), ('outcome', outcome)))
+        usage = call['usage']
+        if usage is not None:
+            metrics.inc('study_buddy_openai_tokens_total', (('kind', 'prompt'),), usage.prompt_tokens or 0)
+            metrics.inc('study_buddy_openai_tokens_total', (('kind', 'completion'),), usage.completion_tokens or 0)
@@ -0,0 +1,317 @@
+"""
+Versioned MySQL schema migrations
+app.py and AuthManager used to create the tables themselves with different
+definitions (user_id nullable in one, NOT NULL in the other), so the schema
+depended on which ran first. Both now call migrate(), which applies each
+numbered step below once and records it in schema_migrations. Steps check
+information_schema before changing anything, so a database created by either
+of the old code paths converges on the same schema.
+
+Run `python migrations.py` to apply pending steps and print the index each
+hot query uses.
+"""
+
+import sys
+
+import mysql.connector
+
+from config import Config
+from queries import (DUE_REVIEWS, SESSION_LOOKUP, SESSION_PURGE, SESSIONS_BEYOND_CAP, STUDY_SESSION_CARDS,
+                     flashcards_page_sql, lsh_candidates_sql)
+from request_log import log
+
+# Held while migrating so gunicorn workers starting together do not race
+LOCK_NAME = 'flashcards_db.schema_migrations'
+LOCK_TIMEOUT = 60
+
+
+def _has_column(cursor, table, column):
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.columns
+        WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s
+    """, (table, column))
+    return cursor.fetchone()[0] > 0
+
+
+def _has_index(cursor, table, name):
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+    """, (table, name))
+    return cursor.fetchone()[0] > 0
+
+
+def _add_indexes(cursor, table, indexes):
+    for name, definition in indexes.items():
+        if not _has_index(cursor, table, name):
+            cursor.execute(f"ALTER TABLE {table} ADD {definition}")
+
+
+def create_tables(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            id VARCHAR(36) PRIMARY KEY,
+            username VARCHAR(50) UNIQUE NOT NULL,
+            email VARCHAR(100) UNIQUE NOT NULL,
+            password_hash VARCHAR(255) NOT NULL,
+            salt VARCHAR(255) NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_login TIMESTAMP NULL
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS user_sessions (
+            id VARCHAR(36) PRIMARY KEY,
+            user_id VARCHAR(36) NOT NULL,
+            session_token VARCHAR(255) UNIQUE NOT NULL,
+            expires_at TIMESTAMP NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_user_sessions_token_expires (session_token, expires_at),
+            INDEX idx_user_sessions_expires (expires_at),
+            INDEX idx_user_sessions_user_created (user_id, created_at),
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+    """)
+    # user_id is NULL for cards generated without signing in
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS flashcards (
+            id VARCHAR(36) PRIMARY KEY,
+            user_id VARCHAR(36) NULL,
+            question TEXT NOT NULL,
+            answer TEXT NOT NULL,
+            subject VARCHAR(100),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            minhash VARBINARY(256) NULL,
+            INDEX idx_flashcards_user_created (user_id, created_at, id),
+            INDEX idx_flashcards_user_subject_created (user_id, subject, created_at, id),
+            FULLTEXT INDEX ft_flashcards_question_answer (question, answer),
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+    """)
+    # LSH buckets for near-duplicate detection: one row per card per band
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS flashcard_lsh_buckets (
+            user_id VARCHAR(36) NOT NULL,
+            band_hash BIGINT NOT NULL,
+            flashcard_id VARCHAR(36) NOT NULL,
+            PRIMARY KEY (user_id, band_hash, flashcard_id),
+            INDEX idx_lsh_buckets_flashcard (flashcard_id)
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS study_sessions (
+            id VARCHAR(36) PRIMARY KEY,
+            user_id VARCHAR(36) NULL,
+            session_name VARCHAR(200),
+            flashcard_ids JSON,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_study_sessions_user_created (user_id, created_at, id),
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+    """)
+
+
+def index_flashcards(cursor):
+    if not _has_column(cursor, 'flashcards', 'minhash'):
+        cursor.execute("ALTER TABLE flashcards ADD COLUMN minhash VARBINARY(256) NULL")
+    _add_indexes(cursor, 'flashcards', {
+        'idx_flashcards_user_created': 'INDEX idx_flashcards_user_created (user_id, created_at, id)',
+        'idx_flashcards_user_subject_created':
+            'INDEX idx_flashcards_user_subject_created (user_id, subject, created_at, id)',
+        'ft_flashcards_question_answer': 'FULLTEXT INDEX ft_flashcards_question_answer (question, answer)'
+    })
+
+
+def index_user_sessions(cursor):
+    # (session_token, expires_at) lets login_required check expiry in the index before reading the row
+    _add_indexes(cursor, 'user_sessions', {
+        'idx_user_sessions_token_expires': 'INDEX idx_user_sessions_token_expires (session_token, expires_at)',
+        'idx_user_sessions_expires': 'INDEX idx_user_sessions_expires (expires_at)',
+        'idx_user_sessions_user_created': 'INDEX idx_user_sessions_user_created (user_id, created_at)'
+    })
+
+
+def allow_anonymous_rows(cursor):
+    """AuthManager created user_id NOT NULL, which rejected app.py's anonymous saves"""
+    for table in ('flashcards', 'study_sessions'):
+        cursor.execute("""
+            SELECT is_nullable FROM information_schema.columns
+            WHERE table_schema = DATABASE() AND table_name = %s AND column_name = 'user_id'
+        """, (table,))
+        row = cursor.fetchone()
+        if row and row[0] == 'NO':
+            cursor.execute(f"ALTER TABLE {table} MODIFY user_id VARCHAR(36) NULL")
+
+
+def index_study_sessions(cursor):
+    _add_indexes(cursor, 'study_sessions', {
+        'idx_study_sessions_user_created': 'INDEX idx_study_sessions_user_created (user_id, created_at, id)'
+    })
+
+
+def create_study_session_cards(cursor):
+    """Move study_sessions.flashcard_ids JSON lists into an ordered join table"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS study_session_cards (
+            session_id VARCHAR(36) NOT NULL,
+            position INT NOT NULL,
+            flashcard_id VARCHAR(36) NOT NULL,
+            PRIMARY KEY (session_id, position),
+            INDEX idx_study_session_cards_flashcard (flashcard_id),
+            FOREIGN KEY (session_id) REFERENCES study_sessions(id) ON DELETE CASCADE,
+            FOREIGN KEY (flashcard_id) REFERENCES flashcards(id) ON DELETE CASCADE
+        )
+    """)
+    if not _has_column(cursor, 'study_sessions', 'flashcard_ids'):
+        return
+    # Ids of cards that no longer exist or belong to someone else are dropped
+    cursor.execute("""
+        INSERT IGNORE INTO study_session_cards (session_id, position, flashcard_id)
+        SELECT s.id, j.position, f.id
+        FROM study_sessions s
+        JOIN JSON_TABLE(s.flashcard_ids, '$[*]' COLUMNS (
+            position FOR ORDINALITY,
+            flashcard_id VARCHAR(36) PATH '$'
+        )) j
+        JOIN flashcards f ON f.id = j.flashcard_id AND f.user_id <=> s.user_id
+        WHERE s.flashcard_ids IS NOT NULL
+    """)
+    cursor.execute("ALTER TABLE study_sessions DROP COLUMN flashcard_ids")
+
+
+def create_flashcard_reviews(cursor):
+    """Spaced-repetition state per card; (user_id, due_at) is each user's due queue"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS flashcard_reviews (
+            flashcard_id VARCHAR(36) PRIMARY KEY,
+            user_id VARCHAR(36) NOT NULL,
+            due_at DATETIME(3) NOT NULL,
+            repetitions INT NOT NULL DEFAULT 0,
+            interval_days INT NOT NULL DEFAULT 0,
+            ease DOUBLE NOT NULL DEFAULT 2.5,
+            reviews INT NOT NULL DEFAULT 0,
+            last_reviewed_at DATETIME(3) NULL,
+            INDEX idx_flashcard_reviews_user_due (user_id, due_at),
+            FOREIGN KEY (flashcard_id) REFERENCES flashcards(id) ON DELETE CASCADE,
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+    """)
+    # Cards saved before reviews existed are due from when they were created
+    cursor.execute("""
+        INSERT IGNORE INTO flashcard_reviews (flashcard_id, user_id, due_at)
+        SELECT id, user_id, created_at FROM flashcards WHERE user_id IS NOT NULL
+    """)
+
+
+def track_session_use(cursor):
+    """Record when each login session was last used, so the per-user cap evicts the least recently used"""
+    if not _has_column(cursor, 'user_sessions', 'last_used_at'):
+        cursor.execute("ALTER TABLE user_sessions ADD COLUMN last_used_at TIMESTAMP NULL")
+    # Sessions from before this step count as last used when they were created
+    cursor.execute("UPDATE user_sessions SET last_used_at = created_at WHERE last_used_at IS NULL")
+    _add_indexes(cursor, 'user_sessions', {
+        'idx_user_sessions_user_last_used': 'INDEX idx_user_sessions_user_last_used (user_id, last_used_at)'
+    })
+
+
+# (version, description, step) - append only; never renumber or edit an applied step
+MIGRATIONS = [
+    (1, 'Create users, user_sessions, flashcards, flashcard_lsh_buckets and study_sessions', create_tables),
+    (2, 'Add flashcards minhash column, keyset pagination and FULLTEXT indexes', index_flashcards),
+    (3, 'Index user_sessions by token and expiry, expiry, and user and creation time', index_user_sessions),
+    (4, 'Make flashcards and study_sessions user_id nullable', allow_anonymous_rows),
+    (5, 'Index study_sessions by user and creation time', index_study_sessions),
+    (6, 'Move study_sessions.flashcard_ids into study_session_cards', create_study_session_cards),
+    (7, 'Create flashcard_reviews with a (user_id, due_at) due queue index', create_flashcard_reviews),
+    (8, 'Add user_sessions last_used_at, indexed by user', track_session_use)
+]
+
+
+def applied_versions(cursor):
+    cursor.execute("SELECT version FROM schema_migrations")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def migrate(conn, migrations=None):
+    """Apply pending migrations on conn's current database; returns the versions applied"""
+    migrations = MIGRATIONS if migrations is None else migrations
+    cursor = conn.cursor()
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT PRIMARY KEY,
+            description VARCHAR(255) NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("SELECT GET_LOCK(%s, %s)", (LOCK_NAME, LOCK_TIMEOUT))
+    if cursor.fetchone()[0] != 1:
+        cursor.close()
+        raise RuntimeError(f"Timed out waiting for the {LOCK_NAME} lock")
+
+    applied = []
+    try:
+        done = applied_versions(cursor)
+        for version, description, step in sorted(migrations, key=lambda m: m[0]):
+            if version in done:
+                continue
+            # MySQL commits DDL implicitly, so each step is written to be safely re-run
+            step(cursor)
+            cursor.execute("INSERT INTO schema_migrations (version, description) VALUES (%s, %s)",
+                           (version, description))
+            conn.commit()
+            applied.append(version)
+            log('migration_applied', version=version, description=description)
+    finally:
+        cursor.execute("SELECT RELEASE_LOCK(%s)", (LOCK_NAME,))
+        cursor.fetchone()
+        cursor.close()
+    return applied
+
+
+# Hot queries as the application issues them: name -> (table to check, SQL, params)
+HOT_QUERIES = {
+    'flashcards_page': ('flashcards', flashcards_page_sql(), ('user-1', 21)),
+    'flashcards_subject_page': ('flashcards', flashcards_page_sql(subject=True), ('user-1', 'Biology', 21)),
+    'session_lookup': ('us', SESSION_LOOKUP, ('token-1',)),
+    'session_purge': ('user_sessions', SESSION_PURGE, (1000,)),
+    'sessions_by_user': ('user_sessions', SESSIONS_BEYOND_CAP, ('user-1', 10)),
+    'study_session_cards': ('c', STUDY_SESSION_CARDS, ('study-1', 'user-2')),
+    'due_reviews': ('r', DUE_REVIEWS, ('user-1', '2038-01-01 00:00:00', 1)),
+    'lsh_candidates': ('b', lsh_candidates_sql(3), ('user-1', 1, 2, 3))
+}
+
+
+def explain_hot_queries(conn):
+    """Index MySQL picks for each hot query's table: name -> (access type, key or None)"""
+    cursor = conn.cursor(dictionary=True)
+    plans = {}
+    for name, (table, sql, params) in HOT_QUERIES.items():
+        cursor.execute("EXPLAIN " + sql, params)
+        rows = [row for row in cursor.fetchall() if row['table'] == table]
+        plans[name] = (rows[0]['type'], rows[0]['key']) if rows else (None, None)
+    cursor.close()
+    return plans
+
+
+def main():
+    db_config = Config.DB_CONFIG
+    conn = mysql.connector.connect(host=db_config['host'], user=db_config['user'], password=db_config['password'])
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f"CREATE DATABASE IF NOT EXISTS `{db_config['database']}`")
+        cursor.execute(f"USE `{db_config['database']}`")
+        cursor.close()
+        applied = migrate(conn)
+        for version, description, _ in MIGRATIONS:
+            if version in applied:
+                print(f"🗄️  Applied migration {version}: {description}")
+        print(f"✅ Schema up to date ({len(applied)} migrations applied)")
+        for name, (access, key) in explain_hot_queries(conn).items():
+            print(f"   {name}: {key or 'NO INDEX'} ({access})")
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
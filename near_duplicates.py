@@ -0,0 +1,158 @@
+"""
+Near-duplicate flashcard detection with MinHash and locality-sensitive hashing
+Each card gets a MinHash signature of its word shingles. Signatures are cut
+into bands and every band is hashed into a bucket, so finding cards similar
+to a new one only looks at cards sharing a bucket instead of the whole deck.
+"""
+
+import hashlib
+import random
+import re
+import struct
+
+from config import Config
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_WORD = re.compile(r'\w+')
+_SIGNATURE_FORMAT = f'<{NUM_PERM}I'
+SIGNATURE_BYTES = struct.calcsize(_SIGNATURE_FORMAT)
+
+# Fixed seed: signatures are persisted, so the permutations must never change
+_rng = random.Random(1_000_003)
+_PERMUTATIONS = [(_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME)) for _ in range(NUM_PERM)]
+
+
+def _hash64(text):
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def shingles(card):
+    """Hashed words and word pairs of a card's question and answer"""
+    # Words keep short cards stable under one-word edits; pairs capture word order
+    words = _WORD.findall(f"{card.get('question', '')} {card.get('answer', '')}".lower())
+    hashed = {_hash64(word) for word in words}
+    hashed.update(_hash64(f"{first} {second}") for first, second in zip(words, words[1:]))
+    return hashed or {_hash64('')}
+
+
+def minhash(card):
+    """MinHash signature of a card as a tuple of NUM_PERM 32-bit integers"""
+    hashes = shingles(card)
+    return tuple(
+        min(((a * h + b) % _MERSENNE_PRIME) for h in hashes) & _MAX_HASH
+        for a, b in _PERMUTATIONS
+    )
+
+
+def similarity(signature, other):
+    """Estimated Jaccard similarity of the two cards' shingle sets"""
+    return sum(1 for x, y in zip(signature, other) if x == y) / NUM_PERM
+
+
+def band_hashes(signature):
+    """One 63-bit bucket key per band (fits a signed BIGINT column)"""
+    keys = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS:(band + 1) * ROWS]
+        data = struct.pack(f'<I{ROWS}I', band, *rows)
+        keys.append(int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'little') >> 1)
+    return keys
+
+
+def pack_signature(signature):
+    return struct.pack(_SIGNATURE_FORMAT, *signature)
+
+
+def unpack_signature(data):
+    return struct.unpack(_SIGNATURE_FORMAT, bytes(data))
+
+
+class LSHIndex:
+    """Banded LSH index of card signatures"""
+
+    def __init__(self):
+        # Signatures are kept packed: 256 bytes per card instead of ~2.5 KB of ints
+        self._signatures = {}
+        self._buckets = {}
+
+    def __len__(self):
+        return len(self._signatures)
+
+    def __contains__(self, card_id):
+        return card_id in self._signatures
+
+    def signature(self, card_id):
+        packed = self._signatures.get(card_id)
+        return unpack_signature(packed) if packed is not None else None
+
+    def add(self, card_id, signature):
+        self._signatures[card_id] = pack_signature(signature)
+        for key in band_hashes(signature):
+            self._buckets.setdefault(key, set()).add(card_id)
+
+    def remove(self, card_id):
+        packed = self._signatures.pop(card_id, None)
+        if packed is None:
+            return
+        for key in band_hashes(unpack_signature(packed)):
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(card_id)
+                if not bucket:
+                    del self._buckets[key]
+
+    def query(self, signature, threshold=None):
+        """Id of the most similar indexed card at or above threshold, or None"""
+        candidates = set()
+        for key in band_hashes(signature):
+            candidates.update(self._buckets.get(key, ()))
+        return best_match(signature, ((card_id, self._signatures[card_id]) for card_id in candidates), threshold)
+
+
+def best_match(signature, candidates, threshold=None):
+    """Id of the (card_id, packed signature) candidate most similar to signature, or None below threshold"""
+    threshold = Config.DEDUPE_THRESHOLD if threshold is None else threshold
+    best_id, best = None, threshold
+    for card_id, packed in candidates:
+        score = similarity(signature, unpack_signature(packed))
+        if score >= best:
+            best_id, best = card_id, score
+    return best_id
+
+
+def find_duplicate_groups(cards, threshold=None):
+    """
+    Group (card_id, signature) pairs, oldest first, into {kept_id: [duplicate ids]};
+    the oldest card of each group is the one kept
+    """
+    index = LSHIndex()
+    groups = {}
+    for card_id, signature in cards:
+        original = index.query(signature, threshold)
+        if original is None:
+            index.add(card_id, signature)
+        else:
+            groups.setdefault(original, []).append(card_id)
+    return groups
+
+
+def check_batch(cards, deck_index, threshold=None):
+    """
+    Compare new (card_id, card) pairs with a user's deck and with each other.
+    Returns (card_id, signature, duplicate_of) triples, where duplicate_of is the
+    id of the matching deck card or earlier batch card, or None for new content.
+    """
+    batch_index = LSHIndex()
+    results = []
+    for card_id, card in cards:
+        signature = minhash(card)
+        duplicate_of = deck_index.query(signature, threshold) or batch_index.query(signature, threshold)
+        if duplicate_of is None:
+            batch_index.add(card_id, signature)
+        results.append((card_id, signature, duplicate_of))
+    return results
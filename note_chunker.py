@@ -0,0 +1,134 @@
+"""
+Chunked flashcard generation for long study notes
+Notes are split on paragraph and heading boundaries into pieces that fit the
+prompt budget, cards are shared out in proportion to each piece's length, and
+the pieces are generated concurrently so long notes take about as long as the
+slowest piece.
+"""
+
+import math
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from config import Config
+
+_PARAGRAPH_BREAK = re.compile(r'\n\s*\n|\n(?=#{1,6}\s)')
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+_NON_WORD = re.compile(r'\W+')
+
+
+def estimate_tokens(text):
+    """Rough token count: about four characters per token for English text"""
+    return math.ceil(len(text) / 4)
+
+
+def _split_long(paragraph, max_tokens):
+    """Break a paragraph over the budget at sentence ends, then hard at the limit"""
+    max_chars = max_tokens * 4
+    pieces = []
+    current = ''
+    for sentence in _SENTENCE_END.split(paragraph):
+        while len(sentence) > max_chars:
+            if current:
+                pieces.append(current)
+                current = ''
+            cut = sentence.rfind(' ', 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            pieces.append(sentence[:cut])
+            sentence = sentence[cut:].lstrip()
+        candidate = f"{current} {sentence}" if current else sentence
+        if len(candidate) > max_chars:
+            pieces.append(current)
+            current = sentence
+        else:
+            current = candidate
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def split_notes(notes, max_tokens=None):
+    """Split notes into chunks of at most max_tokens, keeping paragraphs whole where possible"""
+    max_tokens = max_tokens or Config.GENERATION_CHUNK_TOKENS
+    if estimate_tokens(notes) <= max_tokens:
+        return [notes]
+
+    chunks = []
+    current = []
+    current_tokens = 0
+    for paragraph in _PARAGRAPH_BREAK.split(notes):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        for piece in ([paragraph] if estimate_tokens(paragraph) <= max_tokens else _split_long(paragraph, max_tokens)):
+            tokens = estimate_tokens(piece) + 1
+            if current and current_tokens + tokens > max_tokens:
+                chunks.append('\n\n'.join(current))
+                current = []
+                current_tokens = 0
+            current.append(piece)
+            current_tokens += tokens
+    if current:
+        chunks.append('\n\n'.join(current))
+    return chunks
+
+
+def allocate_cards(chunks, num_cards):
+    """Share num_cards across chunks in proportion to their size (largest remainder)"""
+    sizes = [estimate_tokens(chunk) for chunk in chunks]
+    total = sum(sizes) or 1
+    quotas = [num_cards * size / total for size in sizes]
+    counts = [int(quota) for quota in quotas]
+    leftover = num_cards - sum(counts)
+    by_remainder = sorted(range(len(chunks)), key=lambda i: quotas[i] - counts[i], reverse=True)
+    for index in by_remainder[:leftover]:
+        counts[index] += 1
+    return counts
+
+
+def card_fingerprint(card):
+    """Questions differing only in case, spacing or punctuation count as duplicates"""
+    return _NON_WORD.sub(' ', str(card.get('question', '')).casefold()).strip()
+
+
+class CardDeduper:
+    """Drops cards whose question was already seen"""
+
+    def __init__(self):
+        self._seen = set()
+
+    def add(self, card):
+        fingerprint = card_fingerprint(card)
+        if fingerprint in self._seen:
+            return False
+        self._seen.add(fingerprint)
+        return True
+
+
+def iter_chunk_cards(notes, num_cards, generate, max_workers=None, max_tokens=None):
+    """Yield (chunk_index, cards) as each chunk's generation finishes"""
+    chunks = split_notes(notes, max_tokens)
+    work = [(index, chunk, count) for index, (chunk, count)
+            in enumerate(zip(chunks, allocate_cards(chunks, int(num_cards)))) if count]
+    if not work:
+        return
+    if len(work) == 1:
+        index, chunk, count = work[0]
+        yield index, generate(chunk, count)
+        return
+
+    workers = min(max_workers or Config.GENERATION_CONCURRENCY, len(work))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='chunk') as executor:
+        futures = {executor.submit(generate, chunk, count): index for index, chunk, count in work}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+
+def generate_chunked(notes, num_cards, generate, max_workers=None, max_tokens=None):
+    """Generate cards for every chunk concurrently and merge them in note order"""
+    results = dict(iter_chunk_cards(notes, num_cards, generate, max_workers, max_tokens))
+    deduper = CardDeduper()
+    merged = []
+    for index in sorted(results):
+        merged.extend(card for card in results[index] if deduper.add(card))
+    return merged[:int(num_cards)]
@@ -0,0 +1,61 @@
+"""
+Keyset pagination helpers for flashcard listings
+A page is addressed by the (created_at, id) of the last card on the previous
+page, so fetching a deep page costs the same as fetching the first one.
+"""
+
+import base64
+import json
+from datetime import datetime
+
+from config import Config
+
+
+def encode_cursor(created_at, card_id):
+    """Opaque cursor pointing just past the given card"""
+    if isinstance(created_at, datetime):
+        created_at = created_at.isoformat()
+    raw = json.dumps([created_at, card_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return (created_at, id) from a cursor; raises ValueError if it is malformed"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, card_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except Exception:
+        raise ValueError('Invalid cursor')
+    if not isinstance(created_at, str) or not isinstance(card_id, str):
+        raise ValueError('Invalid cursor')
+    return created_at, card_id
+
+
+def parse_page_args(args):
+    """Read limit, cursor and subject from query args; raises ValueError on bad input"""
+    try:
+        limit = int(args.get('limit', Config.FLASHCARDS_PAGE_SIZE))
+    except (TypeError, ValueError):
+        raise ValueError('limit must be an integer')
+    if limit < 1:
+        raise ValueError('limit must be at least 1')
+    limit = min(limit, Config.FLASHCARDS_MAX_PAGE_SIZE)
+
+    cursor = args.get('cursor')
+    after = decode_cursor(cursor) if cursor else None
+    subject = args.get('subject') or None
+    return limit, after, subject
+
+
+def page_response(rows, limit):
+    """Build the /flashcards payload from up to limit + 1 rows, newest first"""
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = None
+    if has_more and rows:
+        next_cursor = encode_cursor(rows[-1]['created_at'], rows[-1]['id'])
+    return {
+        'flashcards': rows,
+        'next_cursor': next_cursor,
+        'has_more': has_more
+    }
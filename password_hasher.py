@@ -0,0 +1,143 @@
+"""
+Password hashing off the request path
+PBKDF2 with 100,000+ iterations is deliberately slow, and running it inside
+a request pins the worker's CPU for every login, registration and reset. The
+work is sent to a small process pool instead, at a lower CPU priority, and at
+most PASSWORD_HASH_MAX_PENDING hashes may be waiting at once so a login storm
+is turned away instead of starving every other request.
+
+Hashes are stored as pbkdf2_sha256$<iterations>$<hex digest> so the cost can
+be raised later; a hash stored at an older cost is replaced on the next
+successful login. Bare hex digests from before this format are read as
+100,000 iterations.
+"""
+
+import hashlib
+import hmac
+import multiprocessing
+import os
+import secrets
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from config import Config
+from request_log import log
+
+ALGORITHM = 'pbkdf2_sha256'
+LEGACY_ITERATIONS = 100000
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when too many hashes are already waiting for the pool"""
+
+
+def _pbkdf2(password, salt, iterations):
+    return hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt.encode('utf-8'), iterations).hex()
+
+
+def _lower_priority(niceness):
+    try:
+        os.nice(niceness)
+    except OSError:
+        pass
+
+
+def encode_hash(iterations, digest):
+    return f"{ALGORITHM}${iterations}${digest}"
+
+
+def decode_hash(stored_hash):
+    """(iterations, hex digest) of a stored hash, in either format"""
+    if stored_hash.startswith(ALGORITHM + '$'):
+        _, iterations, digest = stored_hash.split('$', 2)
+        return int(iterations), digest
+    return LEGACY_ITERATIONS, stored_hash
+
+
+class PasswordHasher:
+    """Bounded process pool for PBKDF2"""
+
+    def __init__(self, iterations=None, max_workers=None, max_pending=None, queue_timeout=None):
+        self.iterations = iterations or Config.PASSWORD_HASH_ITERATIONS
+        self.max_workers = Config.PASSWORD_HASH_WORKERS if max_workers is None else max_workers
+        self.max_pending = max_pending or Config.PASSWORD_HASH_MAX_PENDING
+        self.queue_timeout = Config.PASSWORD_HASH_QUEUE_TIMEOUT if queue_timeout is None else queue_timeout
+        self._reset()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        """A forked child gets its own pool, started on first use"""
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._executor = None
+        self._stats = {'hashed': 0, 'rejected': 0, 'inline': 0}
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                # forkserver/spawn children do not inherit the app's sockets, threads or locks
+                methods = multiprocessing.get_all_start_methods()
+                context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers, mp_context=context,
+                    initializer=_lower_priority, initargs=(Config.PASSWORD_HASH_NICE,)
+                )
+            return self._executor
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _compute(self, password, salt, iterations):
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            self._count('rejected')
+            raise PasswordHasherBusy('Too many password checks in progress')
+        try:
+            digest = None
+            if self.max_workers:
+                try:
+                    digest = self._pool().submit(_pbkdf2, password, salt, iterations).result()
+                except (BrokenProcessPool, OSError) as e:
+                    # A killed pool process should not lock everyone out
+                    log('hash_pool_unavailable', 'warning', error=str(e), fallback='hashing in the request')
+                    with self._lock:
+                        self._executor = None
+            if digest is None:
+                self._count('inline')
+                digest = _pbkdf2(password, salt, iterations)
+            self._count('hashed')
+            return digest
+        finally:
+            self._slots.release()
+
+    def hash_password(self, password, salt=None):
+        """Hash password with salt at the current cost; returns (salt, encoded hash)"""
+        if salt is None:
+            salt = secrets.token_hex(16)
+        return salt, encode_hash(self.iterations, self._compute(password, salt, self.iterations))
+
+    def verify_password(self, password, stored_hash, stored_salt):
+        """Check password against a stored hash in constant time"""
+        iterations, digest = decode_hash(stored_hash)
+        computed = self._compute(password, stored_salt, iterations)
+        return hmac.compare_digest(computed, digest)
+
+    def needs_rehash(self, stored_hash):
+        """True if the hash was made at a different cost than the current one"""
+        return decode_hash(stored_hash)[0] != self.iterations
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+    def stats(self):
+        return dict(self._stats, iterations=self.iterations, workers=self.max_workers,
+                    max_pending=self.max_pending, running=self._executor is not None)
+
+
+# Global password hasher instance
+password_hasher = PasswordHasher()
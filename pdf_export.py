@@ -0,0 +1,198 @@
+"""
+Streaming PDF export for flashcards
+Builds a printable PDF one page at a time from a card iterator using only
+the standard library. Each card is a row with the question (front) on the
+left and the answer (back) on the right: cut along the solid lines and
+fold along the dashed one.
+"""
+
+import zlib
+
+from config import Config
+
+PAGE_WIDTH = 612   # US Letter, in points
+PAGE_HEIGHT = 792
+MARGIN = 36
+HEADER_HEIGHT = 28
+CELL_PADDING = 10
+FONT_SIZE = 11
+LABEL_SIZE = 8
+LEADING = 14
+
+# Helvetica advance widths (1/1000 em) for ASCII 32-126, from the standard AFM
+_HELVETICA_WIDTHS = [
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584
+]
+_DEFAULT_WIDTH = 556
+
+
+def text_width(text, size):
+    """Approximate rendered width of text in Helvetica at the given size"""
+    total = 0
+    for char in text:
+        code = ord(char)
+        total += _HELVETICA_WIDTHS[code - 32] if 32 <= code <= 126 else _DEFAULT_WIDTH
+    return total * size / 1000.0
+
+
+def wrap_text(text, width, size, max_lines):
+    """Greedy word wrap; the last line gets an ellipsis if text is cut off"""
+    words = ' '.join(str(text or '').split()).split(' ')
+    lines = []
+    current = ''
+    for word in words:
+        candidate = f"{current} {word}" if current else word
+        if text_width(candidate, size) <= width:
+            current = candidate
+            continue
+        if current:
+            lines.append(current)
+        # Hard-break words longer than a whole line
+        while text_width(word, size) > width and len(word) > 1:
+            cut = len(word) - 1
+            while cut > 1 and text_width(word[:cut], size) > width:
+                cut -= 1
+            lines.append(word[:cut])
+            word = word[cut:]
+        current = word
+        if len(lines) > max_lines:
+            break
+    if current:
+        lines.append(current)
+
+    if len(lines) > max_lines:
+        lines = lines[:max_lines]
+        last = lines[-1]
+        while last and text_width(last + '...', size) > width:
+            last = last[:-1]
+        lines[-1] = last.rstrip() + '...'
+    return lines
+
+
+def _pdf_string(text):
+    """Encode text as a PDF literal string in WinAnsiEncoding"""
+    raw = text.encode('cp1252', errors='replace')
+    raw = raw.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)')
+    return b'(' + raw + b')'
+
+
+def _text_block(font, size, x, y, lines):
+    parts = [b'BT', f'/{font} {size} Tf {LEADING} TL {x:.2f} {y:.2f} Td'.encode('ascii')]
+    for index, line in enumerate(lines):
+        if index:
+            parts.append(b'T*')
+        parts.append(_pdf_string(line) + b' Tj')
+    parts.append(b'ET')
+    return b'\n'.join(parts)
+
+
+def render_page(cards, page_number, cards_per_page, title):
+    """Content stream for one page of cards"""
+    usable_height = PAGE_HEIGHT - 2 * MARGIN - HEADER_HEIGHT
+    row_height = usable_height / cards_per_page
+    cell_width = (PAGE_WIDTH - 2 * MARGIN) / 2
+    text_width_limit = cell_width - 2 * CELL_PADDING
+    max_lines = max(1, int((row_height - 2 * CELL_PADDING - LABEL_SIZE - 6) // LEADING))
+    top = PAGE_HEIGHT - MARGIN - HEADER_HEIGHT
+
+    ops = [
+        _text_block('F2', 12, MARGIN, PAGE_HEIGHT - MARGIN - 12, [title]),
+        _text_block('F1', 9, PAGE_WIDTH - MARGIN - 50, PAGE_HEIGHT - MARGIN - 12, [f"Page {page_number}"]),
+        b'0.6 G 0.75 w'
+    ]
+
+    for index, card in enumerate(cards):
+        row_top = top - index * row_height
+        row_bottom = row_top - row_height
+        ops.append(f'[] 0 d {MARGIN} {row_bottom:.2f} {PAGE_WIDTH - 2 * MARGIN} {row_height:.2f} re S'.encode('ascii'))
+        fold_x = MARGIN + cell_width
+        ops.append(f'[4 3] 0 d {fold_x:.2f} {row_bottom:.2f} m {fold_x:.2f} {row_top:.2f} l S'.encode('ascii'))
+
+        for column, (label, text) in enumerate((('QUESTION', card.get('question')), ('ANSWER', card.get('answer')))):
+            x = MARGIN + column * cell_width + CELL_PADDING
+            label_y = row_top - CELL_PADDING - LABEL_SIZE
+            ops.append(_text_block('F2', LABEL_SIZE, x, label_y, [label]))
+            lines = wrap_text(text, text_width_limit, FONT_SIZE, max_lines)
+            ops.append(_text_block('F1', FONT_SIZE, x, label_y - 6 - FONT_SIZE, lines))
+
+    return b'\n'.join(ops)
+
+
+def _pdf_object(number, body):
+    return f'{number} 0 obj\n'.encode('ascii') + body + b'\nendobj\n'
+
+
+def _stream_object(number, data):
+    compressed = zlib.compress(data)
+    body = f'<< /Length {len(compressed)} /Filter /FlateDecode >>\nstream\n'.encode('ascii')
+    return _pdf_object(number, body + compressed + b'\nendstream')
+
+
+def _batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def iter_pdf(rows, cards_per_page=None, title='AI Study Buddy - Flashcards'):
+    """Yield a PDF document page by page from an iterator of card rows"""
+    cards_per_page = cards_per_page or Config.PDF_CARDS_PER_PAGE
+    offsets = {}
+    position = 0
+
+    def emit(number, data):
+        nonlocal position
+        if number is not None:
+            offsets[number] = position
+        position += len(data)
+        return data
+
+    # Objects 1-4 are fixed; the page tree (2) is written last, once the page count is known
+    head = emit(None, b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+    head += emit(1, _pdf_object(1, b'<< /Type /Catalog /Pages 2 0 R >>'))
+    for number, font in ((3, 'Helvetica'), (4, 'Helvetica-Bold')):
+        head += emit(number, _pdf_object(
+            number, f'<< /Type /Font /Subtype /Type1 /BaseFont /{font} /Encoding /WinAnsiEncoding >>'.encode('ascii')
+        ))
+    yield head
+
+    page_ids = []
+    next_id = 5
+
+    def page(cards, page_number):
+        nonlocal next_id
+        content_id, page_id = next_id, next_id + 1
+        next_id += 2
+        content = render_page(cards, page_number, cards_per_page, title)
+        chunk = emit(content_id, _stream_object(content_id, content))
+        chunk += emit(page_id, _pdf_object(page_id, (
+            f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] '
+            f'/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents {content_id} 0 R >>'
+        ).encode('ascii')))
+        page_ids.append(page_id)
+        return chunk
+
+    for page_number, cards in enumerate(_batches(rows, cards_per_page), 1):
+        yield page(cards, page_number)
+    if not page_ids:
+        yield page([{'question': 'No flashcards to export yet.', 'answer': ''}], 1)
+
+    kids = ' '.join(f'{page_id} 0 R' for page_id in page_ids)
+    tail = emit(2, _pdf_object(2, f'<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>'.encode('ascii')))
+
+    xref_position = position
+    xref = [f'xref\n0 {next_id}\n', '0000000000 65535 f \n']
+    xref.extend(f'{offsets[number]:010d} 00000 n \n' for number in range(1, next_id))
+    xref.append(f'trailer\n<< /Size {next_id} /Root 1 0 R >>\n')
+    xref.append(f'startxref\n{xref_position}\n%%EOF\n')
+    yield tail + ''.join(xref).encode('ascii')
@@ -0,0 +1,80 @@
+"""
+SQL for the MySQL hot paths
+The routes in app.py, AuthManager and the session purger run these
+statements, and migrations.HOT_QUERIES builds its EXPLAIN and index checks
+from the same strings, so the checks follow the SQL the app actually sends.
+"""
+
+FLASHCARDS_PAGE = """
+    SELECT id, user_id, question, answer, subject, created_at
+    FROM flashcards
+    WHERE user_id = %s
+"""
+FLASHCARDS_PAGE_SUBJECT = " AND subject = %s"
+# Keyset condition on (created_at, id) - served by the composite indexes
+FLASHCARDS_PAGE_AFTER = " AND (created_at < %s OR (created_at = %s AND id < %s))"
+FLASHCARDS_PAGE_ORDER = " ORDER BY created_at DESC, id DESC LIMIT %s"
+
+
+def flashcards_page_sql(subject=False, after=False):
+    """A page of a user's flashcards, newest first, optionally in one subject and after a cursor"""
+    sql = FLASHCARDS_PAGE
+    if subject:
+        sql += FLASHCARDS_PAGE_SUBJECT
+    if after:
+        sql += FLASHCARDS_PAGE_AFTER
+    return sql + FLASHCARDS_PAGE_ORDER
+
+
+def lsh_candidates_sql(count):
+    """Cards of a user that share any of count LSH buckets"""
+    placeholders = ', '.join(['%s'] * count)
+    return f"""
+        SELECT DISTINCT f.id, f.minhash
+        FROM flashcard_lsh_buckets b
+        JOIN flashcards f ON f.id = b.flashcard_id
+        WHERE b.user_id = %s AND b.band_hash IN ({placeholders}) AND f.minhash IS NOT NULL
+    """
+
+
+SESSION_LOOKUP = """
+    SELECT us.*, u.username, u.email
+    FROM user_sessions us
+    JOIN users u ON us.user_id = u.id
+    WHERE us.session_token = %s AND us.expires_at > NOW()
+"""
+
+# A user's sessions past the first OFFSET, least recently used last
+SESSIONS_BEYOND_CAP = """
+    SELECT session_token FROM user_sessions
+    WHERE user_id = %s
+    ORDER BY last_used_at DESC, created_at DESC, id DESC
+    LIMIT 18446744073709551615 OFFSET %s
+"""
+
+SESSION_PURGE = "DELETE FROM user_sessions WHERE expires_at <= NOW() LIMIT %s"
+
+# One query: the session by primary key, its cards in order from the join
+# table's (session_id, position) key, each card by id
+STUDY_SESSION_CARDS = """
+    SELECT s.session_name, s.created_at AS session_created_at,
+           f.id, f.question, f.answer, f.subject, f.created_at
+    FROM study_sessions s
+    LEFT JOIN study_session_cards c ON c.session_id = s.id
+    LEFT JOIN flashcards f ON f.id = c.flashcard_id
+    WHERE s.id = %s AND s.user_id = %s
+    ORDER BY c.position
+"""
+
+REVIEW_COLUMNS = ('due_at', 'repetitions', 'interval_days', 'ease', 'reviews', 'last_reviewed_at')
+
+# Range scan of idx_flashcard_reviews_user_due: cost follows the limit, not deck size
+DUE_REVIEWS = f"""
+    SELECT f.id, f.question, f.answer, f.subject, f.created_at,
+           {', '.join('r.' + column for column in REVIEW_COLUMNS)}
+    FROM flashcard_reviews r
+    JOIN flashcards f ON f.id = r.flashcard_id
+    WHERE r.user_id = %s AND r.due_at <= %s
+    ORDER BY r.due_at, r.flashcard_id
+    LIMIT %s
+"""
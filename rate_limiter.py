@@ -0,0 +1,199 @@
+"""
+Token-bucket admission control for the auth endpoints
+Every login, registration and password reset costs a PBKDF2 hash, so a
+scripted client could keep every worker busy hashing. Each client IP and
+each username gets a bucket that refills at a steady rate; a request that
+finds its bucket empty is answered with 429 before any hashing happens.
+
+Buckets live in this process by default. Set AUTH_RATE_LIMIT_DB to a SQLite
+file to share them between gunicorn workers, so a client cannot multiply its
+allowance by the number of workers.
+"""
+
+import math
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import jsonify, request
+
+from config import Config
+
+
+class RateLimited(Exception):
+    """Raised when a bucket is empty; retry_after is in whole seconds"""
+
+    def __init__(self, scope, retry_after):
+        super().__init__(f"Too many {scope} attempts, retry in {retry_after}s")
+        self.scope = scope
+        self.retry_after = retry_after
+
+
+class TokenBuckets:
+    """One token bucket per key, refilled at rate tokens a second up to burst"""
+
+    EVICT_EVERY = 500
+
+    def __init__(self, scope, rate, burst, max_keys=None, path=None):
+        self.scope = scope
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys or Config.AUTH_RATE_LIMIT_MAX_KEYS
+        self.path = path
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()
+        self._stats = {'allowed': 0, 'limited': 0}
+        self._takes = 0
+        if path:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.execute("""
+                        CREATE TABLE IF NOT EXISTS rate_limit_buckets (
+                            scope TEXT NOT NULL,
+                            key TEXT NOT NULL,
+                            tokens REAL NOT NULL,
+                            updated REAL NOT NULL,
+                            PRIMARY KEY (scope, key)
+                        )
+                    """)
+            finally:
+                conn.close()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def _take_local(self, key, now):
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [float(self.burst), now]
+                if len(self._buckets) > self.max_keys:
+                    # Forgetting a key only hands it a full bucket again
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return None
+            return bucket[0]
+
+    def _take_shared(self, key, now):
+        conn = self._connect()
+        try:
+            with conn:
+                # One statement, so concurrent workers cannot both spend the last token
+                cursor = conn.execute("""
+                    INSERT INTO rate_limit_buckets (scope, key, tokens, updated) VALUES (?, ?, ?, ?)
+                    ON CONFLICT (scope, key) DO UPDATE SET
+                        tokens = MIN(?, tokens + (excluded.updated - updated) * ?) - 1,
+                        updated = excluded.updated
+                    WHERE MIN(?, tokens + (excluded.updated - updated) * ?) >= 1
+                """, (self.scope, key, self.burst - 1, now, self.burst, self.rate, self.burst, self.rate))
+                if cursor.rowcount:
+                    return None
+                tokens, updated = conn.execute(
+                    "SELECT tokens, updated FROM rate_limit_buckets WHERE scope = ? AND key = ?", (self.scope, key)
+                ).fetchone()
+                return min(self.burst, tokens + (now - updated) * self.rate)
+        finally:
+            conn.close()
+
+    def _evict_shared(self, now):
+        """Drop rows whose bucket has refilled; a missing row means a full bucket"""
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM rate_limit_buckets WHERE scope = ? AND updated < ?",
+                             (self.scope, now - self.burst / self.rate))
+        finally:
+            conn.close()
+
+    def take(self, key):
+        """Spend one token for key or raise RateLimited"""
+        now = time.time()
+        if self.path:
+            tokens = self._take_shared(key, now)
+            self._takes += 1
+            if self._takes % self.EVICT_EVERY == 0:
+                self._evict_shared(now)
+        else:
+            tokens = self._take_local(key, now)
+
+        with self._lock:
+            self._stats['allowed' if tokens is None else 'limited'] += 1
+        if tokens is not None:
+            raise RateLimited(self.scope, max(1, math.ceil((1 - tokens) / self.rate)))
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats, rate=self.rate, burst=self.burst, shared=bool(self.path))
+            if not self.path:
+                stats['keys'] = len(self._buckets)
+            return stats
+
+
+class AuthLimiter:
+    """Per-IP and per-username buckets for the auth endpoints"""
+
+    def __init__(self, path=None):
+        path = Config.AUTH_RATE_LIMIT_DB if path is None else path
+        self.by_ip = TokenBuckets('ip', Config.AUTH_RATE_LIMIT_IP_RATE, Config.AUTH_RATE_LIMIT_IP_BURST, path=path)
+        self.by_username = TokenBuckets('username', Config.AUTH_RATE_LIMIT_USER_RATE,
+                                        Config.AUTH_RATE_LIMIT_USER_BURST, path=path)
+
+    def check(self, ip, *usernames):
+        """Spend a token from the IP's bucket and each username's; raises RateLimited"""
+        if not Config.AUTH_RATE_LIMIT_ENABLED:
+            return
+        self.by_ip.take(ip or 'unknown')
+        for username in usernames:
+            if isinstance(username, str) and username.strip():
+                self.by_username.take(username.strip().lower())
+
+    def stats(self):
+        return {'enabled': Config.AUTH_RATE_LIMIT_ENABLED, 'ip': self.by_ip.stats(),
+                'username': self.by_username.stats()}
+
+
+def client_ip():
+    """The caller's address, trusting AUTH_RATE_LIMIT_PROXIES hops of X-Forwarded-For"""
+    proxies = Config.AUTH_RATE_LIMIT_PROXIES
+    if proxies:
+        # Each trusted proxy appends the address it received from, so count from the right
+        forwarded = [hop.strip() for hop in request.headers.get('X-Forwarded-For', '').split(',') if hop.strip()]
+        if len(forwarded) >= proxies:
+            return forwarded[-proxies]
+    return request.remote_addr
+
+
+def rate_limited_response(error):
+    response = jsonify({'error': str(error)})
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response, 429
+
+
+def limit_auth(*fields):
+    """Decorator: check the IP and the named JSON fields' buckets before the route runs"""
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            data = request.get_json(silent=True)
+            data = data if isinstance(data, dict) else {}
+            try:
+                auth_limiter.check(client_ip(), *(data.get(field) for field in fields))
+            except RateLimited as e:
+                return rate_limited_response(e)
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
+
+
+# Global auth limiter instance
+auth_limiter = AuthLimiter()
@@ -9,18 +9,27 @@ import json
 import os
 from datetime import datetime, timedelta
 import uuid
-import hashlib
 import secrets
+from config import Config
+from fallback_generator import create_fallback_flashcards
+from storage import create_store
+from metrics import init_app as init_metrics
+from request_log import init_app as init_request_log
+from password_hasher import PasswordHasherBusy, password_hasher
+from rate_limiter import auth_limiter, limit_auth
+from search_index import parse_search_args
+from review_scheduler import due_response, parse_review_answer, parse_review_args, review_fields
+from pagination import page_response, parse_page_args
 
 app = Flask(__name__)
+init_metrics(app)
+init_request_log(app)
 
 # Simple configuration
 app.config['SECRET_KEY'] = 'your-secret-key-here'
 
-# In-memory storage
-flashcards_storage = []
-users_storage = []
-sessions_storage = []
+# In-memory or SQLite storage (STORAGE_BACKEND)
+store = create_store()
 
 # Simple CORS headers (no external dependencies)
 @app.after_request
@@ -31,16 +40,18 @@ def after_request(response):
     return response
 
 def hash_password(password, salt=None):
-    """Hash password with salt"""
-    if salt is None:
-        salt = secrets.token_hex(16)
-    password_hash = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt.encode('utf-8'), 100000)
-    return salt, password_hash.hex()
+    """Hash password with salt in the password hashing pool"""
+    return password_hasher.hash_password(password, salt)
 
 def verify_password(password, stored_hash, stored_salt):
-    """Verify password against stored hash"""
-    _, computed_hash = hash_password(password, stored_salt)
-    return computed_hash == stored_hash
+    """Verify password against stored hash in constant time"""
+    return password_hasher.verify_password(password, stored_hash, stored_salt)
+
+def busy_response(error):
+    """503 for a request turned away by the password hashing pool"""
+    response = jsonify({'error': f'Too many sign-ins in progress, please retry ({error})'})
+    response.headers['Retry-After'] = '1'
+    return response, 503
 
 def create_user_session(user_id):
     """Create a session for user"""
@@ -48,39 +59,14 @@ def create_user_session(user_id):
     session_data = {
         'user_id': user_id,
         'session_token': session_token,
-        'expires_at': datetime.now() + timedelta(days=7)
+        'expires_at': datetime.now() + timedelta(seconds=Config.SESSION_LIFETIME)
     }
-    sessions_storage.append(session_data)
+    store.add_session(session_data)
     return session_token
 
 def verify_session_token(session_token):
     """Verify session token and return user info"""
-    for session in sessions_storage:
-        if session['session_token'] == session_token and session['expires_at'] > datetime.now():
-            for user in users_storage:
-                if user['id'] == session['user_id']:
-                    return {
-                        'user_id': user['id'],
-                        'username': user['username'],
-                        'email': user['email']
-                    }
-    return None
-
-def create_fallback_flashcards(notes, num_cards):
-    """Create simple flashcards when AI fails"""
-    sentences = notes.split('.')
-    flashcards = []
-    
-    for i in range(min(num_cards, len(sentences))):
-        if sentences[i].strip():
-            question = f"What is the key point about: {sentences[i][:50]}..."
-            answer = sentences[i].strip()
-            flashcards.append({
-                "question": question,
-                "answer": answer
-            })
-    
-    return flashcards
+    return store.verify_session(session_token)
 
 @app.route('/')
 def index():
@@ -88,6 +74,7 @@ def index():
     return render_template('index.html')
 
 @app.route('/auth/register', methods=['POST'])
+@limit_auth('username', 'email')
 def register():
     """User registration endpoint"""
     try:
@@ -110,9 +97,8 @@ def register():
             return jsonify({'error': 'Password must be at least 6 characters'}), 400
         
         # Check if username or email already exists
-        for user in users_storage:
-            if user['username'] == username or user['email'] == email:
-                return jsonify({'error': 'Username or email already exists'}), 400
+        if store.user_exists(username, email):
+            return jsonify({'error': 'Username or email already exists'}), 400
         
         # Create new user
         user_id = str(uuid.uuid4())
@@ -127,14 +113,18 @@ def register():
             'created_at': datetime.now().isoformat()
         }
         
-        users_storage.append(new_user)
+        if not store.add_user(new_user):
+            return jsonify({'error': 'Username or email already exists'}), 400
         
         return jsonify({'message': 'User registered successfully!', 'user_id': user_id}), 201
             
+    except PasswordHasherBusy as e:
+        return busy_response(e)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/auth/login', methods=['POST'])
+@limit_auth('username')
 def login():
     """User login endpoint"""
     try:
@@ -149,11 +139,7 @@ def login():
             return jsonify({'error': 'Username and password are required'}), 400
         
         # Find user
-        user = None
-        for u in users_storage:
-            if u['username'] == username:
-                user = u
-                break
+        user = store.get_user_by_username(username)
         
         if not user:
             return jsonify({'error': 'Invalid username or password'}), 401
@@ -162,6 +148,11 @@ def login():
         if not verify_password(password, user['password_hash'], user['salt']):
             return jsonify({'error': 'Invalid username or password'}), 401
         
+        # Upgrade hashes stored at an older cost while the password is at hand
+        if password_hasher.needs_rehash(user['password_hash']):
+            salt, password_hash = hash_password(password)
+            store.update_password(user['id'], salt, password_hash)
+        
         # Create session
         session_token = create_user_session(user['id'])
         
@@ -175,6 +166,8 @@ def login():
             }
         })
             
+    except PasswordHasherBusy as e:
+        return busy_response(e)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -185,7 +178,7 @@ def logout():
         session_token = request.headers.get('Authorization', '').replace('Bearer ', '')
         
         # Remove session
-        sessions_storage[:] = [s for s in sessions_storage if s['session_token'] != session_token]
+        store.remove_session(session_token)
         
         return jsonify({'message': 'Logout successful!'})
     except Exception as e:
@@ -232,17 +225,14 @@ def generate():
         flashcards = create_fallback_flashcards(notes, num_cards)
         
         # Save to storage
-        for card in flashcards:
-            card_id = str(uuid.uuid4())
-            card_data = {
-                'id': card_id,
-                'user_id': user['user_id'],
-                'question': card['question'],
-                'answer': card['answer'],
-                'subject': subject,
-                'created_at': datetime.now().isoformat()
-            }
-            flashcards_storage.append(card_data)
+        store.add_flashcards([{
+            'id': str(uuid.uuid4()),
+            'user_id': user['user_id'],
+            'question': card['question'],
+            'answer': card['answer'],
+            'subject': subject,
+            'created_at': datetime.now().isoformat()
+        } for card in flashcards])
         
         return jsonify({
             'flashcards': flashcards,
@@ -254,17 +244,77 @@ def generate():
 
 @app.route('/flashcards')
 def get_flashcards():
-    """Get user's flashcards"""
+    """Get a page of the user's flashcards, newest first"""
     session_token = request.headers.get('Authorization', '').replace('Bearer ', '')
     user = verify_session_token(session_token)
     
     if not user:
         return jsonify({'error': 'Authentication required'}), 401
     
+    try:
+        limit, after, subject = parse_page_args(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
     # Get only user's flashcards
-    user_flashcards = [card for card in flashcards_storage if card.get('user_id') == user['user_id']]
+    user_flashcards = store.page_flashcards(user['user_id'], limit + 1, after, subject)
+    
+    return jsonify(page_response(user_flashcards, limit))
+
+@app.route('/flashcards/search')
+def search_flashcards():
+    """Search the user's flashcards by question and answer text, best match first"""
+    session_token = request.headers.get('Authorization', '').replace('Bearer ', '')
+    user = verify_session_token(session_token)
+    
+    if not user:
+        return jsonify({'error': 'Authentication required'}), 401
+    
+    try:
+        query, limit, subject = parse_search_args(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    results = store.search_flashcards(user['user_id'], query, limit, subject)
+    
+    return jsonify({'flashcards': results, 'query': query, 'count': len(results)})
+
+@app.route('/review/next')
+def next_review():
+    """The user's cards that are due for review, soonest first"""
+    session_token = request.headers.get('Authorization', '').replace('Bearer ', '')
+    user = verify_session_token(session_token)
+    
+    if not user:
+        return jsonify({'error': 'Authentication required'}), 401
+    
+    try:
+        limit = parse_review_args(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    cards = store.due_reviews(user['user_id'], limit)
+    next_due_at = None if cards else store.next_review_at(user['user_id'])
+    return jsonify(due_response(cards, next_due_at))
+
+@app.route('/review/answer', methods=['POST'])
+def answer_review():
+    """Record how well the user recalled a card and schedule its next review"""
+    session_token = request.headers.get('Authorization', '').replace('Bearer ', '')
+    user = verify_session_token(session_token)
+    
+    if not user:
+        return jsonify({'error': 'Authentication required'}), 401
+    
+    try:
+        card_id, grade = parse_review_answer(request.get_json(silent=True) or {})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    return jsonify({'flashcards': user_flashcards})
+    state = store.record_review(user['user_id'], card_id, grade)
+    if state is None:
+        return jsonify({'error': 'Flashcard not found'}), 404
+    return jsonify({'card_id': card_id, 'grade': grade, 'review': review_fields(state)})
 
 @app.route('/health')
 def health_check():
@@ -280,13 +330,17 @@ def health_check():
 @app.route('/debug')
 def debug_info():
     """Debug endpoint"""
+    counts = store.counts()
     return jsonify({
         'app_name': 'AI Study Buddy (Simple)',
         'status': 'running',
         'timestamp': datetime.now().isoformat(),
-        'users_count': len(users_storage),
-        'sessions_count': len(sessions_storage),
-        'flashcards_count': len(flashcards_storage),
+        'users_count': counts['users'],
+        'sessions_count': counts['sessions'],
+        'flashcards_count': counts['flashcards'],
+        'password_hasher': password_hasher.stats(),
+        'auth_rate_limit': auth_limiter.stats(),
+        'sessions': store.session_stats(),
         'cors_enabled': True,
         'endpoints': [
             '/',
@@ -296,8 +350,13 @@ def debug_info():
             '/auth/profile',
             '/generate',
             '/flashcards',
+            '/flashcards/search',
+            '/review/next',
+            '/review/answer',
             '/health',
-            '/debug'
+            '/debug',
+            '/status',
+            '/metrics'
         ]
     })
 
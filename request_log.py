@@ -0,0 +1,187 @@
+"""
+Structured logging for app.py, demo.py and render_simple.py
+log() puts a record on a bounded queue and returns; a daemon thread per
+worker turns records into JSON lines and writes them in batches to stdout or
+LOG_FILE. A request never waits on the stream, and when the queue is full
+records are dropped and counted rather than blocking.
+
+init_app() gives every request an id (the client's X-Request-ID if it sent
+a sensible one), echoes it in the response, stamps it on every record logged
+while the request runs, and logs one 'request' record with the duration once
+the response is built. Routes listed in LOG_SAMPLE_RATES are logged only at
+that rate, except errors and slow requests, which are always logged.
+"""
+
+import atexit
+import json
+import os
+import queue
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from flask import g, has_request_context, request
+
+from config import Config
+
+REQUEST_ID_HEADER = 'X-Request-ID'
+_REQUEST_ID = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+
+def parse_sample_rates(value):
+    """'/health=0.01,/metrics=0' -> {route: rate}; raises ValueError on bad input"""
+    rates = {}
+    for item in filter(None, (part.strip() for part in value.split(','))):
+        route, _, rate = item.rpartition('=')
+        rate = float(rate)
+        if not route or not 0 <= rate <= 1:
+            raise ValueError(f"bad LOG_SAMPLE_RATES entry: {item}")
+        rates[route] = rate
+    return rates
+
+
+class RequestLog:
+    """Queue of log records drained by a background writer thread"""
+
+    def __init__(self, path=None, queue_size=None, batch_size=256):
+        self.path = Config.LOG_FILE if path is None else path
+        self.queue_size = queue_size or Config.LOG_QUEUE_SIZE
+        self.batch_size = batch_size
+        self._reset()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._reset)
+        atexit.register(self.close)
+
+    def _reset(self):
+        """Threads do not survive fork, so each process starts its own lazily"""
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(self.queue_size)
+        self._thread = None
+        self._dropped = 0
+        self._stats = {'written': 0, 'dropped': 0}
+
+    def log(self, event, level='info', **fields):
+        """Queue one record; never blocks"""
+        record = {'ts': time.time(), 'level': level, 'event': event}
+        if has_request_context() and 'request_id' in g:
+            record['request_id'] = g.request_id
+        record.update(fields)
+        if self._thread is None or self._pid != os.getpid():
+            self._start()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self._dropped += 1
+
+    def _start(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                self._reset()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name='request-log', daemon=True)
+                self._thread.start()
+
+    def _loop(self):
+        while True:
+            self._write([self._queue.get()])
+
+    def _drain(self, batch):
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch):
+        batch = self._drain(batch)
+        taken = len(batch)
+        with self._lock:
+            dropped, self._dropped = self._dropped, 0
+        if dropped:
+            batch.append({'ts': time.time(), 'level': 'warning', 'event': 'log_dropped', 'count': dropped})
+        lines = []
+        for record in batch:
+            record['ts'] = datetime.fromtimestamp(record['ts']).isoformat(timespec='milliseconds')
+            lines.append(json.dumps(record, default=str) + '\n')
+        try:
+            if self.path:
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.writelines(lines)
+            else:
+                sys.stdout.writelines(lines)
+                sys.stdout.flush()
+        except (OSError, ValueError):
+            # Nowhere to write (closed stdout at shutdown, unwritable file); drop the batch
+            pass
+        with self._lock:
+            self._stats['written'] += len(lines)
+            self._stats['dropped'] += dropped
+        for _ in range(taken):
+            self._queue.task_done()
+
+    def flush(self):
+        """Wait until every record queued so far has been written"""
+        if self._thread is not None and self._pid == os.getpid():
+            self._queue.join()
+
+    def close(self):
+        """Write whatever is still queued; called at exit"""
+        if self._pid != os.getpid():
+            return
+        while not self._queue.empty():
+            try:
+                self._write([self._queue.get_nowait()])
+            except queue.Empty:
+                break
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, queued=self._queue.qsize(), dropped=self._stats['dropped'] + self._dropped)
+
+
+# Global request log instance
+request_log = RequestLog()
+
+
+def log(event, level='info', **fields):
+    """Log a structured event without blocking the caller"""
+    request_log.log(event, level, **fields)
+
+
+def init_app(app, logger=None):
+    """Give app's requests ids and log each one's status and duration"""
+    logger = logger or request_log
+    if not Config.LOG_REQUESTS:
+        return
+    sample_rates = parse_sample_rates(Config.LOG_SAMPLE_RATES)
+    slow_ms = Config.LOG_SLOW_REQUEST_MS
+
+    @app.before_request
+    def start_request_log():
+        supplied = request.headers.get(REQUEST_ID_HEADER, '')
+        g.request_id = supplied if _REQUEST_ID.match(supplied) else uuid.uuid4().hex
+        g.request_log_started = time.perf_counter()
+
+    @app.after_request
+    def log_request(response):
+        started = g.pop('request_log_started', None)
+        if started is None:
+            return response
+        response.headers[REQUEST_ID_HEADER] = g.request_id
+        duration_ms = (time.perf_counter() - started) * 1000
+        route = request.url_rule.rule if request.url_rule else None
+        rate = sample_rates.get(route, 1.0)
+        if rate < 1.0 and response.status_code < 500 and duration_ms < slow_ms and random.random() >= rate:
+            return response
+        level = 'error' if response.status_code >= 500 else 'warning' if duration_ms >= slow_ms else 'info'
+        logger.log('request', level, method=request.method, path=request.path, route=route,
+                   status=response.status_code, duration_ms=round(duration_ms, 2),
+                   remote_addr=request.remote_addr, sample_rate=rate)
+        return response
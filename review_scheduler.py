@@ -0,0 +1,156 @@
+"""
+Spaced-repetition review scheduling (SM-2)
+Every saved card of a signed-in user has a review state: how many times in a
+row it was recalled, the current interval in days, an ease factor and when it
+is next due. Answering a card with a grade from 0 (blackout) to 5 (perfect)
+moves its due time; grades below 3 start the card over.
+
+ReviewQueue keeps one user's cards in a min-heap by due time, so the next
+due cards come off in O(log n) however large the deck is. The MySQL and
+SQLite stores get the same from a (user_id, due_at) index.
+"""
+
+import heapq
+from datetime import datetime
+
+from config import Config
+
+DAY = 24 * 60 * 60
+INITIAL_EASE = 2.5
+MIN_EASE = 1.3
+PASSING_GRADE = 3
+MAX_GRADE = 5
+
+
+def new_state(due_at):
+    """Review state of a card nobody has reviewed yet, due at epoch seconds due_at"""
+    return {
+        'due_at': due_at,
+        'repetitions': 0,
+        'interval_days': 0,
+        'ease': INITIAL_EASE,
+        'reviews': 0,
+        'last_reviewed_at': None
+    }
+
+
+def schedule(state, grade, now):
+    """The state after answering with grade 0-5 at epoch seconds now"""
+    repetitions, interval, ease = state['repetitions'], state['interval_days'], state['ease']
+    if grade >= PASSING_GRADE:
+        if repetitions == 0:
+            interval = 1
+        elif repetitions == 1:
+            interval = 6
+        else:
+            interval = max(1, round(interval * ease))
+        repetitions += 1
+    else:
+        repetitions, interval = 0, 1
+    miss = MAX_GRADE - grade
+    ease = max(MIN_EASE, ease + 0.1 - miss * (0.08 + miss * 0.02))
+    return {
+        'due_at': now + interval * DAY,
+        'repetitions': repetitions,
+        'interval_days': interval,
+        'ease': round(ease, 4),
+        'reviews': state['reviews'] + 1,
+        'last_reviewed_at': now
+    }
+
+
+def _isoformat(value):
+    if isinstance(value, (int, float)):
+        value = datetime.fromtimestamp(value)
+    return value.isoformat() if value is not None else None
+
+
+def review_fields(state):
+    """A review state for JSON responses, with ISO timestamps"""
+    return dict(state, due_at=_isoformat(state['due_at']), last_reviewed_at=_isoformat(state['last_reviewed_at']))
+
+
+def due_response(cards, next_due_at=None):
+    """Build the /review/next payload from cards carrying a 'review' state"""
+    return {
+        'flashcards': [dict(card, review=review_fields(card['review'])) for card in cards],
+        'count': len(cards),
+        'next_due_at': None if cards else _isoformat(next_due_at)
+    }
+
+
+def parse_review_args(args):
+    """Read limit from /review/next query args; raises ValueError on bad input"""
+    try:
+        limit = int(args.get('limit', 1))
+    except (TypeError, ValueError):
+        raise ValueError('limit must be an integer')
+    if limit < 1:
+        raise ValueError('limit must be at least 1')
+    return min(limit, Config.FLASHCARDS_MAX_PAGE_SIZE)
+
+
+def parse_review_answer(data):
+    """Read card_id and grade from a /review/answer body; raises ValueError on bad input"""
+    card_id = data.get('card_id')
+    if not isinstance(card_id, str) or not card_id:
+        raise ValueError('card_id is required')
+    grade = data.get('grade')
+    if isinstance(grade, bool) or not isinstance(grade, int) or not 0 <= grade <= MAX_GRADE:
+        raise ValueError(f"grade must be an integer from 0 to {MAX_GRADE}")
+    return card_id, grade
+
+
+class ReviewQueue:
+    """One user's cards in a min-heap by due time; removed or rescheduled entries are skipped lazily"""
+
+    def __init__(self):
+        self._heap = []
+        self._due = {}
+
+    def __len__(self):
+        return len(self._due)
+
+    def __contains__(self, card_id):
+        return card_id in self._due
+
+    def push(self, card_id, due_at):
+        """Add a card or move it to a new due time"""
+        self._due[card_id] = due_at
+        heapq.heappush(self._heap, (due_at, card_id))
+        self._compact()
+
+    def remove(self, card_id):
+        if self._due.pop(card_id, None) is not None:
+            self._compact()
+
+    def _is_current(self, entry):
+        return self._due.get(entry[1]) == entry[0]
+
+    def _compact(self):
+        """Rebuild once stale entries outnumber live ones, so the heap stays O(deck size)"""
+        if len(self._heap) > 2 * len(self._due) + 64:
+            self._heap = [(due_at, card_id) for card_id, due_at in self._due.items()]
+            heapq.heapify(self._heap)
+
+    def due(self, now, limit=1):
+        """Up to limit card ids due by now, soonest first, in O(limit log n)"""
+        taken, seen = [], set()
+        while self._heap and len(taken) < limit:
+            entry = self._heap[0]
+            if not self._is_current(entry) or entry[1] in seen:
+                heapq.heappop(self._heap)
+                continue
+            if entry[0] > now:
+                break
+            taken.append(heapq.heappop(self._heap))
+            seen.add(entry[1])
+        for entry in taken:
+            heapq.heappush(self._heap, entry)
+        return [card_id for _, card_id in taken]
+
+    def next_due_at(self):
+        """When the soonest card is due, or None for an empty queue"""
+        while self._heap and not self._is_current(self._heap[0]):
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
@@ -0,0 +1,110 @@
+"""
+Incremental full-text search over flashcards with BM25 ranking
+Each user gets an inverted index from term to the cards containing it, kept
+up to date as cards are added or removed. A query only visits the postings
+of its own terms, so search time follows how common the query words are
+rather than the size of the deck.
+"""
+
+import heapq
+import math
+import re
+
+from config import Config
+from fallback_generator import STOPWORDS
+
+K1 = 1.2
+B = 0.75
+
+_WORD = re.compile(r'\w+')
+
+
+def tokenize(text):
+    """Lower-cased words of text, without stopwords"""
+    return [word for word in _WORD.findall(text.lower()) if word not in STOPWORDS]
+
+
+def card_terms(card):
+    return tokenize(f"{card.get('question', '')} {card.get('answer', '')}")
+
+
+class SearchIndex:
+    """Inverted index of one user's cards"""
+
+    def __init__(self):
+        self._postings = {}
+        self._lengths = {}
+        self._terms = {}
+        self._total_length = 0
+
+    def __len__(self):
+        return len(self._lengths)
+
+    def __contains__(self, card_id):
+        return card_id in self._lengths
+
+    def add(self, card_id, card):
+        self.remove(card_id)
+        terms = card_terms(card)
+        counts = {}
+        for term in terms:
+            counts[term] = counts.get(term, 0) + 1
+        for term, count in counts.items():
+            self._postings.setdefault(term, {})[card_id] = count
+        self._lengths[card_id] = len(terms)
+        self._terms[card_id] = tuple(counts)
+        self._total_length += len(terms)
+
+    def remove(self, card_id):
+        length = self._lengths.pop(card_id, None)
+        if length is None:
+            return
+        self._total_length -= length
+        for term in self._terms.pop(card_id):
+            postings = self._postings[term]
+            del postings[card_id]
+            if not postings:
+                del self._postings[term]
+
+    def search(self, query, limit=20, accept=None):
+        """
+        Up to limit (card_id, score) pairs for query, best first.
+        accept, if given, is called with each matching card id to filter results.
+        """
+        count = len(self._lengths)
+        if not count:
+            return []
+        average_length = self._total_length / count or 1.0
+        lengths = self._lengths
+
+        scores = {}
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            frequency = len(postings)
+            idf = math.log(1 + (count - frequency + 0.5) / (frequency + 0.5))
+            # Hoisted out of the loop: the per-posting work is one lookup and a few multiplies
+            weight = idf * (K1 + 1)
+            scale = K1 * B / average_length
+            base = K1 * (1 - B)
+            for card_id, tf in postings.items():
+                scores[card_id] = scores.get(card_id, 0.0) + weight * tf / (tf + base + scale * lengths[card_id])
+
+        if accept is not None:
+            scores = {card_id: score for card_id, score in scores.items() if accept(card_id)}
+        return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+
+def parse_search_args(args):
+    """Read q, limit and subject from query args; raises ValueError on bad input"""
+    query = (args.get('q') or '').strip()
+    if not tokenize(query):
+        raise ValueError('q must contain at least one search word')
+    try:
+        limit = int(args.get('limit', Config.FLASHCARDS_PAGE_SIZE))
+    except (TypeError, ValueError):
+        raise ValueError('limit must be an integer')
+    if limit < 1:
+        raise ValueError('limit must be at least 1')
+    return query, min(limit, Config.FLASHCARDS_MAX_PAGE_SIZE), args.get('subject') or None
@@ -0,0 +1,237 @@
+"""
+Session cache for AI Study Buddy
+Keeps verified sessions in memory so login_required can skip the
+user_sessions/users JOIN on every protected request.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from config import Config
+from request_log import log
+from metrics import cache_samples, metrics
+
+# Returned by SessionCache.get when the token has no cached entry
+MISS = object()
+
+
+def token_key(session_token):
+    """Hash a session token so raw tokens never leave the request"""
+    return hashlib.sha256(session_token.encode('utf-8')).hexdigest()
+
+
+class FileInvalidationChannel:
+    """Share session revocations between gunicorn workers through an append-only file"""
+
+    def __init__(self, path, poll_interval=None, max_bytes=1024 * 1024):
+        self.path = path
+        self.poll_interval = poll_interval if poll_interval is not None else Config.SESSION_INVALIDATION_POLL
+        self.max_bytes = max_bytes
+        self._handle = None
+        self._inode = None
+        self._started = False
+        self._next_poll = 0.0
+        self._lock = threading.Lock()
+
+    def publish(self, key):
+        """Announce that the session with this key has been revoked"""
+        line = f"{key}\n".encode('ascii')
+        # A single O_APPEND write is atomic, so workers never see torn lines
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        try:
+            os.write(fd, line)
+            size = os.fstat(fd).st_size
+        finally:
+            os.close(fd)
+
+        if size > self.max_bytes:
+            try:
+                # Readers keep their handle to the old file and drain it first
+                os.replace(self.path, self.path + '.1')
+            except OSError:
+                pass
+
+    def poll(self):
+        """Return keys revoked since the last poll, at most once per poll interval"""
+        now = time.monotonic()
+        if now < self._next_poll:
+            return []
+
+        with self._lock:
+            if now < self._next_poll:
+                return []
+            self._next_poll = now + self.poll_interval
+
+            keys = []
+            if self._handle is None:
+                # Revocations published before this worker started are already in MySQL
+                self._open(seek_end=not self._started)
+                self._started = True
+                if self._handle is None:
+                    return keys
+
+            keys.extend(self._read_new())
+            try:
+                inode = os.stat(self.path).st_ino
+            except OSError:
+                inode = None
+            if inode is not None and inode != self._inode:
+                # File was rotated - finish the old one, then follow the new one
+                self._handle.close()
+                self._handle = None
+                self._open(seek_end=False)
+                if self._handle is not None:
+                    keys.extend(self._read_new())
+            return keys
+
+    def _open(self, seek_end):
+        try:
+            self._handle = open(self.path, 'rb')
+        except OSError:
+            # Nothing published yet; start from the beginning once it exists
+            self._handle = None
+            if seek_end:
+                fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+                os.close(fd)
+                self._handle = open(self.path, 'rb')
+            else:
+                return
+        self._inode = os.fstat(self._handle.fileno()).st_ino
+        if seek_end:
+            self._handle.seek(0, os.SEEK_END)
+
+    def _read_new(self):
+        data = self._handle.read()
+        if not data:
+            return []
+        # Keep a partial trailing line for the next poll
+        complete, _, partial = data.rpartition(b'\n')
+        if partial:
+            self._handle.seek(-len(partial), os.SEEK_CUR)
+        return [line.decode('ascii') for line in complete.split(b'\n') if line]
+
+
+class SessionCache:
+    """Bounded LRU of verified sessions with TTL and negative caching"""
+
+    def __init__(self, max_entries=None, ttl=None, negative_ttl=None, channel=None):
+        self.max_entries = max_entries or Config.SESSION_CACHE_SIZE
+        self.ttl = ttl if ttl is not None else Config.SESSION_CACHE_TTL
+        self.negative_ttl = negative_ttl if negative_ttl is not None else Config.SESSION_CACHE_NEGATIVE_TTL
+        self.channel = channel
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, session_token):
+        """Return the cached user dict, None for a known-bad token, or MISS"""
+        self._apply_remote_invalidations()
+        key = token_key(session_token)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return MISS
+
+            user, expires = entry
+            if expires <= now:
+                del self._entries[key]
+                self.misses += 1
+                return MISS
+
+            self._entries.move_to_end(key)
+            if user is None:
+                self.negative_hits += 1
+                return None
+            self.hits += 1
+            return dict(user)
+
+    def set(self, session_token, user, expires_at=None):
+        """Cache a verified user until the TTL or the session's expires_at, whichever is first"""
+        ttl = self.ttl
+        if expires_at is not None:
+            ttl = min(ttl, (expires_at - datetime.now()).total_seconds())
+        if ttl <= 0:
+            return
+        self._store(token_key(session_token), dict(user), ttl)
+
+    def set_invalid(self, session_token):
+        """Remember briefly that a token did not verify"""
+        if self.negative_ttl > 0:
+            self._store(token_key(session_token), None, self.negative_ttl)
+
+    def invalidate(self, session_token):
+        """Forget a session here and, if configured, in every other worker"""
+        key = token_key(session_token)
+        self._discard(key)
+        if self.channel is not None:
+            try:
+                self.channel.publish(key)
+            except OSError as e:
+                log('session_invalidation_error', 'error', operation='publish', error=str(e))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Hit/miss counters for the session cache"""
+        with self._lock:
+            lookups = self.hits + self.negative_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'negative_hits': self.negative_hits,
+                'misses': self.misses,
+                'hit_ratio': round((self.hits + self.negative_hits) / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'cross_worker_invalidation': self.channel is not None
+            }
+
+    def _store(self, key, user, ttl):
+        with self._lock:
+            self._entries[key] = (user, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def _discard(self, key):
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def _apply_remote_invalidations(self):
+        if self.channel is None:
+            return
+        try:
+            keys = self.channel.poll()
+        except OSError as e:
+            log('session_invalidation_error', 'error', operation='poll', error=str(e))
+            return
+        for key in keys:
+            self._discard(key)
+
+
+def _default_channel():
+    if Config.SESSION_INVALIDATION_FILE:
+        return FileInvalidationChannel(Config.SESSION_INVALIDATION_FILE)
+    return None
+
+
+# Global session cache instance
+session_cache = SessionCache(channel=_default_channel())
+metrics.register_collector(lambda: cache_samples(
+    'session', session_cache.hits + session_cache.negative_hits, session_cache.misses))
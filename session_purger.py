@@ -0,0 +1,107 @@
+"""
+Background purge of expired MySQL login sessions
+Expired rows in user_sessions are never read again, but nothing removed
+them, so the table and its unique token index grew with every login ever
+made. A daemon thread per worker deletes them in small batches, each its
+own short transaction, so the purge never holds locks long enough to stall
+logins.
+"""
+
+import os
+import threading
+import time
+
+import mysql.connector
+
+from config import Config
+from db_pool import db_connection
+from queries import SESSION_PURGE
+from request_log import log
+
+
+class SessionPurger:
+    """Periodically deletes expired rows from user_sessions"""
+
+    def __init__(self, interval=None, batch_size=None):
+        self.interval = interval or Config.SESSION_PURGE_INTERVAL
+        self.batch_size = batch_size or Config.SESSION_PURGE_BATCH
+        self._reset()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        """Threads do not survive fork, so each process starts its own lazily"""
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self._stats = {'runs': 0, 'purged': 0, 'errors': 0, 'last_run': None}
+
+    def start(self):
+        """Start the purge thread for this process if not running"""
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._reset()
+            if self._thread is None:
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._loop, name='session-purger', daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        with self._lock:
+            thread, self._thread = self._thread, None
+            self._stop.set()
+        if thread is not None:
+            thread.join()
+
+    def purge(self):
+        """Delete expired sessions batch by batch; returns how many were removed"""
+        purged = 0
+        while True:
+            with db_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(SESSION_PURGE, (self.batch_size,))
+                deleted = cursor.rowcount
+                conn.commit()
+                cursor.close()
+            purged += deleted
+            if deleted < self.batch_size or self._stop.is_set():
+                break
+        with self._lock:
+            self._stats['runs'] += 1
+            self._stats['purged'] += purged
+            self._stats['last_run'] = time.time()
+        return purged
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.purge()
+            except mysql.connector.Error as e:
+                with self._lock:
+                    self._stats['errors'] += 1
+                log('session_purge_error', 'error', error=str(e))
+
+    def stats(self):
+        """Purge counters plus live and expired session counts"""
+        with self._lock:
+            stats = dict(self._stats, running=self._thread is not None)
+        try:
+            with db_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    SELECT COALESCE(SUM(expires_at > NOW()), 0), COALESCE(SUM(expires_at <= NOW()), 0)
+                    FROM user_sessions
+                """)
+                live, expired = cursor.fetchone()
+                cursor.close()
+            stats.update(live=int(live), expired=int(expired))
+        except mysql.connector.Error:
+            stats.update(live=None, expired=None)
+        return stats
+
+
+# Global session purger instance
+session_purger = SessionPurger()
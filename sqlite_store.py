@@ -0,0 +1,600 @@
+"""
+SQLite storage for single-node deployments
+Implements the MemoryStore interface on one SQLite file in WAL mode, so data
+survives restarts and every gunicorn worker on the box shares it without a
+database server. Each thread keeps one connection, and with it sqlite3's
+cache of prepared statements; every write method is a single short
+BEGIN IMMEDIATE transaction, so readers never wait and writers queue
+briefly instead of failing with "database is locked".
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from config import Config
+from metrics import observe_query
+from near_duplicates import band_hashes, best_match, pack_signature, unpack_signature
+from review_scheduler import schedule
+from search_index import tokenize
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id TEXT PRIMARY KEY,
+    username TEXT NOT NULL UNIQUE,
+    email TEXT NOT NULL UNIQUE,
+    password_hash TEXT NOT NULL,
+    salt TEXT NOT NULL,
+    created_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS sessions (
+    session_token TEXT PRIMARY KEY,
+    id TEXT,
+    user_id TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions (expires_at);
+CREATE INDEX IF NOT EXISTS idx_sessions_user_last_used ON sessions (user_id, last_used);
+
+-- seq is the rowid the full-text index points at; an explicit INTEGER PRIMARY KEY survives VACUUM
+CREATE TABLE IF NOT EXISTS flashcards (
+    seq INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    user_id TEXT,
+    question TEXT NOT NULL,
+    answer TEXT NOT NULL,
+    subject TEXT,
+    created_at TEXT NOT NULL,
+    minhash BLOB
+);
+CREATE INDEX IF NOT EXISTS idx_flashcards_user_created ON flashcards (user_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_flashcards_user_subject_created ON flashcards (user_id, subject, created_at, id);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS flashcards_fts USING fts5(
+    question, answer, content='flashcards', content_rowid='seq'
+);
+CREATE TRIGGER IF NOT EXISTS flashcards_fts_insert AFTER INSERT ON flashcards BEGIN
+    INSERT INTO flashcards_fts (rowid, question, answer) VALUES (new.seq, new.question, new.answer);
+END;
+CREATE TRIGGER IF NOT EXISTS flashcards_fts_delete AFTER DELETE ON flashcards BEGIN
+    INSERT INTO flashcards_fts (flashcards_fts, rowid, question, answer)
+    VALUES ('delete', old.seq, old.question, old.answer);
+END;
+
+CREATE TABLE IF NOT EXISTS flashcard_lsh_buckets (
+    user_id TEXT NOT NULL,
+    band_hash INTEGER NOT NULL,
+    flashcard_id TEXT NOT NULL,
+    PRIMARY KEY (user_id, band_hash, flashcard_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_lsh_buckets_flashcard ON flashcard_lsh_buckets (flashcard_id);
+
+CREATE TABLE IF NOT EXISTS study_sessions (
+    id TEXT PRIMARY KEY,
+    user_id TEXT,
+    session_name TEXT,
+    created_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_study_sessions_user ON study_sessions (user_id, created_at);
+
+-- A session's cards in order; the primary key serves loading a whole session
+CREATE TABLE IF NOT EXISTS study_session_cards (
+    session_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    flashcard_id TEXT NOT NULL,
+    PRIMARY KEY (session_id, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_study_session_cards_flashcard ON study_session_cards (flashcard_id);
+
+-- Spaced-repetition state of each signed-in user's cards; (user_id, due_at) is the due queue
+CREATE TABLE IF NOT EXISTS flashcard_reviews (
+    flashcard_id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    due_at REAL NOT NULL,
+    repetitions INTEGER NOT NULL DEFAULT 0,
+    interval_days INTEGER NOT NULL DEFAULT 0,
+    ease REAL NOT NULL DEFAULT 2.5,
+    reviews INTEGER NOT NULL DEFAULT 0,
+    last_reviewed_at REAL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_flashcard_reviews_user_due ON flashcard_reviews (user_id, due_at);
+
+CREATE TABLE IF NOT EXISTS reset_tokens (
+    token TEXT PRIMARY KEY,
+    email TEXT NOT NULL UNIQUE,
+    user_id TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+CARD_COLUMNS = "id, user_id, question, answer, subject, created_at"
+REVIEW_COLUMNS = "due_at, repetitions, interval_days, ease, reviews, last_reviewed_at"
+
+# SQLite limits bound parameters per statement; stay well below it
+_CHUNK = 500
+
+# Refresh a session's last_used at most this often, so verifying is a read
+_TOUCH_INTERVAL = 60
+
+
+def _timestamp(value):
+    return value.timestamp() if isinstance(value, datetime) else float(value)
+
+
+class SQLiteLSHIndex:
+    """A user's near-duplicate index, read from the MinHash column and bucket table"""
+
+    def __init__(self, store, user_id):
+        self._store = store
+        self.user_id = user_id
+
+    def __len__(self):
+        return self._store._read(
+            "SELECT COUNT(*) FROM flashcards WHERE user_id IS ? AND minhash IS NOT NULL", (self.user_id,)
+        ).fetchone()[0]
+
+    def __contains__(self, card_id):
+        return self.signature(card_id) is not None
+
+    def signature(self, card_id):
+        row = self._store._read("SELECT minhash FROM flashcards WHERE id = ?", (card_id,)).fetchone()
+        return unpack_signature(row[0]) if row and row[0] is not None else None
+
+    def add(self, card_id, signature):
+        with self._store._write() as conn:
+            self._store._index_signature(conn, self.user_id, card_id, signature)
+
+    def remove(self, card_id):
+        with self._store._write() as conn:
+            conn.execute("DELETE FROM flashcard_lsh_buckets WHERE flashcard_id = ?", (card_id,))
+            conn.execute("UPDATE flashcards SET minhash = NULL WHERE id = ?", (card_id,))
+
+    def query(self, signature, threshold=None):
+        keys = band_hashes(signature)
+        rows = self._store._read(f"""
+            SELECT DISTINCT f.id, f.minhash
+            FROM flashcard_lsh_buckets b JOIN flashcards f ON f.id = b.flashcard_id
+            WHERE b.user_id = ? AND b.band_hash IN ({', '.join('?' * len(keys))})
+        """, [self.user_id, *keys]).fetchall()
+        return best_match(signature, rows, threshold)
+
+
+class SQLiteStore:
+    """MemoryStore-compatible storage in a SQLite file shared by every worker"""
+
+    def __init__(self, path=None):
+        self.path = path or Config.STORAGE_PATH
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._session_stats = {'expired': 0, 'evicted': 0}
+        with self._write() as conn:
+            had_reviews = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'flashcard_reviews'").fetchone()
+            # executescript would commit the open transaction, so run the statements one by one
+            for statement in _statements(SCHEMA):
+                conn.execute(statement)
+            _move_session_card_lists(conn)
+            if not had_reviews:
+                # Cards saved before reviews existed are all due now
+                conn.execute("""
+                    INSERT OR IGNORE INTO flashcard_reviews (flashcard_id, user_id, due_at)
+                    SELECT id, user_id, ? FROM flashcards WHERE user_id IS NOT NULL
+                """, (time.time(),))
+
+    def _connect(self):
+        """This thread's connection, reopened after a fork"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, cached_statements=256)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            # With WAL, NORMAL only risks the last transactions on power loss, never corruption
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=10000")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _read(self, sql, params=()):
+        started = time.perf_counter()
+        try:
+            return self._connect().execute(sql, params)
+        finally:
+            observe_query('sqlite', 'select', time.perf_counter() - started)
+
+    @contextmanager
+    def _write(self):
+        """One short write transaction; IMMEDIATE takes the write lock up front"""
+        conn = self._connect()
+        started = time.perf_counter()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        observe_query('sqlite', 'transaction', time.perf_counter() - started)
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # Users
+
+    def add_user(self, user):
+        """Store a new user; returns False if the username or email is taken"""
+        try:
+            with self._write() as conn:
+                conn.execute("""
+                    INSERT INTO users (id, username, email, password_hash, salt, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, (user['id'], user['username'], user['email'], user['password_hash'], user['salt'],
+                      user.get('created_at')))
+            return True
+        except sqlite3.IntegrityError:
+            return False
+
+    def _user(self, column, value):
+        row = self._read(f"SELECT * FROM users WHERE {column} = ?", (value,)).fetchone()
+        return dict(row) if row else None
+
+    def get_user(self, user_id):
+        return self._user('id', user_id)
+
+    def get_user_by_username(self, username):
+        return self._user('username', username)
+
+    def get_user_by_email(self, email):
+        return self._user('email', email)
+
+    def user_exists(self, username, email):
+        return self._read("SELECT 1 FROM users WHERE username = ? OR email = ?", (username, email)).fetchone() is not None
+
+    def update_password(self, user_id, salt, password_hash):
+        """Replace a user's password hash; returns the user or None"""
+        with self._write() as conn:
+            conn.execute("UPDATE users SET salt = ?, password_hash = ? WHERE id = ?", (salt, password_hash, user_id))
+        return self.get_user(user_id)
+
+    # Login sessions
+
+    def add_session(self, session, max_per_user=None):
+        """Store a session, evicting the user's least recently used ones over the cap"""
+        max_per_user = max_per_user or Config.MAX_SESSIONS_PER_USER
+        now = time.time()
+        with self._write() as conn:
+            expired = conn.execute("DELETE FROM sessions WHERE expires_at <= ?", (now,)).rowcount
+            conn.execute("""
+                INSERT OR REPLACE INTO sessions (session_token, id, user_id, expires_at, last_used)
+                VALUES (?, ?, ?, ?, ?)
+            """, (session['session_token'], session.get('id'), session['user_id'],
+                  _timestamp(session['expires_at']), now))
+            evicted = conn.execute("""
+                DELETE FROM sessions WHERE session_token IN (
+                    SELECT session_token FROM sessions WHERE user_id = ?
+                    ORDER BY last_used DESC LIMIT -1 OFFSET ?
+                )
+            """, (session['user_id'], max_per_user)).rowcount
+        with self._stats_lock:
+            self._session_stats['expired'] += expired
+            self._session_stats['evicted'] += evicted
+
+    def get_session(self, session_token):
+        row = self._read("SELECT * FROM sessions WHERE session_token = ?", (session_token,)).fetchone()
+        if row is None:
+            return None
+        session = dict(row)
+        session['expires_at'] = datetime.fromtimestamp(session['expires_at'])
+        return session
+
+    def remove_session(self, session_token):
+        session = self.get_session(session_token)
+        if session is not None:
+            with self._write() as conn:
+                conn.execute("DELETE FROM sessions WHERE session_token = ?", (session_token,))
+        return session
+
+    def expire_sessions(self, now=None):
+        """Drop every session whose expiry has passed; returns how many"""
+        with self._write() as conn:
+            expired = conn.execute("DELETE FROM sessions WHERE expires_at <= ?",
+                                   (_timestamp(now or datetime.now()),)).rowcount
+        with self._stats_lock:
+            self._session_stats['expired'] += expired
+        return expired
+
+    def session_stats(self):
+        """Live session count and how many sessions expired or were evicted"""
+        live, users = self._read(
+            "SELECT COUNT(*), COUNT(DISTINCT user_id) FROM sessions WHERE expires_at > ?", (time.time(),)
+        ).fetchone()
+        with self._stats_lock:
+            return dict(self._session_stats, live=live, users=users)
+
+    def verify_session(self, session_token):
+        """Return user info for a live session token, or None"""
+        now = time.time()
+        row = self._read("""
+            SELECT s.expires_at, s.last_used, u.id, u.username, u.email
+            FROM sessions s JOIN users u ON u.id = s.user_id
+            WHERE s.session_token = ?
+        """, (session_token,)).fetchone()
+        if row is None:
+            return None
+        if row['expires_at'] <= now:
+            self.expire_sessions()
+            return None
+        if now - row['last_used'] > _TOUCH_INTERVAL:
+            with self._write() as conn:
+                conn.execute("UPDATE sessions SET last_used = ? WHERE session_token = ?", (now, session_token))
+        return {
+            'user_id': row['id'],
+            'username': row['username'],
+            'email': row['email']
+        }
+
+    # Flashcards
+
+    def _index_signature(self, conn, user_id, card_id, signature):
+        conn.execute("UPDATE flashcards SET minhash = ? WHERE id = ?", (pack_signature(signature), card_id))
+        conn.executemany(
+            "INSERT OR IGNORE INTO flashcard_lsh_buckets (user_id, band_hash, flashcard_id) VALUES (?, ?, ?)",
+            [(user_id, key, card_id) for key in band_hashes(signature)]
+        )
+
+    def add_flashcards(self, cards, signatures=None):
+        """Store flashcard dicts, plus MinHash signatures if given"""
+        with self._write() as conn:
+            conn.executemany(f"""
+                INSERT INTO flashcards ({CARD_COLUMNS}, minhash) VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, [
+                (card['id'], card.get('user_id'), card['question'], card['answer'], card.get('subject'),
+                 card['created_at'], pack_signature(signatures[i]) if signatures is not None else None)
+                for i, card in enumerate(cards)
+            ])
+            if signatures is not None:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO flashcard_lsh_buckets (user_id, band_hash, flashcard_id) VALUES (?, ?, ?)",
+                    [(card.get('user_id'), key, card['id'])
+                     for card, signature in zip(cards, signatures) for key in band_hashes(signature)]
+                )
+            # New cards are due for their first review straight away
+            now = time.time()
+            conn.executemany(
+                "INSERT OR REPLACE INTO flashcard_reviews (flashcard_id, user_id, due_at) VALUES (?, ?, ?)",
+                [(card['id'], card['user_id'], now) for card in cards if card.get('user_id') is not None]
+            )
+
+    def remove_flashcards(self, card_ids):
+        """Delete flashcards by id; returns how many were removed"""
+        card_ids = list(card_ids)
+        removed = 0
+        with self._write() as conn:
+            for start in range(0, len(card_ids), _CHUNK):
+                chunk = card_ids[start:start + _CHUNK]
+                placeholders = ', '.join('?' * len(chunk))
+                conn.execute(f"DELETE FROM flashcard_lsh_buckets WHERE flashcard_id IN ({placeholders})", chunk)
+                conn.execute(f"DELETE FROM study_session_cards WHERE flashcard_id IN ({placeholders})", chunk)
+                conn.execute(f"DELETE FROM flashcard_reviews WHERE flashcard_id IN ({placeholders})", chunk)
+                removed += conn.execute(f"DELETE FROM flashcards WHERE id IN ({placeholders})", chunk).rowcount
+        return removed
+
+    def near_duplicate_index(self, user_id):
+        """The LSH index of a user's card signatures"""
+        return SQLiteLSHIndex(self, user_id)
+
+    def search_flashcards(self, user_id, query, limit=20, subject=None):
+        """Up to limit of a user's cards matching query, best BM25 match first"""
+        terms = tokenize(query)
+        if not terms:
+            return []
+        # Quote every term so user input is never parsed as FTS5 query syntax
+        match = ' OR '.join('"' + term.replace('"', '""') + '"' for term in dict.fromkeys(terms))
+        sql = f"""
+            SELECT {', '.join('f.' + column for column in CARD_COLUMNS.split(', '))},
+                   -bm25(flashcards_fts) AS score
+            FROM flashcards_fts JOIN flashcards f ON f.seq = flashcards_fts.rowid
+            WHERE flashcards_fts MATCH ? AND f.user_id IS ?
+        """
+        params = [match, user_id]
+        if subject:
+            sql += " AND f.subject = ?"
+            params.append(subject)
+        sql += " ORDER BY bm25(flashcards_fts) LIMIT ?"
+        params.append(limit)
+        return [dict(row, score=round(row['score'], 4)) for row in self._read(sql, params)]
+
+    def get_user_flashcards(self, user_id):
+        """Return a user's flashcards, oldest first"""
+        return list(self.iter_user_flashcards(user_id, newest_first=False))
+
+    def iter_user_flashcards(self, user_id, newest_first=True):
+        """Yield a user's flashcards from one cursor, newest first unless newest_first is False"""
+        order = 'DESC' if newest_first else 'ASC'
+        cursor = self._read(f"""
+            SELECT {CARD_COLUMNS} FROM flashcards WHERE user_id IS ? ORDER BY created_at {order}, id {order}
+        """, (user_id,))
+        try:
+            while True:
+                rows = cursor.fetchmany(Config.EXPORT_FETCH_SIZE)
+                if not rows:
+                    return
+                for row in rows:
+                    yield dict(row)
+        finally:
+            cursor.close()
+
+    def page_flashcards(self, user_id, limit, after=None, subject=None):
+        """Up to limit of a user's cards older than the (created_at, id) key, newest first"""
+        sql = f"SELECT {CARD_COLUMNS} FROM flashcards WHERE user_id IS ?"
+        params = [user_id]
+        if subject:
+            sql += " AND subject = ?"
+            params.append(subject)
+        if after:
+            sql += " AND (created_at, id) < (?, ?)"
+            params.extend(after)
+        sql += " ORDER BY created_at DESC, id DESC LIMIT ?"
+        params.append(limit)
+        return [dict(row) for row in self._read(sql, params)]
+
+    # Reviews
+
+    def due_reviews(self, user_id, limit=1, now=None):
+        """Up to limit of a user's cards due for review by now, soonest first, each with its review state"""
+        rows = self._read(f"""
+            SELECT {', '.join('f.' + column for column in CARD_COLUMNS.split(', '))},
+                   {', '.join('r.' + column for column in REVIEW_COLUMNS.split(', '))}
+            FROM flashcard_reviews r JOIN flashcards f ON f.id = r.flashcard_id
+            WHERE r.user_id = ? AND r.due_at <= ?
+            ORDER BY r.due_at, r.flashcard_id
+            LIMIT ?
+        """, (user_id, time.time() if now is None else now, limit))
+        cards = []
+        for row in rows:
+            card = {column: row[column] for column in CARD_COLUMNS.split(', ')}
+            card['review'] = {column: row[column] for column in REVIEW_COLUMNS.split(', ')}
+            cards.append(card)
+        return cards
+
+    def next_review_at(self, user_id):
+        """When the user's next card falls due, or None if they have no cards"""
+        return self._read("SELECT MIN(due_at) FROM flashcard_reviews WHERE user_id = ?", (user_id,)).fetchone()[0]
+
+    def record_review(self, user_id, card_id, grade, now=None):
+        """Reschedule a card after an answer; returns its new state, or None if it is not the user's"""
+        now = time.time() if now is None else now
+        with self._write() as conn:
+            row = conn.execute(f"""
+                SELECT {REVIEW_COLUMNS} FROM flashcard_reviews WHERE flashcard_id = ? AND user_id = ?
+            """, (card_id, user_id)).fetchone()
+            if row is None:
+                return None
+            state = schedule(dict(row), grade, now)
+            conn.execute(f"""
+                UPDATE flashcard_reviews SET {', '.join(column + ' = ?' for column in REVIEW_COLUMNS.split(', '))}
+                WHERE flashcard_id = ?
+            """, [state[column] for column in REVIEW_COLUMNS.split(', ')] + [card_id])
+        return state
+
+    # Study sessions
+
+    def add_study_session(self, study_session):
+        """Store a study session; only the owner's existing cards are kept, in the order given"""
+        user_id = study_session.get('user_id')
+        requested = list(dict.fromkeys(study_session.get('flashcard_ids', [])))
+        with self._write() as conn:
+            conn.execute("INSERT INTO study_sessions (id, user_id, session_name, created_at) VALUES (?, ?, ?, ?)",
+                         (study_session['id'], user_id, study_session.get('session_name'),
+                          study_session.get('created_at')))
+            owned = set()
+            for start in range(0, len(requested), _CHUNK):
+                chunk = requested[start:start + _CHUNK]
+                owned.update(row[0] for row in conn.execute(f"""
+                    SELECT id FROM flashcards WHERE user_id IS ? AND id IN ({', '.join('?' * len(chunk))})
+                """, [user_id, *chunk]))
+            flashcard_ids = [card_id for card_id in requested if card_id in owned]
+            conn.executemany(
+                "INSERT INTO study_session_cards (session_id, position, flashcard_id) VALUES (?, ?, ?)",
+                [(study_session['id'], position, card_id) for position, card_id in enumerate(flashcard_ids)]
+            )
+        return dict(study_session, flashcard_ids=flashcard_ids)
+
+    def get_user_study_sessions(self, user_id):
+        rows = self._read("""
+            SELECT s.id, s.user_id, s.session_name, s.created_at, c.flashcard_id
+            FROM study_sessions s LEFT JOIN study_session_cards c ON c.session_id = s.id
+            WHERE s.user_id IS ?
+            ORDER BY s.created_at, s.id, c.position
+        """, (user_id,))
+        sessions = {}
+        for row in rows:
+            study_session = sessions.get(row['id'])
+            if study_session is None:
+                study_session = sessions[row['id']] = dict(row, flashcard_ids=[])
+                del study_session['flashcard_id']
+            if row['flashcard_id'] is not None:
+                study_session['flashcard_ids'].append(row['flashcard_id'])
+        return list(sessions.values())
+
+    def get_study_session_cards(self, user_id, session_id):
+        """A user's study session and its cards in order, or None if it is not theirs"""
+        rows = self._read(f"""
+            SELECT s.session_name, s.created_at AS session_created_at,
+                   {', '.join('f.' + column for column in CARD_COLUMNS.split(', '))}
+            FROM study_sessions s
+            LEFT JOIN study_session_cards c ON c.session_id = s.id
+            LEFT JOIN flashcards f ON f.id = c.flashcard_id
+            WHERE s.id = ? AND s.user_id IS ?
+            ORDER BY c.position
+        """, (session_id, user_id)).fetchall()
+        if not rows:
+            return None
+        study_session = {'id': session_id, 'user_id': user_id, 'session_name': rows[0]['session_name'],
+                         'created_at': rows[0]['session_created_at']}
+        columns = CARD_COLUMNS.split(', ')
+        return study_session, [{column: row[column] for column in columns} for row in rows if row['id'] is not None]
+
+    # Password reset tokens
+
+    def set_reset_token(self, reset_data):
+        """Store a reset token, replacing any earlier token for the same email"""
+        with self._write() as conn:
+            conn.execute("DELETE FROM reset_tokens WHERE email = ?", (reset_data['email'],))
+            conn.execute("INSERT INTO reset_tokens (token, email, user_id, expires_at) VALUES (?, ?, ?, ?)",
+                         (reset_data['token'], reset_data['email'], reset_data['user_id'],
+                          _timestamp(reset_data['expires_at'])))
+
+    def get_reset_token(self, token):
+        """Return reset data for an unexpired token, or None"""
+        row = self._read("SELECT * FROM reset_tokens WHERE token = ? AND expires_at > ?",
+                         (token, time.time())).fetchone()
+        if row is None:
+            return None
+        return dict(row, expires_at=datetime.fromtimestamp(row['expires_at']))
+
+    def remove_reset_token(self, token):
+        with self._write() as conn:
+            conn.execute("DELETE FROM reset_tokens WHERE token = ?", (token,))
+
+    def counts(self):
+        """Number of stored objects of each kind"""
+        row = self._read("""
+            SELECT (SELECT COUNT(*) FROM users), (SELECT COUNT(*) FROM sessions),
+                   (SELECT COUNT(*) FROM flashcards), (SELECT COUNT(*) FROM study_sessions)
+        """).fetchone()
+        return dict(zip(('users', 'sessions', 'flashcards', 'study_sessions'), row))
+
+
+def _move_session_card_lists(conn):
+    """Copy study_sessions.flashcard_ids from files created before study_session_cards existed, then drop it"""
+    columns = [row['name'] for row in conn.execute("PRAGMA table_info(study_sessions)")]
+    if 'flashcard_ids' not in columns:
+        return
+    conn.execute("""
+        INSERT OR IGNORE INTO study_session_cards (session_id, position, flashcard_id)
+        SELECT s.id, j.key, f.id
+        FROM study_sessions s, json_each(s.flashcard_ids) j
+        JOIN flashcards f ON f.id = j.value AND f.user_id IS s.user_id
+    """)
+    conn.execute("ALTER TABLE study_sessions DROP COLUMN flashcard_ids")
+
+
+def _statements(script):
+    """Split a schema script into statements, keeping trigger bodies whole"""
+    statements, current = [], ''
+    for line in script.splitlines():
+        if line.strip().startswith('--'):
+            continue
+        current += line + '\n'
+        if sqlite3.complete_statement(current):
+            statements.append(current.strip())
+            current = ''
+    return statements
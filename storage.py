@@ -0,0 +1,32 @@
+"""
+Storage backend selection for demo.py and render_simple.py
+Both entry points talk to a store with the MemoryStore interface: users,
+login sessions, flashcards, study sessions and reset tokens. STORAGE_BACKEND
+picks the implementation:
+
+- memory: dicts in this process; fastest, but lost on restart and not
+  shared between gunicorn workers
+- sqlite: one SQLite file (STORAGE_PATH) in WAL mode, kept across restarts
+  and shared by every worker on the machine
+
+app.py does not use a store: it stays on MySQL through the queries in its
+routes and AuthManager, against the schema in migrations.py. A MySQL store
+with this interface, so app.py can share it, is follow-up work; until then
+a change to a store method has to be made in app.py's queries as well.
+"""
+
+from config import Config
+from memory_store import MemoryStore
+from sqlite_store import SQLiteStore
+
+BACKENDS = ('memory', 'sqlite')
+
+
+def create_store(backend=None, path=None):
+    """A store for the configured backend"""
+    backend = backend or Config.STORAGE_BACKEND
+    if backend == 'memory':
+        return MemoryStore()
+    if backend == 'sqlite':
+        return SQLiteStore(path)
+    raise ValueError(f"Unknown STORAGE_BACKEND {backend!r}; expected one of {', '.join(BACKENDS)}")
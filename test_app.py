@@ -20,24 +20,21 @@ def test_fallback_flashcard_generation():
     that captures light energy.
     """
     
-    # Simulate the fallback function
-    sentences = notes.split('.')
-    flashcards = []
-    
-    for i in range(min(5, len(sentences))):
-        if sentences[i].strip():
-            question = f"What is the key point about: {sentences[i][:50]}..."
-            answer = sentences[i].strip()
-            flashcards.append({
-                "question": question,
-                "answer": answer
-            })
+    from fallback_generator import create_fallback_flashcards, split_sentences
+    flashcards = create_fallback_flashcards(notes, 5)
     
     print(f"✅ Generated {len(flashcards)} flashcards")
     for i, card in enumerate(flashcards, 1):
         print(f"   Card {i}: {card['question'][:60]}...")
     
-    return len(flashcards) > 0
+    # Abbreviations, initials and decimals must not end a sentence
+    sentences = split_sentences("Dr. J. Smith measured 3.14 cm, e.g. in Fig. 2. The U.S. team agreed.")
+    if sentences != ["Dr. J. Smith measured 3.14 cm, e.g. in Fig. 2.", "The U.S. team agreed."]:
+        print(f"❌ Unexpected sentence split: {sentences}")
+        return False
+    
+    blanked = all('_____' in card['question'] and card['answer'] for card in flashcards)
+    return len(flashcards) == 4 and blanked
 
 def test_json_parsing():
     """Test JSON parsing functionality"""
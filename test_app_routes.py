@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Tests for app.py routes that tie generated cards to the signed-in user
+MySQL is replaced by an in-memory flashcards table and sessions by a fixed
+token, so these run without a database server or an OpenAI key.
+"""
+
+import sys
+from contextlib import contextmanager
+
+import app as study_app
+from auth import auth_manager
+
+TOKEN = 'token-1'
+USER = {'user_id': 'user-1', 'username': 'alice', 'email': 'alice@example.com'}
+NOTES = """
+Photosynthesis is the process by which plants convert sunlight into chemical energy.
+Chlorophyll is the green pigment that captures light energy in the chloroplasts.
+"""
+
+
+class FakeCursor:
+    """Stores inserted flashcards and answers the /flashcards page query"""
+
+    def __init__(self, db):
+        self.db = db
+        self.result = []
+
+    def execute(self, sql, params=()):
+        self.result = []
+        if 'FROM flashcards' in sql and sql.lstrip().startswith('SELECT id, user_id'):
+            rows = [row for row in self.db.flashcards if row['user_id'] == params[0]]
+            self.result = rows[:params[-1]]
+
+    def executemany(self, sql, rows):
+        if 'INSERT INTO flashcards' in sql:
+            for card_id, user_id, question, answer, subject, _ in rows:
+                self.db.flashcards.append({'id': card_id, 'user_id': user_id, 'question': question,
+                                           'answer': answer, 'subject': subject, 'created_at': None})
+
+    def fetchall(self):
+        return self.result
+
+    def close(self):
+        pass
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.flashcards = []
+
+    def cursor(self, **kwargs):
+        return FakeCursor(self)
+
+    def commit(self):
+        pass
+
+    @contextmanager
+    def connection(self):
+        yield self
+
+
+@contextmanager
+def fake_backend():
+    """Route app.py's queries to a FakeDatabase and accept TOKEN as USER's session"""
+    db = FakeDatabase()
+    original_connection = study_app.db_connection
+    original_verify = auth_manager.verify_session
+    study_app.db_connection = db.connection
+    auth_manager.verify_session = lambda token: dict(USER) if token == TOKEN else None
+    try:
+        yield db
+    finally:
+        study_app.db_connection = original_connection
+        auth_manager.verify_session = original_verify
+
+
+def test_generated_cards_belong_to_signed_in_user():
+    """Cards from /generate with a session token are listed by that user's /flashcards"""
+    print("🧪 Testing /generate with a signed-in user...")
+    client = study_app.app.test_client()
+    headers = {'Authorization': f'Bearer {TOKEN}'}
+    with fake_backend() as db:
+        response = client.post('/generate', json={'notes': NOTES, 'num_cards': 2}, headers=headers)
+        assert response.status_code == 200
+        generated = response.get_json()
+        assert generated['flashcards'] and all(row['user_id'] == USER['user_id'] for row in db.flashcards)
+
+        response = client.get('/flashcards', headers=headers)
+        assert response.status_code == 200
+        listed = {card['id'] for card in response.get_json()['flashcards']}
+        assert set(generated['card_ids']) <= listed
+
+        # Without a token the cards are anonymous and not in anyone's deck
+        client.post('/generate', json={'notes': NOTES, 'num_cards': 1})
+        assert db.flashcards[-1]['user_id'] is None
+    print("✅ Generated cards appear in the user's /flashcards")
+
+
+def test_first_request_starts_job_reaper():
+    """Each worker reclaims orphaned jobs from its first request, not its first /jobs POST"""
+    print("\n🧪 Testing background thread startup...")
+    queue = study_app.generation_jobs
+    queue.stop()
+    assert queue._executor is None
+    try:
+        study_app.app.test_client().get('/')
+        assert queue._executor is not None and queue._reaper.is_alive()
+    finally:
+        queue.stop()
+        study_app.session_purger.stop()
+    print("✅ Job reaper started with the worker")
+
+
+def main():
+    """Run all tests"""
+    print("🚀 AI Study Buddy - App Route Tests")
+    print("=" * 40)
+
+    tests = [
+        test_generated_cards_belong_to_signed_in_user,
+        test_first_request_starts_job_reaper
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except Exception as e:
+            print(f"❌ Test failed with exception: {e}")
+
+    print("\n" + "=" * 40)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+    return 0 if passed == len(tests) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Tests for AuthManager's use of the MySQL pool around password hashing
+MySQL is replaced by a fake pool that counts checked-out connections.
+"""
+
+import sys
+from contextlib import contextmanager
+
+from flask import Flask
+
+import auth
+from auth import AuthManager
+from password_hasher import password_hasher
+
+USER = {'id': 'user-1', 'username': 'alice', 'email': 'alice@example.com',
+        'password_hash': 'old-hash', 'salt': 'old-salt'}
+
+
+class FakeCursor:
+    def __init__(self, db):
+        self.db = db
+        self.result = []
+
+    def execute(self, sql, params=()):
+        sql = ' '.join(sql.split())
+        self.db.statements.append(sql)
+        self.result = []
+        if sql.startswith('SELECT * FROM users') and self.db.user:
+            self.result = [dict(self.db.user)]
+
+    def fetchone(self):
+        return self.result[0] if self.result else None
+
+    def fetchall(self):
+        return self.result
+
+    def close(self):
+        pass
+
+
+class FakePool:
+    """Hands out one fake connection and records how many are checked out"""
+
+    def __init__(self, user=None):
+        self.user = user
+        self.statements = []
+        self.checked_out = 0
+
+    def cursor(self, **kwargs):
+        return FakeCursor(self)
+
+    def commit(self):
+        pass
+
+    @contextmanager
+    def connection(self):
+        self.checked_out += 1
+        try:
+            yield self
+        finally:
+            self.checked_out -= 1
+
+
+@contextmanager
+def fake_pool(pool):
+    original = auth.db_connection
+    auth.db_connection = pool.connection
+    try:
+        with Flask(__name__).test_request_context('/auth/login', environ_base={'REMOTE_ADDR': '10.0.0.1'}):
+            yield pool
+    finally:
+        auth.db_connection = original
+
+
+def hashing_outside_pool(pool, calls):
+    """hash_password / verify_password stand-ins that fail if a connection is held"""
+    def hash_password(password, salt=None):
+        calls.append(('hash', pool.checked_out))
+        return 'new-salt', 'new-hash'
+
+    def verify_password(password, stored_hash, stored_salt):
+        calls.append(('verify', pool.checked_out))
+        return password == 'secret'
+    return hash_password, verify_password
+
+
+def test_register_hashes_without_a_connection():
+    """The slow hash runs between the lookup and the INSERT, not inside either"""
+    print("🧪 Testing registration...")
+    calls = []
+    with fake_pool(FakePool()) as pool:
+        manager = AuthManager()
+        manager.hash_password, manager.verify_password = hashing_outside_pool(pool, calls)
+        ok, user_id = manager.register_user('bob', 'bob@example.com', 'secret')
+        assert ok and user_id
+        assert calls == [('hash', 0)]
+        assert pool.statements[0].startswith('SELECT id FROM users')
+        assert pool.statements[1].startswith('INSERT INTO users')
+    print("✅ No connection held while hashing")
+
+
+def test_login_verifies_and_rehashes_without_a_connection():
+    """Verification and rehashing happen with the connection back in the pool"""
+    print("\n🧪 Testing login...")
+    calls = []
+    original_needs_rehash = password_hasher.needs_rehash
+    password_hasher.needs_rehash = lambda stored_hash: stored_hash == 'old-hash'
+    try:
+        with fake_pool(FakePool(user=USER)) as pool:
+            manager = AuthManager()
+            manager.hash_password, manager.verify_password = hashing_outside_pool(pool, calls)
+            ok, session = manager.login_user('alice', 'secret')
+            assert ok and session['user_id'] == 'user-1' and session['session_token']
+            assert calls == [('verify', 0), ('hash', 0)]
+            assert any(sql.startswith('UPDATE users SET password_hash') for sql in pool.statements)
+            assert any(sql.startswith('INSERT INTO user_sessions') for sql in pool.statements)
+
+            pool.statements.clear()
+            assert manager.login_user('alice', 'wrong') == (False, "Invalid username or password")
+            assert pool.statements == ['SELECT * FROM users WHERE username = %s']
+    finally:
+        password_hasher.needs_rehash = original_needs_rehash
+    print("✅ No connection held while verifying or rehashing")
+
+
+def main():
+    """Run all tests"""
+    print("🚀 AI Study Buddy - Auth Manager Tests")
+    print("=" * 40)
+
+    tests = [
+        test_register_hashes_without_a_connection,
+        test_login_verifies_and_rehashes_without_a_connection
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except Exception as e:
+            print(f"❌ Test failed with exception: {e}")
+
+    print("\n" + "=" * 40)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+    return 0 if passed == len(tests) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
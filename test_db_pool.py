@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Tests for the MySQL connection pool
+Uses an in-process fake connection so no MySQL server is required.
+"""
+
+import os
+import sys
+import threading
+import time
+
+from flask import Flask
+
+from db_pool import ConnectionPool, db_connection, init_app
+
+
+class FakeConnection:
+    """Minimal stand-in for a mysql.connector connection"""
+
+    def __init__(self):
+        self.alive = True
+        self.closed = False
+        self.in_transaction = False
+        self.rollbacks = 0
+
+    def is_connected(self):
+        return self.alive
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.in_transaction = False
+
+    def close(self):
+        self.closed = True
+
+
+def make_pool(**kwargs):
+    created = []
+
+    def connect(**_):
+        conn = FakeConnection()
+        created.append(conn)
+        return conn
+
+    options = {'db_config': {}, 'size': 2, 'timeout': 0.2, 'max_lifetime': 60, 'ping_interval': 0}
+    options.update(kwargs)
+    return ConnectionPool(connect=connect, **options), created
+
+
+def test_connections_are_reused():
+    """A released connection is handed out again instead of reconnecting"""
+    print("🧪 Testing connection reuse...")
+    pool, created = make_pool()
+
+    first = pool.get_connection()
+    pool.release(first)
+    second = pool.get_connection()
+    pool.release(second)
+
+    assert first is second
+    assert len(created) == 1
+    assert pool.stats()['checked_out'] == 0
+    print("✅ Connection reused")
+
+
+def test_open_transaction_is_rolled_back():
+    """Connections go back to the pool without a dangling transaction"""
+    print("\n🧪 Testing rollback on release...")
+    pool, _ = make_pool()
+
+    conn = pool.get_connection()
+    conn.in_transaction = True
+    pool.release(conn)
+
+    assert conn.rollbacks == 1
+    print("✅ Transaction rolled back")
+
+
+def test_dead_and_expired_connections_are_replaced():
+    """Liveness check and max lifetime both force a fresh connection"""
+    print("\n🧪 Testing liveness check and recycling...")
+    pool, created = make_pool()
+
+    conn = pool.get_connection()
+    pool.release(conn)
+    conn.alive = False
+    replacement = pool.get_connection()
+    assert replacement is not conn and conn.closed
+    pool.release(replacement)
+
+    pool.max_lifetime = 0.01
+    time.sleep(0.02)
+    recycled = pool.get_connection()
+    assert recycled is not replacement and replacement.closed
+    pool.release(recycled)
+
+    stats = pool.stats()
+    assert stats['stale'] == 1 and stats['recycled'] == 1
+    assert len(created) == 3
+    print("✅ Stale and expired connections replaced")
+
+
+def test_exhausted_pool_waits_then_times_out():
+    """Checkouts beyond the pool size wait for a release or time out"""
+    print("\n🧪 Testing pool exhaustion...")
+    pool, _ = make_pool(size=1)
+
+    held = pool.get_connection()
+    releaser = threading.Timer(0.05, pool.release, args=(held,))
+    releaser.start()
+    conn = pool.get_connection()
+    releaser.join()
+
+    try:
+        pool.get_connection()
+        raise AssertionError("expected a pool timeout")
+    except Exception as e:
+        assert 'exhausted' in str(e)
+    pool.release(conn)
+
+    stats = pool.stats()
+    assert stats['waits'] == 2 and stats['timeouts'] == 1
+    assert stats['wait_time_total'] > 0
+    print(f"✅ Waits: {stats['waits']}, timeouts: {stats['timeouts']}")
+
+
+def test_request_shares_one_connection():
+    """Every db_connection() inside one request uses the same connection"""
+    print("\n🧪 Testing per-request connection binding...")
+    pool, created = make_pool()
+    app = Flask(__name__)
+    init_app(app, pool)
+
+    with app.test_request_context('/'):
+        with db_connection() as first:
+            pass
+        with db_connection() as second:
+            pass
+        assert first is second
+        assert pool.stats()['checked_out'] == 1
+
+    assert pool.stats()['checked_out'] == 0
+    assert len(created) == 1
+    print("✅ One connection per request")
+
+
+def test_fork_drops_parent_connections():
+    """A forked child never reuses connections opened by its parent"""
+    print("\n🧪 Testing fork safety...")
+    if not hasattr(os, 'fork'):
+        print("⚠️  os.fork not available - skipping")
+        return
+
+    pool, created = make_pool()
+    parent_conn = pool.get_connection()
+    pool.release(parent_conn)
+
+    pid = os.fork()
+    if pid == 0:
+        child_conn = pool.get_connection()
+        os._exit(0 if child_conn is not parent_conn and not parent_conn.closed else 1)
+
+    _, status = os.waitpid(pid, 0)
+    assert os.WEXITSTATUS(status) == 0
+    print("✅ Child process opened its own connection")
+
+
+def main():
+    """Run all tests"""
+    print("🚀 AI Study Buddy - Connection Pool Tests")
+    print("=" * 40)
+
+    tests = [
+        test_connections_are_reused,
+        test_open_transaction_is_rolled_back,
+        test_dead_and_expired_connections_are_replaced,
+        test_exhausted_pool_waits_then_times_out,
+        test_request_shares_one_connection,
+        test_fork_drops_parent_connections
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except Exception as e:
+            print(f"❌ Test failed with exception: {e}")
+
+    print("\n" + "=" * 40)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+    return 0 if passed == len(tests) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Tests that each deploy's requirements file covers what its entry point imports
+"""
+
+import ast
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Distribution names in requirements files whose import name differs
+IMPORT_NAMES = {'python-dotenv': 'dotenv', 'mysql-connector-python': 'mysql'}
+
+
+def requirements(filename):
+    """Top-level import names provided by a requirements file"""
+    names = set()
+    with open(os.path.join(ROOT, filename), encoding='utf-8') as f:
+        for line in f:
+            line = line.split('#')[0].strip()
+            if not line:
+                continue
+            distribution = line.split('==')[0].split('>=')[0].strip()
+            names.add(IMPORT_NAMES.get(distribution, distribution.lower()))
+    return names
+
+
+def third_party_imports(entry_point):
+    """Non-stdlib modules imported by entry_point and every local module it imports"""
+    local = {name[:-3] for name in os.listdir(ROOT) if name.endswith('.py')}
+    seen, found, pending = set(), {}, [entry_point]
+    while pending:
+        module = pending.pop()
+        if module in seen:
+            continue
+        seen.add(module)
+        with open(os.path.join(ROOT, module + '.py'), encoding='utf-8') as f:
+            tree = ast.parse(f.read())
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+                names = [node.module]
+            else:
+                continue
+            for name in names:
+                top = name.split('.')[0]
+                if top in local:
+                    pending.append(top)
+                elif top not in sys.stdlib_module_names:
+                    found.setdefault(top, set()).add(module)
+    return found
+
+
+def test_render_simple_requirements():
+    """render_simple.yaml installs only requirements_simple.txt"""
+    print("🧪 Testing requirements_simple.txt...")
+    provided = requirements('requirements_simple.txt')
+    missing = {name: sorted(modules) for name, modules in third_party_imports('render_simple').items()
+               if name not in provided}
+    assert not missing, f"render_simple.py needs packages missing from requirements_simple.txt: {missing}"
+    print("✅ requirements_simple.txt covers render_simple.py")
+
+
+def main():
+    """Run all tests"""
+    print("🚀 AI Study Buddy - Deploy Requirements Tests")
+    print("=" * 40)
+
+    tests = [
+        test_render_simple_requirements
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except Exception as e:
+            print(f"❌ Test failed with exception: {e}")
+
+    print("\n" + "=" * 40)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+    return 0 if passed == len(tests) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
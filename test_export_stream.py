@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Tests for streaming flashcard export
+"""
+
+import csv
+import io
+import json
+import re
+import sys
+import time
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from export_stream import iter_csv, iter_json, iter_ndjson
+from pdf_export import iter_pdf
+
+LARGE_DECK = 500_000
+LARGE_PDF_DECK = 20_000
+MEMORY_CEILING = 16 * 1024 * 1024
+
+
+def peak_rss():
+    """Process high-water mark in bytes"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def synthetic_cards(count):
+    """Generate card rows lazily, like an unbuffered database cursor"""
+    created_at = datetime(2024, 1, 1, 9, 30)
+    for i in range(count):
+        yield {
+            'id': f"card-{i:08d}",
+            'user_id': 'user-1',
+            'question': f"What is fact number {i}, and why does it matter?",
+            'answer': f"Fact {i} is \"important\" because it follows fact {i - 1}.",
+            'subject': 'Biology',
+            'created_at': created_at
+        }
+
+
+def test_formats_round_trip():
+    """Each format decodes back to the exported cards"""
+    print("🧪 Testing export formats...")
+    cards = list(synthetic_cards(3))
+
+    document = json.loads(b''.join(iter_json(iter(cards))))
+    assert [c['id'] for c in document['flashcards']] == [c['id'] for c in cards]
+    assert document['flashcards'][0]['created_at'] == '2024-01-01T09:30:00'
+
+    lines = b''.join(iter_ndjson(iter(cards))).decode('utf-8').splitlines()
+    assert [json.loads(line)['answer'] for line in lines] == [c['answer'] for c in cards]
+
+    rows = list(csv.DictReader(io.StringIO(b''.join(iter_csv(iter(cards))).decode('utf-8'))))
+    assert [row['question'] for row in rows] == [c['question'] for c in cards]
+
+    assert json.loads(b''.join(iter_json(iter([]))))['flashcards'] == []
+    print("✅ JSON, NDJSON and CSV round trip")
+
+
+def test_large_export_memory_is_flat():
+    """Exporting 500k cards stays under a fixed memory ceiling in every format"""
+    print(f"\n🧪 Testing {LARGE_DECK:,}-card export memory...")
+    if resource is None:
+        print("⚠️  resource module not available - skipping")
+        return
+
+    for name, serializer in (('ndjson', iter_ndjson), ('csv', iter_csv), ('json', iter_json)):
+        baseline = peak_rss()
+        started = time.perf_counter()
+        total = 0
+        for chunk in serializer(synthetic_cards(LARGE_DECK)):
+            total += len(chunk)
+        growth = peak_rss() - baseline
+
+        print(f"   {name}: {total / 1e6:.0f} MB streamed, peak RSS +{growth / 1024:.0f} KB, {time.perf_counter() - started:.1f}s")
+        assert growth < MEMORY_CEILING, f"{name} export grew RSS by {growth} bytes"
+
+    print("✅ Memory stays flat")
+
+
+def test_pdf_structure():
+    """The PDF has one page per N cards and a cross-reference table that points at every object"""
+    print("\n🧪 Testing PDF export...")
+    document = b''.join(iter_pdf(synthetic_cards(10), cards_per_page=4))
+
+    assert document.startswith(b'%PDF-1.4') and document.rstrip().endswith(b'%%EOF')
+    assert re.search(rb'/Type /Pages /Kids \[[^\]]*\] /Count 3', document)
+
+    xref_at = int(document.rsplit(b'startxref', 1)[1].split()[0])
+    table = document[xref_at:].split(b'trailer')[0].splitlines()[2:]
+    for number, entry in enumerate(table[1:], 1):
+        offset = int(entry.split()[0])
+        assert document[offset:].startswith(f'{number} 0 obj'.encode('ascii')), number
+
+    empty = b''.join(iter_pdf(iter([])))
+    assert b'/Count 1' in empty
+    print("✅ PDF pages and cross-reference table are valid")
+
+
+def test_large_pdf_is_streamed():
+    """PDF export yields page by page without growing memory"""
+    print(f"\n🧪 Testing {LARGE_PDF_DECK:,}-card PDF export...")
+    if resource is None:
+        print("⚠️  resource module not available - skipping")
+        return
+
+    baseline = peak_rss()
+    started = time.perf_counter()
+    chunks = 0
+    total = 0
+    for chunk in iter_pdf(synthetic_cards(LARGE_PDF_DECK), cards_per_page=4):
+        chunks += 1
+        total += len(chunk)
+    growth = peak_rss() - baseline
+
+    print(f"   {chunks:,} chunks, {total / 1e6:.1f} MB, peak RSS +{growth / 1024:.0f} KB, {time.perf_counter() - started:.1f}s")
+    assert chunks == LARGE_PDF_DECK // 4 + 2
+    assert growth < MEMORY_CEILING
+    print("✅ PDF streamed page by page")
+
+
+def main():
+    """Run all tests"""
+    print("🚀 AI Study Buddy - Export Tests")
+    print("=" * 40)
+
+    tests = [
+        test_formats_round_trip,
+        test_large_export_memory_is_flat,
+        test_pdf_structure,
+        test_large_pdf_is_streamed
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except Exception as e:
+            print(f"❌ Test failed with exception: {e}")
+
+    print("\n" + "=" * 40)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+    return 0 if passed == len(tests) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
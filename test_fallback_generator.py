@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Tests for the extractive fallback flashcard generator
+"""
+
+import sys
+
+from fallback_generator import (MIN_CONTEXT_WORDS, cloze, create_fallback_flashcards, key_term, score_sentences,
+                                split_sentences)
+
+NOTES = """
+Photosynthesis is the process by which plants convert sunlight into chemical energy.
+The process occurs in the chloroplasts and requires carbon dioxide and water.
+It is a process.
+
+- Chlorophyll is the green pigment that captures light energy in the chloroplasts.
+- Glucose made by photosynthesis is stored as starch for later use.
+"""
+PREFIX = "Fill in the blank: "
+
+
+def source_sentence(card):
+    """The note sentence a cloze card was made from"""
+    return card['question'][len(PREFIX):].replace('_____', card['answer'])
+
+
+def test_sentence_splitting():
+    """Abbreviations, initials, decimals and bullets do not confuse the splitter"""
+    print("🧪 Testing sentence splitting...")
+    sentences = split_sentences("Dr. J. Smith measured 3.14 cm, e.g. in Fig. 2. The U.S. team agreed! Did it work? Yes")
+    assert sentences == ["Dr. J. Smith measured 3.14 cm, e.g. in Fig. 2.", "The U.S. team agreed!",
+                         "Did it work?", "Yes"]
+    bullets = split_sentences("Key facts:\n- Cells divide\n- Genes mutate\n\n1. First step. Second step.")
+    assert bullets == ["Key facts:", "Cells divide", "Genes mutate", "First step.", "Second step."]
+    assert split_sentences("  \n\n ") == []
+    print("✅ Sentences split correctly")
+
+
+def test_ranking_prefers_informative_sentences():
+    """Sentences full of specific terms outrank filler, and cards follow note order"""
+    print("\n🧪 Testing sentence ranking...")
+    sentences = split_sentences(NOTES)
+    scores, idf, terms = score_sentences(sentences)
+    filler = sentences.index("It is a process.")
+    assert scores[filler] == min(scores)
+    assert idf['chlorophyll'] > idf['process']
+    assert key_term(terms[3], idf) not in ('light', 'green')
+
+    cards = create_fallback_flashcards(NOTES, 2)
+    answers = [card['answer'].lower() for card in cards]
+    assert len(cards) == 2 and 'process' not in answers
+    positions = [sentences.index(source_sentence(card)) for card in cards]
+    assert positions == sorted(positions)
+    assert create_fallback_flashcards(NOTES, 0) == [] and len(create_fallback_flashcards(NOTES, 50)) == 4
+    print("✅ Informative sentences chosen, in note order")
+
+
+def test_cloze_cards():
+    """Each card blanks one whole word of its sentence and keeps context around it"""
+    print("\n🧪 Testing cloze output...")
+    assert cloze("Cells divide by mitosis.", "mitosis") == ("Cells divide by _____.", "mitosis")
+    assert cloze("Mitosis splits cells.", "mitosis") == ("_____ splits cells.", "Mitosis")
+    assert cloze("Submitosis is not a word.", "mitosis") is None
+
+    for card in create_fallback_flashcards(NOTES, 4):
+        question = card['question']
+        assert question.startswith(PREFIX) and question.count('_____') == 1
+        assert source_sentence(card) in split_sentences(NOTES)
+        assert len(question[len(PREFIX):].split()) - 1 >= MIN_CONTEXT_WORDS
+
+    # A sentence that is nothing but its key term makes no card
+    assert create_fallback_flashcards('Photosynthesis.', 3) == []
+    assert create_fallback_flashcards('Photosynthesis. Plants make sugar.', 3) == []
+    assert create_fallback_flashcards('Cells divide by mitosis.', 3) == [
+        {'question': 'Fill in the blank: Cells divide by _____.', 'answer': 'mitosis'}]
+    print("✅ Cloze cards keep their context")
+
+
+def main():
+    """Run all tests"""
+    print("🚀 AI Study Buddy - Fallback Generator Tests")
+    print("=" * 40)
+
+    tests = [
+        test_sentence_splitting,
+        test_ranking_prefers_informative_sentences,
+        test_cloze_cards
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except Exception as e:
+            print(f"❌ Test failed with exception: {e}")
+
+    print("\n" + "=" * 40)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+    return 0 if passed == len(tests) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Tests for streaming flashcard generation
+"""
+
+import json
+import sys
+import time
+
+from flashcard_stream import FlashcardArrayParser, iter_generation_events, parse_flashcard_json
+from generation_cache import cache_key, generation_cache
+
+COMPLETION = '''Here are your flashcards:
+[
+  {"question": "What does {x} mean in \\"set\\" notation?", "answer": "A set containing x ]"},
+  {"question": "Nested?", "answer": "Yes", "tags": {"level": [1, 2]}},
+  {"note": "not a card"},
+  {"question": "Last", "answer": "One"}
+]
+Good luck with your studies!'''
+
+
+def parse_events(chunks):
+    events = []
+    for chunk in chunks:
+        lines = dict(line.split(': ', 1) for line in chunk.strip().split('\n'))
+        events.append((lines['event'], json.loads(lines['data'])))
+    return events
+
+
+def test_parser_handles_any_chunking():
+    """Cards come out the same however the completion is split"""
+    print("🧪 Testing incremental parser...")
+    expected = [
+        {'question': 'What does {x} mean in "set" notation?', 'answer': 'A set containing x ]'},
+        {'question': 'Nested?', 'answer': 'Yes'},
+        {'question': 'Last', 'answer': 'One'}
+    ]
+    for size in (1, 2, 7, 64, len(COMPLETION)):
+        parser = FlashcardArrayParser()
+        cards = []
+        for i in range(0, len(COMPLETION), size):
+            cards.extend(parser.feed(COMPLETION[i:i + size]))
+        assert cards == expected, size
+        assert parser.finished
+    print("✅ Parser output independent of chunk size")
+
+
+def test_parse_whole_completion():
+    """The array is found in surrounding text; anything else means no cards"""
+    print("\n🧪 Testing whole-completion parser...")
+    cards = parse_flashcard_json(COMPLETION)
+    assert len(cards) == 4 and cards[0]['answer'] == 'A set containing x ]'
+    for content in ('No cards today', 'Oops ] then [', '[{"question": ', '{"question": "Q"}', '[1, 2'):
+        assert parse_flashcard_json(content) is None, content
+    print("✅ Whole completions parsed")
+
+
+def test_cards_emitted_before_completion_ends():
+    """The first card event is sent long before the model finishes"""
+    print("\n🧪 Testing time to first card...")
+    generation_cache.clear()
+
+    def slow_completion(notes, num_cards):
+        for i in range(0, len(COMPLETION), 8):
+            time.sleep(0.005)
+            yield COMPLETION[i:i + 8]
+
+    saved = []
+    started = time.perf_counter()
+    arrivals = []
+    chunks = []
+    for chunk in iter_generation_events(
+        'Streaming notes', 3, lambda notes, n: [], lambda cards: saved.extend(cards) or ['id'] * len(cards),
+        completion=slow_completion
+    ):
+        arrivals.append(time.perf_counter() - started)
+        chunks.append(chunk)
+
+    events = parse_events(chunks)
+    assert [name for name, _ in events] == ['card', 'card', 'card', 'done']
+    assert len(saved) == 3
+    done = events[-1][1]
+    assert done['card_ids'] == ['id', 'id', 'id'] and done['source'] == 'openai'
+    assert arrivals[0] < arrivals[-1] / 2
+    print(f"✅ First card after {arrivals[0]:.3f}s of {arrivals[-1]:.3f}s")
+
+
+def test_fallback_and_cache():
+    """Failed streams fall back; successful ones are served from cache next time"""
+    print("\n🧪 Testing fallback and cache...")
+    generation_cache.clear()
+
+    def broken(notes, num_cards):
+        raise RuntimeError('connection reset')
+        yield
+
+    fallback = lambda notes, n: [{'question': 'Q', 'answer': 'A'}]
+    events = parse_events(iter_generation_events('Fallback notes', 1, fallback, lambda cards: [], completion=broken))
+    assert events[-1][1]['source'] == 'fallback' and len(events) == 2
+
+    complete = lambda notes, n: iter([COMPLETION])
+    list(iter_generation_events('Cached notes', 3, fallback, lambda cards: [], completion=complete))
+    events = parse_events(iter_generation_events('Cached  notes', 3, fallback, lambda cards: [], completion=broken))
+    assert events[-1][1]['source'] == 'cache' and len(events) == 4
+    print("✅ Fallback and cache paths work")
+
+
+def test_truncated_stream_not_cached():
+    """Cards from a stream that fails partway are sent but not cached"""
+    print("\n🧪 Testing truncated stream...")
+    generation_cache.clear()
+
+    def cut_off(notes, num_cards):
+        yield COMPLETION[:COMPLETION.index('{"question": "Nested?"')]
+        raise RuntimeError('connection reset')
+
+    fallback = lambda notes, n: [{'question': 'Q', 'answer': 'A'}]
+    events = parse_events(iter_generation_events('Truncated notes', 3, fallback, lambda cards: [], completion=cut_off))
+    assert [name for name, _ in events] == ['card', 'done'] and events[-1][1]['source'] == 'openai'
+    assert generation_cache.get(cache_key('Truncated notes', 3)) is None
+
+    unfinished = lambda notes, n: iter([COMPLETION[:COMPLETION.index('{"question": "Last"')]])
+    list(iter_generation_events('Unfinished notes', 3, fallback, lambda cards: [], completion=unfinished))
+    assert generation_cache.get(cache_key('Unfinished notes', 3)) is None
+    print("✅ Truncated streams not cached")
+
+
+def main():
+    """Run all tests"""
+    print("🚀 AI Study Buddy - Flashcard Streaming Tests")
+    print("=" * 40)
+
+    tests = [
+        test_parser_handles_any_chunking,
+        test_parse_whole_completion,
+        test_cards_emitted_before_completion_ends,
+        test_fallback_and_cache,
+        test_truncated_stream_not_cached
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except Exception as e:
+            print(f"❌ Test failed with exception: {e}")
+
+    print("\n" + "=" * 40)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+    return 0 if passed == len(tests) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
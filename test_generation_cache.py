@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Tests for the flashcard generation cache
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from generation_cache import GenerationCache, SQLiteCacheTier, cache_key
+
+CARDS = [{'question': 'What is DNA?', 'answer': 'Deoxyribonucleic acid'}]
+
+
+def test_key_ignores_whitespace_only_changes():
+    """Reformatted notes share a key; different settings do not"""
+    print("🧪 Testing cache keys...")
+    key = cache_key("Cells divide.\n\nDNA replicates.", 5)
+    assert cache_key("  Cells divide.  DNA replicates.\n", 5) == key
+    assert cache_key("Cells divide. DNA replicates.", 6) != key
+    assert cache_key("Cells divide. DNA replicates.", 5, model='gpt-4') != key
+    assert cache_key("Cells divide. DNA replicates.", 5, temperature=0.2) != key
+    print("✅ Keys are content addressed")
+
+
+def test_lru_bounded_by_entries_and_bytes():
+    """Least recently used results are evicted first"""
+    print("\n🧪 Testing memory tier eviction...")
+    cache = GenerationCache(max_entries=2, max_bytes=10_000)
+    cache.put('a', CARDS, 1.0)
+    cache.put('b', CARDS, 1.0)
+    assert cache.get('a') == CARDS
+    cache.put('c', CARDS, 1.0)
+    assert cache.get('b') is None
+    assert cache.get('a') == CARDS
+
+    small = GenerationCache(max_entries=100, max_bytes=200)
+    for i in range(10):
+        small.put(str(i), CARDS, 1.0)
+    assert small.stats()['bytes'] <= 200
+    assert small.get('9') == CARDS and small.get('0') is None
+    print("✅ Memory tier stays bounded")
+
+
+def test_hits_return_copies_and_report_savings():
+    """Callers cannot corrupt the cache, and stats count saved latency"""
+    print("\n🧪 Testing hit statistics...")
+    cache = GenerationCache(max_entries=10)
+    assert cache.get('k') is None
+    cache.put('k', CARDS, 2.5)
+    cache.get('k')[0]['question'] = 'changed'
+    assert cache.get('k') == CARDS
+
+    stats = cache.stats()
+    assert stats['memory_hits'] == 2 and stats['misses'] == 1
+    assert stats['hit_ratio'] == round(2 / 3, 4)
+    assert stats['seconds_saved'] == 5.0
+    print("✅ Hit ratio and latency saved reported")
+
+
+def test_persistent_tier_shared_and_aged_out():
+    """A second cache on the same file sees results until they expire"""
+    print("\n🧪 Testing SQLite tier...")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'generation_cache.db')
+        writer = GenerationCache(persistent=SQLiteCacheTier(path))
+        writer.put('k', CARDS, 3.0)
+
+        reader = GenerationCache(persistent=SQLiteCacheTier(path))
+        assert reader.get('k') == CARDS
+        assert reader.stats()['persistent_hits'] == 1
+        assert reader.get('k') == CARDS
+        assert reader.stats()['memory_hits'] == 1
+
+        # An entry copied into memory keeps the age it had on disk
+        short = GenerationCache(max_age=0.5, persistent=SQLiteCacheTier(path, max_age=0.5))
+        time.sleep(0.3)
+        assert short.get('k') == CARDS
+        time.sleep(0.3)
+        assert short.get('k') is None
+        assert short.stats()['memory_hits'] == 0
+
+        tier = SQLiteCacheTier(path, max_age=0.05)
+        time.sleep(0.1)
+        assert tier.get('k') is None
+        tier.evict()
+        assert tier.stats()['entries'] == 0
+
+        sized = SQLiteCacheTier(path, max_bytes=500)
+        for i in range(20):
+            sized.put(str(i), '"' + 'x' * 98 + '"', 1.0)
+        sized.evict()
+        assert sized.stats()['bytes'] <= 500
+        assert sized.get('19') is not None
+    print("✅ SQLite tier shared and evicted by age and size")
+
+
+def main():
+    """Run all tests"""
+    print("🚀 AI Study Buddy - Generation Cache Tests")
+    print("=" * 40)
+
+    tests = [
+        test_key_ignores_whitespace_only_changes,
+        test_lru_bounded_by_entries_and_bytes,
+        test_hits_return_copies_and_report_savings,
+        test_persistent_tier_shared_and_aged_out
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except Exception as e:
+            print(f"❌ Test failed with exception: {e}")
+
+    print("\n" + "=" * 40)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+    return 0 if passed == len(tests) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Tests for the persisted background generation job queue
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from generation_jobs import JobQueue, JobQueueFull
+
+
+def wait_for(queue, job_id, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.get(job_id)
+        if job['status'] in ('done', 'failed'):
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def make_queue(path, runner, **kwargs):
+    kwargs.setdefault('reap_interval', 3600)
+    return JobQueue('test', runner, path=path, **kwargs)
+
+
+def test_submit_returns_immediately_and_completes():
+    """The job id comes back before the runner finishes"""
+    print("🧪 Testing job submission...")
+    release = threading.Event()
+
+    def runner(payload, user_id):
+        release.wait(5)
+        return {'flashcards': [{'question': payload['notes'], 'answer': user_id}]}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        queue = make_queue(os.path.join(tmp, 'jobs.db'), runner)
+        job_id = queue.submit({'notes': 'Cells'}, 'user-1')
+        assert queue.get(job_id)['status'] in ('queued', 'running')
+        release.set()
+        job = wait_for(queue, job_id)
+        assert job['status'] == 'done'
+        assert job['result']['flashcards'][0] == {'question': 'Cells', 'answer': 'user-1'}
+        assert queue.stats()['completed'] == 1
+        queue.stop()
+    print("✅ Job ran in the background")
+
+
+def test_failures_and_backpressure():
+    """Runner errors mark the job failed and a full queue refuses new jobs"""
+    print("\n🧪 Testing failures and queue bound...")
+    release = threading.Event()
+
+    def runner(payload, user_id):
+        release.wait(5)
+        raise RuntimeError('OpenAI unavailable')
+
+    with tempfile.TemporaryDirectory() as tmp:
+        queue = make_queue(os.path.join(tmp, 'jobs.db'), runner, max_workers=1, max_pending=2)
+        first = queue.submit({'notes': 'a'})
+        queue.submit({'notes': 'b'})
+        try:
+            queue.submit({'notes': 'c'})
+            raise AssertionError('expected JobQueueFull')
+        except JobQueueFull:
+            pass
+        release.set()
+        job = wait_for(queue, first)
+        assert job['status'] == 'failed' and 'OpenAI unavailable' in job['error']
+        queue.stop()
+    print("✅ Failures recorded and queue stays bounded")
+
+
+def test_reaper_reclaims_orphaned_jobs():
+    """A job left behind by a dead worker is finished by another one"""
+    print("\n🧪 Testing orphan recovery...")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'jobs.db')
+        # The first worker persists the job but is gone before running it
+        dead = make_queue(path, lambda payload, user_id: None, lease_seconds=0.05)
+        dead.start = lambda: None
+        job_id = dead.submit({'notes': 'orphan'})
+        assert dead.get(job_id)['status'] == 'queued'
+
+        time.sleep(0.1)
+        survivor = make_queue(path, lambda payload, user_id: {'notes': payload['notes']})
+        survivor.start()
+        assert survivor.reap() == 1
+        job = wait_for(survivor, job_id)
+        assert job['status'] == 'done' and job['result'] == {'notes': 'orphan'}
+        assert job['attempts'] == 1
+        assert survivor.stats()['reclaimed'] == 1
+        survivor.stop()
+    print("✅ Orphaned job reclaimed")
+
+
+def test_jobs_abandoned_after_max_attempts():
+    """Jobs that keep losing their worker eventually fail"""
+    print("\n🧪 Testing attempt limit...")
+    with tempfile.TemporaryDirectory() as tmp:
+        queue = make_queue(os.path.join(tmp, 'jobs.db'), lambda payload, user_id: None,
+                           lease_seconds=0.01, max_attempts=1)
+        queue.start()
+        job_id = queue.submit({'notes': 'x'})
+        wait_for(queue, job_id)
+        with queue._connect() as conn:
+            conn.execute("UPDATE generation_jobs SET status = 'running', lease_expires = 0 WHERE id = ?", (job_id,))
+        queue.reap()
+        job = queue.get(job_id)
+        assert job['status'] == 'failed' and 'Abandoned' in job['error']
+        queue.stop()
+    print("✅ Attempt limit enforced")
+
+
+def test_running_job_keeps_its_lease():
+    """A job that outlives its lease is renewed, not run a second time"""
+    print("\n🧪 Testing lease renewal...")
+    calls = []
+
+    def runner(payload, user_id):
+        calls.append(payload)
+        time.sleep(0.6)
+        return {'notes': payload['notes']}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'jobs.db')
+        queue = make_queue(path, runner, lease_seconds=0.15, reap_interval=0.02)
+        other = make_queue(path, runner)
+        other.start()
+        job_id = queue.submit({'notes': 'long notes'})
+        deadline = time.time() + 0.8
+        while time.time() < deadline:
+            queue.reap()
+            other.reap()
+            time.sleep(0.02)
+        job = wait_for(queue, job_id)
+        assert job['status'] == 'done' and job['attempts'] == 1
+        assert len(calls) == 1
+        queue.stop()
+        other.stop()
+    print("✅ Lease renewed while the job ran")
+
+
+def main():
+    """Run all tests"""
+    print("🚀 AI Study Buddy - Generation Job Tests")
+    print("=" * 40)
+
+    tests = [
+        test_submit_returns_immediately_and_completes,
+        test_failures_and_backpressure,
+        test_reaper_reclaims_orphaned_jobs,
+        test_jobs_abandoned_after_max_attempts,
+        test_running_job_keeps_its_lease
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except Exception as e:
+            print(f"❌ Test failed with exception: {e}")
+
+    print("\n" + "=" * 40)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+    return 0 if passed == len(tests) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
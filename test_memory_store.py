@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Tests for the in-memory store used by demo.py and render_simple.py
+"""
+
+import sys
+from datetime import datetime, timedelta
+
+from memory_store import MemoryStore
+from pagination import decode_cursor, encode_cursor, page_response
+
+
+def make_user(i):
+    return {
+        'id': f"user-{i}",
+        'username': f"student{i}",
+        'email': f"student{i}@example.com",
+        'password_hash': 'hash',
+        'salt': 'salt'
+    }
+
+
+def make_cards(user_id, count, subject='General'):
+    start = datetime(2024, 1, 1)
+    return [{
+        'id': f"{user_id}-card-{i:04d}",
+        'user_id': user_id,
+        'question': f"Question {i}",
+        'answer': f"Answer {i}",
+        'subject': subject,
+        # Pairs of cards share a timestamp so the id tie-breaker is exercised
+        'created_at': (start + timedelta(seconds=i // 2)).isoformat()
+    } for i in range(count)]
+
+
+def test_user_and_session_indexes():
+    """Users are found by id, username and email; sessions by token"""
+    print("🧪 Testing user and session lookups...")
+    store = MemoryStore()
+    assert store.add_user(make_user(1))
+    assert not store.add_user(dict(make_user(2), username='student1'))
+
+    assert store.get_user_by_username('student1')['id'] == 'user-1'
+    assert store.get_user_by_email('student1@example.com')['id'] == 'user-1'
+
+    store.add_session({'user_id': 'user-1', 'session_token': 'live', 'expires_at': datetime.now() + timedelta(days=1)})
+    store.add_session({'user_id': 'user-1', 'session_token': 'old', 'expires_at': datetime.now() - timedelta(days=1)})
+    assert store.verify_session('live')['username'] == 'student1'
+    assert store.verify_session('old') is None
+    assert store.get_session('old') is None
+    print("✅ Indexed lookups work")
+
+
+def test_session_expiry_and_cap():
+    """Expired sessions are swept as new ones arrive and each user keeps at most the cap"""
+    print("\n🧪 Testing session expiry...")
+    store = MemoryStore()
+    store.add_user(make_user(1))
+    now = datetime.now()
+    for i in range(1000):
+        store.add_session({'user_id': f"guest-{i}", 'session_token': f"short-{i}",
+                           'expires_at': now + timedelta(hours=1, milliseconds=i)})
+    assert store.expire_sessions(now + timedelta(hours=2)) == 1000
+    store.add_session({'user_id': 'user-1', 'session_token': 'fresh', 'expires_at': now + timedelta(days=1)})
+    assert store.verify_session('fresh')['user_id'] == 'user-1'
+    stats = store.session_stats()
+    assert stats['live'] == 1 and stats['users'] == 1 and stats['expired'] == 1000 and stats['heap_entries'] == 1
+
+    # Logins over the cap sign out the least recently used session
+    for i in range(3):
+        store.add_session({'user_id': 'user-1', 'session_token': f"device-{i}",
+                           'expires_at': now + timedelta(days=1)}, max_per_user=3)
+    assert store.get_session('fresh') is None
+    assert store.verify_session('device-0') is not None
+    store.add_session({'user_id': 'user-1', 'session_token': 'device-3', 'expires_at': now + timedelta(days=1)},
+                      max_per_user=3)
+    assert store.get_session('device-1') is None and store.get_session('device-0') is not None
+    assert store.session_stats()['evicted'] == 2
+
+    # Logouts leave stale heap entries, but the heap is rebuilt before they pile up
+    for i in range(500):
+        store.add_session({'user_id': f"visitor-{i}", 'session_token': f"visit-{i}",
+                           'expires_at': now + timedelta(days=1)})
+        store.remove_session(f"visit-{i}")
+    assert store.session_stats()['heap_entries'] <= 2 * store.session_stats()['live'] + 64
+    print("✅ Sessions expire and stay capped")
+
+
+def test_keyset_pages_cover_deck_exactly_once():
+    """Walking next_cursor visits every card once, newest first"""
+    print("\n🧪 Testing keyset pagination...")
+    store = MemoryStore()
+    store.add_flashcards(make_cards('user-1', 25))
+    store.add_flashcards(make_cards('user-2', 5))
+
+    seen = []
+    after = None
+    while True:
+        page = page_response(store.page_flashcards('user-1', 8, after), 7)
+        seen.extend(card['id'] for card in page['flashcards'])
+        if not page['next_cursor']:
+            break
+        after = decode_cursor(page['next_cursor'])
+
+    expected = sorted((c['created_at'], c['id']) for c in make_cards('user-1', 25))[::-1]
+    assert seen == [card_id for _, card_id in expected]
+    print(f"✅ {len(seen)} cards in {len(seen) // 7 + 1} pages")
+
+
+def test_subject_filter():
+    """Subject pages only contain that subject"""
+    print("\n🧪 Testing subject filter...")
+    store = MemoryStore()
+    store.add_flashcards(make_cards('user-1', 6, 'Biology'))
+    store.add_flashcards([dict(c, id=c['id'] + '-chem', subject='Chemistry') for c in make_cards('user-1', 4)])
+
+    page = store.page_flashcards('user-1', 50, subject='Chemistry')
+    assert len(page) == 4
+    assert all(card['subject'] == 'Chemistry' for card in page)
+    print("✅ Subject filter applied")
+
+
+def test_cursor_round_trip():
+    """Cursors survive encoding and reject garbage"""
+    print("\n🧪 Testing cursor encoding...")
+    cursor = encode_cursor(datetime(2024, 5, 1, 12, 30), 'abc')
+    assert decode_cursor(cursor) == ('2024-05-01T12:30:00', 'abc')
+    try:
+        decode_cursor('not-a-cursor')
+        raise AssertionError('expected ValueError')
+    except ValueError:
+        pass
+    print("✅ Cursor round trip works")
+
+
+def main():
+    """Run all tests"""
+    print("🚀 AI Study Buddy - Memory Store Tests")
+    print("=" * 40)
+
+    tests = [
+        test_user_and_session_indexes,
+        test_session_expiry_and_cap,
+        test_keyset_pages_cover_deck_exactly_once,
+        test_subject_filter,
+        test_cursor_round_trip
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except Exception as e:
+            print(f"❌ Test failed with exception: {e}")
+
+    print("\n" + "=" * 40)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+    return 0 if passed == len(tests) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Tests for the Prometheus metrics
+"""
+
+import atexit
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+
+from flask import Flask
+
+from metrics import Metrics, init_app, metrics, openai_call, statement_kind
+
+WORKER = """
+import sys
+from metrics import Metrics
+registry = Metrics(sys.argv[1], flush_interval=60)
+labels = (('method', 'GET'), ('route', '/flashcards'), ('status', '200'))
+for seconds in (0.002, 0.02, 0.2):
+    registry.inc('study_buddy_http_requests_total', labels)
+    registry.observe('study_buddy_http_request_duration_seconds', seconds, labels[:2])
+registry.add_gauge('study_buddy_http_requests_in_flight', 1)
+registry.flush()
+"""
+
+
+def test_histogram_format():
+    """Buckets are cumulative and every sample is a valid exposition line"""
+    print("🧪 Testing exposition format...")
+    registry = Metrics(path='')
+    labels = (('method', 'GET'), ('route', '/review/next'))
+    for seconds in (0.001, 0.03, 0.03, 40):
+        registry.observe('study_buddy_http_request_duration_seconds', seconds, labels)
+    registry.inc('study_buddy_http_requests_total', labels + (('status', '200'),), 4)
+    registry.register_collector(lambda: [('study_buddy_cache_requests_total', (('cache', 'c'), ('result', 'hit')), 3),
+                                         ('study_buddy_cache_requests_total', (('cache', 'c'), ('result', 'miss')), 1)])
+    text = registry.render()
+    lines = text.splitlines()
+
+    prefix = 'study_buddy_http_request_duration_seconds_bucket{method="GET",route="/review/next",le='
+    buckets = [line for line in lines if line.startswith(prefix)]
+    assert buckets[0] == prefix + '"0.005"} 1', buckets[0]
+    assert prefix + '"0.05"} 3' in buckets and buckets[-1] == prefix + '"+Inf"} 4'
+    counts = [int(line.rsplit(' ', 1)[1]) for line in buckets]
+    assert counts == sorted(counts)
+    assert 'study_buddy_http_request_duration_seconds_count{method="GET",route="/review/next"} 4' in lines
+    assert 'study_buddy_http_requests_total{method="GET",route="/review/next",status="200"} 4' in lines
+    assert 'study_buddy_cache_hit_ratio{cache="c"} 0.75' in lines
+    assert '# TYPE study_buddy_http_request_duration_seconds histogram' in lines
+    for line in lines:
+        assert line.startswith('#') or len(line.rsplit(' ', 1)) == 2, line
+    print(f"✅ {len(lines)} lines")
+
+
+def test_workers_are_summed():
+    """Counts flushed by separate processes add up in the shared file"""
+    print("\n🧪 Testing cross-worker aggregation...")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'metrics.db')
+        env = dict(os.environ, METRICS_DB='')
+        here = os.path.dirname(os.path.abspath(__file__))
+        for _ in range(2):
+            subprocess.run([sys.executable, '-c', WORKER, path], cwd=here, env=env, check=True)
+
+        registry = Metrics(path, flush_interval=60)
+        registry.inc('study_buddy_http_requests_total',
+                     (('method', 'GET'), ('route', '/flashcards'), ('status', '200')))
+        lines = registry.render().splitlines()
+        assert 'study_buddy_http_requests_total{method="GET",route="/flashcards",status="200"} 7' in lines
+        assert ('study_buddy_http_request_duration_seconds_bucket'
+                '{method="GET",route="/flashcards",le="0.025"} 4') in lines
+        assert 'study_buddy_http_requests_in_flight 2' in lines
+
+        # A second scrape must not count this process's requests twice
+        assert 'study_buddy_http_requests_total{method="GET",route="/flashcards",status="200"} 7' in \
+            registry.render().splitlines()
+        # The file goes away with tmp; nothing left to flush at exit
+        atexit.unregister(registry._try_flush)
+    print("✅ Two workers and the scraping process summed once")
+
+
+def test_scrape_survives_failed_flush():
+    """A flush error is logged and the scrape still reports what the file holds"""
+    print("\n🧪 Testing scrape with a failing flush...")
+    with tempfile.TemporaryDirectory() as tmp:
+        registry = Metrics(os.path.join(tmp, 'metrics.db'), flush_interval=60)
+        labels = (('method', 'GET'), ('route', '/flashcards'), ('status', '200'))
+        registry.inc('study_buddy_http_requests_total', labels)
+        registry.flush()
+        registry.inc('study_buddy_http_requests_total', labels)
+
+        def locked():
+            raise sqlite3.OperationalError('database is locked')
+        registry.flush = locked
+        lines = registry.render().splitlines()
+        assert 'study_buddy_http_requests_total{method="GET",route="/flashcards",status="200"} 1' in lines
+        atexit.unregister(registry._try_flush)
+    print("✅ Scrape answered from the last good flush")
+
+
+def test_flask_requests():
+    """Requests are labelled by route template, and none is left in flight"""
+    print("\n🧪 Testing request recording...")
+    app = Flask(__name__)
+    app.logger.disabled = True
+    registry = Metrics(path='')
+    init_app(app, registry)
+
+    @app.route('/cards/<card_id>')
+    def card(card_id):
+        assert registry._gauges[('study_buddy_http_requests_in_flight', ())] == 1
+        return card_id
+
+    @app.route('/boom')
+    def boom():
+        raise RuntimeError('boom')
+
+    client = app.test_client()
+    for card_id in ('a', 'b', 'c'):
+        assert client.get(f"/cards/{card_id}").status_code == 200
+    assert client.get('/missing').status_code == 404
+    assert client.get('/boom').status_code == 500
+    response = client.get('/metrics')
+    assert response.mimetype == 'text/plain'
+    text = response.get_data(as_text=True)
+    assert 'study_buddy_http_requests_total{method="GET",route="/cards/<card_id>",status="200"} 3' in text
+    assert 'route="unmatched",status="404"' in text
+    assert 'route="/boom",status="500"' in text
+    assert registry._gauges[('study_buddy_http_requests_in_flight', ())] == 0
+    print("✅ Routes, statuses and in-flight gauge recorded")
+
+
+def test_helpers():
+    """Statement labels stay bounded; OpenAI calls record outcome and tokens"""
+    print("\n🧪 Testing query and OpenAI helpers...")
+    assert statement_kind('  SELECT * FROM flashcards') == 'select'
+    assert statement_kind('UPDATE flashcards SET x = 1') == 'update'
+    assert statement_kind('CREATE TABLE t (x INT)') == 'other' and statement_kind('') == 'other'
+
+    class Usage:
+        prompt_tokens = 120
+        completion_tokens = 80
+
+    before = dict(metrics._counters)
+    with openai_call() as call:
+        call['usage'] = Usage()
+    try:
+        with openai_call():
+            raise TimeoutError('slow')
+    except TimeoutError:
+        pass
+
+    def tokens(kind):
+        key = ('study_buddy_openai_tokens_total', (('kind', kind),))
+        return metrics._counters.get(key, 0) - before.get(key, 0)
+
+    assert tokens('prompt') == 120 and tokens('completion') == 80
+    labels = {labels for name, labels in metrics._histograms if name == 'study_buddy_openai_request_duration_seconds'}
+    assert (('mode', 'complete'), ('outcome', 'ok')) in labels
+    assert (('mode', 'complete'), ('outcome', 'error')) in labels
+    print("✅ Helpers work")
+
+
+def main():
+    """Run all tests"""
+    print("🚀 AI Study Buddy - Metrics Tests")
+    print("=" * 40)
+
+    tests = [
+        test_histogram_format,
+        test_workers_are_summed,
+        test_scrape_survives_failed_flush,
+        test_flask_requests,
+        test_helpers
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except Exception as e:
+            print(f"❌ Test failed with exception: {e}")
+
+    print("\n" + "=" * 40)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+    return 0 if passed == len(tests) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Tests for the schema migrations
+The runner is tested against a fake connection, and each hot query is checked
+against the indexes the migrations declare. The EXPLAIN test needs a MySQL
+server (DB_HOST, DB_USER, DB_PASSWORD) and is skipped without one.
+"""
+
+import re
+import sys
+import uuid
+
+import mysql.connector
+
+from config import Config
+from migrations import HOT_QUERIES, MIGRATIONS, explain_hot_queries, migrate
+
+
+class FakeCursor:
+    """Answers the runner's own queries from the fake connection's state"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.result = []
+
+    def execute(self, sql, params=()):
+        self.conn.executed.append(sql.strip())
+        if 'GET_LOCK' in sql:
+            self.result = [(0 if self.conn.locked else 1,)]
+        elif 'RELEASE_LOCK' in sql:
+            self.conn.released += 1
+            self.result = [(1,)]
+        elif sql.startswith('SELECT version'):
+            self.result = [(version,) for version in self.conn.versions]
+        elif sql.startswith('INSERT INTO schema_migrations'):
+            self.conn.versions.append(params[0])
+
+    def fetchone(self):
+        return self.result[0]
+
+    def fetchall(self):
+        return self.result
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, locked=False):
+        self.locked = locked
+        self.versions = []
+        self.executed = []
+        self.released = 0
+        self.commits = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+
+def test_versions_are_unique_and_ordered():
+    """Migration versions are listed once each, in increasing order"""
+    print("🧪 Testing migration list...")
+    versions = [version for version, _, _ in MIGRATIONS]
+    assert versions == sorted(set(versions)) and versions[0] == 1
+    assert all(description for _, description, _ in MIGRATIONS)
+    print(f"✅ {len(versions)} migrations")
+
+
+def test_pending_migrations_run_once():
+    """Each step runs once, is recorded, and the lock is always released"""
+    print("\n🧪 Testing migration runner...")
+    calls = []
+    steps = [
+        (2, 'second', lambda cursor: calls.append(2)),
+        (1, 'first', lambda cursor: calls.append(1))
+    ]
+    conn = FakeConnection()
+    assert migrate(conn, steps) == [1, 2]
+    assert migrate(conn, steps) == []
+    assert calls == [1, 2] and conn.versions == [1, 2]
+    assert conn.commits == 2 and conn.released == 2
+
+    def broken(cursor):
+        raise RuntimeError('boom')
+
+    try:
+        migrate(conn, steps + [(3, 'broken', broken)])
+        assert False, "a failing step must propagate"
+    except RuntimeError:
+        pass
+    assert conn.versions == [1, 2] and conn.released == 3
+
+    try:
+        migrate(FakeConnection(locked=True), steps)
+        assert False, "migrate must not run without the lock"
+    except RuntimeError:
+        pass
+    print("✅ Applied in order, once, under the lock")
+
+
+class SchemaRecorder:
+    """Cursor for a fresh database that records every statement the migrations issue"""
+
+    def __init__(self):
+        self.statements = []
+
+    def execute(self, sql, params=()):
+        self.statements.append(' '.join(sql.split()))
+
+    def fetchone(self):
+        return (0,)
+
+
+def schema_indexes():
+    """table -> list of index column tuples the migrations create, InnoDB primary key appended"""
+    recorder = SchemaRecorder()
+    for _, _, step in MIGRATIONS:
+        step(recorder)
+    primary, secondary = {}, {}
+    for sql in recorder.statements:
+        table = re.match(r'(?:CREATE TABLE IF NOT EXISTS|ALTER TABLE) (\w+)', sql)
+        if table is None:
+            continue
+        table = table.group(1)
+        for column in re.findall(r'[(,] (\w+) \w+(?:\(\d+\))? PRIMARY KEY', sql):
+            primary[table] = (column,)
+        for columns in re.findall(r'PRIMARY KEY \(([^)]*)\)', sql):
+            primary[table] = tuple(column.strip() for column in columns.split(','))
+        for columns in re.findall(r'(?<!FULLTEXT )INDEX \w+ \(([^)]*)\)', sql):
+            secondary.setdefault(table, []).append(tuple(column.strip() for column in columns.split(',')))
+    return {
+        table: [key] + [columns + tuple(c for c in key if c not in columns) for columns in secondary.get(table, [])]
+        for table, key in primary.items()
+    }
+
+
+def query_columns(sql, alias):
+    """(columns alias is filtered or looked up by, columns it is ordered by) in a hot query"""
+    sql = ' '.join(sql.split())
+    tables = re.findall(r'(?:FROM|JOIN) (\w+)(?: (?!WHERE|JOIN|LEFT|ON|ORDER|LIMIT)(\w+))?', sql)
+    aliases = [name or table for table, name in tables]
+    table = tables[aliases.index(alias)][0]
+    qualified = len(tables) > 1
+    column = rf'{alias}\.(\w+)' if qualified else r'\b(\w+)'
+
+    where = re.search(r' WHERE (.*?)(?: ORDER BY | LIMIT |$)', sql).group(1)
+    filtered = re.findall(column + r' (?:=|<=|>=|<|>|IN \()', where)
+    # A join condition filters the table joined later, which is looked up by it
+    for left, right in re.findall(r' ON (\w+\.\w+) = (\w+\.\w+)', sql):
+        for own, other in ((left, right), (right, left)):
+            own_alias, own_column = own.split('.')
+            if own_alias == alias and aliases.index(other.split('.')[0]) < aliases.index(alias):
+                filtered.append(own_column)
+
+    order = re.search(r' ORDER BY (.*?)(?: LIMIT |$)', sql)
+    ordered = []
+    for term in (order.group(1).split(',') if order else []):
+        name = term.split()[0]
+        if not qualified or name.startswith(alias + '.'):
+            ordered.append(name.split('.')[-1])
+    return table, set(filtered), [name for name in ordered if name not in filtered]
+
+
+def test_hot_queries_have_indexes():
+    """Each hot query's filter columns, then its first sort column, lead some index the migrations create"""
+    print("\n🧪 Testing hot query indexes...")
+    indexes = schema_indexes()
+    for name, (alias, sql, _) in HOT_QUERIES.items():
+        table, filtered, ordered = query_columns(sql, alias)
+        assert filtered, f"{name} does not filter {table}"
+
+        def serves(index):
+            width = len(filtered)
+            if set(index[:width]) != filtered:
+                return False
+            return not ordered or index[width:width + 1] == (ordered[0],)
+
+        assert any(serves(index) for index in indexes[table]), \
+            f"{name}: no index on {table} starts with {sorted(filtered)} then {ordered}"
+        print(f"   {name}: {table} {sorted(filtered)} then {ordered}")
+    print("✅ Every hot query has a matching index")
+
+
+def seed(conn):
+    """A few hundred rows per table so the optimizer has statistics to work with"""
+    cursor = conn.cursor()
+    users = [(f"user-{i}", f"student{i}", f"s{i}@example.com") for i in range(1, 4)]
+    cursor.executemany("INSERT INTO users (id, username, email, password_hash, salt) VALUES (%s, %s, %s, 'h', 's')",
+                       users)
+    cursor.executemany("""
+        INSERT INTO flashcards (id, user_id, question, answer, subject, minhash)
+        VALUES (%s, %s, 'Q', 'A', %s, 'x')
+    """, [(f"card-{i}", users[i % 3][0], ('Biology', 'Chemistry')[i % 2]) for i in range(300)])
+    cursor.executemany("""
+        INSERT INTO user_sessions (id, user_id, session_token, expires_at)
+        VALUES (%s, %s, %s, NOW() + INTERVAL 1 DAY)
+    """, [(f"session-{i}", users[i % 3][0], f"token-{i}") for i in range(300)])
+    cursor.executemany("INSERT INTO study_sessions (id, user_id, session_name) VALUES (%s, %s, 'S')",
+                       [(f"study-{i}", users[i % 3][0]) for i in range(300)])
+    cursor.executemany("INSERT INTO study_session_cards (session_id, position, flashcard_id) VALUES (%s, %s, %s)",
+                       [(f"study-{i % 300}", i // 300, f"card-{i % 300}") for i in range(900)])
+    cursor.executemany("""
+        INSERT INTO flashcard_reviews (flashcard_id, user_id, due_at)
+        VALUES (%s, %s, NOW() + INTERVAL %s DAY)
+    """, [(f"card-{i}", users[i % 3][0], i % 30 - 10) for i in range(300)])
+    cursor.executemany("INSERT INTO flashcard_lsh_buckets (user_id, band_hash, flashcard_id) VALUES (%s, %s, %s)",
+                       [(users[i % 3][0], i % 50, f"card-{i}") for i in range(300)])
+    conn.commit()
+    for table in ('users', 'flashcards', 'user_sessions', 'study_sessions', 'study_session_cards',
+                  'flashcard_reviews', 'flashcard_lsh_buckets'):
+        cursor.execute(f"ANALYZE TABLE {table}")
+        cursor.fetchall()
+    cursor.close()
+
+
+def test_hot_queries_use_indexes():
+    """After migrating, EXPLAIN shows an index for every hot query"""
+    print("\n🧪 Testing hot query plans...")
+    db_config = Config.DB_CONFIG
+    try:
+        conn = mysql.connector.connect(host=db_config['host'], user=db_config['user'],
+                                       password=db_config['password'], connection_timeout=3)
+    except mysql.connector.Error:
+        print("⚠️  MySQL not available - skipping")
+        return
+
+    database = f"migration_test_{uuid.uuid4().hex[:8]}"
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"CREATE DATABASE {database}")
+        cursor.execute(f"USE {database}")
+        assert migrate(conn) == [version for version, _, _ in MIGRATIONS]
+        assert migrate(conn) == []
+        seed(conn)
+
+        plans = explain_hot_queries(conn)
+        assert set(plans) == set(HOT_QUERIES)
+        for name, (access, key) in plans.items():
+            assert key is not None and access != 'ALL', f"{name} scans without an index ({access})"
+            print(f"   {name}: {key} ({access})")
+    finally:
+        cursor.execute(f"DROP DATABASE IF EXISTS {database}")
+        cursor.close()
+        conn.close()
+    print("✅ Every hot query uses an index")
+
+
+def main():
+    """Run all tests"""
+    print("🚀 AI Study Buddy - Migration Tests")
+    print("=" * 40)
+
+    tests = [
+        test_versions_are_unique_and_ordered,
+        test_pending_migrations_run_once,
+        test_hot_queries_have_indexes,
+        test_hot_queries_use_indexes
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except Exception as e:
+            print(f"❌ Test failed with exception: {e}")
+
+    print("\n" + "=" * 40)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+    return 0 if passed == len(tests) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
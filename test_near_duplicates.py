@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Tests for MinHash/LSH near-duplicate flashcard detection
+"""
+
+import sys
+
+from memory_store import MemoryStore
+from near_duplicates import (LSHIndex, band_hashes, check_batch, find_duplicate_groups, minhash, pack_signature,
+                             similarity, unpack_signature)
+
+ORIGINAL = {'question': 'What is the powerhouse of the cell?', 'answer': 'The mitochondria, which produce ATP'}
+REWORDED = {'question': 'What is the powerhouse of a cell?', 'answer': 'The mitochondria, which produce ATP'}
+UNRELATED = {'question': 'Which pigment captures light energy?', 'answer': 'Chlorophyll'}
+
+
+def card(i, **fields):
+    return dict({'id': f"card-{i}", 'user_id': 'user-1', 'subject': 'Biology',
+                 'created_at': f"2024-01-01T00:00:{i:02d}"}, **fields)
+
+
+def test_signatures_estimate_similarity():
+    """Reworded cards score high, unrelated ones near zero, and packing round-trips"""
+    print("🧪 Testing MinHash signatures...")
+    original = minhash(ORIGINAL)
+    assert similarity(original, minhash(REWORDED)) >= 0.7
+    assert similarity(original, minhash(UNRELATED)) < 0.2
+    assert minhash(dict(ORIGINAL)) == original
+    assert unpack_signature(pack_signature(original)) == original
+    print("✅ Signatures behave")
+
+
+def test_query_only_touches_candidates():
+    """A lookup compares against bucket neighbours, not the whole deck"""
+    print("\n🧪 Testing LSH lookups...")
+    index = LSHIndex()
+    for i in range(2000):
+        index.add(i, minhash({'question': f"Topic {i} question about item {i * 7}", 'answer': f"Answer {i}"}))
+    index.add('original', minhash(ORIGINAL))
+
+    candidates = set()
+    for key in band_hashes(minhash(REWORDED)):
+        candidates.update(index._buckets.get(key, ()))
+    assert 'original' in candidates and len(candidates) < 50
+    assert index.query(minhash(REWORDED)) == 'original'
+    assert index.query(minhash(UNRELATED)) is None
+
+    index.remove('original')
+    assert index.query(minhash(REWORDED)) is None
+    print(f"✅ {len(candidates)} candidates out of {len(index)} cards")
+
+
+def test_batch_check_and_groups():
+    """New cards are matched against the deck and against each other"""
+    print("\n🧪 Testing batch checks and grouping...")
+    deck = LSHIndex()
+    deck.add('deck-1', minhash(ORIGINAL))
+    results = check_batch([('a', REWORDED), ('b', UNRELATED), ('c', dict(UNRELATED))], deck)
+    assert [duplicate_of for _, _, duplicate_of in results] == ['deck-1', None, 'b']
+
+    groups = find_duplicate_groups([
+        ('old', minhash(ORIGINAL)), ('other', minhash(UNRELATED)), ('new', minhash(REWORDED))
+    ])
+    assert groups == {'old': ['new']}
+    print("✅ Duplicates found within and across batches")
+
+
+def test_memory_store_dedupe():
+    """The demo store indexes signatures per user and can drop duplicates"""
+    print("\n🧪 Testing MemoryStore integration...")
+    store = MemoryStore()
+    cards = [card(1, **ORIGINAL), card(2, **UNRELATED), card(3, **REWORDED)]
+    store.add_flashcards(cards, [minhash(c) for c in cards])
+    index = store.near_duplicate_index('user-1')
+    assert len(index) == 3 and store.near_duplicate_index('user-2') is not index
+
+    signed = [(c['id'], index.signature(c['id'])) for c in store.get_user_flashcards('user-1')]
+    duplicates = [card_id for ids in find_duplicate_groups(signed).values() for card_id in ids]
+    assert duplicates == ['card-3']
+    assert store.remove_flashcards(duplicates) == 1
+    assert [c['id'] for c in store.page_flashcards('user-1', 10)] == ['card-2', 'card-1']
+    assert [c['id'] for c in store.page_flashcards('user-1', 10, subject='Biology')] == ['card-2', 'card-1']
+    assert len(index) == 2
+    print("✅ Store removes duplicates from every index")
+
+
+def main():
+    """Run all tests"""
+    print("🚀 AI Study Buddy - Near-Duplicate Tests")
+    print("=" * 40)
+
+    tests = [
+        test_signatures_estimate_similarity,
+        test_query_only_touches_candidates,
+        test_batch_check_and_groups,
+        test_memory_store_dedupe
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except Exception as e:
+            print(f"❌ Test failed with exception: {e}")
+
+    print("\n" + "=" * 40)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+    return 0 if passed == len(tests) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Tests for chunked generation of long study notes
+"""
+
+import sys
+import threading
+import time
+
+from note_chunker import allocate_cards, estimate_tokens, generate_chunked, split_notes
+
+
+def lecture(sections, sentences_per_section=40):
+    return '\n\n'.join(
+        f"# Section {s}\n" + ' '.join(f"Fact {s}.{i} is an important idea." for i in range(sentences_per_section))
+        for s in range(sections)
+    )
+
+
+def test_split_respects_budget_and_paragraphs():
+    """Chunks stay under the token budget and keep section text together"""
+    print("🧪 Testing note splitting...")
+    notes = lecture(8)
+    chunks = split_notes(notes, max_tokens=400)
+    assert len(chunks) > 1
+    assert all(estimate_tokens(chunk) <= 400 for chunk in chunks)
+    assert ' '.join(' '.join(chunks).split()) == ' '.join(notes.replace('\n\n', ' ').split())
+
+    # A single huge paragraph is cut at sentence ends
+    blob = ' '.join(f"Sentence number {i} ends here." for i in range(500))
+    pieces = split_notes(blob, max_tokens=100)
+    assert all(estimate_tokens(piece) <= 100 for piece in pieces)
+    assert all(piece.endswith('.') for piece in pieces)
+
+    assert split_notes("Short notes.", max_tokens=400) == ["Short notes."]
+    print(f"✅ {len(chunks)} chunks, all within budget")
+
+
+def test_allocation_is_proportional_and_exact():
+    """Cards are shared by size and always add up to num_cards"""
+    print("\n🧪 Testing card allocation...")
+    chunks = ['x' * 3000, 'x' * 1000, 'x' * 1000]
+    assert allocate_cards(chunks, 5) == [3, 1, 1]
+    for num_cards in range(0, 12):
+        assert sum(allocate_cards(chunks, num_cards)) == num_cards
+    print("✅ Allocation adds up")
+
+
+def test_chunks_run_concurrently_and_merge():
+    """Wall time follows the slowest chunk and duplicate questions are dropped"""
+    print("\n🧪 Testing concurrent generation...")
+    notes = lecture(4, 30)
+    active = []
+    peak = [0]
+    lock = threading.Lock()
+
+    def generate(chunk, count):
+        with lock:
+            active.append(chunk)
+            peak[0] = max(peak[0], len(active))
+        time.sleep(0.2)
+        with lock:
+            active.remove(chunk)
+        title = chunk.split('\n', 1)[0]
+        return [{'question': 'What is shared?', 'answer': title}] + [
+            {'question': f"{title} question {i}", 'answer': 'A'} for i in range(count - 1)
+        ]
+
+    chunk_count = len(split_notes(notes, max_tokens=300))
+    started = time.perf_counter()
+    cards = generate_chunked(notes, 8, generate, max_workers=8, max_tokens=300)
+    elapsed = time.perf_counter() - started
+
+    assert chunk_count >= 3
+    assert peak[0] > 1
+    assert elapsed < 0.2 * chunk_count * 0.75
+    questions = [card['question'] for card in cards]
+    assert questions.count('What is shared?') == 1
+    assert len(cards) <= 8
+    assert cards[0]['answer'] == '# Section 0'
+    print(f"✅ {chunk_count} chunks in {elapsed:.2f}s with {peak[0]} at once")
+
+
+def main():
+    """Run all tests"""
+    print("🚀 AI Study Buddy - Note Chunker Tests")
+    print("=" * 40)
+
+    tests = [
+        test_split_respects_budget_and_paragraphs,
+        test_allocation_is_proportional_and_exact,
+        test_chunks_run_concurrently_and_merge
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except Exception as e:
+            print(f"❌ Test failed with exception: {e}")
+
+    print("\n" + "=" * 40)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+    return 0 if passed == len(tests) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Tests for pooled password hashing
+"""
+
+import hashlib
+import sys
+import threading
+import time
+
+from password_hasher import PasswordHasher, PasswordHasherBusy, decode_hash
+
+
+def test_hash_format_and_verify():
+    """Hashes record their cost and verify in the pool"""
+    print("🧪 Testing hash format...")
+    hasher = PasswordHasher(iterations=1000, max_workers=1)
+    try:
+        salt, stored = hasher.hash_password('correct horse')
+        assert stored.startswith('pbkdf2_sha256$1000$')
+        assert decode_hash(stored) == (1000, stored.rsplit('$', 1)[1])
+        assert hasher.verify_password('correct horse', stored, salt)
+        assert not hasher.verify_password('wrong horse', stored, salt)
+        assert hasher.stats()['hashed'] == 3 and hasher.stats()['running']
+    finally:
+        hasher.shutdown()
+    print("✅ Hashes verify")
+
+
+def test_legacy_hashes_and_rehash():
+    """Bare hex digests still verify and are flagged when the cost changes"""
+    print("\n🧪 Testing legacy hashes...")
+    salt = 'abc123'
+    legacy = hashlib.pbkdf2_hmac('sha256', b'hunter22', salt.encode('utf-8'), 100000).hex()
+    hasher = PasswordHasher(iterations=100000, max_workers=1)
+    try:
+        assert hasher.verify_password('hunter22', legacy, salt)
+        assert not hasher.needs_rehash(legacy)
+    finally:
+        hasher.shutdown()
+
+    stronger = PasswordHasher(iterations=200000, max_workers=1)
+    try:
+        assert stronger.verify_password('hunter22', legacy, salt)
+        assert stronger.needs_rehash(legacy)
+        new_salt, upgraded = stronger.hash_password('hunter22')
+        assert not stronger.needs_rehash(upgraded)
+        assert stronger.verify_password('hunter22', upgraded, new_salt)
+    finally:
+        stronger.shutdown()
+    print("✅ Old hashes keep working and get upgraded")
+
+
+def test_concurrency_cap():
+    """Callers beyond max_pending are turned away instead of queueing forever"""
+    print("\n🧪 Testing concurrency cap...")
+    hasher = PasswordHasher(iterations=2_000_000, max_workers=1, max_pending=1, queue_timeout=0.05)
+    started = threading.Event()
+    try:
+        hasher.hash_password('warm up', 'salt')
+
+        def slow_hash():
+            started.set()
+            hasher.hash_password('slow', 'salt')
+
+        worker = threading.Thread(target=slow_hash)
+        worker.start()
+        started.wait()
+        while hasher._slots._value:
+            time.sleep(0.001)
+        try:
+            hasher.hash_password('second', 'salt')
+            assert False, 'second hash should be rejected'
+        except PasswordHasherBusy:
+            pass
+        worker.join()
+        assert hasher.stats()['rejected'] == 1
+    finally:
+        hasher.shutdown()
+    print("✅ Excess hashes rejected")
+
+
+def main():
+    """Run all tests"""
+    print("🚀 AI Study Buddy - Password Hasher Tests")
+    print("=" * 40)
+
+    tests = [
+        test_hash_format_and_verify,
+        test_legacy_hashes_and_rehash,
+        test_concurrency_cap
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except Exception as e:
+            print(f"❌ Test failed with exception: {e}")
+
+    print("\n" + "=" * 40)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+    return 0 if passed == len(tests) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Tests for token-bucket rate limiting of the auth endpoints
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from flask import Flask, jsonify
+
+import rate_limiter
+from rate_limiter import AuthLimiter, RateLimited, TokenBuckets, limit_auth
+
+
+def drain(buckets, key):
+    """Take tokens until the bucket refuses; returns how many were granted"""
+    granted = 0
+    while True:
+        try:
+            buckets.take(key)
+            granted += 1
+        except RateLimited as e:
+            return granted, e
+
+
+def test_bucket_bursts_and_refills():
+    """A bucket grants its burst, then one token per 1/rate seconds"""
+    print("🧪 Testing token buckets...")
+    buckets = TokenBuckets('ip', rate=20, burst=3)
+    granted, error = drain(buckets, '10.0.0.1')
+    assert granted == 3 and error.retry_after == 1
+    buckets.take('10.0.0.2')
+    time.sleep(0.06)
+    buckets.take('10.0.0.1')
+    stats = buckets.stats()
+    assert stats['allowed'] == 5 and stats['limited'] == 1 and stats['keys'] == 2
+    print("✅ Burst and refill behave")
+
+
+def test_key_limit_is_bounded():
+    """Idle keys are forgotten once max_keys is reached"""
+    print("\n🧪 Testing key bound...")
+    buckets = TokenBuckets('ip', rate=1, burst=1, max_keys=100)
+    for i in range(1000):
+        buckets.take(f"10.0.{i // 256}.{i % 256}")
+    assert buckets.stats()['keys'] == 100
+    print("✅ Memory stays bounded")
+
+
+def test_shared_buckets_span_workers():
+    """Two limiters on one SQLite file share a single allowance"""
+    print("\n🧪 Testing shared buckets...")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'limits.db')
+        first = TokenBuckets('ip', rate=0.01, burst=4, path=path)
+        second = TokenBuckets('ip', rate=0.01, burst=4, path=path)
+        first.take('10.0.0.1')
+        second.take('10.0.0.1')
+        first.take('10.0.0.1')
+        second.take('10.0.0.1')
+        granted, error = drain(first, '10.0.0.1')
+        assert granted == 0 and error.retry_after > 1
+        second.take('10.0.0.9')
+        assert first.stats()['shared'] and second.stats()['allowed'] == 3
+    print("✅ Workers share buckets")
+
+
+def test_decorator_rejects_before_the_route():
+    """Limited requests get 429 with Retry-After and never reach the handler"""
+    print("\n🧪 Testing auth decorator...")
+    app = Flask(__name__)
+    calls = []
+
+    @app.route('/login', methods=['POST'])
+    @limit_auth('username')
+    def login():
+        calls.append(1)
+        return jsonify({'ok': True})
+
+    original = rate_limiter.auth_limiter
+    rate_limiter.auth_limiter = AuthLimiter(path='')
+    rate_limiter.auth_limiter.by_username.burst = 2
+    try:
+        client = app.test_client()
+        statuses = [client.post('/login', json={'username': 'Alice'}).status_code for _ in range(3)]
+        assert statuses == [200, 200, 429]
+        # The username bucket is shared by every spelling of the name
+        response = client.post('/login', json={'username': ' alice '})
+        assert response.status_code == 429 and int(response.headers['Retry-After']) >= 1
+        assert client.post('/login', json={'username': 'bob'}).status_code == 200
+        assert len(calls) == 3
+    finally:
+        rate_limiter.auth_limiter = original
+    print("✅ Over-limit requests stop before hashing")
+
+
+def main():
+    """Run all tests"""
+    print("🚀 AI Study Buddy - Rate Limiter Tests")
+    print("=" * 40)
+
+    tests = [
+        test_bucket_bursts_and_refills,
+        test_key_limit_is_bounded,
+        test_shared_buckets_span_workers,
+        test_decorator_rejects_before_the_route
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except Exception as e:
+            print(f"❌ Test failed with exception: {e}")
+
+    print("\n" + "=" * 40)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+    return 0 if passed == len(tests) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Tests for the structured request log
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+from flask import Flask
+
+from config import Config
+from request_log import REQUEST_ID_HEADER, RequestLog, init_app, parse_sample_rates
+
+
+def read_records(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_records_are_json_lines():
+    """Each record is one JSON object per line, with a timestamp and level"""
+    print("🧪 Testing JSON lines...")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'app.log')
+        request_log = RequestLog(path)
+        for i in range(500):
+            request_log.log('card_saved', card=i, note='multi\nline "quoted"')
+        request_log.log('db_error', 'error', error=ValueError('boom'))
+        request_log.flush()
+        records = read_records(path)
+        assert [record['card'] for record in records[:-1]] == list(range(500))
+        assert records[0]['note'] == 'multi\nline "quoted"' and records[0]['level'] == 'info'
+        assert records[-1] == dict(records[-1], event='db_error', level='error', error='boom')
+        assert 'T' in records[0]['ts']
+        assert request_log.stats()['written'] == 501
+    print("✅ 501 records written in order")
+
+
+def test_full_queue_drops_instead_of_blocking():
+    """A full queue drops records and reports how many"""
+    print("\n🧪 Testing full queue...")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'app.log')
+        request_log = RequestLog(path, queue_size=10)
+        # Keep the writer from starting so nothing is drained while the queue fills
+        request_log._start = lambda: None
+        for i in range(50):
+            request_log.log('burst', i=i)
+        assert request_log._dropped == 40
+        del request_log._start
+        request_log.log('after')
+        request_log.flush()
+        records = read_records(path)
+        events = [record['event'] for record in records]
+        assert events.count('burst') == 10 and 'after' in events
+        assert [record['count'] for record in records if record['event'] == 'log_dropped'] == [40]
+    print("✅ 40 dropped and reported")
+
+
+def test_request_ids_and_sampling():
+    """Requests get an id, echoed back and on every record; sampled routes still log errors"""
+    print("\n🧪 Testing request records...")
+    saved = Config.LOG_SAMPLE_RATES
+    Config.LOG_SAMPLE_RATES = '/health=0'
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'app.log')
+            request_log = RequestLog(path)
+            app = Flask(__name__)
+            app.logger.disabled = True
+            init_app(app, request_log)
+
+            @app.route('/cards/<card_id>')
+            def card(card_id):
+                request_log.log('card_read', card_id=card_id)
+                return card_id
+
+            @app.route('/health')
+            def health():
+                return 'ok', 500 if app.config.get('UNHEALTHY') else 200
+
+            client = app.test_client()
+            response = client.get('/cards/a')
+            generated = response.headers[REQUEST_ID_HEADER]
+            assert len(generated) == 32
+            assert client.get('/cards/b', headers={REQUEST_ID_HEADER: 'edge-123'}).headers[REQUEST_ID_HEADER] == 'edge-123'
+            assert client.get('/cards/c', headers={REQUEST_ID_HEADER: 'bad id!'}).headers[REQUEST_ID_HEADER] != 'bad id!'
+            for _ in range(20):
+                client.get('/health')
+            app.config['UNHEALTHY'] = True
+            client.get('/health')
+            request_log.flush()
+
+            records = read_records(path)
+            requests = [record for record in records if record['event'] == 'request']
+            assert [record['path'] for record in requests] == ['/cards/a', '/cards/b', '/cards/c', '/health']
+            first = requests[0]
+            assert first['route'] == '/cards/<card_id>' and first['status'] == 200 and first['duration_ms'] >= 0
+            assert first['request_id'] == generated
+            read = [record for record in records if record['event'] == 'card_read']
+            assert read[0]['request_id'] == generated and read[1]['request_id'] == 'edge-123'
+            assert requests[-1]['status'] == 500 and requests[-1]['level'] == 'error'
+    finally:
+        Config.LOG_SAMPLE_RATES = saved
+
+    assert parse_sample_rates(' /health=0.01, /metrics=0 ,') == {'/health': 0.01, '/metrics': 0.0}
+    for bad in ('/health', '/health=2', '=0.5'):
+        try:
+            parse_sample_rates(bad)
+            assert False, f"{bad} must be rejected"
+        except ValueError:
+            pass
+    print("✅ Ids propagated, /health sampled out except its error")
+
+
+def main():
+    """Run all tests"""
+    print("🚀 AI Study Buddy - Request Log Tests")
+    print("=" * 40)
+
+    tests = [
+        test_records_are_json_lines,
+        test_full_queue_drops_instead_of_blocking,
+        test_request_ids_and_sampling
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except Exception as e:
+            print(f"❌ Test failed with exception: {e}")
+
+    print("\n" + "=" * 40)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+    return 0 if passed == len(tests) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Tests for the spaced-repetition scheduler and the stores' review queues
+"""
+
+import os
+import random
+import sys
+import tempfile
+
+from review_scheduler import DAY, ReviewQueue, new_state, parse_review_answer, schedule
+from storage import create_store
+
+
+def test_sm2_intervals():
+    """Correct answers stretch the interval; a miss starts the card over"""
+    print("🧪 Testing SM-2 schedule...")
+    state = new_state(0)
+    intervals = []
+    for _ in range(4):
+        state = schedule(state, 4, state['due_at'])
+        intervals.append(state['interval_days'])
+    assert intervals == [1, 6, 15, 38], intervals
+    assert state['ease'] == 2.5 and state['reviews'] == 4
+
+    missed = schedule(state, 1, 100 * DAY)
+    assert missed['repetitions'] == 0 and missed['interval_days'] == 1
+    assert missed['due_at'] == 101 * DAY and missed['ease'] < state['ease']
+
+    ease = new_state(0)
+    for _ in range(20):
+        ease = schedule(ease, 0, 0)
+    assert ease['ease'] == 1.3
+
+    for bad in ({'card_id': 'c', 'grade': 6}, {'card_id': 'c', 'grade': True}, {'grade': 3}):
+        try:
+            parse_review_answer(bad)
+            assert False, f"{bad} must be rejected"
+        except ValueError:
+            pass
+    print("✅ Intervals 1, 6, 15, 38 days")
+
+
+def test_queue_matches_sorting():
+    """The heap hands out the same cards as sorting the whole deck by due time"""
+    print("\n🧪 Testing review queue...")
+    rng = random.Random(7)
+    queue, due = ReviewQueue(), {}
+    for i in range(2000):
+        card_id = f"card-{i}"
+        due[card_id] = rng.randrange(1000)
+        queue.push(card_id, due[card_id])
+    for _ in range(3000):
+        card_id = f"card-{rng.randrange(2000)}"
+        if rng.random() < 0.2:
+            queue.remove(card_id)
+            due.pop(card_id, None)
+        else:
+            due[card_id] = rng.randrange(1000)
+            queue.push(card_id, due[card_id])
+
+    expected = sorted((at, card_id) for card_id, at in due.items() if at <= 500)[:25]
+    assert queue.due(500, 25) == [card_id for _, card_id in expected]
+    assert queue.due(500, 25) == [card_id for _, card_id in expected], "due() must not consume the queue"
+    assert queue.next_due_at() == min(due.values()) and len(queue) == len(due)
+    assert len(queue._heap) <= 2 * len(due) + 64
+    assert queue.due(-1, 5) == []
+    print(f"✅ {len(due)} cards, heap of {len(queue._heap)}")
+
+
+def test_store_review_queues():
+    """Both backends serve due cards in order and reschedule them on answer"""
+    print("\n🧪 Testing store review queues...")
+    with tempfile.TemporaryDirectory() as tmp:
+        for store in (create_store('memory'), create_store('sqlite', os.path.join(tmp, 'reviews.db'))):
+            name = type(store).__name__
+            store.add_flashcards([
+                {'id': f"c{i}", 'user_id': 'user-1', 'question': f"Q{i}", 'answer': 'A', 'subject': 'General',
+                 'created_at': f"2024-01-01T00:00:0{i}"} for i in range(3)
+            ] + [{'id': 'anon', 'user_id': None, 'question': 'Q', 'answer': 'A', 'subject': 'General',
+                  'created_at': '2024-01-01T00:00:00'}])
+            first = store.due_reviews('user-1', 10)
+            assert sorted(card['id'] for card in first) == ['c0', 'c1', 'c2'], name
+            assert first[0]['review']['repetitions'] == 0
+            assert store.due_reviews(None, 10) == []
+
+            card_id = first[0]['id']
+            state = store.record_review('user-1', card_id, 5)
+            assert state['interval_days'] == 1 and state['repetitions'] == 1
+            assert card_id not in [card['id'] for card in store.due_reviews('user-1', 10)]
+            assert [card['id'] for card in store.due_reviews('user-1', 10, now=state['due_at'])][-1] == card_id
+            assert store.record_review('user-2', card_id, 5) is None
+            assert store.record_review('user-1', 'missing', 5) is None
+
+            store.remove_flashcards([card['id'] for card in first if card['id'] != card_id])
+            assert store.due_reviews('user-1', 10) == []
+            assert abs(store.next_review_at('user-1') - state['due_at']) < 1e-6, name
+    print("✅ Both backends agree")
+
+
+def main():
+    """Run all tests"""
+    print("🚀 AI Study Buddy - Review Scheduler Tests")
+    print("=" * 40)
+
+    tests = [
+        test_sm2_intervals,
+        test_queue_matches_sorting,
+        test_store_review_queues
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except Exception as e:
+            print(f"❌ Test failed with exception: {e}")
+
+    print("\n" + "=" * 40)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+    return 0 if passed == len(tests) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Tests for full-text flashcard search
+"""
+
+import sys
+
+from memory_store import MemoryStore
+from search_index import SearchIndex, parse_search_args, tokenize
+
+CARDS = [
+    {'question': 'What is the powerhouse of the cell?', 'answer': 'The mitochondria', 'subject': 'Biology'},
+    {'question': 'Where does photosynthesis happen?', 'answer': 'In the chloroplasts of plant cells', 'subject': 'Biology'},
+    {'question': 'What do mitochondria produce?', 'answer': 'ATP, the energy currency of the cell, made by mitochondria',
+     'subject': 'Biology'},
+    {'question': 'Who wrote Hamlet?', 'answer': 'William Shakespeare', 'subject': 'Literature'},
+]
+
+
+def make_store():
+    store = MemoryStore()
+    store.add_flashcards([
+        dict(card, id=f"card-{i}", user_id='user-1', created_at=f"2024-01-01T00:00:{i:02d}")
+        for i, card in enumerate(CARDS)
+    ])
+    return store
+
+
+def test_bm25_ranking():
+    """Cards with more, rarer matches rank first and stopwords are ignored"""
+    print("🧪 Testing BM25 ranking...")
+    assert tokenize('What is THE Mitochondria?') == ['mitochondria']
+
+    index = SearchIndex()
+    for i, card in enumerate(CARDS):
+        index.add(i, card)
+    results = index.search('mitochondria')
+    assert [card_id for card_id, _ in results] == [2, 0]
+    assert results[0][1] > results[1][1] > 0
+    assert index.search('the of what') == []
+    assert index.search('shakespeare hamlet', limit=1)[0][0] == 3
+    assert [card_id for card_id, _ in index.search('cell', accept=lambda card_id: card_id != 0)] == [2]
+    print("✅ Ranking behaves")
+
+
+def test_index_stays_incremental():
+    """Removing and re-adding cards keeps postings and lengths consistent"""
+    print("\n🧪 Testing incremental updates...")
+    index = SearchIndex()
+    for i, card in enumerate(CARDS):
+        index.add(i, card)
+    index.remove(2)
+    assert [card_id for card_id, _ in index.search('mitochondria')] == [0]
+    assert 'currency' not in index._postings and len(index) == 3
+
+    index.add(0, CARDS[3])
+    assert index.search('mitochondria') == []
+    assert {card_id for card_id, _ in index.search('shakespeare')} == {0, 3}
+    assert index._total_length == sum(index._lengths.values())
+    print("✅ Index follows inserts and removals")
+
+
+def test_memory_store_search():
+    """The store searches only the owner's cards and honours the subject filter"""
+    print("\n🧪 Testing MemoryStore search...")
+    store = make_store()
+    results = store.search_flashcards('user-1', 'mitochondria energy')
+    assert [card['id'] for card in results] == ['card-2', 'card-0']
+    assert 'score' in results[0] and 'score' not in store.flashcards['card-2']
+    assert store.search_flashcards('user-2', 'mitochondria') == []
+    assert store.search_flashcards('user-1', 'cell', subject='Literature') == []
+
+    store.remove_flashcards(['card-2'])
+    assert [card['id'] for card in store.search_flashcards('user-1', 'mitochondria')] == ['card-0']
+    print("✅ Store search is per user")
+
+
+def test_parse_search_args():
+    """Queries need a real word and limits are capped"""
+    print("\n🧪 Testing search arguments...")
+    query, limit, subject = parse_search_args({'q': ' cells ', 'limit': '100000', 'subject': 'Biology'})
+    assert query == 'cells' and limit <= 200 and subject == 'Biology'
+    for args in ({}, {'q': 'the'}, {'q': 'cells', 'limit': 'x'}, {'q': 'cells', 'limit': '0'}):
+        try:
+            parse_search_args(args)
+            assert False, args
+        except ValueError:
+            pass
+    print("✅ Arguments validated")
+
+
+def main():
+    """Run all tests"""
+    print("🚀 AI Study Buddy - Search Tests")
+    print("=" * 40)
+
+    tests = [
+        test_bm25_ranking,
+        test_index_stays_incremental,
+        test_memory_store_search,
+        test_parse_search_args
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except Exception as e:
+            print(f"❌ Test failed with exception: {e}")
+
+    print("\n" + "=" * 40)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+    return 0 if passed == len(tests) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
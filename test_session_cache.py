@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Tests for the session cache used by AuthManager.verify_session
+"""
+
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from session_cache import MISS, FileInvalidationChannel, SessionCache
+
+USER = {'user_id': 'u1', 'username': 'alice', 'email': 'alice@example.com'}
+
+
+def test_hit_after_set():
+    """A cached session is served without another lookup"""
+    print("🧪 Testing cache hits...")
+    cache = SessionCache(max_entries=10, ttl=60, negative_ttl=5)
+
+    assert cache.get('token') is MISS
+    cache.set('token', USER, datetime.now() + timedelta(days=7))
+    assert cache.get('token') == USER
+
+    stats = cache.stats()
+    assert stats['hits'] == 1 and stats['misses'] == 1
+    print(f"✅ Hit ratio: {stats['hit_ratio']}")
+
+
+def test_ttl_is_capped_by_expires_at():
+    """A session about to expire is not cached past its expiry"""
+    print("\n🧪 Testing TTL capped by expires_at...")
+    cache = SessionCache(max_entries=10, ttl=60, negative_ttl=5)
+
+    cache.set('short', USER, datetime.now() + timedelta(milliseconds=20))
+    cache.set('expired', USER, datetime.now() - timedelta(seconds=1))
+    time.sleep(0.05)
+
+    assert cache.get('short') is MISS
+    assert cache.get('expired') is MISS
+    print("✅ Expired sessions are not served from cache")
+
+
+def test_negative_caching_and_lru_bound():
+    """Bad tokens are remembered and the cache never grows past its bound"""
+    print("\n🧪 Testing negative caching and LRU eviction...")
+    cache = SessionCache(max_entries=2, ttl=60, negative_ttl=5)
+
+    cache.set_invalid('bad')
+    assert cache.get('bad') is None
+
+    cache.set('a', USER)
+    cache.set('b', USER)
+    assert cache.get('bad') is MISS
+    assert cache.stats()['entries'] == 2
+    assert cache.stats()['evictions'] == 1
+    print("✅ Negative entries cached, LRU bound enforced")
+
+
+def test_logout_invalidates_other_workers():
+    """A revocation published by one worker reaches another via the channel"""
+    print("\n🧪 Testing cross-worker invalidation...")
+    path = os.path.join(tempfile.mkdtemp(), 'revoked')
+    worker_a = SessionCache(ttl=60, channel=FileInvalidationChannel(path, poll_interval=0))
+    worker_b = SessionCache(ttl=60, channel=FileInvalidationChannel(path, poll_interval=0))
+
+    worker_b.get('token')
+    worker_b.set('token', USER)
+    assert worker_b.get('token') == USER
+
+    worker_a.invalidate('token')
+    assert worker_b.get('token') is MISS
+    print("✅ Logout honored by the other worker")
+
+
+def test_channel_follows_rotation():
+    """Readers drain the rotated file before following the new one"""
+    print("\n🧪 Testing invalidation file rotation...")
+    path = os.path.join(tempfile.mkdtemp(), 'revoked')
+    writer = FileInvalidationChannel(path, poll_interval=0, max_bytes=100)
+    reader = FileInvalidationChannel(path, poll_interval=0)
+    reader.poll()
+
+    keys = [f"{i:064x}" for i in range(3)]
+    for key in keys:
+        writer.publish(key)
+
+    received = reader.poll() + reader.poll()
+    assert received == keys
+    print("✅ No revocations lost across rotation")
+
+
+def main():
+    """Run all tests"""
+    print("🚀 AI Study Buddy - Session Cache Tests")
+    print("=" * 40)
+
+    tests = [
+        test_hit_after_set,
+        test_ttl_is_capped_by_expires_at,
+        test_negative_caching_and_lru_bound,
+        test_logout_invalidates_other_workers,
+        test_channel_follows_rotation
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except Exception as e:
+            print(f"❌ Test failed with exception: {e}")
+
+    print("\n" + "=" * 40)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+    return 0 if passed == len(tests) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Tests for the background purge of expired login sessions
+"""
+
+import sys
+import time
+from contextlib import contextmanager
+
+import mysql.connector
+
+import session_purger
+from session_purger import SessionPurger
+
+
+class FakeCursor:
+    """Reports the next scripted rowcount for each DELETE"""
+
+    def __init__(self, db):
+        self.db = db
+        self.rowcount = 0
+
+    def execute(self, sql, params=None):
+        self.db.statements.append((' '.join(sql.split()), params))
+        if sql.lstrip().startswith('DELETE'):
+            self.rowcount = self.db.rowcounts.pop(0)
+
+    def fetchone(self):
+        return self.db.counts
+
+    def close(self):
+        pass
+
+
+class FakeDatabase:
+    def __init__(self, rowcounts=(), counts=(0, 0), error=None):
+        self.rowcounts = list(rowcounts)
+        self.counts = counts
+        self.error = error
+        self.statements = []
+        self.commits = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    @contextmanager
+    def connection(self):
+        if self.error is not None:
+            raise self.error
+        yield self
+
+
+def patch_db(db):
+    """Point session_purger at db; returns a function that restores the real pool"""
+    original = session_purger.db_connection
+    session_purger.db_connection = db.connection
+    return lambda: setattr(session_purger, 'db_connection', original)
+
+
+def test_purge_loops_until_a_short_batch():
+    """Full batches are followed by another DELETE; a short one ends the run"""
+    print("🧪 Testing batch looping...")
+    db = FakeDatabase(rowcounts=[3, 3, 1, 3])
+    restore = patch_db(db)
+    try:
+        purger = SessionPurger(interval=3600, batch_size=3)
+        assert purger.purge() == 7
+        assert len(db.statements) == 3 and db.commits == 3
+        assert db.rowcounts == [3]
+        sql, params = db.statements[0]
+        assert sql.startswith('DELETE FROM user_sessions WHERE expires_at <= NOW() LIMIT') and params == (3,)
+
+        # A final empty batch also ends the run when the count is an exact multiple
+        db.rowcounts = [3, 0]
+        assert purger.purge() == 3
+        assert db.rowcounts == []
+    finally:
+        restore()
+    print("✅ Purge stops after the first short batch")
+
+
+def test_stats_counters():
+    """Runs and purged rows accumulate and live/expired counts come from MySQL"""
+    print("\n🧪 Testing purge stats...")
+    db = FakeDatabase(rowcounts=[2, 0, 5], counts=(4, 1))
+    restore = patch_db(db)
+    try:
+        purger = SessionPurger(interval=3600, batch_size=10)
+        before = time.time()
+        purger.purge()
+        purger.purge()
+        stats = purger.stats()
+        assert stats['runs'] == 2 and stats['purged'] == 2 and stats['errors'] == 0
+        assert stats['last_run'] >= before and stats['running'] is False
+        assert stats['live'] == 4 and stats['expired'] == 1
+
+        db.error = mysql.connector.Error('MySQL server has gone away')
+        stats = purger.stats()
+        assert stats['live'] is None and stats['expired'] is None and stats['runs'] == 2
+    finally:
+        restore()
+    print("✅ Stats counters correct")
+
+
+def test_loop_survives_database_errors():
+    """A failed purge is counted and logged, and the thread keeps running"""
+    print("\n🧪 Testing purge error handling...")
+    db = FakeDatabase(error=mysql.connector.Error('Lost connection'))
+    restore = patch_db(db)
+    original_log = session_purger.log
+    logged = []
+    session_purger.log = lambda event, level, **fields: logged.append((event, level, fields))
+    purger = SessionPurger(interval=0.01, batch_size=10)
+    try:
+        purger.start()
+        deadline = time.time() + 5
+        while purger.stats()['errors'] < 2 and time.time() < deadline:
+            time.sleep(0.01)
+        stats = purger.stats()
+        assert stats['errors'] >= 2 and stats['running'] is True and stats['runs'] == 0
+        assert logged[0] == ('session_purge_error', 'error', {'error': 'Lost connection'})
+
+        # Once the database is back the same thread purges again
+        db.error = None
+        db.rowcounts = [1] + [0] * 1000
+        while purger.stats()['purged'] == 0 and time.time() < deadline:
+            time.sleep(0.01)
+        assert purger.stats()['purged'] == 1
+    finally:
+        purger.stop()
+        session_purger.log = original_log
+        restore()
+    assert purger.stats()['running'] is False
+    print("✅ Errors counted without stopping the purger")
+
+
+def main():
+    """Run all tests"""
+    print("🚀 AI Study Buddy - Session Purger Tests")
+    print("=" * 40)
+
+    tests = [
+        test_purge_loops_until_a_short_batch,
+        test_stats_counters,
+        test_loop_survives_database_errors
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except Exception as e:
+            print(f"❌ Test failed with exception: {e}")
+
+    print("\n" + "=" * 40)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+    return 0 if passed == len(tests) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
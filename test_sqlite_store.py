@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Tests for the storage backends: the SQLite store must behave like MemoryStore
+"""
+
+import multiprocessing
+import os
+import sqlite3
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+from config import Config
+from near_duplicates import check_batch, minhash
+from storage import create_store
+
+CARDS = [
+    {'question': 'What is the powerhouse of the cell?', 'answer': 'The mitochondria, which produce ATP'},
+    {'question': 'Which pigment captures light energy?', 'answer': 'Chlorophyll'},
+    {'question': 'What do mitochondria produce?', 'answer': 'ATP, the energy currency of the cell'},
+]
+
+
+def stores(tmp):
+    """One store per backend, each starting empty"""
+    return [create_store('memory'), create_store('sqlite', os.path.join(tmp, 'store.db'))]
+
+
+def make_cards(user_id, count, subject='Biology'):
+    return [dict(CARDS[i % len(CARDS)], id=f"{user_id}-{i:03d}", user_id=user_id, subject=subject,
+                 created_at=f"2024-01-01T00:00:{i // 2:02d}") for i in range(count)]
+
+
+def add_user(store, i):
+    return store.add_user({'id': f"user-{i}", 'username': f"student{i}", 'email': f"s{i}@example.com",
+                           'password_hash': 'hash', 'salt': 'salt', 'created_at': '2024-01-01T00:00:00'})
+
+
+def test_users_and_sessions():
+    """Lookups, uniqueness, expiry and the per-user session cap match across backends"""
+    print("🧪 Testing users and sessions...")
+    with tempfile.TemporaryDirectory() as tmp:
+        for store in stores(tmp):
+            name = type(store).__name__
+            assert add_user(store, 1) and not add_user(store, 1), name
+            assert store.user_exists('student1', 'other@example.com')
+            assert store.get_user_by_email('s1@example.com')['username'] == 'student1'
+            assert store.update_password('user-1', 'salt2', 'hash2')['password_hash'] == 'hash2'
+
+            now = datetime.now()
+            store.add_session({'user_id': 'user-1', 'session_token': 'old', 'expires_at': now - timedelta(days=1)})
+            for i in range(4):
+                store.add_session({'user_id': 'user-1', 'session_token': f"live-{i}",
+                                   'expires_at': now + timedelta(days=1)}, max_per_user=3)
+            assert store.verify_session('old') is None, name
+            assert store.get_session('live-0') is None, name
+            assert store.verify_session('live-3')['username'] == 'student1'
+            assert store.get_session('live-1')['expires_at'] > now
+            store.remove_session('live-1')
+            assert store.verify_session('live-1') is None
+            stats = store.session_stats()
+            assert stats['live'] == 2 and stats['evicted'] == 1, (name, stats)
+
+            store.set_reset_token({'email': 's1@example.com', 'token': 't1', 'user_id': 'user-1',
+                                   'expires_at': now + timedelta(hours=1)})
+            store.set_reset_token({'email': 's1@example.com', 'token': 't2', 'user_id': 'user-1',
+                                   'expires_at': now + timedelta(hours=1)})
+            assert store.get_reset_token('t1') is None and store.get_reset_token('t2')['user_id'] == 'user-1'
+            store.remove_reset_token('t2')
+            assert store.get_reset_token('t2') is None
+    print("✅ Both backends agree")
+
+
+def test_flashcards_pages_search_and_duplicates():
+    """Paging, search, study sessions and near-duplicate checks match across backends"""
+    print("\n🧪 Testing flashcards...")
+    with tempfile.TemporaryDirectory() as tmp:
+        results = []
+        for store in stores(tmp):
+            name = type(store).__name__
+            cards = make_cards('user-1', 9) + make_cards('user-2', 2)
+            store.add_flashcards(cards, [minhash(card) for card in cards])
+
+            pages, after = [], None
+            while True:
+                page = store.page_flashcards('user-1', 4, after)
+                pages.extend(card['id'] for card in page)
+                if len(page) < 4:
+                    break
+                after = (page[-1]['created_at'], page[-1]['id'])
+            assert len(pages) == 9 and len(set(pages)) == 9
+            assert [c['id'] for c in store.get_user_flashcards('user-2')] == ['user-2-000', 'user-2-001']
+            saved_fetch_size = Config.EXPORT_FETCH_SIZE
+            Config.EXPORT_FETCH_SIZE = 2
+            try:
+                assert [c['id'] for c in store.iter_user_flashcards('user-1')] == pages, name
+                assert [c['id'] for c in store.iter_user_flashcards('user-1', newest_first=False)] == pages[::-1]
+                exported = store.iter_user_flashcards('user-2')
+                assert next(exported)['id'] == 'user-2-001'
+                store.add_flashcards(make_cards('user-3', 1))
+                assert [c['id'] for c in exported] == ['user-2-000']
+            finally:
+                Config.EXPORT_FETCH_SIZE = saved_fetch_size
+
+            found = store.search_flashcards('user-1', 'mitochondria "ATP" OR', 3)
+            assert found and all('mitochondria' in (c['question'] + c['answer']).lower() for c in found)
+            assert store.search_flashcards('user-1', 'chlorophyll', subject='Chemistry') == []
+
+            index = store.near_duplicate_index('user-1')
+            checked = check_batch([('new', dict(CARDS[1]))], index)
+            assert checked[0][2] is not None and len(index) == 9
+            assert store.remove_flashcards(['user-1-000', 'user-1-001']) == 2
+            assert len(store.get_user_flashcards('user-1')) == 7 and len(index) == 7
+
+            store.add_study_session({'id': 's1', 'user_id': 'user-1', 'session_name': 'Review',
+                                     'flashcard_ids': ['user-1-002'], 'created_at': '2024-01-02T00:00:00'})
+            assert store.get_user_study_sessions('user-1')[0]['flashcard_ids'] == ['user-1-002']
+            store.remove_flashcards(['user-1-002'])
+            assert store.get_user_study_sessions('user-1')[0]['flashcard_ids'] == []
+            results.append((pages, store.counts()))
+        assert results[0] == results[1]
+    print("✅ Both backends agree")
+
+
+def test_study_session_cards():
+    """A session loads its own cards in order; missing and foreign ids are dropped"""
+    print("\n🧪 Testing study session cards...")
+    with tempfile.TemporaryDirectory() as tmp:
+        for store in stores(tmp):
+            name = type(store).__name__
+            store.add_flashcards(make_cards('user-1', 4) + make_cards('user-2', 1))
+            saved = store.add_study_session({
+                'id': 's1', 'user_id': 'user-1', 'session_name': 'Review', 'created_at': '2024-01-02T00:00:00',
+                'flashcard_ids': ['user-1-003', 'temp-id', 'user-2-000', 'user-1-001', 'user-1-003']
+            })
+            assert saved['flashcard_ids'] == ['user-1-003', 'user-1-001'], name
+            study_session, cards = store.get_study_session_cards('user-1', 's1')
+            assert study_session['session_name'] == 'Review' and 'flashcard_ids' not in study_session
+            assert [card['id'] for card in cards] == ['user-1-003', 'user-1-001'], name
+            assert store.get_study_session_cards('user-2', 's1') is None
+            assert store.get_study_session_cards('user-1', 'missing') is None
+
+            store.remove_flashcards(['user-1-003'])
+            assert [card['id'] for card in store.get_study_session_cards('user-1', 's1')[1]] == ['user-1-001']
+            store.add_study_session({'id': 's2', 'user_id': 'user-1', 'session_name': 'Empty',
+                                     'created_at': '2024-01-03T00:00:00'})
+            assert store.get_study_session_cards('user-1', 's2')[1] == []
+    print("✅ Both backends agree")
+
+
+def test_sqlite_moves_json_card_lists():
+    """Files created with the JSON flashcard_ids column get a study_session_cards table"""
+    print("\n🧪 Testing study session upgrade...")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'old.db')
+        conn = sqlite3.connect(path)
+        conn.executescript("""
+            CREATE TABLE flashcards (seq INTEGER PRIMARY KEY, id TEXT NOT NULL UNIQUE, user_id TEXT,
+                                     question TEXT NOT NULL, answer TEXT NOT NULL, subject TEXT,
+                                     created_at TEXT NOT NULL, minhash BLOB);
+            CREATE TABLE study_sessions (id TEXT PRIMARY KEY, user_id TEXT, session_name TEXT,
+                                         flashcard_ids TEXT NOT NULL, created_at TEXT);
+            INSERT INTO flashcards (id, user_id, question, answer, created_at)
+            VALUES ('c1', 'user-1', 'Q1', 'A1', '2024'), ('c2', 'user-1', 'Q2', 'A2', '2024');
+            INSERT INTO study_sessions VALUES ('s1', 'user-1', 'Old', '["c2", "gone", "c1"]', '2024');
+        """)
+        conn.close()
+        store = create_store('sqlite', path)
+        assert [card['id'] for card in store.get_study_session_cards('user-1', 's1')[1]] == ['c2', 'c1']
+        assert store.get_user_study_sessions('user-1')[0]['flashcard_ids'] == ['c2', 'c1']
+        create_store('sqlite', path)
+    print("✅ JSON lists moved to the join table")
+
+
+def _write_cards(path, worker):
+    store = create_store('sqlite', path)
+    for i in range(50):
+        store.add_flashcards([{'id': f"w{worker}-{i}", 'user_id': 'shared', 'question': f"Q{i}",
+                               'answer': 'A', 'subject': 'General', 'created_at': f"2024-01-01T00:{i:02d}:00"}])
+
+
+def test_workers_share_one_file():
+    """Separate processes writing at once all land in the same store"""
+    print("\n🧪 Testing shared SQLite file...")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'shared.db')
+        create_store('sqlite', path)
+        context = multiprocessing.get_context('spawn')
+        workers = [context.Process(target=_write_cards, args=(path, worker)) for worker in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        assert all(worker.exitcode == 0 for worker in workers)
+        assert create_store('sqlite', path).counts()['flashcards'] == 200
+    print("✅ 4 workers wrote 200 cards")
+
+
+def main():
+    """Run all tests"""
+    print("🚀 AI Study Buddy - Storage Backend Tests")
+    print("=" * 40)
+
+    tests = [
+        test_users_and_sessions,
+        test_flashcards_pages_search_and_duplicates,
+        test_study_session_cards,
+        test_sqlite_moves_json_card_lists,
+        test_workers_share_one_file
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except Exception as e:
+            print(f"❌ Test failed with exception: {e}")
+
+    print("\n" + "=" * 40)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+    return 0 if passed == len(tests) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())